@@ -11,7 +11,9 @@ from .guideline_fetcher import (
     GuidelineFetcher,
     GuidelineMetadata,
     detect_medical_themes,
+    detect_medical_themes_many,
     fetch_guidelines_for_text,
+    fetch_guidelines_for_texts,
 )
 from .medical_validator import (
     MedicalValidationLayer,
@@ -43,7 +45,9 @@ __all__ = [
     "GuidelineFetcher",
     "GuidelineMetadata",
     "detect_medical_themes",
+    "detect_medical_themes_many",
     "fetch_guidelines_for_text",
+    "fetch_guidelines_for_texts",
     # Validation
     "MedicalValidationLayer",
     "ValidationResult",
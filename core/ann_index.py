@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+MedExamAI ANN Index
+===================
+
+Approximate-Nearest-Neighbour-Index für die RAG-Embedding-Matrix.
+
+Backends:
+- ``ivf``:  Inverted File Index mit sphärischem k-Means (reines NumPy)
+- ``hnsw``: HNSW-Graph über hnswlib (optional, falls installiert)
+
+Der Index liefert nur Kandidaten-Zeilen; das exakte Re-Ranking (Tier-Bonus,
+Filter, Schwellenwert) macht MedicalRAGSystem auf der Matrix. Zeilen, die
+nach dem letzten Build/Sync angehängt wurden, gelten als "pending" und werden
+immer exakt mitbewertet, bis sie per ``sync()`` inkrementell eingefügt sind.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .kb_store import ids_fingerprint
+
+try:
+    import hnswlib  # type: ignore
+    HNSWLIB_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    hnswlib = None  # type: ignore
+    HNSWLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class IVFIndex:
+    """Inverted File Index: Zeilen sind ihrem nächsten k-Means-Zentroid zugeordnet."""
+
+    backend = "ivf"
+
+    def __init__(self, nlist: int = 0, nprobe: int = 16, seed: int = 42, iterations: int = 10):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.iterations = iterations
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.trained_rows = 0
+        self._order: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+        self.ids_fingerprint: Optional[str] = None
+
+    @property
+    def indexed_rows(self) -> int:
+        return int(self.assignments.shape[0])
+
+    def build(self, vectors: np.ndarray) -> None:
+        """Trainiert Zentroide auf (einer Stichprobe von) `vectors` und ordnet alle Zeilen zu."""
+        n = vectors.shape[0]
+        nlist = self.nlist or int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+        rng = np.random.default_rng(self.seed)
+
+        sample_size = min(n, max(nlist * 64, 10_000))
+        sample = np.asarray(vectors[np.sort(rng.choice(n, sample_size, replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.iterations):
+            labels = self._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            if empty.any():  # leere Cluster neu besetzen
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = sums / norms
+
+        self.centroids = centroids.astype(np.float32)
+        self.nlist = nlist
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.trained_rows = n
+        self.sync(vectors)
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, block: int = 65_536) -> np.ndarray:
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], block):
+            labels[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+        return labels
+
+    def sync(self, vectors: np.ndarray) -> int:
+        """Ordnet neue Zeilen (ab indexed_rows) ihren Zentroiden zu. Returns: Anzahl eingefügter Zeilen."""
+        start = self.indexed_rows
+        if vectors.shape[0] <= start:
+            return 0
+        labels = self._nearest(np.asarray(vectors[start:], dtype=np.float32), self.centroids)
+        self.assignments = np.concatenate([self.assignments, labels])
+        self._order = None
+        return int(labels.shape[0])
+
+    def update(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        """Ordnet bereits indizierte, überschriebene Zeilen neu zu."""
+        rows = np.asarray(rows, dtype=np.int64)
+        self.assignments[rows] = self._nearest(np.asarray(vectors[rows], dtype=np.float32), self.centroids)
+        self._order = None
+
+    def _inverted_lists(self):
+        if self._order is None:
+            self._order = np.argsort(self.assignments, kind="stable").astype(np.int64)
+            counts = np.bincount(self.assignments, minlength=self.nlist)
+            self._list_offsets = np.concatenate([[0], np.cumsum(counts)])
+        return self._order, self._list_offsets
+
+    def candidates(self, query: np.ndarray, k: int, n_rows: int) -> np.ndarray:
+        """Kandidaten-Zeilen: Inhalte der `nprobe` nächsten Listen plus alle pending Zeilen."""
+        order, offsets = self._inverted_lists()
+        scores = self.centroids @ query
+        nprobe = min(self.nprobe, self.nlist)
+        probe = np.argpartition(-scores, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        parts = [order[offsets[c]:offsets[c + 1]] for c in probe]
+        if n_rows > self.indexed_rows:
+            parts.append(np.arange(self.indexed_rows, n_rows, dtype=np.int64))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def save(self, base_path: Path, ids: List[str]) -> None:
+        np.savez(
+            str(base_path) + ".npz",
+            centroids=self.centroids,
+            assignments=self.assignments,
+            meta=np.array(json.dumps({
+                "backend": self.backend,
+                "nprobe": self.nprobe,
+                "trained_rows": self.trained_rows,
+                "ids_fingerprint": ids_fingerprint(ids[:self.indexed_rows]),
+            })),
+        )
+
+    @classmethod
+    def load(cls, base_path: Path) -> "IVFIndex":
+        with np.load(str(base_path) + ".npz") as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(nlist=int(data["centroids"].shape[0]), nprobe=meta.get("nprobe", 16))
+            index.centroids = data["centroids"].astype(np.float32)
+            index.assignments = data["assignments"].astype(np.int32)
+        index.trained_rows = meta.get("trained_rows", index.indexed_rows)
+        index.ids_fingerprint = meta.get("ids_fingerprint")
+        return index
+
+
+class HNSWIndex:
+    """HNSW-Graph (hnswlib, inner product auf normalisierten Vektoren)."""
+
+    backend = "hnsw"
+
+    def __init__(self, m: int = 16, ef_construction: int = 200, ef_search: int = 128):
+        if not HNSWLIB_AVAILABLE:
+            raise RuntimeError("hnswlib nicht installiert: pip install hnswlib")
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index = None
+        self.indexed_rows = 0
+        self.trained_rows = 0
+        self.ids_fingerprint: Optional[str] = None
+
+    def build(self, vectors: np.ndarray) -> None:
+        self.index = hnswlib.Index(space="ip", dim=int(vectors.shape[1]))
+        self.index.init_index(
+            max_elements=max(1, vectors.shape[0]), ef_construction=self.ef_construction, M=self.m
+        )
+        self.indexed_rows = 0
+        self.trained_rows = int(vectors.shape[0])
+        self.sync(vectors)
+
+    def sync(self, vectors: np.ndarray) -> int:
+        start = self.indexed_rows
+        n = vectors.shape[0]
+        if n <= start:
+            return 0
+        if n > self.index.get_max_elements():
+            self.index.resize_index(max(n, 2 * self.index.get_max_elements()))
+        self.index.add_items(np.asarray(vectors[start:], dtype=np.float32), np.arange(start, n))
+        self.indexed_rows = n
+        return n - start
+
+    def update(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        """Ersetzt die Vektoren bereits indizierter Zeilen (hnswlib aktualisiert vorhandene Labels)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        self.index.add_items(np.asarray(vectors[rows], dtype=np.float32), rows)
+
+    def candidates(self, query: np.ndarray, k: int, n_rows: int) -> np.ndarray:
+        k = min(k, self.indexed_rows)
+        parts = []
+        if k:
+            self.index.set_ef(max(self.ef_search, k))
+            labels, _ = self.index.knn_query(query.reshape(1, -1), k=k)
+            parts.append(labels[0].astype(np.int64))
+        if n_rows > self.indexed_rows:
+            parts.append(np.arange(self.indexed_rows, n_rows, dtype=np.int64))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def save(self, base_path: Path, ids: List[str]) -> None:
+        self.index.save_index(str(base_path) + ".hnsw")
+        Path(str(base_path) + ".json").write_text(json.dumps({
+            "backend": self.backend,
+            "m": self.m,
+            "ef_construction": self.ef_construction,
+            "ef_search": self.ef_search,
+            "dimension": self.index.dim,
+            "indexed_rows": self.indexed_rows,
+            "trained_rows": self.trained_rows,
+            "ids_fingerprint": ids_fingerprint(ids[:self.indexed_rows]),
+        }), encoding="utf-8")
+
+    @classmethod
+    def load(cls, base_path: Path) -> "HNSWIndex":
+        meta = json.loads(Path(str(base_path) + ".json").read_text(encoding="utf-8"))
+        index = cls(m=meta["m"], ef_construction=meta["ef_construction"], ef_search=meta["ef_search"])
+        index.index = hnswlib.Index(space="ip", dim=meta["dimension"])
+        index.index.load_index(str(base_path) + ".hnsw", max_elements=meta["indexed_rows"])
+        index.indexed_rows = meta["indexed_rows"]
+        index.trained_rows = meta.get("trained_rows", index.indexed_rows)
+        index.ids_fingerprint = meta.get("ids_fingerprint")
+        return index
+
+
+def create_ann_index(backend: str, config) -> Optional[object]:
+    """Erzeugt einen leeren ANN-Index gemäß RAGConfig (None bei backend "none")."""
+    if backend == "auto":
+        backend = "hnsw" if HNSWLIB_AVAILABLE else "ivf"
+    if backend == "ivf":
+        return IVFIndex(nlist=config.ann_nlist, nprobe=config.ann_nprobe)
+    if backend == "hnsw":
+        return HNSWIndex(
+            m=config.ann_hnsw_m,
+            ef_construction=config.ann_hnsw_ef_construction,
+            ef_search=config.ann_hnsw_ef_search,
+        )
+    return None
+
+
+def load_ann_index(base_path: Path, ids: List[str]) -> Optional[object]:
+    """
+    Lädt einen persistierten ANN-Index, sofern er zu den KB-Zeilen passt.
+
+    Returns:
+        Index oder None (nicht vorhanden, hnswlib fehlt, oder IDs passen nicht)
+    """
+    index = None
+    try:
+        if Path(str(base_path) + ".npz").exists():
+            index = IVFIndex.load(base_path)
+        elif Path(str(base_path) + ".hnsw").exists() and HNSWLIB_AVAILABLE:
+            index = HNSWIndex.load(base_path)
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"ANN-Index konnte nicht geladen werden ({base_path}): {e}")
+        return None
+    if index is None:
+        return None
+    if index.indexed_rows > len(ids) or index.ids_fingerprint != ids_fingerprint(ids[:index.indexed_rows]):
+        logger.warning("ANN-Index passt nicht zur Wissensbasis und wird ignoriert (Neuaufbau nötig).")
+        return None
+    return index
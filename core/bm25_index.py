@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+MedExamAI BM25 Index
+====================
+
+Lexikalischer Index (Okapi BM25) für deutschsprachige medizinische Texte.
+
+- Tokenisierung: Kleinschreibung, Umlaut-Faltung (ä -> ae, ß -> ss),
+  Akzente entfernen, deutsche Stoppwörter, leichtes Suffix-Stemming
+- Postings als kompakte NumPy-Arrays (CSR: Term -> Dokumente + Termfrequenzen)
+- Persistenz als einzelne ``.npz``-Datei (atomar geschrieben)
+
+Dokument-IDs sind fortlaufende Zeilennummern (0..n-1), passend zur
+Embedding-Matrix von MedicalRAGSystem bzw. zur Reihenfolge einer Liste.
+Neu hinzugefügte Dokumente werden gepuffert und beim nächsten Suchen in
+einem Schritt in die Postings gemischt.
+"""
+
+import json
+import logging
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BM25_FORMAT_VERSION = 1
+
+_UMLAUT_MAP = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+
+# Längste Suffixe zuerst; Stamm muss mindestens _MIN_STEM Zeichen behalten
+_SUFFIXES = (
+    "ungen", "heiten", "keiten", "innen", "ischen", "ische", "isch",
+    "ung", "heit", "keit", "en", "er", "em", "es", "e", "n", "s",
+)
+_MIN_STEM = 4
+
+
+def _fold(text: str) -> str:
+    """Kleinschreibung, Umlaute ausschreiben, sonstige Akzente entfernen."""
+    text = (text or "").lower().translate(_UMLAUT_MAP)
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+STOPWORDS_DE = frozenset(_fold(w) for w in (
+    "der", "die", "das", "ein", "eine", "einer", "einem", "einen", "eines",
+    "und", "oder", "aber", "sowie", "wie", "was", "welche", "welcher", "welches",
+    "wann", "warum", "wieso", "wo", "mit", "ohne", "bei", "im", "in", "am", "an",
+    "auf", "aus", "für", "von", "vom", "zum", "zur", "zu", "des", "den", "dem",
+    "ist", "sind", "war", "wird", "werden", "kann", "können", "soll", "sollen",
+    "bitte", "u", "ua", "z", "b", "es", "er", "sie", "wir", "ihr", "man", "sich",
+    "nicht", "auch", "als", "nach", "bis", "durch", "über", "unter", "um", "so",
+    "dass", "ob", "wenn", "dann", "noch", "nur", "sehr", "mehr", "hat", "haben",
+))
+
+
+def _stem(token: str) -> str:
+    if token.isdigit():
+        return token
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Zerlegt Text in normalisierte, gestemmte Terme (ohne Stoppwörter)."""
+    return [_stem(t) for t in _TOKEN_RE.findall(_fold(text)) if t not in STOPWORDS_DE]
+
+
+def file_fingerprint(path: "os.PathLike[str] | str") -> str:
+    """Günstiger Fingerprint einer Quelldatei (Größe + mtime) zur Invalidierung persistierter Indizes."""
+    stat = Path(path).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class BM25Index:
+    """
+    Okapi-BM25-Index über fortlaufend nummerierte Dokumente.
+
+    Usage:
+        index = BM25Index()
+        index.add_many(texts)
+        hits = index.search("Therapie Vorhofflimmern", top_k=5)  # [(doc_id, score), ...]
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+        self.source_fingerprint: Optional[str] = None
+        # CSR-Postings: Term t -> _docs/_tfs[_offsets[t]:_offsets[t + 1]] (Dokumente aufsteigend)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._docs = np.zeros(0, dtype=np.int32)
+        self._tfs = np.zeros(0, dtype=np.uint16)
+        self._doc_lengths = np.zeros(0, dtype=np.int32)
+        # Noch nicht eingemischte Dokumente
+        self._pending_terms: List[int] = []
+        self._pending_docs: List[int] = []
+        self._pending_tfs: List[int] = []
+        self._pending_lengths: List[int] = []
+
+    @property
+    def n_docs(self) -> int:
+        return int(self._doc_lengths.shape[0]) + len(self._pending_lengths)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def add(self, text: str) -> int:
+        """Fügt ein Dokument hinzu. Returns: Dokument-ID."""
+        return self.add_tokens(tokenize(text))
+
+    def add_many(self, texts: Iterable[str]) -> int:
+        """Fügt mehrere Dokumente hinzu. Returns: Anzahl hinzugefügter Dokumente."""
+        count = 0
+        for text in texts:
+            self.add(text)
+            count += 1
+        return count
+
+    def add_tokens(self, tokens: List[str]) -> int:
+        doc_id = self.n_docs
+        counts: Dict[int, int] = {}
+        for token in tokens:
+            term_id = self.vocab.setdefault(token, len(self.vocab))
+            counts[term_id] = counts.get(term_id, 0) + 1
+        for term_id, tf in counts.items():
+            self._pending_terms.append(term_id)
+            self._pending_docs.append(doc_id)
+            self._pending_tfs.append(min(tf, 65_535))
+        self._pending_lengths.append(len(tokens))
+        return doc_id
+
+    def _flush(self) -> None:
+        """Mischt gepufferte Dokumente in die CSR-Postings (ein Sortierschritt)."""
+        if not self._pending_lengths:
+            return
+        old_terms = np.repeat(
+            np.arange(len(self._offsets) - 1, dtype=np.int64), np.diff(self._offsets)
+        )
+        terms = np.concatenate([old_terms, np.asarray(self._pending_terms, dtype=np.int64)])
+        docs = np.concatenate([self._docs, np.asarray(self._pending_docs, dtype=np.int32)])
+        tfs = np.concatenate([self._tfs, np.asarray(self._pending_tfs, dtype=np.uint16)])
+
+        # Stabil nach Term: bestehende Postings liegen vor den neuen (höheren) Dokument-IDs
+        order = np.argsort(terms, kind="stable")
+        self._docs = docs[order]
+        self._tfs = tfs[order]
+        counts = np.bincount(terms, minlength=len(self.vocab))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._doc_lengths = np.concatenate(
+            [self._doc_lengths, np.asarray(self._pending_lengths, dtype=np.int32)]
+        )
+        self._pending_terms, self._pending_docs, self._pending_tfs, self._pending_lengths = [], [], [], []
+
+    def score(
+        self,
+        query: str,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Bewertet alle Dokumente, die mindestens einen Query-Term enthalten.
+
+        Args:
+            query: Suchanfrage
+            mask: Optionale bool-Maske über Dokument-IDs (False = ausschließen)
+
+        Returns:
+            (doc_ids, bm25_scores, matched_terms) – nur Dokumente mit Treffern
+        """
+        self._flush()
+        term_ids = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+        n_docs = self.n_docs
+        if not term_ids or not n_docs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int64)
+
+        avgdl = max(float(self._doc_lengths.mean()), 1e-9)
+        doc_parts: List[np.ndarray] = []
+        score_parts: List[np.ndarray] = []
+        for term_id in term_ids:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs = self._docs[start:end]
+            tf = self._tfs[start:end].astype(np.float64)
+            df = end - start
+            idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self._doc_lengths[docs] / avgdl)
+            doc_parts.append(docs)
+            score_parts.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+
+        doc_ids, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        matched = np.bincount(inverse)
+        if mask is not None:
+            keep = mask[doc_ids]
+            doc_ids, scores, matched = doc_ids[keep], scores[keep], matched[keep]
+        return doc_ids.astype(np.int64), scores, matched
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        mask: Optional[np.ndarray] = None,
+        min_matched: int = 1
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k Dokumente nach BM25-Score (absteigend, bei Gleichstand nach Dokument-ID).
+
+        Args:
+            query: Suchanfrage
+            top_k: Anzahl Ergebnisse
+            mask: Optionale bool-Maske über Dokument-IDs
+            min_matched: Mindestanzahl verschiedener Query-Terme im Dokument
+
+        Returns:
+            Liste von (doc_id, score)
+        """
+        doc_ids, scores, matched = self.score(query, mask=mask)
+        if min_matched > 1:
+            keep = matched >= min_matched
+            doc_ids, scores = doc_ids[keep], scores[keep]
+        if doc_ids.size > top_k:
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            doc_ids, scores = doc_ids[part], scores[part]
+        order = np.lexsort((doc_ids, -scores))
+        return [(int(doc_ids[i]), float(scores[i])) for i in order]
+
+    def save(self, path: "os.PathLike[str] | str", source_fingerprint: Optional[str] = None) -> None:
+        """Schreibt den Index atomar als ``.npz`` (Temp-Datei + rename)."""
+        self._flush()
+        if source_fingerprint is not None:
+            self.source_fingerprint = source_fingerprint
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        terms = sorted(self.vocab, key=self.vocab.__getitem__)
+        tmp = path.with_name(path.name + f".tmp-{os.getpid()}")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(terms, dtype=str),
+                offsets=self._offsets,
+                docs=self._docs,
+                tfs=self._tfs,
+                doc_lengths=self._doc_lengths,
+                meta=np.array(json.dumps({
+                    "version": BM25_FORMAT_VERSION,
+                    "k1": self.k1,
+                    "b": self.b,
+                    "source_fingerprint": self.source_fingerprint,
+                })),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: "os.PathLike[str] | str") -> "BM25Index":
+        with np.load(str(path)) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version", 0) > BM25_FORMAT_VERSION:
+                raise ValueError(f"BM25-Formatversion {meta.get('version')} wird nicht unterstützt")
+            index = cls(k1=meta.get("k1", 1.5), b=meta.get("b", 0.75))
+            index.vocab = {str(term): i for i, term in enumerate(data["terms"])}
+            index._offsets = data["offsets"].astype(np.int64)
+            index._docs = data["docs"].astype(np.int32)
+            index._tfs = data["tfs"].astype(np.uint16)
+            index._doc_lengths = data["doc_lengths"].astype(np.int32)
+        index.source_fingerprint = meta.get("source_fingerprint")
+        return index
+
+    @classmethod
+    def load_or_build(
+        cls,
+        path: "os.PathLike[str] | str",
+        source_fingerprint: str,
+        texts: Callable[[], Iterable[str]],
+        **params
+    ) -> "BM25Index":
+        """
+        Lädt einen persistierten Index, sofern er zur Quelle passt; sonst Neuaufbau und Speichern.
+
+        Args:
+            path: Pfad der ``.npz``-Datei
+            source_fingerprint: Fingerprint der Quelle (z.B. file_fingerprint())
+            texts: Liefert die Dokument-Texte in Dokument-ID-Reihenfolge (nur bei Neuaufbau aufgerufen)
+        """
+        path = Path(path)
+        if path.exists():
+            try:
+                index = cls.load(path)
+                if index.source_fingerprint == source_fingerprint:
+                    logger.info(f"BM25-Index geladen: {path} ({index.n_docs} Dokumente)")
+                    return index
+                logger.info(f"BM25-Index veraltet, baue neu: {path}")
+            except Exception as e:  # noqa: BLE001
+                logger.warning(f"BM25-Index konnte nicht geladen werden ({path}): {e}")
+
+        index = cls(**params)
+        index.add_many(texts())
+        try:
+            index.save(path, source_fingerprint=source_fingerprint)
+            logger.info(f"BM25-Index gebaut und gespeichert: {path} ({index.n_docs} Dokumente)")
+        except OSError as e:
+            logger.warning(f"BM25-Index konnte nicht gespeichert werden ({path}): {e}")
+        return index
@@ -18,10 +18,15 @@ Verwendung:
 """
 
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from core.pattern_scanner import KeywordAutomaton
+except ImportError:  # Aufruf als Skript aus core/
+    from pattern_scanner import KeywordAutomaton
 
 
 class MedicalCategory(Enum):
@@ -392,79 +397,146 @@ def detect_icd_codes(text: str) -> List[Tuple[str, str]]:
     return results
 
 
-def detect_drug_patterns(text: str) -> Optional[str]:
+# Medikamentenklassen als Kategorie-Hinweis (erste passende Gruppe gewinnt)
+DRUG_CLASS_HINTS: List[Tuple[str, List[str]]] = [
+    # Kardiovaskuläre Medikamente
+    ("Innere Medizin", ["betablocker", "ace-hemmer", "at1-blocker", "diuretikum",
+                        "amiodaron", "digitalis", "nitrat", "antikoagul"]),
+    # Psychiatrische Medikamente
+    ("Psychiatrie", ["antidepressiv", "neuroleptik", "ssri", "lithium",
+                     "benzodiazepin", "antipsychoti"]),
+    # Notfallmedikamente
+    ("Notfallmedizin", ["adrenalin", "noradrenalin", "atropin", "naloxon",
+                        "amiodaron bei reanimation"]),
+    # Anästhetika
+    ("Anästhesie", ["propofol", "sevofluran", "desfluran", "isofluran",
+                    "rocuronium", "succinylcholin", "remifentanil"]),
+]
+
+# Klinischer Kontext (Bonus ab zwei Treffern)
+EMERGENCY_CONTEXT: List[str] = [
+    "sofort", "notfall", "akut", "lebensbedrohlich", "bewusstlos",
+    "rettungsdienst", "schockraum", "intensivstation"
+]
+SURGICAL_CONTEXT: List[str] = [
+    "op-indikation", "operativ", "laparoskop", "minimalinvasiv",
+    "postoperativ", "präoperativ", "narkose"
+]
+GERIATRIC_CONTEXT: List[str] = ["geriatrisch", "pflegeheim", "multimorbid"]
+_CONTEXT_TERMS: List[str] = ["ambulant", "hausarzt", "monate", "säugling"]
+
+# Pädiatrischer Kontext (Altersangaben)
+PAEDIATRIC_PATTERNS = [
+    re.compile(p) for p in (
+        r'\b(\d{1,2})\s*(monate?|monat)\s*alt',
+        r'\b(\d{1,2})\s*(jahre?|jährig)',
+        r'säugling', r'kleinkind', r'schulkind', r'jugendlich'
+    )
+]
+
+
+# Keyword-Index: ein Aho-Corasick-Automat über alle festen Keyword-Listen,
+# wird beim ersten Gebrauch und nach Änderungen an den Listen (neu) gebaut
+_KEYWORD_INDEX: Optional[Tuple[tuple, KeywordAutomaton, Dict[str, List[Tuple[str, int]]]]] = None
+
+
+def _keyword_signature() -> tuple:
+    return (
+        tuple((kategorie, len(keywords)) for kategorie, keywords in CATEGORY_KEYWORDS.items()),
+        len(EXCLUSIVE_PHRASES),
+        tuple(len(keywords) for keywords in NEGATIVE_KEYWORDS.values()),
+    )
+
+
+def _keyword_index() -> Tuple[KeywordAutomaton, Dict[str, List[Tuple[str, int]]]]:
     """
-    Erkennt Medikamentenmuster und gibt Kategorie-Hinweise.
+    Returns:
+        (Automat, Keyword -> [(Kategorie, Position im Kategorie-Dict)])
     """
-    text_lower = text.lower()
+    global _KEYWORD_INDEX
+    signature = _keyword_signature()
+    if _KEYWORD_INDEX is None or _KEYWORD_INDEX[0] != signature:
+        automaton = KeywordAutomaton()
+        owners: Dict[str, List[Tuple[str, int]]] = {}
+        for kategorie, keywords in CATEGORY_KEYWORDS.items():
+            for position, keyword in enumerate(keywords):
+                automaton.add(keyword)
+                owners.setdefault(keyword, []).append((kategorie, position))
+        for phrase in EXCLUSIVE_PHRASES:
+            automaton.add(phrase)
+        for neg_keywords in NEGATIVE_KEYWORDS.values():
+            for neg_kw in neg_keywords:
+                automaton.add(neg_kw)
+        for _, drugs in DRUG_CLASS_HINTS:
+            for drug in drugs:
+                automaton.add(drug)
+        for keyword in EMERGENCY_CONTEXT + SURGICAL_CONTEXT + GERIATRIC_CONTEXT + _CONTEXT_TERMS:
+            automaton.add(keyword)
+        automaton.build()
+        _KEYWORD_INDEX = (signature, automaton, owners)
+    return _KEYWORD_INDEX[1], _KEYWORD_INDEX[2]
+
+
+def find_keywords(text_lower: str) -> Dict[str, bool]:
+    """
+    Alle bekannten Keywords im (kleingeschriebenen) Text in einem Durchgang.
 
-    # Kardiovaskuläre Medikamente
-    cardio_drugs = ["betablocker", "ace-hemmer", "at1-blocker", "diuretikum",
-                    "amiodaron", "digitalis", "nitrat", "antikoagul"]
-    if any(d in text_lower for d in cardio_drugs):
-        return "Innere Medizin"
+    Returns:
+        Dict keyword -> True, wenn ein Vorkommen auf Wortgrenzen liegt
+    """
+    automaton, _ = _keyword_index()
+    return automaton.scan(text_lower)
 
-    # Psychiatrische Medikamente
-    psych_drugs = ["antidepressiv", "neuroleptik", "ssri", "lithium",
-                   "benzodiazepin", "antipsychoti"]
-    if any(d in text_lower for d in psych_drugs):
-        return "Psychiatrie"
 
-    # Notfallmedikamente
-    emergency_drugs = ["adrenalin", "noradrenalin", "atropin", "naloxon",
-                       "amiodaron bei reanimation"]
-    if any(d in text_lower for d in emergency_drugs):
-        return "Notfallmedizin"
+def detect_drug_patterns(text: str, hits: Optional[Dict[str, bool]] = None) -> Optional[str]:
+    """
+    Erkennt Medikamentenmuster und gibt Kategorie-Hinweise.
 
-    # Anästhetika
-    anaesthesia_drugs = ["propofol", "sevofluran", "desfluran", "isofluran",
-                         "rocuronium", "succinylcholin", "remifentanil"]
-    if any(d in text_lower for d in anaesthesia_drugs):
-        return "Anästhesie"
+    Args:
+        hits: Optional bereits berechnetes Ergebnis von find_keywords(text.lower())
+    """
+    if hits is None:
+        hits = find_keywords(text.lower())
+
+    for kategorie, drugs in DRUG_CLASS_HINTS:
+        if any(d in hits for d in drugs):
+            return kategorie
 
     return None
 
 
-def detect_clinical_context(text: str) -> Dict[str, float]:
+def detect_clinical_context(text: str, hits: Optional[Dict[str, bool]] = None) -> Dict[str, float]:
     """
     Erkennt klinischen Kontext für bessere Kategorisierung.
 
+    Args:
+        hits: Optional bereits berechnetes Ergebnis von find_keywords(text.lower())
+
     Returns:
         Dict mit Kontext-Hinweisen und Gewichtungen
     """
     text_lower = text.lower()
+    if hits is None:
+        hits = find_keywords(text_lower)
     context = {}
 
     # Notfall-Kontext
-    emergency_context = [
-        "sofort", "notfall", "akut", "lebensbedrohlich", "bewusstlos",
-        "rettungsdienst", "schockraum", "intensivstation"
-    ]
-    if sum(1 for kw in emergency_context if kw in text_lower) >= 2:
+    if sum(1 for kw in EMERGENCY_CONTEXT if kw in hits) >= 2:
         context["Notfallmedizin"] = 3.0
 
     # Operativer Kontext
-    surgical_context = [
-        "op-indikation", "operativ", "laparoskop", "minimalinvasiv",
-        "postoperativ", "präoperativ", "narkose"
-    ]
-    if sum(1 for kw in surgical_context if kw in text_lower) >= 2:
+    if sum(1 for kw in SURGICAL_CONTEXT if kw in hits) >= 2:
         context["Chirurgie"] = 2.0
 
     # Ambulanter vs. stationärer Kontext
-    if "ambulant" in text_lower and "hausarzt" in text_lower:
+    if "ambulant" in hits and "hausarzt" in hits:
         context["Allgemeinmedizin"] = 2.0
 
     # Pädiatrischer Kontext (Altersangaben)
-    paed_patterns = [
-        r'\b(\d{1,2})\s*(monate?|monat)\s*alt',
-        r'\b(\d{1,2})\s*(jahre?|jährig)',
-        r'säugling', r'kleinkind', r'schulkind', r'jugendlich'
-    ]
-    for pattern in paed_patterns:
-        match = re.search(pattern, text_lower)
+    for pattern in PAEDIATRIC_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
-            if "monate" in text_lower or "säugling" in text_lower:
+            if "monate" in hits or "säugling" in hits:
                 context["Pädiatrie"] = 4.0
             elif match.groups():
                 try:
@@ -475,7 +547,7 @@ def detect_clinical_context(text: str) -> Dict[str, float]:
                     pass
 
     # Geriatrischer Kontext
-    if any(kw in text_lower for kw in ["geriatrisch", "pflegeheim", "multimorbid"]):
+    if any(kw in hits for kw in GERIATRIC_CONTEXT):
         context["Innere Medizin"] = 1.5
 
     return context
@@ -501,29 +573,34 @@ def heuristic_category_analysis(text: str) -> Tuple[str, str, float, Dict[str, f
     """
     text_lower = text.lower()
 
+    # Ein Durchgang über den Text liefert alle Keyword-Treffer
+    automaton, owners = _keyword_index()
+    hits = automaton.scan(text_lower)
+
     # SCHRITT 1: Exklusive Phrasen prüfen (höchste Priorität)
     for phrase, kategorie in EXCLUSIVE_PHRASES.items():
-        if phrase in text_lower:
+        if phrase in hits:
             return phrase, kategorie, 1.0, {kategorie: 10.0}, {kategorie: [phrase]}
 
     # SCHRITT 2: Berechne Basis-Score für jede Kategorie
     scores: Dict[str, float] = {}
     matched_keywords: Dict[str, List[str]] = {}
 
+    found_by_category: Dict[str, List[Tuple[int, str]]] = {}
+    for keyword, on_word_boundary in hits.items():
+        # Prüfe auf exakte Wortgrenzen für kurze Keywords
+        if len(keyword) <= 4 and not on_word_boundary:
+            continue
+        for kategorie, position in owners.get(keyword, ()):
+            found_by_category.setdefault(kategorie, []).append((position, keyword))
+
     for kategorie, keywords in CATEGORY_KEYWORDS.items():
+        if kategorie not in found_by_category:
+            continue
         score = 0.0
-        found_keywords = []
-        for keyword, weight in keywords.items():
-            if keyword in text_lower:
-                # Prüfe auf exakte Wortgrenzen für kurze Keywords
-                if len(keyword) <= 4:
-                    pattern = r'\b' + re.escape(keyword) + r'\b'
-                    if re.search(pattern, text_lower):
-                        score += weight
-                        found_keywords.append(keyword)
-                else:
-                    score += weight
-                    found_keywords.append(keyword)
+        found_keywords = [keyword for _, keyword in sorted(found_by_category[kategorie])]
+        for keyword in found_keywords:
+            score += keywords[keyword]
         if score > 0:
             scores[kategorie] = score
             matched_keywords[kategorie] = found_keywords
@@ -537,12 +614,12 @@ def heuristic_category_analysis(text: str) -> Tuple[str, str, float, Dict[str, f
         matched_keywords[kategorie].append(f"ICD:{code}")
 
     # SCHRITT 4: Medikamenten-Pattern Bonus
-    drug_category = detect_drug_patterns(text)
+    drug_category = detect_drug_patterns(text, hits)
     if drug_category:
         scores[drug_category] = scores.get(drug_category, 0) + 1.5
 
     # SCHRITT 5: Klinischer Kontext Bonus
-    context_scores = detect_clinical_context(text)
+    context_scores = detect_clinical_context(text, hits)
     for kategorie, bonus in context_scores.items():
         scores[kategorie] = scores.get(kategorie, 0) + bonus
 
@@ -550,7 +627,7 @@ def heuristic_category_analysis(text: str) -> Tuple[str, str, float, Dict[str, f
     for kategorie, neg_keywords in NEGATIVE_KEYWORDS.items():
         if kategorie in scores:
             for neg_kw in neg_keywords:
-                if neg_kw in text_lower:
+                if neg_kw in hits:
                     scores[kategorie] = scores[kategorie] * 0.5  # Halbiere Score
                     break
 
@@ -654,6 +731,47 @@ def classify_medical_content(
     )
 
 
+def classify_many(
+    texts: Sequence[str],
+    source_files: Optional[Sequence[str]] = None,
+    min_confidence: float = 0.0
+) -> List[ClassificationResult]:
+    """
+    Klassifiziert viele Texte (z.B. ein ganzes Anki-Deck) in einem Aufruf.
+
+    Der Keyword-Automat wird nur einmal gebaut, identische (Text, Quelle)-Paare
+    werden nur einmal analysiert.
+
+    Args:
+        texts: Zu klassifizierende Texte
+        source_files: Optional Quelldateinamen (gleiche Länge wie texts)
+        min_confidence: Wie bei classify_medical_content
+
+    Returns:
+        Liste von ClassificationResult in Eingabereihenfolge
+    """
+    if source_files is not None and len(source_files) != len(texts):
+        raise ValueError("source_files muss gleich lang wie texts sein")
+
+    _keyword_index()
+    seen: Dict[Tuple[str, str], ClassificationResult] = {}
+    results: List[ClassificationResult] = []
+    for i, text in enumerate(texts):
+        key = (text, source_files[i] if source_files is not None else "")
+        cached = seen.get(key)
+        if cached is not None:
+            results.append(replace(
+                cached,
+                all_scores=dict(cached.all_scores),
+                matched_keywords={k: list(v) for k, v in cached.matched_keywords.items()},
+            ))
+            continue
+        result = classify_medical_content(key[0], key[1], min_confidence)
+        seen[key] = result
+        results.append(result)
+    return results
+
+
 def get_all_categories() -> List[str]:
     """Gibt alle verfügbaren Kategorien zurück."""
     return list(CATEGORY_KEYWORDS.keys()) + ["Allgemeinmedizin"]
@@ -0,0 +1,280 @@
+"""Append-only checkpoint journal (JSONL) for resumable batch runs."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Key of the run-state record (never returned as an item record)
+STATE_KEY = "__state__"
+# Internal key prefix for records without a key field (kept, but not resumable by key)
+UNKEYED_PREFIX = "__unkeyed__:"
+
+
+class CheckpointJournal:
+    """
+    Journal of per-item records, one JSON line each, keyed by one record field.
+
+    Every processed item costs one appended line, so a run writes O(n) bytes
+    in total. Resuming reads the file once into a key -> record dict (O(1)
+    lookups). A later record with the same key replaces the earlier one.
+
+    - Every append is flushed to the OS, so it survives a crash of the process.
+      ``fsync`` is batched: every ``sync_every`` records or ``sync_interval`` seconds.
+    - A torn last line (crash during a write) is cut off on open.
+    - Superseded lines (rewritten keys, state updates) are dropped by
+      compaction. The journal is rewritten atomically once it holds more
+      than ``compact_factor`` lines per live record.
+
+    Files written line by line with ``json.dumps(record)`` (the existing
+    ``*_checkpoint.jsonl`` files) are valid journals. Records without the key
+    field are kept (logged, returned by ``records()``), but cannot be looked up.
+
+    Usage:
+        with CheckpointJournal("_OUTPUT/run_checkpoint.jsonl", key_field="id") as journal:
+            for item in items:
+                if item["id"] in journal:
+                    continue
+                journal.append({"id": item["id"], "verdict": ...})
+            results = journal.records()
+    """
+
+    def __init__(
+        self,
+        path: "os.PathLike[str] | str",
+        key_field: str = "id",
+        sync_every: int = 100,
+        sync_interval: Optional[float] = 5.0,
+        compact_factor: float = 2.0,
+        compact_min_lines: int = 1000,
+        readonly: bool = False,
+    ) -> None:
+        """
+        Args:
+            path: Journal file (created on first append).
+            key_field: Record field holding the item key (compared as string).
+            sync_every: fsync after this many appends (1 = every append, 0 = only on sync/close).
+            sync_interval: fsync at the latest after this many seconds (None = no time limit).
+            compact_factor: Compact once lines > factor * live records.
+            compact_min_lines: Never compact below this many lines.
+            readonly: Only read (no tail repair, no writes), e.g. to inspect a running job.
+        """
+        self.path = Path(path)
+        self.key_field = key_field
+        self.sync_every = max(0, int(sync_every))
+        self.sync_interval = sync_interval
+        self.compact_factor = compact_factor
+        self.compact_min_lines = compact_min_lines
+        self.readonly = readonly
+        self._lock = threading.RLock()
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._state: Optional[Dict[str, Any]] = None
+        self._unkeyed = 0
+        self._lines = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = None
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        offset = 0
+        valid_end = 0
+        missing_newline = False
+        with open(self.path, "rb") as f:
+            for raw in f:
+                start, offset = offset, offset + len(raw)
+                complete = raw.endswith(b"\n")
+                if not raw.strip():
+                    valid_end = offset
+                    continue
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    record = None
+                if record is None and not complete:
+                    # Torn write at the end: dropped, appends continue after the last good line
+                    logger.warning("Checkpoint %s: incomplete last line dropped", self.path)
+                    break
+                valid_end = offset
+                missing_newline = not complete
+                self._lines += 1
+                if isinstance(record, dict):
+                    self._remember(record)
+                else:
+                    logger.warning("Checkpoint %s: unreadable line at byte %d skipped", self.path, start)
+        if self.readonly:
+            return
+        if valid_end < self.path.stat().st_size:
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+        if missing_newline:
+            with open(self.path, "ab") as f:
+                f.write(b"\n")
+
+    def _remember(self, record: Dict[str, Any]) -> None:
+        if record.get(self.key_field) is None:
+            self._records[f"{UNKEYED_PREFIX}{self._unkeyed}"] = record
+            self._unkeyed += 1
+            return
+        key = str(record[self.key_field])
+        if key == STATE_KEY:
+            self._state = {k: v for k, v in record.items() if k != self.key_field}
+        else:
+            self._records[key] = record
+
+    def _check_writable(self) -> None:
+        if self.readonly:
+            raise PermissionError(f"Checkpoint {self.path} is opened read-only")
+
+    def _handle(self):
+        self._check_writable()
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "ab")
+        return self._file
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        f = self._handle()
+        f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        f.flush()
+        self._remember(record)
+        self._lines += 1
+        self._unsynced += 1
+        due_count = self.sync_every and self._unsynced >= self.sync_every
+        due_time = self.sync_interval is not None and time.monotonic() - self._last_sync >= self.sync_interval
+        if due_count or due_time:
+            self._sync()
+        self._maybe_compact()
+
+    # --- Reading ---
+
+    def __contains__(self, key: Any) -> bool:
+        return str(key) in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self._records.get(str(key), default)
+
+    def keys(self) -> List[str]:
+        return [key for key in self._records if not key.startswith(UNKEYED_PREFIX)]
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Latest record per key, in order of each key's first append."""
+        with self._lock:
+            return list(self._records.values())
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        """Run state last written with ``update_state`` (empty dict if none)."""
+        return dict(self._state or {})
+
+    # --- Writing ---
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Appends one item record; replaces an earlier record with the same key.
+
+        A record without the key field is logged and kept as is, so a batch run
+        does not abort on one malformed item (it is just not skipped on resume).
+        """
+        if record.get(self.key_field) is None:
+            logger.warning(
+                "Checkpoint %s: record without '%s' kept, but cannot be resumed by key",
+                self.path,
+                self.key_field,
+            )
+        elif str(record[self.key_field]) == STATE_KEY:
+            raise ValueError(f"'{STATE_KEY}' is reserved for the run state")
+        with self._lock:
+            self._write(record)
+
+    def update_state(self, **fields: Any) -> None:
+        """Merges `fields` into the run state (one small line, not a full rewrite)."""
+        with self._lock:
+            self._write({self.key_field: STATE_KEY, **(self._state or {}), **fields})
+
+    def _sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self) -> None:
+        """Forces buffered appends to disk."""
+        with self._lock:
+            self._sync()
+
+    def _maybe_compact(self) -> None:
+        live = len(self._records) + (self._state is not None)
+        if self._lines >= self.compact_min_lines and self._lines > self.compact_factor * max(live, 1):
+            self._compact()
+
+    def compact(self) -> None:
+        """Rewrites the journal with only the live records and the state."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._check_writable()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + f".tmp-{os.getpid()}")
+        records = list(self._records.values())
+        if self._state is not None:
+            records.append({self.key_field: STATE_KEY, **self._state})
+        try:
+            with open(tmp, "wb") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        logger.debug("Checkpoint %s compacted: %d -> %d lines", self.path, self._lines, len(records))
+        self._lines = len(records)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def clear(self) -> None:
+        """Deletes the journal (fresh run)."""
+        self._check_writable()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.path.unlink(missing_ok=True)
+            self._records.clear()
+            self._state = None
+            self._unkeyed = 0
+            self._lines = 0
+            self._unsynced = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "CheckpointJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
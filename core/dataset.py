@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+"""
+MedExamAI Dataset Layer
+=======================
+
+Streaming-Zugriff auf Frage/Antwort-Datensätze (``evidenz_antworten*``).
+
+Kanonische Form ist JSONL (ein Item pro Zeile):
+
+- ``<name>.jsonl``           Items, UTF-8, eine JSON-Zeile pro Item
+- ``<name>.jsonl.meta.json`` Top-Level-Felder neben ``items`` (nur bei Objekt-Form)
+- ``<name>.jsonl.idx.npz``   Byte-Offsets pro Zeile + Index Fragen-Hash -> Zeilen
+
+Die bisherigen JSON-Formen (Liste ``[...]`` oder Objekt ``{..., "items": [...]}``)
+werden ebenfalls gestreamt (inkrementeller Decoder, ein Item zur Zeit im
+Speicher) und lassen sich per ``convert_to_jsonl`` überführen.
+``write_items`` schreibt beide Formen; die JSON-Ausgabe ist byte-identisch zu
+``json.dump(payload, f, ensure_ascii=False, indent=2)``.
+
+Usage:
+    for item in iter_items("_OUTPUT/evidenz_antworten.json", fields=("frage", "antwort")):
+        ...
+    dataset = JsonlDataset("_OUTPUT/evidenz_antworten.jsonl")
+    item = dataset.get("Was ist eine Sepsis?")
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+META_SUFFIX = ".meta.json"
+INDEX_SUFFIX = ".idx.npz"
+QUESTION_FIELD = "frage"
+
+# Lesegröße des inkrementellen JSON-Decoders (Zeichen)
+READ_SIZE = 1 << 20
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = re.compile(r"[0-9+\-.eE]*")
+
+
+def question_key(frage: Any) -> str:
+    """Normalisierte Frage (Whitespace zusammengefasst, lowercase) als Lookup-Schlüssel."""
+    return " ".join(str(frage or "").split()).lower()
+
+
+def question_hash(frage: Any) -> int:
+    """64-Bit-Hash von ``question_key(frage)`` (Schlüssel des Offset-Index)."""
+    digest = hashlib.blake2b(question_key(frage).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def is_jsonl(path: "os.PathLike[str] | str") -> bool:
+    return Path(path).suffix.lower() in JSONL_SUFFIXES
+
+
+def resolve_dataset(path: "os.PathLike[str] | str") -> Path:
+    """
+    JSONL zuerst: Für ``x.json`` wird ``x.jsonl`` geliefert, sofern vorhanden
+    und nicht älter als die JSON-Datei; sonst der Pfad selbst.
+    """
+    path = Path(path)
+    if is_jsonl(path):
+        return path
+    jsonl = path.with_suffix(".jsonl")
+    if jsonl.is_file() and (not path.exists() or jsonl.stat().st_mtime_ns >= path.stat().st_mtime_ns):
+        return jsonl
+    return path
+
+
+def project(item: Any, fields: Optional[Sequence[str]]) -> Any:
+    """Reduziert ein Item auf `fields` (fehlende Felder bleiben weg); Nicht-Dicts unverändert."""
+    if fields is None or not isinstance(item, dict):
+        return item
+    return {k: item[k] for k in fields if k in item}
+
+
+class _JsonReader:
+    """Inkrementeller Decoder für eine Text-Datei (liest blockweise, dekodiert Wert für Wert)."""
+
+    def __init__(self, f: TextIO):
+        self._file = f
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(READ_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Nächstes Nicht-Whitespace-Zeichen ('' am Dateiende)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON: '{char}' erwartet, '{found or 'EOF'}' gefunden")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue  # Wert reicht über das Pufferende hinaus
+                raise
+            # Eine Zahl am Pufferende könnte im nächsten Block weitergehen ("-2." + "5e10")
+            if (
+                isinstance(obj, (int, float))
+                and _NUMBER_CHARS.match(self._buf, end).end() == len(self._buf)
+                and self._fill()
+            ):
+                continue
+            self._pos = end
+            return obj
+
+    def iter_array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == "]":
+                self._pos += 1
+                return
+            self.expect(",")
+
+
+class ItemStream:
+    """
+    Einmal iterierbarer Item-Strom einer Datensatz-Datei (JSONL, Liste oder ``items``-Objekt).
+
+    Attributes:
+        shape: "jsonl", "list" oder "object"
+        meta: Top-Level-Felder neben ``items`` (None bei Listen-Form). Bei
+            JSON-Objekten erst nach vollständiger Iteration komplett, falls
+            Felder hinter ``items`` stehen.
+
+    Usage:
+        with open_items(path) as items:
+            for item in items:
+                ...
+    """
+
+    def __init__(self, path: "os.PathLike[str] | str", fields: Optional[Sequence[str]] = None):
+        self.path = Path(path)
+        self.fields = tuple(fields) if fields is not None else None
+        self.meta: Optional[Dict[str, Any]] = None
+        self._file = open(self.path, "r", encoding="utf-8")
+        self._reader: Optional[_JsonReader] = None
+        if is_jsonl(self.path):
+            self.shape = "jsonl"
+            self.meta = read_meta(self.path)
+            return
+        self._reader = _JsonReader(self._file)
+        first = self._reader.peek()
+        if first == "[":
+            self.shape = "list"
+        elif first == "{":
+            self.shape = "object"
+            self.meta = {}
+        else:
+            self._file.close()
+            raise ValueError(f"{self.path.name}: JSON muss Liste oder Objekt mit `items` sein")
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            if self.shape == "jsonl":
+                for line in self._file:
+                    if line.strip():
+                        yield project(json.loads(line), self.fields)
+            elif self.shape == "list":
+                for item in self._reader.iter_array():
+                    yield project(item, self.fields)
+            else:
+                yield from self._iter_object()
+        finally:
+            self.close()
+
+    def _iter_object(self) -> Iterator[Any]:
+        reader = self._reader
+        reader.expect("{")
+        found_items = False
+        if reader.peek() == "}":
+            reader.expect("}")
+        else:
+            while True:
+                key = reader.value()
+                reader.expect(":")
+                if key == "items" and reader.peek() == "[":
+                    found_items = True
+                    for item in reader.iter_array():
+                        yield project(item, self.fields)
+                else:
+                    self.meta[key] = reader.value()
+                if reader.peek() == "}":
+                    reader.expect("}")
+                    break
+                reader.expect(",")
+        if not found_items:
+            raise ValueError(f"{self.path.name}: JSON muss Liste oder Objekt mit `items` sein")
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ItemStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def open_items(path: "os.PathLike[str] | str", fields: Optional[Sequence[str]] = None) -> ItemStream:
+    """Öffnet einen Item-Strom (Form wird sofort erkannt, Items erst beim Iterieren gelesen)."""
+    return ItemStream(path, fields)
+
+
+def iter_items(path: "os.PathLike[str] | str", fields: Optional[Sequence[str]] = None) -> Iterator[Any]:
+    """
+    Streamt die Items einer Datensatz-Datei in Dateireihenfolge.
+
+    Args:
+        path: ``.jsonl`` oder JSON (Liste bzw. Objekt mit ``items``)
+        fields: Nur diese Felder je Item behalten (None = alle)
+    """
+    yield from ItemStream(path, fields)
+
+
+def load_items(
+    path: "os.PathLike[str] | str",
+    fields: Optional[Sequence[str]] = None,
+) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+    """Lädt alle (ggf. projizierten) Items plus Top-Level-Meta (None bei Listen-Form)."""
+    stream = ItemStream(path, fields)
+    items = list(stream)
+    return items, stream.meta
+
+
+def read_meta(path: "os.PathLike[str] | str") -> Optional[Dict[str, Any]]:
+    """Top-Level-Felder neben ``items`` (JSONL: Sidecar ``.meta.json``); None bei Listen-Form."""
+    path = Path(path)
+    if is_jsonl(path):
+        meta_path = path.with_name(path.name + META_SUFFIX)
+        if not meta_path.is_file():
+            return None
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    stream = ItemStream(path, fields=())
+    for _ in stream:
+        pass
+    return stream.meta
+
+
+def count_items(path: "os.PathLike[str] | str") -> int:
+    """Anzahl Items (JSONL: aus dem Offset-Index, sonst per Streaming)."""
+    if is_jsonl(path):
+        return len(JsonlDataset(path))
+    return sum(1 for _ in iter_items(path, fields=()))
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _fingerprint(path: Path) -> str:
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _save_index(path: Path, offsets: Sequence[int], hashes: Sequence[int]) -> None:
+    """Schreibt den Offset-Index zu `path` atomar (Temp-Datei + rename)."""
+    hashes_arr = np.asarray(hashes, dtype=np.uint64)
+    order = np.argsort(hashes_arr, kind="stable")
+    index_path = _index_path(path)
+    tmp = index_path.with_name(index_path.name + f".tmp-{os.getpid()}")
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            offsets=np.asarray(offsets, dtype=np.int64),
+            hashes=hashes_arr[order],
+            rows=order.astype(np.int64),
+            meta=np.array(json.dumps({
+                "version": INDEX_FORMAT_VERSION,
+                "source_fingerprint": _fingerprint(path),
+            })),
+        )
+    os.replace(tmp, index_path)
+
+
+def build_index(path: "os.PathLike[str] | str") -> Path:
+    """Baut den Offset-Index einer JSONL-Datei (ein Streaming-Durchlauf)."""
+    path = Path(path)
+    offsets: List[int] = []
+    hashes: List[int] = []
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                offsets.append(offset)
+                hashes.append(question_hash(item.get(QUESTION_FIELD) if isinstance(item, dict) else None))
+            offset += len(line)
+    _save_index(path, offsets, hashes)
+    logger.info(f"Dataset-Index gebaut: {_index_path(path).name} ({len(offsets)} Items)")
+    return _index_path(path)
+
+
+class JsonlWriter:
+    """
+    Schreibt Items als JSONL (atomar: Temp-Datei, erst bei ``close`` umbenannt)
+    und legt dabei Offset-Index und ggf. Meta-Sidecar an.
+
+    Usage:
+        with JsonlWriter("_OUTPUT/evidenz_antworten.jsonl") as writer:
+            for item in items:
+                writer.write(item)
+    """
+
+    def __init__(
+        self,
+        path: "os.PathLike[str] | str",
+        meta: Optional[Dict[str, Any]] = None,
+        index: bool = True,
+    ):
+        self.path = Path(path)
+        self.meta = meta
+        self.index = index
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.path.with_name(self.path.name + f".tmp-{os.getpid()}")
+        self._file = open(self._tmp, "wb")
+        self._offsets: List[int] = []
+        self._hashes: List[int] = []
+        self._pos = 0
+
+    def write(self, item: Any) -> None:
+        line = json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n"
+        if self.index:
+            self._offsets.append(self._pos)
+            self._hashes.append(question_hash(item.get(QUESTION_FIELD) if isinstance(item, dict) else None))
+        self._file.write(line)
+        self._pos += len(line)
+        self.count += 1
+
+    def write_many(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.write(item)
+
+    def close(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp, self.path)
+        meta_path = self.path.with_name(self.path.name + META_SUFFIX)
+        if self.meta is not None:
+            meta_path.write_text(json.dumps(self.meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        else:
+            meta_path.unlink(missing_ok=True)
+        if self.index:
+            _save_index(self.path, self._offsets, self._hashes)
+        else:
+            _index_path(self.path).unlink(missing_ok=True)
+
+    def abort(self) -> None:
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Bisherige Datei bleibt unverändert
+            self.abort()
+
+
+def write_items(
+    path: "os.PathLike[str] | str",
+    items: Iterable[Any],
+    meta: Optional[Dict[str, Any]] = None,
+    indent: int = 2,
+) -> int:
+    """
+    Schreibt Items gestreamt und atomar; Format nach Endung.
+
+    - ``.jsonl``: JSONL + Index (+ Meta-Sidecar, falls `meta` gesetzt)
+    - sonst JSON: Liste, bzw. Objekt ``{**meta, "items": [...]}`` wenn `meta`
+      gesetzt ist (Ausgabe wie ``json.dump(..., ensure_ascii=False, indent=indent)``)
+
+    Returns:
+        Anzahl geschriebener Items
+    """
+    path = Path(path)
+    if is_jsonl(path):
+        with JsonlWriter(path, meta=meta) as writer:
+            writer.write_many(items)
+        return writer.count
+
+    def dump(value: Any, prefix: str) -> str:
+        # Verschachtelte Zeilen um die Tiefe des Containers einrücken
+        return json.dumps(value, ensure_ascii=False, indent=indent).replace("\n", "\n" + prefix)
+
+    pad = " " * indent
+    outer = pad if meta is not None else ""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".tmp-{os.getpid()}")
+    count = 0
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            if meta is not None:
+                f.write("{")
+                for key, value in meta.items():
+                    if key != "items":
+                        f.write(f"\n{pad}{json.dumps(str(key), ensure_ascii=False)}: {dump(value, pad)},")
+                f.write(f'\n{pad}"items": ')
+            f.write("[")
+            for item in items:
+                f.write(",\n" if count else "\n")
+                f.write(outer + pad + dump(item, outer + pad))
+                count += 1
+            f.write(f"\n{outer}]" if count else "]")
+            if meta is not None:
+                f.write("\n}")
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return count
+
+
+def convert_to_jsonl(
+    src: "os.PathLike[str] | str",
+    dst: Optional["os.PathLike[str] | str"] = None,
+) -> Path:
+    """
+    Konvertiert eine JSON-Datensatzdatei (Liste oder ``items``-Objekt) gestreamt nach JSONL.
+
+    Args:
+        src: Quelle (JSON)
+        dst: Ziel (Standard: Quelle mit Endung ``.jsonl``)
+    """
+    src = Path(src)
+    dst = Path(dst) if dst is not None else src.with_suffix(".jsonl")
+    stream = ItemStream(src)
+    with JsonlWriter(dst) as writer:
+        writer.write_many(stream)
+        # Felder hinter `items` sind erst nach dem Streamen bekannt
+        writer.meta = stream.meta
+    logger.info(f"Datensatz konvertiert: {src.name} -> {dst.name} ({writer.count} Items)")
+    return dst
+
+
+class JsonlDataset:
+    """
+    Read-only Random Access auf eine JSONL-Datensatzdatei über den Offset-Index.
+
+    Der Index wird bei Bedarf (fehlend oder veraltet) in einem
+    Streaming-Durchlauf neu gebaut; Items werden einzeln per ``seek`` gelesen.
+    """
+
+    def __init__(self, path: "os.PathLike[str] | str"):
+        self.path = Path(path)
+        self._offsets: Optional[np.ndarray] = None
+        self._hashes: Optional[np.ndarray] = None
+        self._rows: Optional[np.ndarray] = None
+
+    def _load_index(self) -> None:
+        if self._offsets is not None:
+            return
+        index_path = _index_path(self.path)
+        fingerprint = _fingerprint(self.path)
+        data = None
+        if index_path.is_file():
+            try:
+                with np.load(str(index_path)) as npz:
+                    meta = json.loads(str(npz["meta"]))
+                    if meta.get("version") == INDEX_FORMAT_VERSION and meta.get("source_fingerprint") == fingerprint:
+                        data = {k: npz[k] for k in ("offsets", "hashes", "rows")}
+            except Exception as e:  # noqa: BLE001 - kaputter Index wird neu gebaut
+                logger.warning(f"Dataset-Index unlesbar ({e}), baue neu: {index_path.name}")
+        if data is None:
+            build_index(self.path)
+            with np.load(str(index_path)) as npz:
+                data = {k: npz[k] for k in ("offsets", "hashes", "rows")}
+        self._offsets = data["offsets"]
+        self._hashes = data["hashes"]
+        self._rows = data["rows"]
+
+    @property
+    def offsets(self) -> np.ndarray:
+        self._load_index()
+        return self._offsets
+
+    @property
+    def meta(self) -> Optional[Dict[str, Any]]:
+        return read_meta(self.path)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter_items(self.path)
+
+    def iter(self, fields: Optional[Sequence[str]] = None) -> Iterator[Any]:
+        return iter_items(self.path, fields)
+
+    def read(self, row: int, fields: Optional[Sequence[str]] = None) -> Any:
+        """Liest Item Nr. `row` per Byte-Offset."""
+        return self.read_many([row], fields)[0]
+
+    def read_many(self, rows: Iterable[int], fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Liest mehrere Items per Byte-Offset (eine Dateiöffnung)."""
+        offsets = self.offsets
+        items = []
+        with open(self.path, "rb") as f:
+            for row in rows:
+                if not 0 <= row < len(offsets):
+                    raise IndexError(row)
+                f.seek(int(offsets[row]))
+                items.append(project(json.loads(f.readline()), fields))
+        return items
+
+    def rows_for(self, frage: Any) -> List[int]:
+        """Zeilen mit gleichem Fragen-Hash (Kandidaten, in Dateireihenfolge)."""
+        self._load_index()
+        key = np.uint64(question_hash(frage))
+        lo = int(np.searchsorted(self._hashes, key, side="left"))
+        hi = int(np.searchsorted(self._hashes, key, side="right"))
+        return sorted(int(row) for row in self._rows[lo:hi])
+
+    def find(self, frage: Any, fields: Optional[Sequence[str]] = None) -> List[Tuple[int, Any]]:
+        """Alle (Zeile, Item) mit gleicher normalisierter Frage (``question_key``)."""
+        key = question_key(frage)
+        rows = self.rows_for(frage)
+        found = []
+        for row, item in zip(rows, self.read_many(rows)):
+            if isinstance(item, dict) and question_key(item.get(QUESTION_FIELD)) == key:
+                found.append((row, project(item, fields)))
+        return found
+
+    def get(self, frage: Any, default: Any = None, fields: Optional[Sequence[str]] = None) -> Any:
+        """Erstes Item zur Frage oder `default`."""
+        found = self.find(frage, fields)
+        return found[0][1] if found else default
+
+    def __contains__(self, frage: Any) -> bool:
+        return bool(self.find(frage))
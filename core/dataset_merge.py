@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+MedExamAI Dataset Merge
+=======================
+
+Führt N Regenerierungs-Läufe in einem Durchgang in einen Basis-Datensatz
+(``evidenz_antworten*``) zusammen.
+
+Jeder Lauf wird einmal gestreamt und pro normalisierter Frage
+(``dataset.question_key``, Hash-Lookup) auf seine Kandidaten reduziert.
+Danach wird die Basis einmal gestreamt und Item für Item geschrieben:
+Laufzeit O(n + m) statt paarweiser Suche. Im Speicher liegen nur die
+Kandidaten der Läufe (optional auf ``fields`` projiziert), nie die Basis.
+
+Vorrang-Regeln (``MergeRules``):
+
+- ``accept``: Kandidat überhaupt verwendbar (z.B. Mindestlänge der Antwort)
+- ``prefer``: Bewertung je Kandidat (höher gewinnt), danach Lauf-Priorität
+  (spätere Läufe gewinnen), danach ``duplicates`` innerhalb eines Laufs
+- ``replace_if``: Basis-Item darf ersetzt werden (z.B. nur leere Antworten);
+  Ziele ohne Kandidat zählen als ``unmatched``
+- ``consume``: Kandidat nur einmal verwenden (doppelte Fragen in der Basis)
+- ``add_missing``: Kandidaten ohne Frage in der Basis anhängen
+- ``fuzzy_threshold``: Fuzzy-Fallback (``FuzzyIndex``) für Ziele ohne exakten
+  Treffer, eins zu eins und nur gegen Kandidaten, deren Frage nicht wörtlich
+  in der Basis steht (bei Datei-Basis ein zusätzlicher Schlüssel-Pass)
+
+Der ``MergeReport`` hält fest, welches Item aus welchem Lauf und über welchen
+Abgleich (``exact``, ``fuzzy``, ``position``, ``added``) übernommen wurde.
+
+Usage:
+    report = merge_into(
+        "_OUTPUT/evidenz_antworten.json",
+        [MergeRun("_OUTPUT/regen_a.json"), MergeRun("_OUTPUT/regen_b.jsonl")],
+        "_OUTPUT/evidenz_antworten_merged.json",
+        MergeRules(replace_if=lambda item: not answer_text(item)),
+        apply=copy_fields({"antwort": "", "quellen": []}, was_regenerated=True),
+    )
+    report.write("_OUTPUT/evidenz_antworten_merged_report.json")
+"""
+
+import copy
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .dataset import iter_items, project, question_key, write_items
+from .fuzzy_match import FuzzyIndex
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_POLICIES = ("first", "last")
+
+Item = Dict[str, Any]
+Source = Union[str, "os.PathLike[str]", Iterable[Any]]
+ApplyFunc = Callable[[Item, Item, "MergeRun"], Item]
+NewItemFunc = Callable[[Item, "MergeRun"], Item]
+
+
+def item_question_key(item: Item) -> str:
+    """Standard-Schlüssel: normalisierte Frage (``frage``, sonst ``question``)."""
+    return question_key(item.get("frage") or item.get("question"))
+
+
+def answer_text(item: Item) -> str:
+    """Antworttext eines Items (``antwort``, sonst ``answer``), getrimmt."""
+    return str(item.get("antwort") or item.get("answer") or "").strip()
+
+
+def copy_fields(defaults: Dict[str, Any], **extra: Any) -> ApplyFunc:
+    """
+    Apply-Funktion, die die Felder aus `defaults` vom Kandidaten übernimmt
+    (fehlende Felder -> Default) und zusätzlich `extra` setzt.
+    """
+
+    def apply(item: Item, candidate: Item, run: "MergeRun") -> Item:
+        for name, default in defaults.items():
+            item[name] = candidate.get(name, copy.copy(default))
+        item.update(extra)
+        return item
+
+    return apply
+
+
+def _update(item: Item, candidate: Item, run: "MergeRun") -> Item:
+    item.update(candidate)
+    return item
+
+
+def _as_new_item(candidate: Item, run: "MergeRun") -> Item:
+    return candidate
+
+
+def _is_path(source: Any) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+@dataclass
+class MergeRun:
+    """Ein Regenerierungs-Lauf (Datei oder Iterable von Items)."""
+
+    source: Source
+    name: Optional[str] = None
+    # Höher gewinnt; None = Position in der Lauf-Liste (spätere Läufe gewinnen)
+    priority: Optional[int] = None
+    # Nur diese Felder behalten (Schlüsselfelder mit angeben)
+    fields: Optional[Sequence[str]] = None
+    # Join über die Basis-Position in diesem Feld statt über die Frage
+    position_field: Optional[str] = None
+
+    def items(self) -> Iterable[Any]:
+        if _is_path(self.source):
+            return iter_items(self.source, self.fields)
+        return (project(item, self.fields) for item in self.source)
+
+
+@dataclass
+class MergeRules:
+    """Schlüssel- und Vorrang-Regeln eines Merges (siehe Modul-Docstring)."""
+
+    key: Callable[[Item], Hashable] = item_question_key
+    accept: Optional[Callable[[Item], bool]] = None
+    prefer: Optional[Callable[[Item], Any]] = None
+    duplicates: str = "last"
+    replace_if: Optional[Callable[[Item], bool]] = None
+    consume: bool = False
+    add_missing: bool = False
+    fuzzy_threshold: Optional[float] = None
+
+
+@dataclass
+class RunStats:
+    items: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    superseded: int = 0
+    used: int = 0
+    added: int = 0
+
+
+@dataclass
+class MergeReport:
+    """Zähler und Herkunft (Provenance) eines Merges."""
+
+    base_items: int = 0
+    output_items: int = 0
+    replaced: int = 0
+    exact: int = 0
+    fuzzy: int = 0
+    position: int = 0
+    # Basis-Items mit Kandidat, die laut ``replace_if`` nicht ersetzt werden durften
+    kept: int = 0
+    # Ziele (``replace_if``) ohne Kandidat
+    unmatched: int = 0
+    added: int = 0
+    # Kandidaten, die weder übernommen noch angehängt wurden
+    unused: int = 0
+    runs: Dict[str, RunStats] = field(default_factory=dict)
+    unmatched_indices: List[int] = field(default_factory=list)
+    unused_keys: List[Any] = field(default_factory=list)
+    provenance: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def write(self, path: "os.PathLike[str] | str") -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+
+
+class _Candidate:
+    __slots__ = ("rank", "item", "run", "stats", "done")
+
+    def __init__(self, rank: Tuple[Any, ...], item: Item, run: MergeRun, stats: RunStats):
+        self.rank = rank
+        self.item = item
+        self.run = run
+        self.stats = stats
+        self.done = False
+
+
+class _Slot:
+    """Kandidaten eines Schlüssels (bzw. einer Basis-Position)."""
+
+    __slots__ = ("key", "candidates", "ordered", "seen", "fuzzy_id")
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.candidates: List[_Candidate] = []
+        self.ordered = True
+        # Schlüssel kommt in der Basis vor (wird dann nicht als neu angehängt)
+        self.seen = False
+        self.fuzzy_id = -1
+
+
+class DatasetMerger:
+    """
+    Index über Regenerierungs-Läufe plus Ein-Pass-Merge einer Basis.
+
+    Beispiel:
+        merger = DatasetMerger(MergeRules(consume=True), apply=copy_fields({"antwort": ""}))
+        merger.add_run(MergeRun("_OUTPUT/regen.json"))
+        write_items("_OUTPUT/merged.json", merger.merge("_OUTPUT/evidenz_antworten.json"))
+        print(merger.report.replaced)
+    """
+
+    def __init__(
+        self,
+        rules: Optional[MergeRules] = None,
+        apply: Optional[ApplyFunc] = None,
+        new_item: Optional[NewItemFunc] = None,
+        on_unmatched: Optional[Callable[[Item], Item]] = None,
+    ):
+        """
+        Args:
+            rules: Schlüssel- und Vorrang-Regeln
+            apply: (Basis-Item, Kandidat, Lauf) -> Ergebnis (Standard: Felder überschreiben)
+            new_item: (Kandidat, Lauf) -> anzuhängendes Item bei ``add_missing``
+            on_unmatched: Ziel-Item ohne Kandidat -> Ergebnis (z.B. als fehlgeschlagen markieren)
+        """
+        self.rules = rules or MergeRules()
+        if self.rules.duplicates not in DUPLICATE_POLICIES:
+            raise ValueError(f"duplicates must be one of {DUPLICATE_POLICIES}")
+        self.apply = apply or _update
+        self.new_item = new_item or _as_new_item
+        self.on_unmatched = on_unmatched
+        self.report = MergeReport()
+        self._run_count = 0
+        self._seq = 0
+        self._slots: Dict[Hashable, _Slot] = {}
+        self._positions: Dict[int, _Slot] = {}
+        self._fuzzy: Optional[FuzzyIndex] = None
+        self._fuzzy_slots: List[_Slot] = []
+        self._fuzzy_open = np.zeros(0, dtype=bool)
+
+    def add_run(self, run: MergeRun) -> RunStats:
+        """Streamt einen Lauf in den Kandidaten-Index."""
+        rules = self.rules
+        self._run_count += 1
+        if run.name is None:
+            run.name = Path(run.source).name if _is_path(run.source) else f"run{self._run_count}"
+        priority = run.priority if run.priority is not None else self._run_count
+        stats = self.report.runs.setdefault(run.name, RunStats())
+
+        for item in run.items():
+            stats.items += 1
+            if not isinstance(item, dict) or (rules.accept is not None and not rules.accept(item)):
+                stats.rejected += 1
+                continue
+            if run.position_field:
+                position = item.get(run.position_field)
+                key = int(position) if position is not None else None
+                slots = self._positions
+            else:
+                key = rules.key(item)
+                slots = self._slots
+            if key is None or key == "":
+                stats.rejected += 1
+                continue
+            slot = slots.get(key)
+            if slot is None:
+                slot = slots[key] = _Slot(key)
+            stats.accepted += 1
+            self._seq += 1
+            rank = (
+                rules.prefer(item) if rules.prefer is not None else 0,
+                priority,
+                self._seq if rules.duplicates == "last" else -self._seq,
+            )
+            self._offer(slot, _Candidate(rank, item, run, stats))
+
+        # Fuzzy-Index bei Bedarf neu aufbauen
+        self._fuzzy = None
+        logger.info(f"Merge-Lauf {run.name}: {stats.accepted}/{stats.items} Kandidaten")
+        return stats
+
+    def _offer(self, slot: _Slot, candidate: _Candidate) -> None:
+        if self.rules.consume:
+            slot.candidates.append(candidate)
+            slot.ordered = False
+        elif not slot.candidates:
+            slot.candidates.append(candidate)
+        elif candidate.rank > slot.candidates[0].rank:
+            slot.candidates[0].stats.superseded += 1
+            slot.candidates[0] = candidate
+        else:
+            candidate.stats.superseded += 1
+
+    def _take(self, slot: _Slot) -> Optional[_Candidate]:
+        """Bester Kandidat des Slots (bei ``consume`` entnommen)."""
+        if not slot.candidates:
+            return None
+        if not slot.ordered:
+            slot.candidates.sort(key=lambda candidate: candidate.rank, reverse=True)
+            slot.ordered = True
+        if self.rules.consume:
+            return slot.candidates.pop(0)
+        return slot.candidates[0]
+
+    def _claim(self, slot: _Slot) -> None:
+        """Markiert den Schlüssel als in der Basis vorhanden (danach kein Fuzzy-Ziel mehr)."""
+        slot.seen = True
+        if self._fuzzy is not None and slot.fuzzy_id >= 0:
+            self._fuzzy_open[slot.fuzzy_id] = False
+
+    def _fuzzy_match(self, key: str) -> Optional[Tuple[_Slot, float]]:
+        if self._fuzzy is None:
+            self._fuzzy_slots = [slot for slot in self._slots.values() if isinstance(slot.key, str)]
+            for fuzzy_id, slot in enumerate(self._fuzzy_slots):
+                slot.fuzzy_id = fuzzy_id
+            self._fuzzy = FuzzyIndex(slot.key for slot in self._fuzzy_slots)
+            self._fuzzy_open = np.array([not slot.seen for slot in self._fuzzy_slots], dtype=bool)
+        hit = self._fuzzy.match_one(
+            key, np.flatnonzero(self._fuzzy_open), threshold=self.rules.fuzzy_threshold
+        )
+        if hit is None:
+            return None
+        return self._fuzzy_slots[hit[0]], hit[1]
+
+    def _scan_base_keys(self, base: Source) -> None:
+        """Schlüssel-Pass über die Basis: wörtlich vorhandene Fragen sind keine Fuzzy-Ziele."""
+        for item in iter_items(base):
+            if isinstance(item, dict):
+                slot = self._slots.get(self.rules.key(item))
+                if slot is not None:
+                    slot.seen = True
+
+    def _merge_item(self, index: int, item: Item) -> Item:
+        rules = self.rules
+        report = self.report
+        key: Hashable = None
+        match = "position"
+        slot = self._positions.get(index)
+        if slot is None and self._slots:
+            key = rules.key(item)
+            match = "exact"
+            slot = self._slots.get(key)
+        if slot is not None:
+            self._claim(slot)
+
+        target = rules.replace_if is not None
+        if target and not rules.replace_if(item):
+            if slot is not None and slot.candidates:
+                report.kept += 1
+            return item
+
+        candidate = self._take(slot) if slot is not None else None
+        score = None
+        if candidate is None and rules.fuzzy_threshold is not None and isinstance(key, str) and key:
+            hit = self._fuzzy_match(key)
+            if hit is not None:
+                slot, score = hit
+                self._claim(slot)
+                match = "fuzzy"
+                candidate = self._take(slot)
+
+        if candidate is None:
+            if target:
+                report.unmatched += 1
+                report.unmatched_indices.append(index)
+                if self.on_unmatched is not None:
+                    return self.on_unmatched(item)
+            return item
+
+        if not candidate.done:
+            candidate.done = True
+            candidate.stats.used += 1
+        report.replaced += 1
+        setattr(report, match, getattr(report, match) + 1)
+        entry = {"index": index, "key": slot.key, "run": candidate.run.name, "match": match}
+        if score is not None:
+            entry["score"] = round(score, 4)
+        report.provenance.append(entry)
+        return self.apply(item, candidate.item, candidate.run)
+
+    def merge(self, base: Source) -> Iterator[Any]:
+        """
+        Streamt die Basis einmal und liefert die zusammengeführten Items
+        (bei ``add_missing`` danach die neuen Items in Reihenfolge ihres ersten Auftretens).
+        """
+        report = self.report
+        if self.rules.fuzzy_threshold is not None and self._slots and _is_path(base):
+            self._scan_base_keys(base)
+        items = iter_items(base) if _is_path(base) else base
+        output = 0
+        for index, item in enumerate(items):
+            report.base_items += 1
+            if isinstance(item, dict):
+                item = self._merge_item(index, item)
+            output += 1
+            yield item
+
+        if self.rules.add_missing:
+            for slot in self._slots.values():
+                if slot.seen:
+                    continue
+                for candidate in slot.candidates:
+                    candidate.done = True
+                    candidate.stats.added += 1
+                    report.added += 1
+                    report.provenance.append(
+                        {"index": output, "key": slot.key, "run": candidate.run.name, "match": "added"}
+                    )
+                    output += 1
+                    yield self.new_item(candidate.item, candidate.run)
+
+        for slots in (self._slots, self._positions):
+            for slot in slots.values():
+                for candidate in slot.candidates:
+                    if not candidate.done:
+                        report.unused += 1
+                        report.unused_keys.append(slot.key)
+        report.output_items = output
+
+
+def merge_into(
+    base: Source,
+    runs: Sequence[MergeRun],
+    output: "os.PathLike[str] | str",
+    rules: Optional[MergeRules] = None,
+    apply: Optional[ApplyFunc] = None,
+    new_item: Optional[NewItemFunc] = None,
+    on_unmatched: Optional[Callable[[Item], Item]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> MergeReport:
+    """
+    Führt `runs` in `base` zusammen und schreibt das Ergebnis gestreamt und
+    atomar nach `output` (darf gleich `base` sein; Format nach Endung, siehe
+    ``dataset.write_items``).
+
+    Returns:
+        MergeReport mit Zählern und Provenance
+    """
+    merger = DatasetMerger(rules, apply=apply, new_item=new_item, on_unmatched=on_unmatched)
+    for run in runs:
+        merger.add_run(run)
+    write_items(output, merger.merge(base), meta=meta)
+    report = merger.report
+    logger.info(
+        f"Merge -> {Path(output).name}: {report.replaced} ersetzt, {report.added} neu, "
+        f"{report.unmatched} ohne Kandidat, {report.unused} Kandidaten ungenutzt"
+    )
+    return report
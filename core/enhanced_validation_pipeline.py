@@ -8,6 +8,11 @@ with:
 - constructor: (rag_system=None, log_dir: Path, strict_mode: bool)
 - method: validate_answer(answer: str, query: str, question_id: str) -> (answer, metadata_dict)
 
+For whole datasets, `validate_many(items, workers=N)` runs the same local
+checks on a process pool (one pipeline per worker) and writes the logs in bulk
+(one JSONL file per call instead of `<question_id>.json` files; pass
+`per_question_logs=True` to also keep the per-question files).
+
 Design goals for MedExamAI:
 - No extra heavy dependencies
 - Conservative (avoid obvious hallucinations), but not overly strict
@@ -19,14 +24,25 @@ from __future__ import annotations
 
 import json
 import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict, is_dataclass
 from datetime import datetime
 from enum import Enum
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# (final_answer, metadata, log payload)
+_Validated = Tuple[str, Dict[str, Any], Dict[str, Any]]
+
+# Pipeline of a validate_many() worker process (built once by the pool initializer)
+_WORKER_PIPELINE: Optional["EnhancedValidationPipeline"] = None
+
+
 def _jsonify(value: Any) -> Any:
     """Convert common non-JSON-native objects (e.g. Enums/Paths) to JSON-safe values."""
     if value is None or isinstance(value, (str, int, float, bool)):
@@ -104,6 +120,99 @@ class EnhancedValidationPipeline:
         Returns:
             (validated_answer, metadata)
         """
+        final_answer, meta, payload = self._validate(answer=answer, query=query, question_id=question_id)
+        self._write_question_log(question_id, payload)
+        return final_answer, meta
+
+    def _write_question_log(self, question_id: Any, payload: Dict[str, Any]) -> None:
+        # Persist per-question log (safe: _OUTPUT is gitignored)
+        try:
+            out_path = self.log_dir / f"{question_id}.json"
+            out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        except Exception as e:  # pragma: no cover
+            logger.debug(f"Could not write validation log: {e}")
+
+    def validate_many(
+        self,
+        items: Iterable[Mapping[str, Any]],
+        workers: Optional[int] = None,
+        chunk_size: int = 32,
+        log_path: Optional[Path] = None,
+        per_question_logs: bool = False,
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Validate many answers on a process pool; yields results in input order.
+
+        Each item holds the validate_answer() keywords (`answer`, `query`,
+        optional `question_id`). All stages are local CPU work, so items are
+        sent to the workers in chunks; every worker builds its validators once.
+        At most 2 chunks per worker are in flight, so `items` may be a lazy
+        stream. Logs are written in bulk: one JSON line per question (same
+        payload as the per-question files) in a single JSONL file per call.
+        Unlike validate_answer(), no `<question_id>.json` files are written
+        unless `per_question_logs` is set.
+
+        Args:
+            items: Iterable of {"answer", "query", "question_id"} mappings.
+            workers: Process count (None = CPU count, <= 1 = in this process).
+            chunk_size: Items per worker task.
+            log_path: JSONL log file (default: log_dir/validate_many_<timestamp>.jsonl).
+            per_question_logs: Also write log_dir/<question_id>.json per item (as validate_answer()).
+
+        Yields:
+            (validated_answer, metadata) per item, like validate_answer().
+        """
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        chunk_size = max(1, int(chunk_size))
+        if log_path is None:
+            log_path = self.log_dir / f"validate_many_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl"
+        log_path = Path(log_path)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+
+        pending_items = iter(items)
+        chunks = iter(lambda: [dict(item) for item in islice(pending_items, chunk_size)], [])
+
+        with open(log_path, "a", encoding="utf-8") as log_file:
+            for results in self._iter_validated_chunks(chunks, workers):
+                log_file.write(
+                    "".join(
+                        json.dumps({"question_id": meta.get("question_id"), **payload}, ensure_ascii=False) + "\n"
+                        for _, meta, payload in results
+                    )
+                )
+                log_file.flush()
+                if per_question_logs:
+                    for _, meta, payload in results:
+                        self._write_question_log(meta.get("question_id", "unknown"), payload)
+                for final_answer, meta, _ in results:
+                    yield final_answer, meta
+
+    def _iter_validated_chunks(
+        self, chunks: Iterator[List[Dict[str, Any]]], workers: int
+    ) -> Iterator[List[_Validated]]:
+        if workers <= 1:
+            for chunk in chunks:
+                yield [self._validate(**_validate_kwargs(item)) for item in chunk]
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.log_dir, self.strict_mode),
+        ) as pool:
+            pending: Deque[Any] = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_validate_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                results = pending.popleft().result()
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    pending.append(pool.submit(_validate_chunk, next_chunk))
+                yield results
+
+    def _validate(self, *, answer: str, query: str, question_id: str = "unknown") -> _Validated:
+        """Runs all local checks; returns (final_answer, metadata, log payload) without writing."""
         started_at = datetime.now().isoformat(timespec="seconds")
         original_answer = answer or ""
         cleaned_answer = original_answer
@@ -194,21 +303,31 @@ class EnhancedValidationPipeline:
         meta["warnings"] = list(med_warnings)
         meta = _jsonify(meta)
 
-        # Persist per-question log (safe: _OUTPUT is gitignored)
-        try:
-            out_path = self.log_dir / f"{question_id}.json"
-            payload = {
-                "query": query,
-                "original_answer": original_answer,
-                "cleaned_answer": cleaned_answer,
-                "final_answer": final_answer,
-                "validation": meta,
-            }
-            out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-        except Exception as e:  # pragma: no cover
-            logger.debug(f"Could not write validation log: {e}")
+        payload = {
+            "query": query,
+            "original_answer": original_answer,
+            "cleaned_answer": cleaned_answer,
+            "final_answer": final_answer,
+            "validation": meta,
+        }
+        return final_answer, meta, payload
+
+
+def _validate_kwargs(item: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "answer": item.get("answer") or "",
+        "query": item.get("query") or "",
+        "question_id": str(item.get("question_id") or "unknown"),
+    }
 
-        return final_answer, meta
 
+def _init_worker(log_dir: Path, strict_mode: bool) -> None:
+    global _WORKER_PIPELINE
+    _WORKER_PIPELINE = EnhancedValidationPipeline(log_dir=log_dir, strict_mode=strict_mode)
 
 
+def _validate_chunk(chunk: List[Dict[str, Any]]) -> List[_Validated]:
+    pipeline = _WORKER_PIPELINE
+    if pipeline is None:  # pragma: no cover
+        raise RuntimeError("validate_many worker not initialized")
+    return [pipeline._validate(**_validate_kwargs(item)) for item in chunk]
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+MedExamAI Fuzzy Matching
+========================
+
+Fuzzy-Abgleich von Fragen gegen viele Karten/Kandidaten mit exakt derselben
+Ähnlichkeit wie ``difflib.SequenceMatcher(None, query, text).ratio()``.
+
+Statt jeden Kandidaten paarweise mit ``SequenceMatcher`` zu vergleichen, hält
+``FuzzyIndex`` pro Text ein Zeichen-Histogramm (Unigramm-Index als
+NumPy-Matrix). Daraus ergibt sich für alle Kandidaten in einem
+vektorisierten Schritt eine obere Schranke der Ratio (wie ``quick_ratio``:
+2 * gemeinsame Zeichen / Gesamtlänge). Exakt gerechnet werden nur Kandidaten,
+deren Schranke die Schwelle bzw. den bisher besten Score erreicht – in
+absteigender Schrankenreihenfolge mit Abbruch, sobald keiner mehr gewinnen
+kann. Der ``SequenceMatcher`` pro Index-Text (inkl. ``b2j``-Tabelle) wird
+gecacht (optional begrenzt über ``max_matchers``), pro Vergleich wird nur
+noch die Frage gesetzt. Die Histogramm-Matrix wächst geometrisch, damit
+abwechselndes ``add``/Matchen amortisiert linear bleibt.
+
+Längere N-Gramme oder MinHash liefern keine gültige Schranke für die Ratio
+(die Matching-Blöcke können beliebig kurz sein) und würden Treffer verlieren;
+die Ergebnisse bleiben deshalb identisch zur ``difflib``-Schleife.
+"""
+
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (Index des Texts, Ratio)
+Match = Tuple[int, float]
+
+
+def ratio(a: str, b: str) -> float:
+    """``SequenceMatcher(None, a, b).ratio()`` (Referenz-Semantik des Moduls)."""
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class FuzzyIndex:
+    """
+    Index über Texte (IDs = Einfüge-Reihenfolge) für schnelles Fuzzy-Matching.
+
+    ``max_matchers`` begrenzt die gecachten ``SequenceMatcher`` (None = alle).
+
+    Beispiel:
+        index = FuzzyIndex(card.norm for card in cards)
+        hit = index.match_one(frage_norm, threshold=0.92)
+        if hit:
+            card_idx, score = hit
+    """
+
+    def __init__(self, texts: Iterable[str] = (), max_matchers: Optional[int] = None):
+        self.texts: List[str] = []
+        self.max_matchers = max_matchers
+        self._columns: Dict[str, int] = {}
+        self._rows: List[Dict[int, int]] = []
+        # Kapazität >= (built, width); nur [:built, :width] ist belegt
+        self._matrix = np.zeros((0, 0), dtype=np.int32)
+        self._lengths = np.zeros(0, dtype=np.int64)
+        self._built = 0
+        self._width = 0
+        self._matchers: Dict[int, SequenceMatcher] = {}
+        for text in texts:
+            self.add(text)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, text: str) -> int:
+        """Fügt einen Text hinzu und gibt seine ID zurück (Histogramm wird beim nächsten Match übernommen)."""
+        row: Dict[int, int] = {}
+        for ch, count in Counter(text).items():
+            row[self._columns.setdefault(ch, len(self._columns))] = count
+        self.texts.append(text)
+        self._rows.append(row)
+        return len(self.texts) - 1
+
+    def _sync(self) -> None:
+        """Übernimmt neu hinzugefügte Texte in Histogramm-Matrix und Längen."""
+        n, width = len(self.texts), len(self._columns)
+        if self._built == n and self._width == width:
+            return
+        rows, cols = self._matrix.shape
+        if n > rows or width > cols:
+            rows = max(n, 2 * rows) if n > rows else rows
+            cols = max(width, 2 * cols) if width > cols else cols
+            matrix = np.zeros((rows, cols), dtype=np.int32)
+            matrix[:self._built, :self._matrix.shape[1]] = self._matrix[:self._built]
+            lengths = np.zeros(rows, dtype=np.int64)
+            lengths[:self._built] = self._lengths[:self._built]
+            self._matrix, self._lengths = matrix, lengths
+        for idx in range(self._built, n):
+            row = self._rows[idx]
+            if row:
+                self._matrix[idx, list(row.keys())] = list(row.values())
+            self._lengths[idx] = len(self.texts[idx])
+        self._built, self._width = n, width
+
+    def _ids(self, candidates: Optional[Iterable[int]]) -> np.ndarray:
+        if candidates is None:
+            return np.arange(len(self.texts), dtype=np.intp)
+        if isinstance(candidates, np.ndarray):
+            return candidates.astype(np.intp, copy=False)
+        return np.fromiter(candidates, dtype=np.intp)
+
+    def upper_bounds(self, query: str, candidates: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Obere Schranke von ``ratio(query, texts[i])`` für jeden Kandidaten
+        (entspricht ``SequenceMatcher.quick_ratio``, gleiche Float-Rechnung).
+        """
+        self._sync()
+        ids = self._ids(candidates)
+        columns: List[int] = []
+        counts: List[int] = []
+        for ch, count in Counter(query).items():
+            column = self._columns.get(ch)
+            if column is not None:
+                columns.append(column)
+                counts.append(count)
+        if columns and ids.size:
+            common = np.minimum(self._matrix[np.ix_(ids, columns)], np.array(counts)).sum(axis=1)
+        else:
+            common = np.zeros(ids.size, dtype=np.int64)
+        total = self._lengths[ids] + len(query)
+        # Zwei leere Texte gelten wie bei difflib als identisch (1.0)
+        return np.where(total > 0, 2.0 * common / np.maximum(total, 1), 1.0)
+
+    def ratio(self, query: str, idx: int) -> float:
+        """Exakte Ratio von ``query`` gegen Text ``idx`` (Matcher des Texts wird gecacht)."""
+        matcher = self._matchers.get(idx)
+        if matcher is None:
+            matcher = SequenceMatcher(None, "", self.texts[idx])
+            if self.max_matchers is None or self.max_matchers > 0:
+                if self.max_matchers is not None and len(self._matchers) >= self.max_matchers:
+                    # Ältesten Matcher verwerfen (Einfüge-Reihenfolge des Dicts)
+                    self._matchers.pop(next(iter(self._matchers)))
+                self._matchers[idx] = matcher
+        matcher.set_seq1(query)
+        return matcher.ratio()
+
+    def scores(
+        self,
+        query: str,
+        candidates: Optional[Iterable[int]] = None,
+        cutoff: float = 0.0,
+    ) -> List[Match]:
+        """Alle Kandidaten mit ``ratio >= cutoff`` als (ID, Ratio), in Kandidatenreihenfolge."""
+        ids = self._ids(candidates)
+        if not ids.size:
+            return []
+        bounds = self.upper_bounds(query, ids)
+        matches = []
+        for idx in ids[bounds >= cutoff].tolist():
+            score = self.ratio(query, idx)
+            if score >= cutoff:
+                matches.append((idx, score))
+        return matches
+
+    def match_one(
+        self,
+        query: str,
+        candidates: Optional[Iterable[int]] = None,
+        threshold: float = 0.0,
+    ) -> Optional[Match]:
+        """
+        Bester Kandidat mit ``ratio >= threshold`` (bei Gleichstand der erste
+        in Kandidatenreihenfolge), sonst None.
+        """
+        ids = self._ids(candidates)
+        if not ids.size:
+            return None
+        bounds = self.upper_bounds(query, ids)
+        order = np.argsort(-bounds, kind="stable")
+        best_pos: Optional[int] = None
+        best_score = threshold
+        for pos, bound in zip(order.tolist(), bounds[order].tolist()):
+            if bound < best_score:
+                break  # Schranken sind absteigend sortiert: keiner kann mehr gewinnen
+            score = self.ratio(query, int(ids[pos]))
+            if score < threshold:
+                continue
+            if best_pos is None or score > best_score or (score == best_score and pos < best_pos):
+                best_pos, best_score = pos, score
+        if best_pos is None:
+            return None
+        return int(ids[best_pos]), best_score
+
+    def match_many(
+        self,
+        queries: Sequence[str],
+        candidates: Optional[Iterable[int]] = None,
+        threshold: float = 0.0,
+    ) -> List[Optional[Match]]:
+        """``match_one`` für viele Fragen gegen dieselben Kandidaten."""
+        ids = self._ids(candidates)
+        return [self.match_one(query, ids, threshold) for query in queries]
@@ -30,8 +30,10 @@ import json
 import logging
 import os
 import re
+import sqlite3
+import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -41,6 +43,13 @@ from urllib.parse import urljoin
 
 import requests
 
+try:
+    from core.http_download import download_file
+    from core.pattern_scanner import KeywordAutomaton, MultiPatternScanner
+except ImportError:  # Aufruf als Skript aus core/
+    from http_download import download_file
+    from pattern_scanner import KeywordAutomaton, MultiPatternScanner
+
 logger = logging.getLogger(__name__)
 
 # Leitlinien-Pfad fest verdrahten (ENV überschreibbar)
@@ -172,6 +181,10 @@ class GuidelineMetadata:
     quality_score: float = 0.0  # 0.0-1.0 basierend auf S-Level, Aktualität
     relevance_score: float = 0.0  # 0.0-1.0 basierend auf Theme-Matching
     detected_themes: List[str] = field(default_factory=list)
+    # HTTP-Validatoren für bedingte Refreshes (If-None-Match / If-Modified-Since)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_sha256: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -190,9 +203,64 @@ class GuidelineMetadata:
             "quality_score": self.quality_score,
             "relevance_score": self.relevance_score,
             "detected_themes": self.detected_themes,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "content_sha256": self.content_sha256,
         }
 
 
+# Theme-Erkennung: Pattern und Theme-Namen werden einmal kompiliert (neu bei
+# Änderungen an MEDICAL_KEYWORDS/THEME_TO_SOCIETY), Ergebnisse pro Text-Hash gecacht
+THEME_CACHE_SIZE = 4096
+_theme_index: Optional[Tuple[tuple, MultiPatternScanner, KeywordAutomaton]] = None
+_theme_cache: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+_theme_lock = threading.Lock()
+
+
+def _get_theme_index() -> Tuple[MultiPatternScanner, KeywordAutomaton]:
+    global _theme_index
+    signature = (
+        tuple((theme, tuple(patterns)) for theme, patterns in MEDICAL_KEYWORDS.items()),
+        tuple(THEME_TO_SOCIETY),
+    )
+    with _theme_lock:
+        if _theme_index is None or _theme_index[0] != signature:
+            scanner = MultiPatternScanner(
+                (theme, pattern, re.IGNORECASE)
+                for theme, patterns in MEDICAL_KEYWORDS.items()
+                for pattern in patterns
+            )
+            automaton = KeywordAutomaton(theme_key.lower() for theme_key in THEME_TO_SOCIETY)
+            automaton.build()
+            _theme_index = (signature, scanner, automaton)
+            _theme_cache.clear()
+        return _theme_index[1], _theme_index[2]
+
+
+def _score_themes(text: str) -> List[Tuple[str, float]]:
+    """Alle Themen mit Score, absteigend sortiert (ohne top_n-Schnitt)."""
+    scanner, automaton = _get_theme_index()
+    theme_scores: Dict[str, float] = {}
+
+    # Score für jedes Theme basierend auf Keyword-Matches (ein Scan für alle Pattern)
+    matches: Dict[str, int] = {}
+    for theme, _ in scanner.scan(text):
+        matches[theme] = matches.get(theme, 0) + 1
+    for theme, count in matches.items():
+        # Normalisieren nach Textlänge (Matches pro 1000 Zeichen)
+        score = (count / len(text)) * 1000
+        theme_scores[theme] = min(1.0, score)
+
+    # Auch direkte Theme-Erwähnungen prüfen
+    hits = automaton.scan(text.lower())
+    for theme_key in THEME_TO_SOCIETY.keys():
+        if theme_key.lower() in hits:
+            theme_scores[theme_key] = max(theme_scores.get(theme_key, 0.0), 0.5)
+
+    # Sortieren nach Score
+    return sorted(theme_scores.items(), key=lambda x: x[1], reverse=True)
+
+
 def detect_medical_themes(text: str, top_n: int = 5) -> List[Tuple[str, float]]:
     """
     Erkennt medizinische Themen aus Text mittels Keyword-Matching.
@@ -207,30 +275,32 @@ def detect_medical_themes(text: str, top_n: int = 5) -> List[Tuple[str, float]]:
     if not text or len(text) < 50:
         return []
 
-    theme_scores: Dict[str, float] = defaultdict(float)
+    _get_theme_index()
+    key = hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+    with _theme_lock:
+        sorted_themes = _theme_cache.get(key)
+        if sorted_themes is not None:
+            _theme_cache.move_to_end(key)
 
-    # Score für jedes Theme basierend auf Keyword-Matches
-    for theme, patterns in MEDICAL_KEYWORDS.items():
-        matches = 0
-        for pattern in patterns:
-            matches += len(re.findall(pattern, text, re.IGNORECASE))
+    if sorted_themes is None:
+        sorted_themes = _score_themes(text)
+        with _theme_lock:
+            _theme_cache[key] = sorted_themes
+            while len(_theme_cache) > THEME_CACHE_SIZE:
+                _theme_cache.popitem(last=False)
 
-        if matches > 0:
-            # Normalisieren nach Textlänge (Matches pro 1000 Zeichen)
-            score = (matches / len(text)) * 1000
-            theme_scores[theme] = min(1.0, score)
+    logger.debug(f"Erkannte Themen: {sorted_themes[:top_n]}")
+    return sorted_themes[:top_n]
 
-    # Auch direkte Theme-Erwähnungen prüfen
-    text_lower = text.lower()
-    for theme_key in THEME_TO_SOCIETY.keys():
-        if theme_key.lower() in text_lower:
-            theme_scores[theme_key] = max(theme_scores.get(theme_key, 0.0), 0.5)
 
-    # Sortieren nach Score
-    sorted_themes = sorted(theme_scores.items(), key=lambda x: x[1], reverse=True)
+def detect_medical_themes_many(texts: List[str], top_n: int = 5) -> List[List[Tuple[str, float]]]:
+    """
+    Batch-Variante von detect_medical_themes (gleiche Texte werden nur einmal analysiert).
 
-    logger.debug(f"Erkannte Themen: {sorted_themes[:top_n]}")
-    return sorted_themes[:top_n]
+    Returns:
+        Liste von Theme-Listen in Eingabereihenfolge
+    """
+    return [detect_medical_themes(text, top_n=top_n) for text in texts]
 
 
 def map_themes_to_societies(themes: List[Tuple[str, float]]) -> Dict[str, float]:
@@ -262,6 +332,142 @@ def map_themes_to_societies(themes: List[Tuple[str, float]]) -> Dict[str, float]
     return dict(sorted(society_scores.items(), key=lambda x: x[1], reverse=True))
 
 
+class GuidelineCacheStore:
+    """
+    Persistenter Metadaten-Cache für Leitlinien (SQLite im WAL-Modus).
+
+    - Ein Eintrag pro Leitlinie; jeder abgeschlossene Download wird als eigene
+      Transaktion geschrieben (O(1) statt kompletter JSON-Neuschreibung)
+    - Threads (batch_download) teilen eine Verbindung hinter einem Lock,
+      parallele Prozesse warten per busy timeout
+    - Ein altes ``guideline_cache.json`` wird beim ersten Öffnen einmalig übernommen
+    - Tabelle ``blob_paths`` (Pfad -> SHA-256): identische PDFs teilen sich per
+      Hardlink einen Inode, jede Leitlinie behält ihren eigenen Pfad
+    """
+
+    def __init__(self, db_path: Path, legacy_file: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS guidelines (
+                cache_key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blob_paths (
+                path TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS blob_paths_sha256 ON blob_paths (sha256)")
+        # Frühere Tabelle ``blobs`` (SHA-256 -> ein Pfad) übernehmen
+        if self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'blobs'"
+        ).fetchone():
+            self._conn.execute("INSERT OR IGNORE INTO blob_paths (path, sha256) SELECT path, sha256 FROM blobs")
+            self._conn.execute("DROP TABLE blobs")
+        self._conn.commit()
+        if legacy_file is not None:
+            self._migrate_legacy_json(Path(legacy_file))
+
+    def _migrate_legacy_json(self, legacy_file: Path) -> None:
+        """Übernimmt Einträge aus dem alten JSON-Cache und benennt ihn um."""
+        if not legacy_file.exists():
+            return
+        try:
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            self.put_many({k: GuidelineMetadata(**v) for k, v in legacy.items()})
+        except Exception as e:
+            logger.error(f"Cache-Ladefehler (Legacy-JSON): {e}")
+            return
+        legacy_file.rename(legacy_file.with_name(legacy_file.name + ".migrated"))
+        logger.info(f"Legacy-Leitlinien-Cache migriert: {len(legacy)} Einträge")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM guidelines").fetchone()[0]
+
+    def load_all(self) -> Dict[str, GuidelineMetadata]:
+        with self._lock:
+            rows = self._conn.execute("SELECT cache_key, data FROM guidelines").fetchall()
+        cache: Dict[str, GuidelineMetadata] = {}
+        for key, data in rows:
+            try:
+                cache[key] = GuidelineMetadata(**json.loads(data))
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Defekter Cache-Eintrag {key} übersprungen: {e}")
+        return cache
+
+    def put_many(self, entries: Dict[str, GuidelineMetadata]) -> None:
+        """Schreibt Einträge atomar (eine Transaktion)."""
+        now = datetime.now().isoformat()
+        rows = [
+            (key, json.dumps(g.to_dict(), ensure_ascii=False), now)
+            for key, g in entries.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO guidelines (cache_key, data, updated_at) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def put(self, key: str, guideline: GuidelineMetadata) -> None:
+        self.put_many({key: guideline})
+
+    def claim_blob(self, sha256: str, path: Path) -> Optional[Path]:
+        """
+        Registriert `path` mit Inhalt `sha256`. Liegt derselbe Inhalt bereits
+        unter einem anderen Pfad, wird `path` durch einen Hardlink darauf
+        ersetzt (atomar per os.replace). Beide Pfade bleiben eigenständig:
+        ein späterer Download ersetzt nur den eigenen Verzeichniseintrag,
+        nie den gemeinsamen Inhalt.
+
+        Returns:
+            Pfad der bereits vorhandenen Kopie, falls verlinkt, sonst None
+        """
+        path = Path(path)
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT path FROM blob_paths WHERE sha256 = ? AND path != ?", (sha256, str(path))
+            ).fetchall()
+            linked: Optional[Path] = None
+            for (other_str,) in rows:
+                other = Path(other_str)
+                try:
+                    if not other.exists() or other.stat().st_size != path.stat().st_size:
+                        continue
+                    if not os.path.samefile(other, path):
+                        tmp = path.with_name(path.name + ".link")
+                        tmp.unlink(missing_ok=True)
+                        os.link(other, tmp)
+                        os.replace(tmp, path)
+                    linked = other
+                    break
+                except OSError as e:
+                    # z.B. anderes Dateisystem: eigene Kopie behalten
+                    logger.debug(f"Hardlink {path} -> {other} nicht möglich: {e}")
+                    break
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blob_paths (path, sha256) VALUES (?, ?)", (str(path), sha256)
+            )
+        return linked
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
 class GuidelineFetcher:
     """Fetcher für deutsche medizinische Leitlinien."""
 
@@ -288,8 +494,12 @@ class GuidelineFetcher:
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(parents=True, exist_ok=True)
 
+        # Metadaten-Cache in SQLite; cache_file (JSON) wird nur noch migriert
         self.cache_file = self.download_dir / cache_file
+        self.cache_db = self.cache_file.with_suffix(".sqlite")
         self.cache: Dict[str, GuidelineMetadata] = {}
+        self._cache_lock = threading.Lock()
+        self.store = GuidelineCacheStore(self.cache_db, legacy_file=self.cache_file)
         self._load_cache()
 
         self.max_parallel = max_parallel
@@ -305,26 +515,40 @@ class GuidelineFetcher:
         logger.info(f"GuidelineFetcher initialisiert: {self.download_dir}")
 
     def _load_cache(self) -> None:
-        """Lädt Cache aus Datei."""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    for k, v in data.items():
-                        self.cache[k] = GuidelineMetadata(**v)
-                logger.info(f"Cache geladen: {len(self.cache)} Leitlinien")
-            except Exception as e:
-                logger.error(f"Cache-Ladefehler: {e}")
+        """Lädt Cache aus der Datenbank."""
+        try:
+            entries = self.store.load_all()
+        except sqlite3.Error as e:
+            logger.error(f"Cache-Ladefehler: {e}")
+            return
+        with self._cache_lock:
+            self.cache.update(entries)
+        if entries:
+            logger.info(f"Cache geladen: {len(entries)} Leitlinien")
 
     def _save_cache(self) -> None:
-        """Speichert Cache in Datei."""
+        """Speichert den kompletten Cache (eine Transaktion)."""
         try:
-            data = {k: v.to_dict() for k, v in self.cache.items()}
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
+            with self._cache_lock:
+                entries = dict(self.cache)
+            self.store.put_many(entries)
+        except sqlite3.Error as e:
+            logger.error(f"Cache-Speicherfehler: {e}")
+
+    def _record_download(self, cache_key: str, guideline: GuidelineMetadata) -> None:
+        """Vermerkt einen abgeschlossenen Download (thread-safe, eine Zeile)."""
+        with self._cache_lock:
+            self.cache[cache_key] = guideline
+        try:
+            self.store.put(cache_key, guideline)
+        except sqlite3.Error as e:
             logger.error(f"Cache-Speicherfehler: {e}")
 
+    def close(self) -> None:
+        """Schließt Datenbank und HTTP-Session."""
+        self.store.close()
+        self.session.close()
+
     def get_curated_guidelines(
         self,
         specialty: Optional[str] = None,
@@ -814,11 +1038,10 @@ class GuidelineFetcher:
         Returns:
             Pfad zur heruntergeladenen Datei oder None
         """
-        if guideline.local_path and not force:
-            local = Path(guideline.local_path)
-            if local.exists():
-                logger.info(f"Bereits heruntergeladen: {local}")
-                return local
+        local = Path(guideline.local_path) if guideline.local_path else None
+        if local is not None and not force and local.exists():
+            logger.info(f"Bereits heruntergeladen: {local}")
+            return local
 
         try:
             # Dateiname erstellen
@@ -829,34 +1052,49 @@ class GuidelineFetcher:
             output_path = self.download_dir / guideline.source / filename
             output_path.parent.mkdir(parents=True, exist_ok=True)
 
+            # Refresh einer vorhandenen Datei: nur bedingt anfragen (304 = unverändert)
+            refresh = local is not None and local.exists()
             logger.info(f"Lade herunter: {guideline.title}")
 
-            # Download mit Retry
+            # Download mit Retry; abgebrochene Übertragungen werden per Range fortgesetzt
             for attempt in range(3):
                 try:
-                    response = self.session.get(
+                    result = download_file(
+                        self.session,
                         guideline.url,
+                        output_path,
+                        etag=guideline.etag if refresh else None,
+                        last_modified=guideline.last_modified if refresh else None,
                         timeout=60,
-                        stream=True
                     )
-                    response.raise_for_status()
 
-                    with open(output_path, "wb") as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                    cache_key = f"{guideline.source}_{guideline.registry_number}"
+                    if not result.changed:
+                        logger.info(f"Unverändert (304): {local}")
+                        return local
+
+                    # Gleicher Inhalt unter anderem Namen bereits vorhanden -> Hardlink statt Kopie
+                    stored_path = output_path
+                    linked = self.store.claim_blob(result.sha256, output_path)
+                    if linked is not None:
+                        logger.info(f"Identisch mit {linked.name}, als Hardlink abgelegt")
 
                     # Metadaten aktualisieren
-                    guideline.local_path = str(output_path)
+                    guideline.local_path = str(stored_path)
                     guideline.downloaded_at = datetime.now().isoformat()
-                    guideline.file_size_bytes = output_path.stat().st_size
+                    guideline.file_size_bytes = result.size
+                    guideline.etag = result.etag
+                    guideline.last_modified = result.last_modified
+                    guideline.content_sha256 = result.sha256
 
                     # Cache aktualisieren
-                    cache_key = f"{guideline.source}_{guideline.registry_number}"
-                    self.cache[cache_key] = guideline
-                    self._save_cache()
+                    self._record_download(cache_key, guideline)
 
-                    logger.info(f"Download erfolgreich: {output_path}")
-                    return output_path
+                    if result.status == "resumed":
+                        logger.info(f"Download fortgesetzt ({result.bytes_transferred} Bytes): {stored_path}")
+                    else:
+                        logger.info(f"Download erfolgreich: {stored_path}")
+                    return stored_path
 
                 except requests.RequestException as e:
                     logger.warning(f"Versuch {attempt + 1} fehlgeschlagen: {e}")
@@ -926,12 +1164,15 @@ class GuidelineFetcher:
         by_source = defaultdict(int)
         by_specialty = defaultdict(int)
 
-        for g in self.cache.values():
+        with self._cache_lock:
+            entries = list(self.cache.values())
+
+        for g in entries:
             by_source[g.source] += 1
             by_specialty[g.specialty] += 1
 
         return {
-            "total_cached": len(self.cache),
+            "total_cached": len(entries),
             "by_source": dict(by_source),
             "by_specialty": dict(by_specialty),
         }
@@ -941,7 +1182,8 @@ def fetch_guidelines_for_text(
     text: str,
     download_dir: str = "_BIBLIOTHEK/Leitlinien",
     download: bool = False,
-    min_relevance: float = 0.3
+    min_relevance: float = 0.3,
+    fetcher: Optional[GuidelineFetcher] = None
 ) -> Dict[str, Any]:
     """
     Hauptfunktion: Erkennt Themen aus Text und holt relevante Leitlinien.
@@ -951,6 +1193,7 @@ def fetch_guidelines_for_text(
         download_dir: Download-Verzeichnis
         download: Tatsächlich herunterladen
         min_relevance: Minimum Relevanz-Score
+        fetcher: Optional wiederverwendeter GuidelineFetcher (sonst neu für download_dir)
 
     Returns:
         Dictionary mit Themen, Gesellschaften und Leitlinien
@@ -973,20 +1216,25 @@ def fetch_guidelines_for_text(
     societies = map_themes_to_societies(themes)
     relevant = {s: score for s, score in societies.items() if score >= min_relevance}
 
-    # 3. Leitlinien suchen
-    fetcher = GuidelineFetcher(download_dir)
+    # 3. Leitlinien suchen (selbst erzeugten Fetcher am Ende schließen)
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = GuidelineFetcher(download_dir)
     all_guidelines = []
-
-    for theme, _ in themes[:3]:
-        guidelines = fetcher.search_guidelines(search_term=theme, limit=5)
-        for g in guidelines:
-            g.detected_themes = [t[0] for t in themes[:5]]
-        all_guidelines.extend(guidelines)
-
-    # 4. Optional herunterladen
     download_results = []
-    if download and all_guidelines:
-        download_results = fetcher.batch_download(all_guidelines)
+    try:
+        for theme, _ in themes[:3]:
+            guidelines = fetcher.search_guidelines(search_term=theme, limit=5)
+            for g in guidelines:
+                g.detected_themes = [t[0] for t in themes[:5]]
+            all_guidelines.extend(guidelines)
+
+        # 4. Optional herunterladen
+        if download and all_guidelines:
+            download_results = fetcher.batch_download(all_guidelines)
+    finally:
+        if owns_fetcher:
+            fetcher.close()
 
     return {
         "detected_themes": themes,
@@ -1002,6 +1250,40 @@ def fetch_guidelines_for_text(
     }
 
 
+def fetch_guidelines_for_texts(
+    texts: List[str],
+    download_dir: str = "_BIBLIOTHEK/Leitlinien",
+    download: bool = False,
+    min_relevance: float = 0.3
+) -> List[Dict[str, Any]]:
+    """
+    Batch-Variante von fetch_guidelines_for_text für viele Blöcke.
+
+    Teilt einen GuidelineFetcher (Cache-Datei und HTTP-Session werden nur einmal
+    geladen) und nutzt den Theme-Cache für wiederholte Texte.
+
+    Returns:
+        Liste von Ergebnis-Dicts in Eingabereihenfolge
+    """
+    fetcher: Optional[GuidelineFetcher] = None
+    results = []
+    try:
+        for text in texts:
+            if fetcher is None and detect_medical_themes(text, top_n=10):
+                fetcher = GuidelineFetcher(download_dir)
+            results.append(fetch_guidelines_for_text(
+                text,
+                download_dir=download_dir,
+                download=download,
+                min_relevance=min_relevance,
+                fetcher=fetcher,
+            ))
+    finally:
+        if fetcher is not None:
+            fetcher.close()
+    return results
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
 
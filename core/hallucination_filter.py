@@ -19,6 +19,11 @@ from typing import List, Tuple, Dict, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+try:
+    from core.pattern_scanner import MultiPatternScanner
+except ImportError:  # Aufruf als Skript aus core/
+    from pattern_scanner import MultiPatternScanner
+
 
 class HallucinationType(Enum):
     """Typen von Halluzinationen/Qualitätsproblemen"""
@@ -134,6 +139,14 @@ class HallucinationFilter:
             for p in VAGUE_ANSWER_PATTERNS
         ]
 
+        # Alle Pattern in einem Scanner (Vorfilter über Pflicht-Literale)
+        self.scanner = MultiPatternScanner()
+        for h_type, patterns in self.compiled_patterns.items():
+            for pattern, severity in patterns:
+                self.scanner.add((h_type, severity), pattern.pattern, pattern.flags)
+        for pattern in self.vague_patterns:
+            self.scanner.add((HallucinationType.VAGUE_ANSWER, "medium"), pattern.pattern, pattern.flags)
+
     def detect(self, text: str) -> List[HallucinationMatch]:
         """
         Erkennt Halluzinationen im Text.
@@ -143,29 +156,16 @@ class HallucinationFilter:
         """
         matches = []
 
-        for h_type, patterns in self.compiled_patterns.items():
-            for pattern, severity in patterns:
-                for match in pattern.finditer(text):
-                    matches.append(HallucinationMatch(
-                        type=h_type,
-                        pattern=pattern.pattern,
-                        text=match.group(),
-                        start=match.start(),
-                        end=match.end(),
-                        severity=severity,
-                    ))
-
-        # Prüfe auf vage Antworten
-        for pattern in self.vague_patterns:
-            for match in pattern.finditer(text):
-                matches.append(HallucinationMatch(
-                    type=HallucinationType.VAGUE_ANSWER,
-                    pattern=pattern.pattern,
-                    text=match.group(),
-                    start=match.start(),
-                    end=match.end(),
-                    severity="medium",
-                ))
+        # Ein Scan-Durchgang; Reihenfolge wie bisher: Typ, Pattern, Position
+        for (h_type, severity), match in self.scanner.scan(text):
+            matches.append(HallucinationMatch(
+                type=h_type,
+                pattern=match.re.pattern,
+                text=match.group(),
+                start=match.start(),
+                end=match.end(),
+                severity=severity,
+            ))
 
         return matches
 
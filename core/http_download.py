@@ -0,0 +1,210 @@
+"""Conditional, resumable and hash-verified file downloads (guideline PDFs)."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import requests
+
+CHUNK_SIZE = 65536
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class DownloadError(requests.RequestException):
+    """Response was received but is unusable (truncated, too small, wrong type)."""
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of ``download_file``."""
+
+    status: str  # "downloaded", "resumed" or "not_modified"
+    path: Path
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    sha256: Optional[str] = None
+    size: int = 0
+    bytes_transferred: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return self.status != "not_modified"
+
+
+_locks_guard = threading.Lock()
+_path_locks: Dict[str, threading.Lock] = {}
+
+
+def _path_lock(path: Path) -> threading.Lock:
+    key = str(Path(path).resolve())
+    with _locks_guard:
+        return _path_locks.setdefault(key, threading.Lock())
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _part_paths(output_path: Path):
+    part = output_path.with_name(output_path.name + ".part")
+    return part, part.with_name(part.name + ".json")
+
+
+def _discard(*paths: Path) -> None:
+    for p in paths:
+        p.unlink(missing_ok=True)
+
+
+def download_file(
+    session: requests.Session,
+    url: str,
+    output_path: Path,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    timeout: float = 60,
+    min_size: int = 0,
+    accept: Optional[Callable[[requests.Response], bool]] = None,
+) -> DownloadResult:
+    """
+    Download ``url`` to ``output_path`` and move only changed bytes.
+
+    - If validators of a current local copy are given, the request carries
+      ``If-None-Match`` / ``If-Modified-Since``. On 304 nothing is written.
+    - Bytes are streamed into ``<name>.part``, and its validators go to
+      ``<name>.part.json``. An interrupted transfer is continued with
+      ``Range`` + ``If-Range``. If the server content changed meanwhile, the
+      server answers 200 and the download starts over.
+    - The file is renamed into place only once it is complete (length checked),
+      so readers never see a truncated file.
+
+    Raises:
+        requests.RequestException: transport/HTTP errors, DownloadError for unusable responses
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with _path_lock(output_path):
+        return _download(session, url, output_path, etag, last_modified, timeout, min_size, accept, True)
+
+
+def _download(session, url, output_path, etag, last_modified, timeout, min_size, accept, allow_resume):
+    part, meta_path = _part_paths(output_path)
+    headers: Dict[str, str] = {}
+    offset = 0
+    partial_meta: Dict[str, Optional[str]] = {}
+
+    if allow_resume and part.exists() and meta_path.exists():
+        try:
+            partial_meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            partial_meta = {}
+        validator = partial_meta.get("etag") or partial_meta.get("last_modified")
+        if partial_meta.get("url") == url and validator and part.stat().st_size > 0:
+            offset = part.stat().st_size
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+    if not offset:
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    response = session.get(url, headers=headers, timeout=timeout, stream=True)
+    try:
+        if response.status_code == 304:
+            return DownloadResult(
+                status="not_modified",
+                path=output_path,
+                etag=response.headers.get("ETag", etag),
+                last_modified=response.headers.get("Last-Modified", last_modified),
+                size=output_path.stat().st_size if output_path.exists() else 0,
+            )
+        if response.status_code == 416 and offset:
+            # Range does not fit the content (any more): start over
+            _discard(part, meta_path)
+            response.close()
+            return _download(session, url, output_path, etag, last_modified, timeout, min_size, accept, False)
+        response.raise_for_status()
+        if accept is not None and not accept(response):
+            raise DownloadError(f"Unexpected content type ({response.headers.get('Content-Type', '?')}): {url}")
+
+        expected_total: Optional[int] = None
+        identity = response.headers.get("Content-Encoding", "identity") == "identity"
+        if response.status_code == 206 and offset:
+            match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+            if not match or int(match.group(1)) != offset:
+                _discard(part, meta_path)
+                response.close()
+                return _download(session, url, output_path, etag, last_modified, timeout, min_size, accept, False)
+            if match.group(3) != "*":
+                expected_total = int(match.group(3))
+            new_etag = response.headers.get("ETag") or partial_meta.get("etag")
+            new_last_modified = response.headers.get("Last-Modified") or partial_meta.get("last_modified")
+            status = "resumed"
+        else:
+            offset = 0
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit() and identity:
+                expected_total = int(length)
+            new_etag = response.headers.get("ETag")
+            new_last_modified = response.headers.get("Last-Modified")
+            status = "downloaded"
+
+        meta_path.write_text(
+            json.dumps({"url": url, "etag": new_etag, "last_modified": new_last_modified}),
+            encoding="utf-8",
+        )
+
+        digest = hashlib.sha256()
+        if offset:
+            with open(part, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        transferred = 0
+        resumable = bool(new_etag or new_last_modified)
+        try:
+            with open(part, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    transferred += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            if not resumable:
+                _discard(part, meta_path)
+            raise
+
+        size = part.stat().st_size
+        if expected_total is not None and size != expected_total:
+            if not resumable:
+                _discard(part, meta_path)
+            raise DownloadError(f"Incomplete download: {size} of {expected_total} bytes")
+        if size < min_size:
+            _discard(part, meta_path)
+            raise DownloadError(f"File too small ({size} bytes): {url}")
+
+        os.replace(part, output_path)
+        meta_path.unlink(missing_ok=True)
+        return DownloadResult(
+            status=status,
+            path=output_path,
+            etag=new_etag,
+            last_modified=new_last_modified,
+            sha256=digest.hexdigest(),
+            size=size,
+            bytes_transferred=transferred,
+        )
+    finally:
+        response.close()
+
@@ -0,0 +1,122 @@
+"""Shared HTTP connection pooling (keep-alive) for provider and web-search calls."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HTTPSessionPool:
+    """
+    One ``requests.Session`` with a sized ``HTTPAdapter`` per base URL.
+
+    Connections to the same scheme://host are kept alive and reused, so
+    repeated calls skip the TCP + TLS handshake. Retries are left to the
+    callers (tenacity / key rotation), the adapters never retry on their own.
+    """
+
+    def __init__(self, pool_maxsize: int = 16, pool_block: bool = False) -> None:
+        """
+        Args:
+            pool_maxsize: Max. kept-alive connections per base URL (>= concurrent requests).
+            pool_block: Block when all connections of a base URL are busy instead of opening extra ones.
+        """
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        self._counters: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _base_url(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}/"
+
+    def _ensure_adapter(self, base_url: str) -> None:
+        with self._lock:
+            if base_url in self._adapters:
+                return
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=self.pool_maxsize,
+                max_retries=0,
+                pool_block=self.pool_block,
+            )
+            self.session.mount(base_url, adapter)
+            self._adapters[base_url] = adapter
+            self._counters[base_url] = {"requests": 0, "errors": 0, "seconds": 0.0}
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        base_url = self._base_url(url)
+        self._ensure_adapter(base_url)
+        start = time.monotonic()
+        failed = True
+        try:
+            response = self.session.request(method, url, **kwargs)
+            failed = False
+            return response
+        finally:
+            with self._lock:
+                counters = self._counters[base_url]
+                counters["requests"] += 1
+                counters["errors"] += int(failed)
+                counters["seconds"] += time.monotonic() - start
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per base URL: requests, transport errors, new connections opened, reused
+        requests, idle connections in the pool and mean latency.
+        """
+        with self._lock:
+            report: Dict[str, Dict[str, Any]] = {}
+            for base_url, adapter in self._adapters.items():
+                pools = adapter.poolmanager.pools
+                conn_pools = [pools[key] for key in pools.keys()]
+                new_connections = sum(getattr(p, "num_connections", 0) for p in conn_pools)
+                counters = self._counters[base_url]
+                requests_made = int(counters["requests"])
+                report[base_url] = {
+                    "requests": requests_made,
+                    "errors": int(counters["errors"]),
+                    "new_connections": new_connections,
+                    "reused": max(0, requests_made - new_connections),
+                    "idle_connections": sum(
+                        1 for p in conn_pools if p.pool is not None for conn in list(p.pool.queue) if conn is not None
+                    ),
+                    "pool_maxsize": self.pool_maxsize,
+                    "avg_latency_s": round(counters["seconds"] / requests_made, 3) if requests_made else 0.0,
+                }
+            return report
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "HTTPSessionPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+_default_pool: Optional[HTTPSessionPool] = None
+_default_lock = threading.Lock()
+
+
+def get_default_pool() -> HTTPSessionPool:
+    """Process-wide pool for modules that were not handed one explicitly."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = HTTPSessionPool()
+        return _default_pool
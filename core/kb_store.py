@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+MedExamAI Binary Knowledge-Base Store
+=====================================
+
+Versioniertes Binärformat für die RAG-Wissensbasis (ersetzt die große JSON-KB).
+
+Layout eines KB-Verzeichnisses (z.B. ``_OUTPUT/rag_knowledge_base.kb/``):
+
+- ``manifest.json``    Format, Version, Anzahl Zeilen, Dimension, Statistiken
+- ``embeddings.f32``   Roh-float32-Matrix (count x dimension), L2-normalisiert,
+                       wird per ``np.memmap`` read-only geöffnet
+- ``records.jsonl``    Eine Zeile pro Eintrag (content_id, text, metadata, ...)
+- ``offsets.i64``      Byte-Offsets der JSONL-Zeilen (int64) für Random Access
+
+Das Manifest ist der Commit-Punkt: Es wird zuletzt (atomar) geschrieben.
+Bytes hinter ``count`` Zeilen (z.B. nach Absturz während eines Appends)
+werden ignoriert und beim nächsten Append abgeschnitten.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KB_FORMAT = "medexam-kb"
+KB_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.f32"
+RECORDS_FILE = "records.jsonl"
+OFFSETS_FILE = "offsets.i64"
+
+RECORD_FIELDS = ("content_id", "text", "metadata", "source_module", "source_tier", "timestamp")
+
+
+def ids_fingerprint(ids: List[str]) -> str:
+    """Fingerprint der Zeilen-IDs einer KB (Schutz vor Index/KB-Versatz bei ANN- und BM25-Index)."""
+    return hashlib.md5("\n".join(ids).encode("utf-8")).hexdigest()
+
+
+def is_binary_kb(path: "os.PathLike[str] | str") -> bool:
+    """Prüft, ob `path` ein Binär-KB-Verzeichnis ist."""
+    return (Path(path) / MANIFEST_FILE).is_file()
+
+
+def read_manifest(path: "os.PathLike[str] | str") -> Dict[str, Any]:
+    """Liest und validiert das Manifest eines KB-Verzeichnisses."""
+    manifest = json.loads((Path(path) / MANIFEST_FILE).read_text(encoding="utf-8"))
+    if manifest.get("format") != KB_FORMAT:
+        raise ValueError(f"Kein {KB_FORMAT}-Verzeichnis: {path}")
+    if manifest.get("version", 0) > KB_FORMAT_VERSION:
+        raise ValueError(
+            f"KB-Formatversion {manifest.get('version')} wird nicht unterstützt (max. {KB_FORMAT_VERSION})"
+        )
+    return manifest
+
+
+def _write_manifest(path: Path, manifest: Dict[str, Any]) -> None:
+    tmp = path / (MANIFEST_FILE + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path / MANIFEST_FILE)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class BinaryKBWriter:
+    """
+    Schreibt Einträge zeilenweise in ein KB-Verzeichnis (neu oder als Append).
+
+    Usage:
+        with BinaryKBWriter(path, dimension=768) as writer:
+            writer.add(record, embedding)
+    """
+
+    def __init__(
+        self,
+        path: "os.PathLike[str] | str",
+        dimension: Optional[int] = None,
+        append: bool = False,
+        normalize: bool = True,
+        statistics: Optional[Dict[str, Any]] = None
+    ):
+        self.path = Path(path)
+        self.normalize = normalize
+        self.statistics = statistics
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.count = 0
+        self.dimension = dimension
+        if append and is_binary_kb(self.path):
+            manifest = read_manifest(self.path)
+            self.count = int(manifest["count"])
+            self.dimension = self.dimension or manifest.get("dimension")
+            if manifest.get("dimension") and manifest["dimension"] != self.dimension:
+                raise ValueError(
+                    f"Dimensionskonflikt beim Append: {self.dimension} vs {manifest['dimension']}"
+                )
+            self._truncate_to_count()
+            mode = "ab"
+        else:
+            mode = "wb"
+
+        self._emb = open(self.path / EMBEDDINGS_FILE, mode)
+        self._rec = open(self.path / RECORDS_FILE, mode)
+        self._off = open(self.path / OFFSETS_FILE, mode)
+        self._rec_pos = self._rec.tell()
+
+    def _truncate_to_count(self) -> None:
+        """Schneidet nicht committete Bytes (hinter `count`) ab."""
+        offsets_path = self.path / OFFSETS_FILE
+        records_path = self.path / RECORDS_FILE
+        emb_path = self.path / EMBEDDINGS_FILE
+
+        record_end = 0
+        if self.count:
+            offsets = np.fromfile(offsets_path, dtype=np.int64, count=self.count)
+            with open(records_path, "rb") as f:
+                f.seek(int(offsets[-1]))
+                f.readline()
+                record_end = f.tell()
+
+        for file_path, size in (
+            (emb_path, self.count * (self.dimension or 0) * 4),
+            (offsets_path, self.count * 8),
+            (records_path, record_end),
+        ):
+            if file_path.exists() and file_path.stat().st_size > size:
+                with open(file_path, "r+b") as f:
+                    f.truncate(size)
+
+    def add(self, record: Dict[str, Any], embedding: Iterable[float]) -> None:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        if self.dimension is None:
+            self.dimension = int(vector.shape[1])
+        if vector.shape[1] != self.dimension:
+            raise ValueError(f"Embedding-Dimensionskonflikt: {vector.shape[1]}, erwartet {self.dimension}")
+        if self.normalize:
+            vector = _normalize_rows(vector)
+
+        line = json.dumps({k: record.get(k) for k in RECORD_FIELDS}, ensure_ascii=False).encode("utf-8") + b"\n"
+        self._off.write(np.int64(self._rec_pos).tobytes())
+        self._rec.write(line)
+        self._rec_pos += len(line)
+        self._emb.write(vector.tobytes())
+        self.count += 1
+
+    def close(self) -> None:
+        for f in (self._emb, self._rec, self._off):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        _write_manifest(self.path, {
+            "format": KB_FORMAT,
+            "version": KB_FORMAT_VERSION,
+            "count": self.count,
+            "dimension": self.dimension,
+            "dtype": "float32",
+            "normalized": self.normalize,
+            "embeddings_file": EMBEDDINGS_FILE,
+            "records_file": RECORDS_FILE,
+            "offsets_file": OFFSETS_FILE,
+            "statistics": self.statistics or {},
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+
+    def __enter__(self) -> "BinaryKBWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Manifest nicht anfassen: letzter Commit bleibt gültig
+            for f in (self._emb, self._rec, self._off):
+                f.close()
+
+
+class BinaryKnowledgeBase:
+    """Read-only Zugriff auf ein KB-Verzeichnis (Embeddings per memmap, Records per Offset)."""
+
+    def __init__(self, path: "os.PathLike[str] | str"):
+        self.path = Path(path)
+        self.manifest = read_manifest(self.path)
+        self.count = int(self.manifest["count"])
+        self.dimension = self.manifest.get("dimension")
+        self._offsets: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Embedding-Matrix als read-only memmap (keine Kopie)."""
+        if not self.count:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+        return np.memmap(
+            self.path / self.manifest.get("embeddings_file", EMBEDDINGS_FILE),
+            dtype=np.float32,
+            mode="r",
+            shape=(self.count, self.dimension),
+        )
+
+    @property
+    def offsets(self) -> np.ndarray:
+        if self._offsets is None:
+            self._offsets = np.fromfile(
+                self.path / self.manifest.get("offsets_file", OFFSETS_FILE), dtype=np.int64, count=self.count
+            )
+        return self._offsets
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Streamt alle Records in Zeilenreihenfolge."""
+        with open(self.path / self.manifest.get("records_file", RECORDS_FILE), "rb") as f:
+            for _ in range(self.count):
+                line = f.readline()
+                if not line:
+                    break
+                yield json.loads(line)
+
+    def read_record(self, row: int) -> Dict[str, Any]:
+        """Liest einen einzelnen Record per Byte-Offset."""
+        if not 0 <= row < self.count:
+            raise IndexError(row)
+        with open(self.path / self.manifest.get("records_file", RECORDS_FILE), "rb") as f:
+            f.seek(int(self.offsets[row]))
+            return json.loads(f.readline())
+
+    def read_records(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        """Liest mehrere Records per Byte-Offset (eine Dateiöffnung)."""
+        records = []
+        with open(self.path / self.manifest.get("records_file", RECORDS_FILE), "rb") as f:
+            for row in rows:
+                f.seek(int(self.offsets[row]))
+                records.append(json.loads(f.readline()))
+        return records
+
+
+def iter_json_kb(json_path: "os.PathLike[str] | str") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streamt (content_id, content_dict) aus einer JSON-KB.
+
+    Nutzt ijson falls installiert (konstanter Speicher), sonst json.load.
+    """
+    try:
+        import ijson  # type: ignore
+    except ImportError:
+        ijson = None
+
+    if ijson is not None:
+        with open(json_path, "rb") as f:
+            for content_id, content_dict in ijson.kvitems(f, "knowledge_base", use_float=True):
+                yield content_id, content_dict
+        return
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    yield from data.get("knowledge_base", {}).items()
+
+
+def convert_json_kb(
+    json_path: "os.PathLike[str] | str",
+    output_path: "os.PathLike[str] | str",
+    progress_every: int = 10000
+) -> Dict[str, int]:
+    """
+    Konvertiert eine bestehende JSON-KB in das Binärformat.
+
+    Einträge mit abweichender Embedding-Dimension werden übersprungen.
+
+    Returns:
+        {"written": n, "skipped": m}
+    """
+    written = 0
+    skipped = 0
+    with BinaryKBWriter(output_path) as writer:
+        for content_id, content in iter_json_kb(json_path):
+            embedding = content.get("embedding") or []
+            if not embedding or (writer.dimension is not None and len(embedding) != writer.dimension):
+                skipped += 1
+                continue
+            record = dict(content)
+            record["content_id"] = content_id
+            writer.add(record, embedding)
+            written += 1
+            if progress_every and written % progress_every == 0:
+                logger.info(f"  {written} Einträge konvertiert...")
+    logger.info(f"KB konvertiert: {written} Einträge ({skipped} übersprungen) -> {output_path}")
+    return {"written": written, "skipped": skipped}
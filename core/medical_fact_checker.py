@@ -26,6 +26,8 @@ from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from core.pattern_scanner import MultiPatternScanner
+
 
 @dataclass
 class MedicalFact:
@@ -147,6 +149,12 @@ class MedicalFactChecker:
                 for p, label in patterns
             ]
 
+        # Gemeinsamer Scanner: Schlüssel (fact_type, label) in Reihenfolge von self.patterns
+        self.scanner = MultiPatternScanner()
+        for fact_type, patterns in self.patterns.items():
+            for pattern, label in patterns:
+                self.scanner.add((fact_type, label), pattern.pattern, pattern.flags)
+
     def _load_leitlinien_index(self):
         """Lädt den Leitlinien-Index"""
         manifest_path = Path("_BIBLIOTHEK/leitlinien_manifest.json")
@@ -168,34 +176,37 @@ class MedicalFactChecker:
         facts = []
         lines = text.split('\n')
 
+        # Vorauswahl einmal auf dem Gesamttext, pro Zeile nur noch diese Pattern
+        candidates = self.scanner.candidates(text)
+        if not candidates:
+            return facts
+
         for line_num, line in enumerate(lines, 1):
-            for fact_type, patterns in self.patterns.items():
-                for pattern, label in patterns:
-                    for match in pattern.finditer(line):
-                        matched_text = match.group(0)
-
-                        # Filter: Überspringe alleinstehende Prozentangaben
-                        # (z.B. "20%", "100 %") ohne medizinischen Kontext
-                        if self._is_standalone_percentage(matched_text):
-                            continue
-
-                        # Filter: Überspringe zu kurze oder nicht-informative Matches
-                        if len(matched_text.strip()) < 3:
-                            continue
-
-                        # Kontext extrahieren (umgebende Zeilen)
-                        start = max(0, line_num - 3)
-                        end = min(len(lines), line_num + 3)
-                        context = '\n'.join(lines[start:end])
-
-                        facts.append(MedicalFact(
-                            text=matched_text,
-                            fact_type=fact_type,
-                            context=context,
-                            source_file=source_file,
-                            line_number=line_num,
-                            extracted_value=matched_text,
-                        ))
+            for (fact_type, _label), match in self.scanner.scan(line, candidates):
+                matched_text = match.group(0)
+
+                # Filter: Überspringe alleinstehende Prozentangaben
+                # (z.B. "20%", "100 %") ohne medizinischen Kontext
+                if self._is_standalone_percentage(matched_text):
+                    continue
+
+                # Filter: Überspringe zu kurze oder nicht-informative Matches
+                if len(matched_text.strip()) < 3:
+                    continue
+
+                # Kontext extrahieren (umgebende Zeilen)
+                start = max(0, line_num - 3)
+                end = min(len(lines), line_num + 3)
+                context = '\n'.join(lines[start:end])
+
+                facts.append(MedicalFact(
+                    text=matched_text,
+                    fact_type=fact_type,
+                    context=context,
+                    source_file=source_file,
+                    line_number=line_num,
+                    extracted_value=matched_text,
+                ))
 
         return facts
 
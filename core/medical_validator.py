@@ -28,6 +28,11 @@ from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+try:
+    from core.pattern_scanner import MultiPatternScanner
+except ImportError:  # Aufruf als Skript aus core/
+    from pattern_scanner import MultiPatternScanner
+
 logger = logging.getLogger(__name__)
 
 
@@ -163,6 +168,9 @@ class DosageValidator:
     # Mindestlänge für Medikamentennamen
     MIN_MED_NAME_LENGTH = 3
 
+    # Einmal kompiliert, von allen Instanzen geteilt
+    SCANNER = MultiPatternScanner((i, p, re.IGNORECASE) for i, p in enumerate(DOSAGE_PATTERNS))
+
     def __init__(self, reference_data: Optional[Dict] = None):
         self.reference = reference_data or DOSAGE_REFERENCE
         self.aliases = self._build_aliases()
@@ -177,29 +185,28 @@ class DosageValidator:
     def extract_dosages(self, text: str) -> List[Dict[str, Any]]:
         """Extrahiert Dosierungsangaben aus Text."""
         extractions = []
-        for pattern in self.DOSAGE_PATTERNS:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                groups = match.groupdict()
-                try:
-                    med_name = groups["med"].strip()
-
-                    # Filter: Mindestlänge für Medikamentennamen
-                    if len(med_name) < self.MIN_MED_NAME_LENGTH:
-                        continue
+        for _, match in self.SCANNER.scan(text):
+            groups = match.groupdict()
+            try:
+                med_name = groups["med"].strip()
 
-                    # Filter: Applikationsrouten und häufige Nicht-Medikamente
-                    if med_name.lower() in self.ROUTE_ABBREVIATIONS:
-                        continue
+                # Filter: Mindestlänge für Medikamentennamen
+                if len(med_name) < self.MIN_MED_NAME_LENGTH:
+                    continue
 
-                    dose = float(groups["dose"].replace(",", "."))
-                    extractions.append({
-                        "medication": med_name,
-                        "dose": dose,
-                        "unit": groups["unit"].lower(),
-                        "original": match.group(0)
-                    })
-                except (ValueError, KeyError):
+                # Filter: Applikationsrouten und häufige Nicht-Medikamente
+                if med_name.lower() in self.ROUTE_ABBREVIATIONS:
                     continue
+
+                dose = float(groups["dose"].replace(",", "."))
+                extractions.append({
+                    "medication": med_name,
+                    "dose": dose,
+                    "unit": groups["unit"].lower(),
+                    "original": match.group(0)
+                })
+            except (ValueError, KeyError):
+                continue
         return extractions
 
     def validate(self, text: str) -> Tuple[List[Dict], List[ValidationIssue]]:
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+MedExamAI Pattern Scanner
+=========================
+
+Gemeinsame Scan-Engine für die Regex-Pattern-Sets der Validatoren
+(HallucinationFilter, MedicalFactChecker, DosageValidator) sowie ein
+Aho-Corasick-Automat für feste Keyword-Listen (category_classifier).
+
+Statt jedes Pattern per ``finditer`` über den ganzen Text laufen zu lassen,
+wird beim Registrieren aus dem Parse-Baum jedes Patterns eine Menge von
+Pflicht-Literalen abgeleitet ("mindestens eines davon steht in jedem Treffer").
+Pro Text wird einmal eine case-gefaltete Fassung erzeugt und gegen alle
+Literale geprüft (C-Substring-Suche); nur Pattern mit vorhandenem Literal
+werden danach wirklich ausgeführt. Die Treffer sind identisch zu einzelnen
+``finditer``-Läufen (inkl. Reihenfolge und Überlappungen zwischen Pattern) –
+eine kombinierte Alternation würde überlappende Treffer verschlucken.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:  # Python >= 3.11
+    from re import _parser as _sre_parse  # type: ignore
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse  # type: ignore
+
+try:
+    import ahocorasick  # type: ignore
+    AHOCORASICK_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    ahocorasick = None  # type: ignore
+    AHOCORASICK_AVAILABLE = False
+
+# Kürzere Pflicht-Literale filtern praktisch nichts heraus
+MIN_LITERAL_LENGTH = 2
+
+# Bis zu so vielen Keywords ist str.find (C) schneller als die Python-DFA
+FIND_SCAN_MAX_KEYWORDS = 128
+
+# Die einzigen Zeichen, bei denen re.IGNORECASE und str.casefold() uneins sind
+_CASEFOLD_FIXES = {0x130: "i", 0x131: "i"}
+
+
+def _fold(text: str) -> str:
+    return text.translate(_CASEFOLD_FIXES).casefold()
+
+
+@lru_cache(maxsize=64)
+def fold_text(text: str) -> str:
+    """Case-gefaltete Fassung eines Texts (gecacht, damit mehrere Scanner pro Antwort nur einmal falten)."""
+    return _fold(text)
+
+
+# (Literal, case-insensitiv?)
+_Literal = Tuple[str, bool]
+
+
+def _best(options: List[Set[_Literal]]) -> Optional[Set[_Literal]]:
+    """Wählt die selektivste Literal-Menge (längstes kürzestes Literal, dann wenigste Alternativen)."""
+    best = None
+    best_key = None
+    for option in options:
+        key = (min(len(lit) for lit, _ in option), -len(option))
+        if best_key is None or key > best_key:
+            best, best_key = option, key
+    return best
+
+
+def _required(items, ignorecase: bool) -> Optional[Set[_Literal]]:
+    """Pflicht-Literale einer Sequenz aus dem sre-Parse-Baum (None = keine bekannt)."""
+    options: List[Set[_Literal]] = []
+    run: List[str] = []
+
+    def close_run() -> None:
+        if run:
+            literal = "".join(run)
+            options.append({(_fold(literal) if ignorecase else literal, ignorecase)})
+            run.clear()
+
+    for op, av in items:
+        name = op.name if hasattr(op, "name") else str(op)
+        if name == "LITERAL":
+            run.append(chr(av))
+            continue
+        close_run()
+        if name == "SUBPATTERN":
+            add_flags, del_flags, sub = av[1], av[2], av[3]
+            sub_ignorecase = ignorecase
+            if add_flags & re.IGNORECASE:
+                sub_ignorecase = True
+            if del_flags & re.IGNORECASE:
+                sub_ignorecase = False
+            found = _required(sub, sub_ignorecase)
+            if found:
+                options.append(found)
+        elif name == "BRANCH":
+            union: Set[_Literal] = set()
+            for branch in av[1]:
+                found = _required(branch, ignorecase)
+                if not found:
+                    union = set()
+                    break
+                union |= found
+            if union:
+                options.append(union)
+        elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") and av[0] >= 1:
+            found = _required(av[2], ignorecase)
+            if found:
+                options.append(found)
+        elif name == "ATOMIC_GROUP":
+            found = _required(av, ignorecase)
+            if found:
+                options.append(found)
+        # IN, ANY, AT, ASSERT*, GROUPREF, optionale Wiederholungen: kein Pflicht-Literal
+    close_run()
+    return _best(options) if options else None
+
+
+def required_literals(pattern: "re.Pattern") -> Optional[Set[_Literal]]:
+    """
+    Literale, von denen jeder Treffer von `pattern` mindestens eines enthält.
+
+    Returns:
+        Menge von (Literal, case-insensitiv) oder None, wenn das Pattern
+        keinen brauchbaren Vorfilter hat (dann wird es immer ausgeführt)
+    """
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:  # noqa: BLE001 - unbekannte Syntax: ohne Vorfilter arbeiten
+        return None
+    if not isinstance(pattern.pattern, str):
+        return None
+    found = _required(list(parsed), bool(pattern.flags & re.IGNORECASE))
+    if not found or min(len(lit) for lit, _ in found) < MIN_LITERAL_LENGTH:
+        return None
+    return found
+
+
+class MultiPatternScanner:
+    """
+    Registriert viele Pattern (mit Besitzer-Key) und scannt Texte in einem Durchgang.
+
+    Beispiel:
+        scanner = MultiPatternScanner()
+        scanner.add(("uncertainty", "medium"), r"möglicherweise", re.IGNORECASE)
+        for key, match in scanner.scan(text):
+            ...
+    """
+
+    def __init__(self, entries: Optional[Iterable[Tuple[Any, str, int]]] = None):
+        self.keys: List[Any] = []
+        self.patterns: List["re.Pattern"] = []
+        self._literals: List[Optional[Set[_Literal]]] = []
+        for key, pattern, flags in entries or []:
+            self.add(key, pattern, flags)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def add(self, key: Any, pattern: str, flags: int = 0) -> "re.Pattern":
+        """Registriert ein Pattern und gibt die kompilierte Fassung zurück."""
+        compiled = re.compile(pattern, flags)
+        self.keys.append(key)
+        self.patterns.append(compiled)
+        self._literals.append(required_literals(compiled))
+        return compiled
+
+    def candidates(self, text: str, indices: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Indizes der Pattern, die in `text` überhaupt treffen können (Registrierungsreihenfolge).
+
+        Args:
+            text: Zu scannender Text
+            indices: Optional nur diese Pattern prüfen (z.B. Vorauswahl auf dem Gesamttext)
+        """
+        folded = None
+        result = []
+        for i in (range(len(self.patterns)) if indices is None else indices):
+            literals = self._literals[i]
+            if literals is None:
+                result.append(i)
+                continue
+            for literal, ignorecase in literals:
+                if ignorecase:
+                    if folded is None:
+                        folded = fold_text(text)
+                    if literal in folded:
+                        break
+                elif literal in text:
+                    break
+            else:
+                continue
+            result.append(i)
+        return result
+
+    def scan(self, text: str, indices: Optional[Iterable[int]] = None) -> List[Tuple[Any, "re.Match"]]:
+        """
+        Alle Treffer als (key, match) – gleiche Menge und Reihenfolge wie
+        ``finditer`` pro Pattern in Registrierungsreihenfolge.
+        """
+        matches = []
+        for i in self.candidates(text, indices):
+            key = self.keys[i]
+            matches.extend((key, match) for match in self.patterns[i].finditer(text))
+        return matches
+
+
+def _is_word_char(ch: str) -> bool:
+    """Wortzeichen wie bei re's ``\\w`` (Unicode): alphanumerisch oder Unterstrich."""
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick-Automat über feste Keywords (z.B. Kategorie-Keywords).
+
+    Findet alle Vorkommen aller Keywords in einem Durchgang über den Text –
+    die Laufzeit hängt von der Textlänge ab, nicht von der Anzahl Keywords.
+    Mit installiertem ``pyahocorasick`` läuft der Scan in C, sonst werden die
+    Übergänge beim Build zu einer vollständigen DFA aufgelöst (ein Dict-Lookup
+    pro Zeichen in reinem Python). Kleine Keyword-Mengen (bis
+    FIND_SCAN_MAX_KEYWORDS) prüft ``scan`` ohne nativen Automaten direkt per
+    ``str.find``.
+    """
+
+    def __init__(self, keywords: Iterable[str] = ()):
+        self._keywords: Dict[str, None] = {}
+        for keyword in keywords:
+            self.add(keyword)
+        self._delta: Optional[List[Dict[str, int]]] = None
+        self._output: List[Tuple[str, ...]] = []
+        self._native = None
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self._keywords
+
+    def add(self, keyword: str) -> None:
+        """Fügt ein Keyword hinzu (Automat wird beim nächsten Scan neu gebaut)."""
+        if keyword and keyword not in self._keywords:
+            self._keywords[keyword] = None
+            self._delta = None
+            self._native = None
+
+    def build(self) -> None:
+        """Baut Trie, Failure-Links und die vollständige Übergangstabelle."""
+        if AHOCORASICK_AVAILABLE:
+            native = ahocorasick.Automaton()
+            for keyword in self._keywords:
+                native.add_word(keyword, keyword)
+            if self._keywords:
+                native.make_automaton()
+            self._native = native
+            self._delta = []
+            return
+
+        goto: List[Dict[str, int]] = [{}]
+        output: List[Tuple[str, ...]] = [()]
+        for keyword in self._keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    output.append(())
+                state = nxt
+            output[state] = output[state] + (keyword,)
+
+        # Breitensuche: delta[s] = delta[fail(s)] überschrieben mit den eigenen Kanten
+        delta: List[Dict[str, int]] = [dict() for _ in goto]
+        delta[0] = dict(goto[0])
+        queue = []
+        for child in goto[0].values():
+            queue.append((child, 0))
+        head = 0
+        while head < len(queue):
+            state, fail = queue[head]
+            head += 1
+            output[state] = output[state] + output[fail]
+            table = dict(delta[fail])
+            for ch, child in goto[state].items():
+                queue.append((child, delta[fail].get(ch, 0)))
+                table[ch] = child
+            delta[state] = table
+        self._delta = delta
+        self._output = output
+
+    def iter_matches(self, text: str):
+        """Liefert (start, keyword) für alle (auch überlappenden) Vorkommen, geordnet nach Endposition."""
+        if self._delta is None:
+            self.build()
+        if self._native is not None:
+            if len(self._keywords):
+                for end, keyword in self._native.iter(text):
+                    yield end + 1 - len(keyword), keyword
+            return
+        delta = self._delta
+        output = self._output
+        state = 0
+        for end, ch in enumerate(text, 1):
+            state = delta[state].get(ch, 0)
+            if output[state]:
+                for keyword in output[state]:
+                    yield end - len(keyword), keyword
+
+    def scan(self, text: str) -> Dict[str, bool]:
+        """
+        Alle im Text vorkommenden Keywords.
+
+        Returns:
+            Dict keyword -> True, wenn mindestens ein Vorkommen an beiden Enden
+            auf Wortgrenzen liegt (Semantik von ``\\b keyword \\b``), sonst False
+        """
+        hits: Dict[str, bool] = {}
+        if not AHOCORASICK_AVAILABLE and len(self._keywords) <= FIND_SCAN_MAX_KEYWORDS:
+            for keyword in self._keywords:
+                start = text.find(keyword)
+                while start >= 0:
+                    hits[keyword] = self._on_word_boundary(text, start, keyword)
+                    if hits[keyword]:
+                        break
+                    start = text.find(keyword, start + 1)
+            return hits
+
+        for start, keyword in self.iter_matches(text):
+            if hits.get(keyword):
+                continue
+            hits[keyword] = self._on_word_boundary(text, start, keyword)
+        return hits
+
+    @staticmethod
+    def _on_word_boundary(text: str, start: int, keyword: str) -> bool:
+        end = start + len(keyword)
+        left = start > 0 and _is_word_char(text[start - 1])
+        right = end < len(text) and _is_word_char(text[end])
+        return left != _is_word_char(keyword[0]) and right != _is_word_char(keyword[-1])
@@ -30,6 +30,8 @@ from typing import Any, Dict, List, Optional
 
 import requests
 
+from core.http_pool import HTTPSessionPool, get_default_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -84,6 +86,7 @@ WICHTIG:
         model: str = "sonar-pro",
         timeout: int = 60,
         max_retries: int = 3,
+        http_pool: Optional[HTTPSessionPool] = None,
     ):
         """
         Initialisiert den PDF-Finder.
@@ -93,11 +96,13 @@ WICHTIG:
             model: Perplexity-Modell (default: sonar-pro)
             timeout: Request-Timeout in Sekunden
             max_retries: Maximale Retry-Versuche
+            http_pool: Keep-Alive-Verbindungspool (z.B. UnifiedAPIClient.http, sonst geteilter Standard-Pool)
         """
         self.api_keys = api_keys or self._load_api_keys()
         self.model = model
         self.timeout = timeout
         self.max_retries = max_retries
+        self.http = http_pool or get_default_pool()
         self._key_index = 0
 
         if not self.api_keys:
@@ -235,7 +240,7 @@ Antworte ausschließlich mit dem JSON-Objekt."""
             "max_tokens": 800,
         }
 
-        resp = requests.post(
+        resp = self.http.post(
             "https://api.perplexity.ai/chat/completions",
             headers=headers,
             json=payload,
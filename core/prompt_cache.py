@@ -1,43 +1,159 @@
-"""Filesystem backed prompt cache for high reuse prompts."""
+"""Persistent prompt cache (SQLite) for high reuse prompts, shared across threads and processes."""
 from __future__ import annotations
 
 import hashlib
 import json
+import sqlite3
 import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+# Read hits are buffered in memory and written in one transaction per batch
+HIT_FLUSH_BATCH = 64
+HIT_FLUSH_INTERVAL = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    cache_key TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 1,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_entries_hits ON entries (hits, accessed_at);
+CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries (expires_at) WHERE expires_at IS NOT NULL;
+
+-- Running totals, kept by triggers so size checks never scan the table
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals (id, entries, bytes) VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 0;
+END;
+"""
 
 
 class PromptCache:
-    """Lightweight persistent cache for prompt responses."""
+    """
+    Lightweight persistent cache for prompt responses.
 
-    def __init__(self, cache_path: str = "cache/prompt_cache.json", max_entries: int = 2000) -> None:
+    Entries live in one SQLite database (WAL mode), so every ``set`` is a
+    single-row upsert and parallel batch scripts can share the cache file.
+    Eviction is true LRU (or LFU) by access time / hit count, bounded by entry
+    count and optionally by total response bytes. Entries can expire per scope.
+    Lookups are plain reads; hit counts and access times are buffered and
+    flushed in batches (and before every write, so eviction sees them).
+    """
+
+    def __init__(
+        self,
+        cache_path: str = "cache/prompt_cache.json",
+        max_entries: int = 2000,
+        max_bytes: Optional[int] = None,
+        policy: str = "lru",
+        default_ttl: Optional[float] = None,
+        scope_ttls: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        Args:
+            cache_path: Database path, or a legacy JSON path; the database then lives next to it as ``.sqlite``.
+            max_entries: Max. number of cached responses.
+            max_bytes: Max. total size of stored responses (UTF-8 JSON bytes), None = unbounded.
+            policy: "lru" (least recently used) or "lfu" (least frequently used).
+            default_ttl: Seconds until an entry expires, None = never.
+            scope_ttls: TTL overrides per scope.
+        """
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"policy must be one of {EVICTION_POLICIES}")
         self.cache_path = Path(cache_path)
         self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_path.with_suffix(".sqlite")
         self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.default_ttl = default_ttl
+        self.scope_ttls = dict(scope_ttls or {})
         self._lock = threading.Lock()
-        self._store: Dict[str, Dict[str, Any]] = {}
+        # cache_key -> (buffered hits, last access time), guarded by _lock
+        self._pending_hits: Dict[str, Tuple[int, float]] = {}
+        self._last_flush = time.monotonic()
+        # Autocommit mode: write transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
         self._load()
 
     def _load(self) -> None:
-        if self.cache_path.is_file():
-            try:
-                data = json.loads(self.cache_path.read_text(encoding="utf-8"))
-                if isinstance(data, dict):
-                    self._store = data
-            except json.JSONDecodeError:
-                self._store = {}
-
-    def _persist(self) -> None:
-        self.cache_path.write_text(json.dumps(self._store, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    def _evict_if_needed(self) -> None:
-        if len(self._store) <= self.max_entries:
+        """Imports a legacy JSON cache once and renames it to ``*.migrated``."""
+        if self.cache_path == self.db_path or not self.cache_path.is_file():
             return
-        # Evict oldest entries based on insertion order
-        while len(self._store) > self.max_entries:
-            first_key = next(iter(self._store))
-            self._store.pop(first_key, None)
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            data = {}
+        if isinstance(data, dict):
+            now = time.time()
+            rows = []
+            for offset, (cache_key, entry) in enumerate(data.items()):
+                if not isinstance(entry, dict) or "response" not in entry:
+                    continue
+                response = json.dumps(entry["response"], ensure_ascii=False)
+                # Insertion order becomes the initial access order
+                rows.append((cache_key, "", response, len(response.encode("utf-8")),
+                             now, now + offset * 1e-6, int(entry.get("hits", 1)), None))
+            with self._write() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                self._evict_if_needed(conn)
+        self.cache_path.rename(self.cache_path.with_name(self.cache_path.name + ".migrated"))
+
+    def _write(self) -> "_WriteTransaction":
+        return _WriteTransaction(self._conn, self._lock)
+
+    def _ttl(self, scope: str) -> Optional[float]:
+        return self.scope_ttls.get(scope, self.default_ttl)
+
+    def _evict_if_needed(self, conn: sqlite3.Connection, keep: Optional[str] = None) -> None:
+        """Drops expired entries, then the least recently / frequently used ones (never `keep`)."""
+        now = time.time()
+        conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        entries, total_bytes = conn.execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+        over_entries = entries - self.max_entries
+        over_bytes = total_bytes - self.max_bytes if self.max_bytes is not None else 0
+        if over_entries <= 0 and over_bytes <= 0:
+            return
+        order = "accessed_at" if self.policy == "lru" else "hits, accessed_at"
+        victims = []
+        for cache_key, size in conn.execute(f"SELECT cache_key, size FROM entries ORDER BY {order}"):
+            if over_entries <= 0 and over_bytes <= 0:
+                break
+            if cache_key == keep:
+                continue
+            victims.append((cache_key,))
+            over_entries -= 1
+            over_bytes -= size
+        conn.executemany("DELETE FROM entries WHERE cache_key = ?", victims)
 
     def _hash_messages(self, messages: Any, scope: str) -> str:
         payload = json.dumps({"messages": messages, "scope": scope}, sort_keys=True, ensure_ascii=False)
@@ -45,19 +161,122 @@ class PromptCache:
 
     def get(self, messages: Any, scope: str) -> Optional[Dict[str, Any]]:
         cache_key = self._hash_messages(messages, scope)
+        now = time.time()
         with self._lock:
-            entry = self._store.get(cache_key)
-            if entry:
-                entry["hits"] = entry.get("hits", 0) + 1
-        return entry
+            row = self._conn.execute(
+                "SELECT response, hits, expires_at FROM entries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, hits, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                return None  # removed by the next eviction pass
+            pending, _ = self._pending_hits.get(cache_key, (0, now))
+            self._pending_hits[cache_key] = (pending + 1, now)
+            flush = (
+                len(self._pending_hits) >= HIT_FLUSH_BATCH
+                or time.monotonic() - self._last_flush >= HIT_FLUSH_INTERVAL
+            )
+        if flush:
+            self.flush_hits()
+        return {"response": json.loads(response), "hits": hits + pending + 1}
+
+    def flush_hits(self) -> None:
+        """Writes buffered hit counts and access times."""
+        with self._write() as conn:
+            self._apply_hits(conn)
+
+    def _apply_hits(self, conn: sqlite3.Connection) -> None:
+        """Applies buffered hits inside an open write transaction (caller holds _lock)."""
+        self._last_flush = time.monotonic()
+        if not self._pending_hits:
+            return
+        conn.executemany(
+            "UPDATE entries SET hits = hits + ?, accessed_at = MAX(accessed_at, ?) WHERE cache_key = ?",
+            [(count, accessed_at, key) for key, (count, accessed_at) in self._pending_hits.items()],
+        )
+        self._pending_hits.clear()
 
     def set(self, messages: Any, scope: str, response: Dict[str, Any]) -> None:
         cache_key = self._hash_messages(messages, scope)
-        payload = {
-            "response": response,
-            "hits": 1,
+        payload = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        ttl = self._ttl(scope)
+        with self._write() as conn:
+            self._apply_hits(conn)
+            conn.execute(
+                """
+                INSERT INTO entries (cache_key, scope, response, size, created_at, accessed_at, hits, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    response = excluded.response,
+                    size = excluded.size,
+                    created_at = excluded.created_at,
+                    accessed_at = excluded.accessed_at,
+                    expires_at = excluded.expires_at
+                """,
+                (cache_key, scope, payload, len(payload.encode("utf-8")), now, now,
+                 now + ttl if ttl is not None else None),
+            )
+            self._evict_if_needed(conn, keep=cache_key)
+
+    def invalidate(self, messages: Any, scope: str) -> bool:
+        """Removes one entry; returns True if it existed."""
+        cache_key = self._hash_messages(messages, scope)
+        with self._write() as conn:
+            self._apply_hits(conn)
+            return conn.execute("DELETE FROM entries WHERE cache_key = ?", (cache_key,)).rowcount > 0
+
+    def clear(self, scope: Optional[str] = None) -> None:
+        """Removes all entries, or only those of one scope."""
+        with self._write() as conn:
+            self._apply_hits(conn)
+            if scope is None:
+                conn.execute("DELETE FROM entries")
+            else:
+                conn.execute("DELETE FROM entries WHERE scope = ?", (scope,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT entries, bytes FROM totals WHERE id = 0"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "policy": self.policy,
         }
+
+    def __len__(self) -> int:
+        return self.stats()["entries"]
+
+    def close(self) -> None:
+        if self._pending_hits:
+            self.flush_hits()
         with self._lock:
-            self._store[cache_key] = payload
-            self._evict_if_needed()
-            self._persist()
+            self._conn.close()
+
+
+class _WriteTransaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT`` under the per-instance lock (other processes wait on the busy timeout)."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock) -> None:
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._lock.acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._lock.release()
+            raise
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._lock.release()
@@ -11,6 +11,7 @@ Features:
 - Wissensbasis-Aufbau aus Gold-Standard-Dokumenten
 - Kontextabfrage für Antwortgenerierung
 - Kosten-Tracking für API-Nutzung
+- Binäres KB-Format (memmap-Embeddings, siehe core.kb_store)
 
 Autor: MedExamAI Team
 """
@@ -19,14 +20,21 @@ import hashlib
 import json
 import logging
 import os
+import shutil
+import sqlite3
+import threading
 import time
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, field, fields
 from pathlib import Path
 from typing import List, Dict, Optional, Any, Union, Tuple
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 import numpy as np
 
+from .ann_index import create_ann_index, load_ann_index
+from .bm25_index import BM25Index
+from .kb_store import RECORD_FIELDS, BinaryKBWriter, BinaryKnowledgeBase, ids_fingerprint, is_binary_kb
+
 # Sentence Transformers für echte semantische Embeddings
 # (robust: in manchen Umgebungen schlagen Transitive-Imports z.B. über torch fehl)
 try:
@@ -59,8 +67,27 @@ class RAGConfig:
     top_k: int = 5
     similarity_threshold: float = 0.3  # Niedriger für bessere Recall (war 0.7!)
 
+    # ANN-Index (optional, für große KBs; Kandidaten werden exakt nachbewertet)
+    ann_backend: str = "none"  # none, ivf, hnsw (hnswlib), auto
+    ann_min_items: int = 50_000  # darunter immer exakte Suche
+    ann_nlist: int = 0  # IVF: Anzahl Listen (0 = auto, ~4*sqrt(n))
+    ann_nprobe: int = 16  # IVF: durchsuchte Listen pro Query (höher = besserer Recall, langsamer)
+    ann_hnsw_m: int = 16
+    ann_hnsw_ef_construction: int = 200
+    ann_hnsw_ef_search: int = 128  # HNSW: Suchbreite (höher = besserer Recall, langsamer)
+    ann_candidates: int = 200  # HNSW: Kandidaten pro Query vor dem exakten Re-Ranking
+    ann_retrain_factor: float = 4.0  # IVF neu trainieren, wenn KB um diesen Faktor gewachsen ist
+
+    # Hybride Suche (BM25 + Dense, fusioniert per Reciprocal Rank Fusion)
+    hybrid_search: bool = False  # Standard für search()/search_many()/get_context_for_question()
+    hybrid_candidates: int = 50  # Kandidaten pro Retriever vor der Fusion
+    rrf_k: int = 60  # RRF-Konstante: score = sum(1 / (rrf_k + rank))
+    bm25_k1: float = 1.5
+    bm25_b: float = 0.75
+
     # Verarbeitungsparameter
-    batch_size: int = 32
+    batch_size: int = 32  # Batch-Größe pro Encoder-Forward-Pass (lokal)
+    embedding_request_size: int = 2048  # Texte pro Embedding-Aufruf (OpenAI-Limit: 2048 Inputs/Request)
 
     # Kosten-Tracking
     cost_per_1m_tokens: float = 0.02  # $0.02 per 1M tokens für text-embedding-3-small
@@ -74,14 +101,18 @@ class EmbeddedContent:
     """Inhalt mit Embedding-Vektor."""
     content_id: str
     text: str
-    embedding: List[float]
+    # None, sobald der Eintrag in der EmbeddingMatrix liegt (siehe MedicalRAGSystem.get_embedding)
+    embedding: Optional[List[float]]
     metadata: Dict[str, Any]
     source_module: str  # z.B. "gold_standard", "leitlinien", "fragen"
     source_tier: str  # "tier1_gold" oder "tier2_bibliothek"
     timestamp: str
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        if isinstance(self.embedding, np.ndarray):  # memmap-Zeile aus Binär-KB
+            data["embedding"] = self.embedding.tolist()
+        return data
 
 
 @dataclass
@@ -125,54 +156,332 @@ class CostTracker:
 
 
 class EmbeddingCache:
-    """Cache für Embeddings zur Vermeidung von Neuberechnung."""
+    """
+    Persistenter Embedding-Cache (SQLite, float32-BLOBs) zur Vermeidung von Neuberechnung.
+
+    - Schlüssel: (Modellname, Text-Hash) -> kein Vermischen von Encodern/Dimensionen
+    - Inserts sind O(1) (Einzelzeile, Commit gebündelt alle `commit_every` Writes bzw. bei save())
+    - Lookups lesen lazy aus der DB; ein optionales LRU hält heiße Einträge als
+      float32-Arrays im Speicher (20k x 768 Dim. ~ 60 MB)
+    - Ein altes ``embeddings.json`` wird beim ersten Öffnen einmalig übernommen;
+      Einträge mit abweichender Dimension bleiben darin erhalten
+    """
 
-    def __init__(self, cache_dir: str = ".embedding_cache"):
+    def __init__(
+        self,
+        cache_dir: str = ".embedding_cache",
+        model_name: str = "default",
+        expected_dimension: Optional[int] = None,
+        max_memory_items: Optional[int] = 20_000,
+        commit_every: int = 500
+    ):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = self.cache_dir / "embeddings.json"
-        self.cache: Dict[str, Dict] = {}
-        self._load_cache()
-
-    def _load_cache(self) -> None:
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
-                logger.info(f"Cache geladen: {len(self.cache)} Embeddings")
-            except Exception as e:
-                logger.error(f"Cache-Ladefehler: {e}")
-                self.cache = {}
+        self.db_path = self.cache_dir / "embeddings.sqlite"
+        self.legacy_file = self.cache_dir / "embeddings.json"
+        self.model_name = model_name
+        self.max_memory_items = max_memory_items
+        self.commit_every = commit_every
+        self._lru: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._pending_writes = 0
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                metadata TEXT,
+                timestamp TEXT,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+        self._migrate_legacy_json(expected_dimension)
 
-    def _save_cache(self) -> None:
+    def _migrate_legacy_json(self, expected_dimension: Optional[int]) -> None:
+        """Übernimmt Einträge aus embeddings.json (ohne Modellinfo) für das aktuelle Modell."""
+        if not self.legacy_file.exists():
+            return
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f)
-            logger.debug(f"Cache gespeichert: {len(self.cache)} Embeddings")
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
         except Exception as e:
-            logger.error(f"Cache-Speicherfehler: {e}")
+            logger.error(f"Cache-Ladefehler (Legacy-JSON): {e}")
+            return
 
-    def get(self, text: str) -> Optional[List[float]]:
-        key = self._generate_key(text)
-        entry = self.cache.get(key)
-        return entry.get("embedding") if entry else None
-
-    def set(self, text: str, embedding: List[float], metadata: Dict = None) -> None:
-        key = self._generate_key(text)
-        self.cache[key] = {
-            "embedding": embedding,
-            "metadata": metadata or {},
-            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
-        }
+        imported = invalid = 0
+        # Einträge eines anderen Encoders (abweichende Dimension) bleiben im Legacy-JSON
+        remaining: Dict[str, Any] = {}
+        with self._lock:
+            for key, entry in legacy.items():
+                embedding = (entry or {}).get("embedding")
+                if not embedding:
+                    invalid += 1
+                    continue
+                if expected_dimension and len(embedding) != expected_dimension:
+                    remaining[key] = entry
+                    continue
+                self._write(self.model_name, key, embedding, entry.get("metadata"), entry.get("timestamp"))
+                imported += 1
+            self._conn.commit()
+            self._pending_writes = 0
+
+        # Das erste .migrated enthält das vollständige Original und wird nicht überschrieben
+        migrated = self.legacy_file.with_name("embeddings.json.migrated")
+        if not migrated.exists():
+            self.legacy_file.rename(migrated)
+        elif not remaining:
+            self.legacy_file.unlink()
+        if remaining:
+            tmp = self.legacy_file.with_name(f"embeddings.json.tmp-{os.getpid()}")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(remaining, f, ensure_ascii=False)
+            os.replace(tmp, self.legacy_file)
+            logger.warning(
+                f"{len(remaining)} Legacy-Embeddings mit abweichender Dimension verbleiben in {self.legacy_file}"
+            )
+        logger.info(
+            f"Legacy-Cache migriert: {imported} Embeddings für '{self.model_name}' "
+            f"({len(remaining)} verbleiben, {invalid} ohne Vektor)"
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _remember(self, key: Tuple[str, str], embedding: np.ndarray) -> None:
+        if self.max_memory_items == 0:
+            return
+        self._lru[key] = embedding
+        self._lru.move_to_end(key)
+        if self.max_memory_items is not None:
+            while len(self._lru) > self.max_memory_items:
+                self._lru.popitem(last=False)
+
+    def get(self, text: str, model: Optional[str] = None) -> Optional[List[float]]:
+        key = (model or self.model_name, self._generate_key(text))
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                return vector.tolist()
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE model = ? AND text_hash = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            vector = np.frombuffer(row[0], dtype=np.float32)
+            self._remember(key, vector)
+            return vector.tolist()
+
+    def set(self, text: str, embedding: List[float], metadata: Dict = None, model: Optional[str] = None) -> None:
+        key = (model or self.model_name, self._generate_key(text))
+        with self._lock:
+            vector = self._write(key[0], key[1], embedding, metadata, time.strftime("%Y-%m-%dT%H:%M:%S"))
+            self._remember(key, vector)
+            if self._pending_writes >= self.commit_every:
+                self._conn.commit()
+                self._pending_writes = 0
+
+    def _write(
+        self,
+        model: str,
+        text_hash: str,
+        embedding: List[float],
+        metadata: Optional[Dict],
+        timestamp: Optional[str]
+    ) -> np.ndarray:
+        vector = np.array(embedding, dtype=np.float32)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector, metadata, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (model, text_hash, int(vector.shape[0]), vector.tobytes(),
+             json.dumps(metadata or {}, ensure_ascii=False), timestamp),
+        )
+        self._pending_writes += 1
+        return vector
 
     def save(self) -> None:
-        self._save_cache()
+        """Committet ausstehende Writes (O(neue Einträge), kein Neuschreiben des Caches)."""
+        try:
+            with self._lock:
+                self._conn.commit()
+                self._pending_writes = 0
+            logger.debug("Embedding-Cache gespeichert")
+        except Exception as e:
+            logger.error(f"Cache-Speicherfehler: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
 
     @staticmethod
     def _generate_key(text: str) -> str:
         return hashlib.md5(text.encode()).hexdigest()
 
 
+class EmbeddingMatrix:
+    """
+    Zusammenhängende float32-Matrix aller KB-Embeddings (zeilenweise L2-normalisiert).
+
+    Hält parallel zu den Zeilen die Modul- und Tier-Codes als Integer-Arrays,
+    damit Filter als boolesche Masken und der Tier1-Bonus als Gewichtsvektor
+    ausgewertet werden können. Kapazität wächst geometrisch, Einfügen ist
+    amortisiert O(1).
+    """
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 1024):
+        self.dimension = dimension
+        self.initial_capacity = max(1, initial_capacity)
+        self.size = 0
+        self.ids: List[str] = []
+        self.row_by_id: Dict[str, int] = {}
+        self.module_vocab: Dict[str, int] = {}
+        self.tier_vocab: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._module_codes = np.zeros(0, dtype=np.int32)
+        self._tier_codes = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Belegter Teil der Matrix (View, keine Kopie)."""
+        if self._vectors is None:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+        return self._vectors[:self.size]
+
+    @property
+    def module_codes(self) -> np.ndarray:
+        return self._module_codes[:self.size]
+
+    @property
+    def tier_codes(self) -> np.ndarray:
+        return self._tier_codes[:self.size]
+
+    @classmethod
+    def from_arrays(
+        cls,
+        vectors: np.ndarray,
+        ids: List[str],
+        module_codes: np.ndarray,
+        tier_codes: np.ndarray,
+        module_vocab: Dict[str, int],
+        tier_vocab: Dict[str, int]
+    ) -> "EmbeddingMatrix":
+        """
+        Übernimmt bereits normalisierte Vektoren ohne Kopie (z.B. read-only memmap).
+
+        Die Daten werden erst beim ersten schreibenden Zugriff in den RAM kopiert.
+        """
+        matrix = cls(dimension=int(vectors.shape[1]))
+        matrix._vectors = vectors
+        matrix.size = int(vectors.shape[0])
+        matrix.ids = list(ids)
+        matrix.row_by_id = {content_id: row for row, content_id in enumerate(matrix.ids)}
+        matrix._module_codes = np.asarray(module_codes, dtype=np.int32)
+        matrix._tier_codes = np.asarray(tier_codes, dtype=np.int32)
+        matrix.module_vocab = dict(module_vocab)
+        matrix.tier_vocab = dict(tier_vocab)
+        return matrix
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalisiert Zeilen (Nullvektoren bleiben Nullvektoren)."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _ensure_capacity(self, needed: int) -> None:
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(self.initial_capacity, capacity * 2, needed)
+        vectors = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        module_codes = np.zeros(new_capacity, dtype=np.int32)
+        tier_codes = np.zeros(new_capacity, dtype=np.int32)
+        if self.size:
+            vectors[:self.size] = self._vectors[:self.size]
+            module_codes[:self.size] = self._module_codes[:self.size]
+            tier_codes[:self.size] = self._tier_codes[:self.size]
+        self._vectors = vectors
+        self._module_codes = module_codes
+        self._tier_codes = tier_codes
+
+    @staticmethod
+    def _code(vocab: Dict[str, int], name: str) -> int:
+        if name not in vocab:
+            vocab[name] = len(vocab)
+        return vocab[name]
+
+    def add(self, content_id: str, embedding: List[float], source_module: str, source_tier: str) -> int:
+        """
+        Fügt ein Embedding hinzu bzw. überschreibt die Zeile einer bestehenden ID.
+
+        Returns:
+            Zeilenindex des Eintrags
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = int(vector.shape[0])
+        if vector.shape[0] != self.dimension:
+            raise ValueError(
+                f"Embedding-Dimensionskonflikt in Matrix: {vector.shape[0]}, erwartet {self.dimension}"
+            )
+
+        row = self.row_by_id.get(content_id)
+        if row is None:
+            self._ensure_capacity(self.size + 1)
+            row = self.size
+            self.size += 1
+            self.ids.append(content_id)
+            self.row_by_id[content_id] = row
+        elif not self._vectors.flags.writeable:
+            self._vectors = np.array(self._vectors)  # Copy-on-write für memmap-Daten
+
+        self._vectors[row] = self.normalize(vector)
+        self._module_codes[row] = self._code(self.module_vocab, source_module)
+        self._tier_codes[row] = self._code(self.tier_vocab, source_tier)
+        return row
+
+    def filter_mask(
+        self,
+        source_modules: Optional[List[str]] = None,
+        source_tiers: Optional[List[str]] = None,
+        rows: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        """Boolesche Maske für Modul-/Tier-Filter (None = kein Filter), optional nur für `rows`."""
+        mask: Optional[np.ndarray] = None
+        if source_modules:
+            codes = [self.module_vocab[m] for m in source_modules if m in self.module_vocab]
+            module_codes = self.module_codes if rows is None else self.module_codes[rows]
+            mask = np.isin(module_codes, codes)
+        if source_tiers:
+            codes = [self.tier_vocab[t] for t in source_tiers if t in self.tier_vocab]
+            tier_codes = self.tier_codes if rows is None else self.tier_codes[rows]
+            tier_mask = np.isin(tier_codes, codes)
+            mask = tier_mask if mask is None else (mask & tier_mask)
+        return mask
+
+    def tier_weights(self, tier: str, bonus: float, rows: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Gewichtsvektor: `bonus` für Zeilen des Tiers, sonst 1.0 (None wenn Tier unbekannt)."""
+        code = self.tier_vocab.get(tier)
+        if code is None:
+            return None
+        tier_codes = self.tier_codes if rows is None else self.tier_codes[rows]
+        return np.where(tier_codes == code, np.float32(bonus), np.float32(1.0))
+
+
 class MedicalRAGSystem:
     """
     Haupt-RAG-System für medizinische Inhalte.
@@ -184,6 +493,9 @@ class MedicalRAGSystem:
     - Tier-basierte Suche (Gold-Standard priorisiert)
     """
 
+    # Max. Elemente einer Score-Matrix (Queries x KB) pro Block (~64 MB float32)
+    SCORE_BLOCK_ELEMENTS = 16_777_216
+
     def __init__(
         self,
         config: Optional[RAGConfig] = None,
@@ -192,13 +504,17 @@ class MedicalRAGSystem:
     ):
         self.config = config or RAGConfig()
         self.use_openai = use_openai
-        self.embedding_cache = EmbeddingCache(cache_dir)
         self.knowledge_base: Dict[str, EmbeddedContent] = {}
         self.index_by_module: Dict[str, List[str]] = defaultdict(list)
         self.index_by_tier: Dict[str, List[str]] = defaultdict(list)
+        self.embedding_matrix = EmbeddingMatrix()
+        self.ann_index = None  # optional, siehe build_ann_index()
+        self.lexical_index: Optional[BM25Index] = None  # BM25, wird bei hybrider Suche lazy aufgebaut
         self.cost_tracker = CostTracker()
         self.active_embedding_dim: Optional[int] = None  # Erzwinge konsistente Dimension über alle Embeddings
         self._dimension_mismatch_logged = False
+        # (Pfad, Zeilen) der zuletzt geschriebenen/geladenen Binär-KB für inkrementelles Speichern
+        self._persisted_kb: Optional[Tuple[str, int]] = None
 
         # OpenAI-Client initialisieren wenn gewünscht
         self.openai_client = None
@@ -210,8 +526,23 @@ class MedicalRAGSystem:
         if not self.use_openai and SENTENCE_TRANSFORMERS_AVAILABLE:
             self._init_local_model()
 
+        # Cache nach Modell-Initialisierung: Schlüssel enthalten den Modellnamen
+        self.embedding_cache = EmbeddingCache(
+            cache_dir,
+            model_name=self._embedding_model_name(),
+            expected_dimension=(
+                self.config.embedding_dimension if self.use_openai else self.config.local_embedding_dimension
+            ),
+        )
+
         logger.info(f"MedicalRAGSystem initialisiert (OpenAI: {use_openai}, LocalModel: {self.local_model is not None})")
 
+    def _embedding_model_name(self, openai: Optional[bool] = None) -> str:
+        """Name des Encoders, unter dem Embeddings gecacht werden."""
+        if openai is None:
+            openai = bool(self.use_openai and self.openai_client)
+        return self.config.embedding_model if openai else self.config.local_embedding_model
+
     def _init_local_model(self) -> None:
         """Initialisiert das lokale Sentence-Transformer Modell."""
         try:
@@ -302,7 +633,7 @@ class MedicalRAGSystem:
             self.cost_tracker.add_usage(tokens, self.config.cost_per_1m_tokens)
 
             # Cache speichern
-            self.embedding_cache.set(text, embedding)
+            self.embedding_cache.set(text, embedding, model=self._embedding_model_name(openai=True))
 
             self._ensure_active_embedding_dim(embedding, source="openai")
             return embedding
@@ -326,7 +657,7 @@ class MedicalRAGSystem:
                 embedding_list = embedding.tolist()
 
                 # Cache speichern
-                self.embedding_cache.set(text, embedding_list)
+                self.embedding_cache.set(text, embedding_list, model=self._embedding_model_name(openai=False))
 
                 self._ensure_active_embedding_dim(embedding_list, source="local_model")
                 return embedding_list
@@ -348,6 +679,93 @@ class MedicalRAGSystem:
         self._ensure_active_embedding_dim(embedding_list, source="fallback")
         return embedding_list
 
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generiert Embeddings für mehrere Texte in einem Durchgang.
+
+        Cache-Treffer werden direkt übernommen, alle Fehlschläge werden gebündelt
+        (je `config.embedding_request_size` Texte) in einem Encoder-Aufruf (lokal)
+        bzw. einem API-Request (OpenAI) erzeugt.
+
+        Args:
+            texts: Zu embeddende Texte
+
+        Returns:
+            Embedding-Vektoren in Eingabereihenfolge
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            cached = self.embedding_cache.get(text)
+            if cached:
+                self._ensure_active_embedding_dim(cached, source="cache")
+                embeddings[i] = cached
+            else:
+                missing.setdefault(text, []).append(i)
+
+        unique_texts = list(missing)
+        request_size = max(1, self.config.embedding_request_size)
+        for start in range(0, len(unique_texts), request_size):
+            batch = unique_texts[start:start + request_size]
+            if self.use_openai and self.openai_client:
+                generated = self._generate_openai_embeddings(batch)
+            else:
+                generated = self._generate_local_embeddings(batch)
+            for text, embedding in zip(batch, generated):
+                for i in missing[text]:
+                    embeddings[i] = embedding
+
+        return embeddings  # type: ignore[return-value]
+
+    def _generate_openai_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generiert Embeddings für mehrere Texte in einem OpenAI-Request."""
+        try:
+            response = self.openai_client.embeddings.create(
+                model=self.config.embedding_model,
+                input=[text[:8000] for text in texts]  # Max Input-Länge
+            )
+            data = sorted(response.data, key=lambda d: d.index)
+            embeddings = [d.embedding for d in data]
+
+            # Kosten tracken
+            tokens = response.usage.total_tokens
+            self.cost_tracker.add_usage(tokens, self.config.cost_per_1m_tokens)
+
+            model = self._embedding_model_name(openai=True)
+            for text, embedding in zip(texts, embeddings):
+                self._ensure_active_embedding_dim(embedding, source="openai")
+                self.embedding_cache.set(text, embedding, model=model)
+            return embeddings
+
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"OpenAI Batch-Embedding-Fehler: {e}")
+            return self._generate_local_embeddings(texts)
+
+    def _generate_local_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generiert Embeddings für mehrere Texte mit einem Encoder-Aufruf."""
+        if self.local_model is not None:
+            try:
+                matrix = self.local_model.encode(
+                    [text[:8000] for text in texts],  # Max Input-Länge begrenzen
+                    batch_size=self.config.batch_size,
+                    normalize_embeddings=True,  # L2-normalisiert
+                    show_progress_bar=False
+                )
+                embeddings = [row.tolist() for row in matrix]
+                model = self._embedding_model_name(openai=False)
+                for text, embedding in zip(texts, embeddings):
+                    self._ensure_active_embedding_dim(embedding, source="local_model")
+                    self.embedding_cache.set(text, embedding, model=model)
+                return embeddings
+            except ValueError:
+                raise
+            except Exception as e:
+                logger.warning(f"Batch-Embedding-Fehler, Fallback auf Einzeltexte: {e}")
+
+        return [self._generate_local_embedding(text) for text in texts]
+
     def _ensure_active_embedding_dim(self, embedding: List[float], source: str) -> None:
         """
         Stellt sicher, dass alle Embeddings dieselbe Dimension haben.
@@ -387,37 +805,55 @@ class MedicalRAGSystem:
         if isinstance(texts, str):
             texts = [texts]
 
-        added = 0
-        for text in texts:
-            if not text or len(text.strip()) < 10:
-                continue
+        texts = [text for text in texts if text and len(text.strip()) >= 10]
 
+        added = 0
+        request_size = max(1, self.config.embedding_request_size)
+        for start in range(0, len(texts), request_size):
+            batch = texts[start:start + request_size]
             try:
-                embedding = self.generate_embedding(text)
-            except ValueError as e:
-                logger.error(f"Überspringe Eintrag wegen Embedding-Dimension: {e}")
-                continue
-
-            content_id = f"{source_module}_{hashlib.md5(text.encode()).hexdigest()[:12]}"
-
-            content = EmbeddedContent(
-                content_id=content_id,
-                text=text,
-                embedding=embedding,
-                metadata=metadata or {},
-                source_module=source_module,
-                source_tier=source_tier,
-                timestamp=time.strftime("%Y-%m-%dT%H:%M:%S")
-            )
-
-            self.knowledge_base[content_id] = content
-            self.index_by_module[source_module].append(content_id)
-            self.index_by_tier[source_tier].append(content_id)
-            added += 1
+                embeddings = self.generate_embeddings(batch)
+            except ValueError:
+                # Dimensionskonflikt im Batch: einzeln einbetten, um nur betroffene Einträge zu überspringen
+                embeddings = []
+                for text in batch:
+                    try:
+                        embeddings.append(self.generate_embedding(text))
+                    except ValueError as e:
+                        logger.error(f"Überspringe Eintrag wegen Embedding-Dimension: {e}")
+                        embeddings.append(None)
+
+            for text, embedding in zip(batch, embeddings):
+                if embedding is not None:
+                    self._add_embedded(text, embedding, source_module, source_tier, metadata)
+                    added += 1
 
         logger.info(f"{added} Einträge zur Wissensbasis hinzugefügt ({source_module}, {source_tier})")
         return added
 
+    def _add_embedded(
+        self,
+        text: str,
+        embedding: List[float],
+        source_module: str,
+        source_tier: str,
+        metadata: Optional[Dict[str, Any]]
+    ) -> None:
+        """Legt einen bereits eingebetteten Text als EmbeddedContent an."""
+        content_id = f"{source_module}_{hashlib.md5(text.encode()).hexdigest()[:12]}"
+
+        content = EmbeddedContent(
+            content_id=content_id,
+            text=text,
+            embedding=embedding,
+            metadata=metadata or {},
+            source_module=source_module,
+            source_tier=source_tier,
+            timestamp=time.strftime("%Y-%m-%dT%H:%M:%S")
+        )
+
+        self._register_content(content)
+
     def search(
         self,
         query: str,
@@ -425,7 +861,8 @@ class MedicalRAGSystem:
         source_modules: Optional[List[str]] = None,
         source_tiers: Optional[List[str]] = None,
         min_similarity: Optional[float] = None,
-        prioritize_tier1: bool = True
+        prioritize_tier1: bool = True,
+        hybrid: Optional[bool] = None
     ) -> List[SearchResult]:
         """
         Semantische Suche in der Wissensbasis.
@@ -435,11 +872,12 @@ class MedicalRAGSystem:
             top_k: Anzahl der Top-Ergebnisse
             source_modules: Filter nach Quellmodulen
             source_tiers: Filter nach Tiers
-            min_similarity: Minimum Ähnlichkeit
+            min_similarity: Minimum Ähnlichkeit (gilt für die Dense-Treffer)
             prioritize_tier1: Tier1 (Gold-Standard) priorisieren
+            hybrid: BM25 + Dense per RRF fusionieren (Standard: config.hybrid_search)
 
         Returns:
-            Liste von SearchResult, sortiert nach Ähnlichkeit
+            Liste von SearchResult, sortiert nach Ähnlichkeit (hybrid: nach RRF-Score)
         """
         if not self.knowledge_base:
             logger.warning("Wissensbasis ist leer")
@@ -454,44 +892,394 @@ class MedicalRAGSystem:
         except ValueError as e:
             logger.error(f"Suche abgebrochen wegen Embedding-Dimension: {e}")
             return []
-        query_vector = np.array(query_embedding)
 
-        # Ähnlichkeiten berechnen
-        similarities: List[Tuple[str, float]] = []
+        use_hybrid = self.config.hybrid_search if hybrid is None else hybrid
+        results = self._search_vectors(
+            np.asarray(query_embedding, dtype=np.float32)[None, :],
+            top_k=top_k,
+            source_modules=source_modules,
+            source_tiers=source_tiers,
+            min_similarity=min_similarity,
+            prioritize_tier1=prioritize_tier1,
+            query_texts=[query] if use_hybrid else None,
+        )[0]
 
-        for content_id, content in self.knowledge_base.items():
-            # Filter anwenden
-            if source_modules and content.source_module not in source_modules:
-                continue
-            if source_tiers and content.source_tier not in source_tiers:
-                continue
+        logger.info(f"Suche: {len(results)} Ergebnisse für '{query[:50]}...'")
+        return results
 
-            content_dim = len(content.embedding)
-            if content_dim != len(query_embedding):
-                if not self._dimension_mismatch_logged:
-                    logger.error(
-                        "Überspringe KB-Eintrag wegen abweichender Embedding-Dimension "
-                        f"({content_dim} vs {len(query_embedding)}). Bitte KB neu einbetten."
-                    )
-                    self._dimension_mismatch_logged = True
+    def _register_content(self, content: EmbeddedContent) -> None:
+        """Trägt einen Eintrag in Wissensbasis, Indizes und Embedding-Matrix ein."""
+        content_id = content.content_id
+        if content_id not in self.knowledge_base:
+            self.index_by_module[content.source_module].append(content_id)
+            self.index_by_tier[content.source_tier].append(content_id)
+        else:
+            if self._persisted_kb and self.embedding_matrix.row_by_id[content_id] < self._persisted_kb[1]:
+                self._persisted_kb = None  # Bereits persistierte Zeile geändert -> Vollschreiben nötig
+            if self.lexical_index is not None and self.knowledge_base[content_id].text != content.text:
+                self.lexical_index = None  # Text einer indizierten Zeile geändert -> Neuaufbau
+        overwrite = content_id in self.knowledge_base
+        self.knowledge_base[content_id] = content
+        self.embedding_matrix.add(content_id, content.embedding, content.source_module, content.source_tier)
+        if overwrite and self.ann_index is not None:
+            row = self.embedding_matrix.row_by_id[content_id]
+            if row < self.ann_index.indexed_rows:
+                # Zeile wurde in der Matrix überschrieben -> ANN-Zuordnung erneuern
+                self.ann_index.update(self.embedding_matrix.vectors, np.array([row]))
+        # Vektor liegt jetzt (normalisiert) in der Matrix; Listen-Kopie nicht doppelt halten
+        content.embedding = None
+
+    def get_embedding(self, content_id: str) -> Optional[np.ndarray]:
+        """L2-normalisiertes Embedding eines Eintrags (Zeile der EmbeddingMatrix, keine Kopie)."""
+        row = self.embedding_matrix.row_by_id.get(content_id)
+        if row is None:
+            return None
+        return self.embedding_matrix.vectors[row]
+
+    def _content_dict(self, content: EmbeddedContent) -> Dict[str, Any]:
+        data = content.to_dict()
+        if data["embedding"] is None:
+            data["embedding"] = self.get_embedding(content.content_id).tolist()
+        return data
+
+    def _score_matrix(
+        self,
+        query_vectors: np.ndarray,
+        source_modules: Optional[List[str]] = None,
+        source_tiers: Optional[List[str]] = None,
+        prioritize_tier1: bool = True,
+        rows: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Bewertet Query-Vektoren (n_queries x dim) gegen die KB-Matrix (bzw. nur gegen `rows`).
+
+        Gefilterte Zeilen erhalten -inf, Tier1-Zeilen den 10% Gold-Standard-Bonus.
+
+        Returns:
+            Score-Matrix (n_queries x n_items) oder None bei Dimensionskonflikt
+        """
+        matrix = self.embedding_matrix
+        if query_vectors.shape[1] != matrix.dimension:
+            if not self._dimension_mismatch_logged:
+                logger.error(
+                    "Query-Embedding hat abweichende Dimension "
+                    f"({query_vectors.shape[1]} vs {matrix.dimension}). Bitte KB neu einbetten."
+                )
+                self._dimension_mismatch_logged = True
+            return None
+
+        vectors = matrix.vectors if rows is None else matrix.vectors[rows]
+        scores = EmbeddingMatrix.normalize(query_vectors) @ vectors.T
+
+        if prioritize_tier1:
+            weights = matrix.tier_weights("tier1_gold", 1.1, rows=rows)  # 10% Bonus für Gold-Standard
+            if weights is not None:
+                scores *= weights
+
+        mask = matrix.filter_mask(source_modules, source_tiers, rows=rows)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        return scores
+
+    def _top_k_rows(
+        self,
+        scores: np.ndarray,
+        top_k: int,
+        min_similarity: float,
+        rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k Zeilen über Schwellenwert per argpartition, absteigend sortiert (stabil nach Zeile).
+
+        `rows` bildet Score-Positionen auf Matrix-Zeilen ab (bei Teilmengen-Scores).
+        """
+        candidates = np.flatnonzero(scores >= min_similarity)
+        if candidates.size > top_k:
+            part = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            candidates = candidates[part]
+        matrix_rows = candidates if rows is None else rows[candidates]
+        order = np.lexsort((matrix_rows, -scores[candidates]))
+        ids = self.embedding_matrix.ids
+        return [(ids[matrix_rows[i]], float(scores[candidates[i]])) for i in order]
+
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: Optional[int] = None,
+        source_modules: Optional[List[str]] = None,
+        source_tiers: Optional[List[str]] = None,
+        min_similarity: Optional[float] = None,
+        prioritize_tier1: bool = True,
+        hybrid: Optional[bool] = None
+    ) -> List[List[SearchResult]]:
+        """
+        Semantische Suche für mehrere Anfragen auf einmal.
+
+        Alle Queries werden gebündelt eingebettet und blockweise per
+        Matrix-Matrix-Produkt gegen die Wissensbasis bewertet.
+
+        Args:
+            queries: Suchanfragen
+            top_k, source_modules, source_tiers, min_similarity, prioritize_tier1, hybrid: wie bei search()
+
+        Returns:
+            Pro Query eine Liste von SearchResult (Reihenfolge wie `queries`)
+        """
+        if not queries:
+            return []
+        if not self.knowledge_base:
+            logger.warning("Wissensbasis ist leer")
+            return [[] for _ in queries]
+
+        try:
+            query_vectors = np.asarray(self.generate_embeddings(queries), dtype=np.float32)
+        except ValueError as e:
+            logger.error(f"Suche abgebrochen wegen Embedding-Dimension: {e}")
+            return [[] for _ in queries]
+
+        use_hybrid = self.config.hybrid_search if hybrid is None else hybrid
+        results = self._search_vectors(
+            query_vectors,
+            top_k=top_k,
+            source_modules=source_modules,
+            source_tiers=source_tiers,
+            min_similarity=min_similarity,
+            prioritize_tier1=prioritize_tier1,
+            query_texts=queries if use_hybrid else None,
+        )
+        logger.info(f"Batch-Suche: {len(queries)} Queries, {sum(len(r) for r in results)} Ergebnisse")
+        return results
+
+    def _search_vectors(
+        self,
+        query_vectors: np.ndarray,
+        top_k: Optional[int] = None,
+        source_modules: Optional[List[str]] = None,
+        source_tiers: Optional[List[str]] = None,
+        min_similarity: Optional[float] = None,
+        prioritize_tier1: bool = True,
+        query_texts: Optional[List[str]] = None
+    ) -> List[List[SearchResult]]:
+        """
+        Bewertet bereits eingebettete Queries blockweise (begrenzter Speicher für die Score-Matrix).
+
+        Mit `query_texts` (gleiche Reihenfolge wie `query_vectors`) wird hybrid
+        gesucht: Dense- und BM25-Kandidaten werden per RRF fusioniert.
+        """
+        top_k = top_k or self.config.top_k
+        min_similarity = min_similarity or self.config.similarity_threshold
+
+        if query_texts is not None:
+            dense = self._search_vectors(
+                query_vectors,
+                top_k=max(top_k, self.config.hybrid_candidates),
+                source_modules=source_modules,
+                source_tiers=source_tiers,
+                min_similarity=min_similarity,
+                prioritize_tier1=prioritize_tier1,
+            )
+            return [
+                self._fuse_hybrid(text, vector, dense_results, top_k, source_modules,
+                                  source_tiers, prioritize_tier1)
+                for text, vector, dense_results in zip(query_texts, query_vectors, dense)
+            ]
+
+        ann_index = self._active_ann_index()
+        if ann_index is not None and query_vectors.shape[1] == self.embedding_matrix.dimension:
+            return [
+                self._search_ann(ann_index, vector, top_k, source_modules, source_tiers,
+                                 min_similarity, prioritize_tier1)
+                for vector in EmbeddingMatrix.normalize(query_vectors)
+            ]
+
+        n_items = max(1, len(self.embedding_matrix))
+        block_size = max(1, self.SCORE_BLOCK_ELEMENTS // n_items)
+
+        results: List[List[SearchResult]] = []
+        for start in range(0, len(query_vectors), block_size):
+            block = query_vectors[start:start + block_size]
+            scores = self._score_matrix(
+                block,
+                source_modules=source_modules,
+                source_tiers=source_tiers,
+                prioritize_tier1=prioritize_tier1,
+            )
+            if scores is None:
+                results.extend([] for _ in range(len(block)))
                 continue
+            for row_scores in scores:
+                similarities = self._top_k_rows(row_scores, top_k, min_similarity)
+                results.append(self._to_search_results(similarities))
+        return results
+
+    def _search_ann(
+        self,
+        ann_index,
+        query_vector: np.ndarray,
+        top_k: int,
+        source_modules: Optional[List[str]],
+        source_tiers: Optional[List[str]],
+        min_similarity: float,
+        prioritize_tier1: bool
+    ) -> List[SearchResult]:
+        """
+        Suche über ANN-Kandidaten mit exaktem Re-Ranking.
+
+        Bleiben nach den Filtern weniger als top_k Kandidaten übrig (z.B. sehr
+        selektiver Modul-Filter), wird für diese Query exakt gesucht.
+        """
+        n_rows = len(self.embedding_matrix)
+        rows = ann_index.candidates(query_vector, max(top_k, self.config.ann_candidates), n_rows)
+        scores = self._score_matrix(
+            query_vector[None, :],
+            source_modules=source_modules,
+            source_tiers=source_tiers,
+            prioritize_tier1=prioritize_tier1,
+            rows=rows,
+        )[0]
+        if np.isfinite(scores).sum() < top_k:
+            scores = self._score_matrix(
+                query_vector[None, :],
+                source_modules=source_modules,
+                source_tiers=source_tiers,
+                prioritize_tier1=prioritize_tier1,
+            )[0]
+            rows = None
+        return self._to_search_results(self._top_k_rows(scores, top_k, min_similarity, rows=rows))
+
+    def _fuse_hybrid(
+        self,
+        query_text: str,
+        query_vector: np.ndarray,
+        dense_results: List[SearchResult],
+        top_k: int,
+        source_modules: Optional[List[str]],
+        source_tiers: Optional[List[str]],
+        prioritize_tier1: bool
+    ) -> List[SearchResult]:
+        """
+        Reciprocal Rank Fusion aus Dense-Treffern und BM25-Treffern (gleiche Filter).
+
+        Die Reihenfolge folgt dem RRF-Score; similarity_score bleibt die
+        Cosinus-Ähnlichkeit (inkl. Tier-Bonus), auch für rein lexikalische Treffer.
+        """
+        matrix = self.embedding_matrix
+        lexical_hits = self._active_lexical_index().search(
+            query_text,
+            top_k=self.config.hybrid_candidates,
+            mask=matrix.filter_mask(source_modules, source_tiers),
+        )
+
+        rrf_k = self.config.rrf_k
+        fused: Dict[int, float] = defaultdict(float)
+        for rank, result in enumerate(dense_results, 1):
+            fused[matrix.row_by_id[result.content_id]] += 1.0 / (rrf_k + rank)
+        for rank, (row, _score) in enumerate(lexical_hits, 1):
+            fused[row] += 1.0 / (rrf_k + rank)
+        if not fused:
+            return []
 
-            content_vector = np.array(content.embedding)
-            similarity = self._cosine_similarity(query_vector, content_vector)
+        rows = np.fromiter(fused.keys(), dtype=np.int64, count=len(fused))
+        rrf_scores = np.fromiter(fused.values(), dtype=np.float64, count=len(fused))
+        rows = rows[np.lexsort((rows, -rrf_scores))[:top_k]]
 
-            # Tier1 Bonus wenn priorisiert
-            if prioritize_tier1 and content.source_tier == "tier1_gold":
-                similarity *= 1.1  # 10% Bonus für Gold-Standard
+        scores = self._score_matrix(
+            query_vector[None, :],
+            source_modules=source_modules,
+            source_tiers=source_tiers,
+            prioritize_tier1=prioritize_tier1,
+            rows=rows,
+        )
+        similarities = scores[0] if scores is not None else np.zeros(len(rows), dtype=np.float32)
+        return self._to_search_results(
+            [(matrix.ids[row], float(sim)) for row, sim in zip(rows, similarities)]
+        )
+
+    def build_lexical_index(self) -> int:
+        """
+        Baut den BM25-Index für die hybride Suche bzw. ergänzt neue Zeilen.
+
+        Der Index wird danach mit der KB gespeichert und beim Laden wiederverwendet.
 
-            if similarity >= min_similarity:
-                similarities.append((content_id, similarity))
+        Returns:
+            Anzahl indizierter Zeilen
+        """
+        return self._active_lexical_index().n_docs
+
+    def _active_lexical_index(self) -> BM25Index:
+        """BM25-Index über alle KB-Zeilen; wird bei Bedarf (neu) aufgebaut bzw. um neue Zeilen ergänzt."""
+        if self.lexical_index is None:
+            self.lexical_index = BM25Index(k1=self.config.bm25_k1, b=self.config.bm25_b)
+        matrix = self.embedding_matrix
+        start = self.lexical_index.n_docs
+        if start < len(matrix):
+            self.lexical_index.add_many(
+                self.knowledge_base[content_id].text for content_id in matrix.ids[start:]
+            )
+            if start == 0:
+                logger.info(f"BM25-Index aufgebaut: {len(matrix)} Zeilen")
+        return self.lexical_index
+
+    def _active_ann_index(self):
+        """ANN-Index, falls konfiguriert und KB groß genug; fügt angesammelte neue Zeilen inkrementell ein."""
+        if self.ann_index is None or len(self.embedding_matrix) < self.config.ann_min_items:
+            return None
+        pending = len(self.embedding_matrix) - self.ann_index.indexed_rows
+        if pending > max(1024, self.ann_index.indexed_rows // 20):
+            self.ann_index.sync(self.embedding_matrix.vectors)
+        return self.ann_index
+
+    def build_ann_index(self, force: bool = False) -> bool:
+        """
+        Baut den ANN-Index (config.ann_backend) bzw. fügt neue Zeilen inkrementell ein.
 
-        # Sortieren nach Ähnlichkeit
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        Ein vollständiger Neuaufbau erfolgt nur, wenn noch kein Index existiert,
+        `force` gesetzt ist oder die KB seit dem Training um `ann_retrain_factor`
+        gewachsen ist (IVF-Zentroide veralten).
 
-        # SearchResults erstellen
+        Returns:
+            True wenn ein Index vorhanden ist
+        """
+        if self.config.ann_backend == "none" or not len(self.embedding_matrix):
+            return False
+        vectors = self.embedding_matrix.vectors
+        retrain = (
+            self.ann_index is not None
+            and self.ann_index.backend == "ivf"
+            and len(vectors) > self.ann_index.trained_rows * self.config.ann_retrain_factor
+        )
+        if self.ann_index is None or force or retrain:
+            start = time.time()
+            self.ann_index = create_ann_index(self.config.ann_backend, self.config)
+            if self.ann_index is None:
+                return False
+            self.ann_index.build(vectors)
+            logger.info(
+                f"ANN-Index gebaut ({self.ann_index.backend}, {len(vectors)} Zeilen, "
+                f"{time.time() - start:.1f}s)"
+            )
+        else:
+            added = self.ann_index.sync(vectors)
+            if added:
+                logger.info(f"ANN-Index inkrementell erweitert: +{added} Zeilen")
+        return True
+
+    @staticmethod
+    def _ann_base_path(kb_path: str) -> Path:
+        """Basis-Pfad der ANN-Dateien neben der KB (im Binär-KB-Verzeichnis bzw. <kb>.ann.*)."""
+        path = Path(kb_path)
+        return path / "ann_index" if is_binary_kb(path) else Path(str(path) + ".ann")
+
+    @staticmethod
+    def _lexical_index_path(kb_path: str) -> Path:
+        """Pfad des BM25-Index neben der KB (im Binär-KB-Verzeichnis bzw. <kb>.bm25.npz)."""
+        path = Path(kb_path)
+        return path / "bm25_index.npz" if is_binary_kb(path) else Path(str(path) + ".bm25.npz")
+
+    def _to_search_results(self, similarities: List[Tuple[str, float]]) -> List[SearchResult]:
+        """Wandelt (content_id, score)-Paare in SearchResults um."""
         results: List[SearchResult] = []
-        for rank, (content_id, similarity) in enumerate(similarities[:top_k], 1):
+        for rank, (content_id, similarity) in enumerate(similarities, 1):
             content = self.knowledge_base[content_id]
             results.append(SearchResult(
                 content_id=content_id,
@@ -502,15 +1290,14 @@ class MedicalRAGSystem:
                 source_tier=content.source_tier,
                 rank=rank
             ))
-
-        logger.info(f"Suche: {len(results)} Ergebnisse für '{query[:50]}...'")
         return results
 
     def get_context_for_question(
         self,
         question: str,
         max_context_length: int = 3000,
-        include_tier2: bool = False
+        include_tier2: bool = False,
+        top_k: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Holt relevanten Kontext für eine Frage.
@@ -519,28 +1306,88 @@ class MedicalRAGSystem:
             question: Die Frage
             max_context_length: Maximale Kontextlänge in Zeichen
             include_tier2: Auch Tier2 (Bibliothek) einbeziehen
+            top_k: Max. Anzahl Quellen (Standard: config.top_k)
 
         Returns:
             Dictionary mit Kontext, Quellen und Metadaten
         """
-        # Erst Tier1 durchsuchen
-        tier1_results = self.search(
-            query=question,
-            top_k=self.config.top_k,
-            source_tiers=["tier1_gold"],
-            min_similarity=0.5
-        )
+        return self.get_context_for_questions(
+            [question],
+            max_context_length=max_context_length,
+            include_tier2=include_tier2,
+            top_k=top_k,
+        )[0]
+
+    def get_context_for_questions(
+        self,
+        questions: List[str],
+        max_context_length: int = 3000,
+        include_tier2: bool = False,
+        top_k: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Batch-Variante von get_context_for_question().
+
+        Alle Fragen werden einmal gebündelt eingebettet; Tier1- und optionale
+        Tier2-Suche laufen als Matrix-Produkte über denselben Query-Vektoren.
+
+        Returns:
+            Pro Frage ein Kontext-Dictionary (Reihenfolge wie `questions`)
+        """
+        if not questions:
+            return []
+        top_k = top_k or self.config.top_k
+
+        tier1_results: List[List[SearchResult]] = [[] for _ in questions]
+        tier2_results: List[List[SearchResult]] = [[] for _ in questions]
+
+        query_vectors: Optional[np.ndarray] = None
+        if self.knowledge_base:
+            try:
+                query_vectors = np.asarray(self.generate_embeddings(questions), dtype=np.float32)
+            except ValueError as e:
+                logger.error(f"Kontextsuche abgebrochen wegen Embedding-Dimension: {e}")
+        else:
+            logger.warning("Wissensbasis ist leer")
 
-        # Optional Tier2 hinzufügen
-        tier2_results = []
-        if include_tier2 and len(tier1_results) < 3:
-            tier2_results = self.search(
-                query=question,
-                top_k=self.config.top_k - len(tier1_results),
-                source_tiers=["tier2_bibliothek"],
-                min_similarity=0.5
+        if query_vectors is not None:
+            # Erst Tier1 durchsuchen
+            hybrid = self.config.hybrid_search
+            tier1_results = self._search_vectors(
+                query_vectors,
+                top_k=top_k,
+                source_tiers=["tier1_gold"],
+                min_similarity=0.5,
+                query_texts=questions if hybrid else None,
             )
 
+            # Optional Tier2 hinzufügen (nur für Fragen mit wenig Tier1-Treffern)
+            if include_tier2:
+                needs_tier2 = [i for i, r in enumerate(tier1_results) if len(r) < 3]
+                if needs_tier2:
+                    found = self._search_vectors(
+                        query_vectors[needs_tier2],
+                        top_k=top_k,
+                        source_tiers=["tier2_bibliothek"],
+                        min_similarity=0.5,
+                        query_texts=[questions[i] for i in needs_tier2] if hybrid else None,
+                    )
+                    for i, results in zip(needs_tier2, found):
+                        tier2_results[i] = results[:top_k - len(tier1_results[i]) or top_k]
+
+        return [
+            self._build_context(question, tier1, tier2, max_context_length)
+            for question, tier1, tier2 in zip(questions, tier1_results, tier2_results)
+        ]
+
+    @staticmethod
+    def _build_context(
+        question: str,
+        tier1_results: List[SearchResult],
+        tier2_results: List[SearchResult],
+        max_context_length: int
+    ) -> Dict[str, Any]:
+        """Baut das Kontext-Dictionary aus Tier1-/Tier2-Treffern."""
         all_results = tier1_results + tier2_results
 
         # Kontext zusammenbauen
@@ -596,15 +1443,32 @@ class MedicalRAGSystem:
                 tier: len(ids)
                 for tier, ids in self.index_by_tier.items()
             },
-            "cache_size": len(self.embedding_cache.cache),
+            "cache_size": len(self.embedding_cache),
+            "ann_index": (
+                {"backend": self.ann_index.backend, "indexed_rows": self.ann_index.indexed_rows}
+                if self.ann_index is not None else None
+            ),
+            "lexical_index": (
+                {"documents": self.lexical_index.n_docs, "terms": len(self.lexical_index.vocab)}
+                if self.lexical_index is not None else None
+            ),
             "cost_summary": self.cost_tracker.get_summary()
         }
 
     def save_knowledge_base(self, path: str) -> None:
-        """Speichert die Wissensbasis als JSON."""
+        """
+        Speichert die Wissensbasis.
+
+        Pfade mit Endung ``.json`` werden im (langsamen) JSON-Format geschrieben,
+        alle anderen als Binär-KB-Verzeichnis (siehe core.kb_store).
+        """
+        if Path(path).suffix.lower() != ".json":
+            self._save_knowledge_base_binary(path)
+            return
+
         data = {
             "knowledge_base": {
-                k: v.to_dict() for k, v in self.knowledge_base.items()
+                k: self._content_dict(v) for k, v in self.knowledge_base.items()
             },
             "statistics": self.get_statistics(),
             "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S")
@@ -614,9 +1478,107 @@ class MedicalRAGSystem:
             json.dump(data, f, ensure_ascii=False, indent=2)
 
         logger.info(f"Wissensbasis gespeichert: {path}")
+        self._save_ann_index(path)
+        self._save_lexical_index(path)
+
+    def _save_ann_index(self, kb_path: str) -> None:
+        """Persistiert den ANN-Index neben der KB (nach inkrementellem Sync)."""
+        if self.ann_index is None:
+            return
+        self.ann_index.sync(self.embedding_matrix.vectors)
+        self.ann_index.save(self._ann_base_path(kb_path), self.embedding_matrix.ids)
+
+    def _save_lexical_index(self, kb_path: str) -> None:
+        """Persistiert den BM25-Index neben der KB (nur wenn er aufgebaut wurde)."""
+        if self.lexical_index is None:
+            return
+        index = self._active_lexical_index()
+        index.save(self._lexical_index_path(kb_path), source_fingerprint=ids_fingerprint(self.embedding_matrix.ids))
+
+    def _save_knowledge_base_binary(self, path: str) -> None:
+        """
+        Speichert die Wissensbasis als Binär-KB.
+
+        Wurde seit dem letzten Laden/Speichern nur angehängt, werden nur die neuen
+        Zeilen geschrieben; sonst wird in ein Temp-Verzeichnis geschrieben und getauscht
+        (bestehende memmaps auf die alten Dateien bleiben gültig).
+        """
+        target = Path(path)
+        key = str(target.resolve())
+        matrix = self.embedding_matrix
+        persisted_rows = 0
+        if self._persisted_kb and self._persisted_kb[0] == key and is_binary_kb(target):
+            if BinaryKnowledgeBase(target).count == self._persisted_kb[1]:
+                persisted_rows = self._persisted_kb[1]
+
+        def write_rows(writer: BinaryKBWriter, start: int) -> None:
+            vectors = matrix.vectors
+            for row in range(start, len(matrix)):
+                content = self.knowledge_base[matrix.ids[row]]
+                writer.add({k: getattr(content, k) for k in RECORD_FIELDS}, vectors[row])
+
+        if persisted_rows:
+            with BinaryKBWriter(target, append=True, statistics=self.get_statistics()) as writer:
+                write_rows(writer, persisted_rows)
+        else:
+            tmp = target.with_name(target.name + f".tmp-{os.getpid()}")
+            if tmp.exists():
+                shutil.rmtree(tmp)
+            with BinaryKBWriter(tmp, dimension=matrix.dimension, statistics=self.get_statistics()) as writer:
+                write_rows(writer, 0)
+            if target.exists():
+                old = target.with_name(target.name + f".old-{os.getpid()}")
+                os.replace(target, old)
+                os.replace(tmp, target)
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.replace(tmp, target)
+
+        self._persisted_kb = (key, len(matrix))
+        logger.info(
+            f"Wissensbasis gespeichert (binär): {path} "
+            f"({len(matrix) - persisted_rows} neue Zeilen, {len(matrix)} gesamt)"
+        )
+        self._save_ann_index(path)
+        self._save_lexical_index(path)
 
     def load_knowledge_base(self, path: str) -> None:
+        """Lädt eine Wissensbasis (Binär-KB-Verzeichnis oder JSON) samt ggf. persistierten ANN-/BM25-Indizes."""
+        was_empty = not self.knowledge_base
+        if is_binary_kb(path):
+            self._load_knowledge_base_binary(path)
+        else:
+            self._load_knowledge_base_json(path)
+
+        if was_empty and self.config.ann_backend != "none":
+            self.ann_index = load_ann_index(self._ann_base_path(path), self.embedding_matrix.ids)
+            if self.ann_index is not None:
+                logger.info(
+                    f"ANN-Index geladen ({self.ann_index.backend}, {self.ann_index.indexed_rows} Zeilen)"
+                )
+        if was_empty:
+            self._load_lexical_index(path)
+
+    def _load_lexical_index(self, kb_path: str) -> None:
+        """Lädt einen persistierten BM25-Index, sofern er zu den KB-Zeilen passt."""
+        index_path = self._lexical_index_path(kb_path)
+        if not index_path.exists():
+            return
+        try:
+            index = BM25Index.load(index_path)
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"BM25-Index konnte nicht geladen werden ({index_path}): {e}")
+            return
+        ids = self.embedding_matrix.ids
+        if index.n_docs > len(ids) or index.source_fingerprint != ids_fingerprint(ids[:index.n_docs]):
+            logger.warning("BM25-Index passt nicht zur Wissensbasis und wird ignoriert (Neuaufbau bei Bedarf).")
+            return
+        self.lexical_index = index
+        logger.info(f"BM25-Index geladen ({index.n_docs} Zeilen)")
+
+    def _load_knowledge_base_json(self, path: str) -> None:
         """Lädt eine Wissensbasis aus JSON."""
+
         with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
 
@@ -635,14 +1597,60 @@ class MedicalRAGSystem:
                     )
                     self._dimension_mismatch_logged = True
                 continue
-            self.knowledge_base[content_id] = content
-            self.index_by_module[content.source_module].append(content_id)
-            self.index_by_tier[content.source_tier].append(content_id)
+            self._register_content(content)
 
         if skipped:
             logger.warning(f"{skipped} Einträge wurden wegen falscher Dimension übersprungen.")
         logger.info(f"Wissensbasis geladen: {len(self.knowledge_base)} Einträge")
 
+    def _load_knowledge_base_binary(self, path: str) -> None:
+        """
+        Lädt eine Binär-KB: Embeddings bleiben als read-only memmap auf der Platte,
+        nur die Text-/Metadaten-Records werden geparst.
+        """
+        kb = BinaryKnowledgeBase(path)
+        if not len(kb):
+            logger.info(f"Wissensbasis geladen: {len(self.knowledge_base)} Einträge")
+            return
+        if self.active_embedding_dim is None:
+            self.active_embedding_dim = kb.dimension
+        elif kb.dimension != self.active_embedding_dim:
+            logger.error(
+                f"Binär-KB hat abweichende Embedding-Dimension ({kb.dimension} vs "
+                f"{self.active_embedding_dim}). Bitte KB mit konsistentem Modell erzeugen."
+            )
+            return
+
+        vectors = kb.embeddings
+        contents = [
+            EmbeddedContent(embedding=vectors[row], **{k: record.get(k) for k in RECORD_FIELDS})
+            for row, record in enumerate(kb.iter_records())
+        ]
+        ids = [content.content_id for content in contents]
+
+        if self.knowledge_base or len(set(ids)) != len(ids):
+            # Zusammenführen mit bestehender KB: Zeilen werden in die RAM-Matrix kopiert
+            for content in contents:
+                self._register_content(content)
+        else:
+            # Zero-Copy: Matrix direkt auf die memmap setzen
+            module_vocab: Dict[str, int] = {}
+            tier_vocab: Dict[str, int] = {}
+            module_codes = np.empty(len(contents), dtype=np.int32)
+            tier_codes = np.empty(len(contents), dtype=np.int32)
+            for row, content in enumerate(contents):
+                self.knowledge_base[content.content_id] = content
+                self.index_by_module[content.source_module].append(content.content_id)
+                self.index_by_tier[content.source_tier].append(content.content_id)
+                module_codes[row] = module_vocab.setdefault(content.source_module, len(module_vocab))
+                tier_codes[row] = tier_vocab.setdefault(content.source_tier, len(tier_vocab))
+            self.embedding_matrix = EmbeddingMatrix.from_arrays(
+                vectors, ids, module_codes, tier_codes, module_vocab, tier_vocab
+            )
+            self._persisted_kb = (str(Path(path).resolve()), len(kb))
+
+        logger.info(f"Wissensbasis geladen (binär): {len(self.knowledge_base)} Einträge")
+
 
 # Global instance
 _rag_system: Optional[MedicalRAGSystem] = None
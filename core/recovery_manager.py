@@ -1,10 +1,11 @@
 """Recovery manager for crash recovery and graceful degradation."""
-import json
 import logging
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 
+from core.session_manager import load_session_data
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,12 +37,18 @@ class RecoveryManager:
             return []
         
         orphaned = []
-        checkpoint_files = list(self.checkpoint_dir.glob('checkpoint_*.json'))
-        
-        for checkpoint_path in checkpoint_files:
+        # Session journals (.jsonl, preferred) and legacy JSON checkpoints, one entry per session
+        checkpoint_files = {}
+        for checkpoint_path in sorted(self.checkpoint_dir.glob('checkpoint_*.json*'), reverse=True):
+            if checkpoint_path.suffix in ('.json', '.jsonl'):
+                session_id = checkpoint_path.stem[len('checkpoint_'):]
+                checkpoint_files.setdefault(session_id, checkpoint_path)
+        
+        for session_id, checkpoint_path in checkpoint_files.items():
             try:
-                with open(checkpoint_path, 'r') as f:
-                    session_data = json.load(f)
+                session_data = load_session_data(self.checkpoint_dir, session_id)
+                if session_data is None:
+                    continue
                 
                 # Check if session is still active
                 if session_data.get('status') == 'active':
@@ -74,15 +81,11 @@ class RecoveryManager:
         Returns:
             Recovered session data or None
         """
-        checkpoint_path = self.checkpoint_dir / f"checkpoint_{session_id}.json"
-        
-        if not checkpoint_path.exists():
-            logger.error(f"❌ No checkpoint found for session {session_id}")
-            return None
-        
         try:
-            with open(checkpoint_path, 'r') as f:
-                session_data = json.load(f)
+            session_data = load_session_data(self.checkpoint_dir, session_id)
+            if session_data is None:
+                logger.error(f"❌ No checkpoint found for session {session_id}")
+                return None
             
             logger.info(
                 f"✅ Recovered session {session_id}: "
@@ -6,9 +6,50 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 
+from core.checkpoint_journal import CheckpointJournal
+
 logger = logging.getLogger(__name__)
 
 
+def _journal_path(checkpoint_dir: Path, session_id: str) -> Path:
+    return Path(checkpoint_dir) / f"checkpoint_{session_id}.jsonl"
+
+
+def _session_data(journal: CheckpointJournal) -> Optional[Dict[str, Any]]:
+    """Rebuild a ``Session.to_dict()`` dict from a session journal."""
+    state = journal.state
+    if not state:
+        return None
+    docs = [r['doc'] for r in sorted(journal.records(), key=lambda r: r['seq'])]
+    # Documents tracked after the last state line still count
+    for doc in docs[state.pop('processed_count', len(docs)):]:
+        state['context_tokens'] = state.get('context_tokens', 0) + doc.get('tokens', 0)
+        state['current_provider'] = doc.get('provider')
+    state['processed_docs'] = docs
+    return state
+
+
+def load_session_data(checkpoint_dir: str, session_id: str) -> Optional[Dict[str, Any]]:
+    """Load session data from its checkpoint journal (or a legacy JSON checkpoint).
+
+    Args:
+        checkpoint_dir: Directory with checkpoint files
+        session_id: Session ID
+
+    Returns:
+        Session dict as produced by ``Session.to_dict()``, or None
+    """
+    journal_path = _journal_path(Path(checkpoint_dir), session_id)
+    if journal_path.exists():
+        return _session_data(CheckpointJournal(journal_path, key_field='seq', readonly=True))
+
+    legacy_path = Path(checkpoint_dir) / f"checkpoint_{session_id}.json"
+    if legacy_path.exists():
+        with open(legacy_path, 'r') as f:
+            return json.load(f)
+    return None
+
+
 class Session:
     """Represents a processing session."""
     
@@ -82,6 +123,7 @@ class SessionManager:
         self.checkpoint_interval = checkpoint_interval
         self.handover_threshold = handover_threshold
         self.current_session: Optional[Session] = None
+        self._journal: Optional[CheckpointJournal] = None
     
     def start_session(
         self,
@@ -102,14 +144,31 @@ class SessionManager:
             session = self._load_session(session_id)
             if session:
                 logger.info(f"✅ Resumed session {session_id}")
-                self.current_session = session
+                self._activate(session)
                 return session
         
         # Create new session
         session = Session(session_id, max_context_tokens)
-        self.current_session = session
+        self._activate(session)
         logger.info(f"✅ Started new session {session.id}")
         return session
+
+    def _activate(self, session: Session):
+        """Make `session` current and open its checkpoint journal."""
+        if self._journal is not None:
+            self._journal.close()
+        self.current_session = session
+        self._journal = CheckpointJournal(
+            _journal_path(self.checkpoint_dir, session.id),
+            key_field='seq',
+            sync_every=self.checkpoint_interval,
+        )
+        if len(self._journal) < len(session.processed_docs):
+            # New session, or resumed from a legacy JSON checkpoint
+            for seq, doc in enumerate(session.processed_docs):
+                if seq not in self._journal:
+                    self._journal.append({'seq': seq, 'doc': doc})
+        self._write_state()
     
     def track_document(
         self,
@@ -144,6 +203,8 @@ class SessionManager:
             'results_count': len(results) if isinstance(results, list) else 0
         }
         session.processed_docs.append(doc_info)
+        # One journal line per document instead of rewriting the whole session
+        self._journal.append({'seq': len(session.processed_docs) - 1, 'doc': doc_info})
         
         logger.info(
             f"📄 Tracked: {doc_path} ({tokens_used} tokens) | "
@@ -229,28 +290,30 @@ class SessionManager:
         # Placeholder - could analyze results for important info
         return ["Session progressing normally"]
     
+    def _write_state(self):
+        """Append the session state without the document list."""
+        state = self.current_session.to_dict()
+        state['processed_count'] = len(state.pop('processed_docs'))
+        self._journal.update_state(**state)
+
     def _save_checkpoint(self):
-        """Save current session state."""
-        if not self.current_session:
+        """Save current session state (documents are journaled as they are tracked)."""
+        if not self.current_session or self._journal is None:
             return
         
-        checkpoint_path = self.checkpoint_dir / f"checkpoint_{self.current_session.id}.json"
-        with open(checkpoint_path, 'w') as f:
-            json.dump(self.current_session.to_dict(), f, indent=2)
+        self._write_state()
+        self._journal.sync()
         
-        logger.info(f"💾 Checkpoint saved: {checkpoint_path}")
+        logger.info(f"💾 Checkpoint saved: {self._journal.path}")
     
     def _load_session(self, session_id: str) -> Optional[Session]:
         """Load session from checkpoint."""
-        checkpoint_path = self.checkpoint_dir / f"checkpoint_{session_id}.json"
+        data = load_session_data(self.checkpoint_dir, session_id)
         
-        if not checkpoint_path.exists():
+        if data is None:
             logger.warning(f"No checkpoint found for session {session_id}")
             return None
         
-        with open(checkpoint_path, 'r') as f:
-            data = json.load(f)
-        
         return Session.from_dict(data)
     
     def get_session_stats(self) -> Dict[str, Any]:
@@ -25,11 +25,14 @@ Basiert auf: Piotr Wozniak's SuperMemo-2 Algorithm
 
 import json
 import logging
+import sqlite3
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from dataclasses import dataclass, field, asdict
-import random
+
+import numpy as np
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -144,6 +147,250 @@ class SM2Algorithm:
         return card
 
 
+class SRSCardStore:
+    """
+    Persistenter Kartenspeicher (SQLite im WAL-Modus) mit Indizes für die Review-Queue.
+
+    - Fälligkeit als Unix-Zeit (``due_at``, NULL = neue Karte) plus Spalten für
+      Fachgebiet, Fragetyp, EF und Wiederholungen: Due-Abfragen laufen über
+      Indizes statt über alle Karten; der Prioritäts-Index (EF, Wiederholungen)
+      liefert die ersten N fälligen Karten ohne Sortieren
+    - Ein Review schreibt genau eine Zeile (statt der kompletten JSON-Datei)
+    - Ein altes ``srs_cards.json`` wird beim ersten Öffnen einmalig übernommen
+    """
+
+    def __init__(self, db_path: Path, legacy_file: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cards (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                due_at REAL,
+                specialty TEXT NOT NULL DEFAULT '',
+                question_type TEXT NOT NULL DEFAULT '',
+                easiness_factor REAL NOT NULL,
+                repetitions INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cards_due ON cards (due_at);
+            CREATE INDEX IF NOT EXISTS idx_cards_specialty_due ON cards (specialty, due_at);
+            CREATE INDEX IF NOT EXISTS idx_cards_type_due ON cards (question_type, due_at);
+            CREATE INDEX IF NOT EXISTS idx_cards_repetitions ON cards (repetitions);
+            CREATE INDEX IF NOT EXISTS idx_cards_priority ON cards (easiness_factor, repetitions);
+            """
+        )
+        self._conn.commit()
+        if legacy_file is not None:
+            self._migrate_legacy_json(Path(legacy_file))
+
+    def _migrate_legacy_json(self, legacy_file: Path) -> None:
+        """Übernimmt Karten aus dem alten JSON-Speicher und benennt ihn um."""
+        if not legacy_file.exists():
+            return
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            cards = [Card.from_dict(c) for c in data.get("cards", [])]
+            self.put_many(cards)
+        except Exception as e:
+            logger.error(f"Error migrating cards: {e}")
+            return
+        legacy_file.rename(legacy_file.with_name(legacy_file.name + ".migrated"))
+        logger.info(f"📦 Migrated {len(cards)} cards from {legacy_file.name}")
+
+    @staticmethod
+    def _due_at(card: Card) -> Optional[float]:
+        if card.next_review is None:
+            return None
+        return datetime.fromisoformat(card.next_review).timestamp()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+
+    def load_all(self) -> Dict[str, Card]:
+        """Alle Karten in Einfügereihenfolge."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, data FROM cards ORDER BY rowid").fetchall()
+        cards: Dict[str, Card] = {}
+        for card_id, data in rows:
+            try:
+                cards[card_id] = Card.from_dict(json.loads(data))
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping broken card {card_id}: {e}")
+        return cards
+
+    def put_many(self, cards: Iterable[Card]) -> None:
+        """Schreibt Karten in einer Transaktion (Upsert, Einfügereihenfolge bleibt erhalten)."""
+        rows = [
+            (
+                card.id,
+                json.dumps(card.to_dict(), ensure_ascii=False),
+                self._due_at(card),
+                card.specialty or "",
+                card.question_type or "",
+                card.easiness_factor,
+                card.repetitions,
+            )
+            for card in cards
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO cards (id, data, due_at, specialty, question_type, easiness_factor, repetitions)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    data = excluded.data,
+                    due_at = excluded.due_at,
+                    specialty = excluded.specialty,
+                    question_type = excluded.question_type,
+                    easiness_factor = excluded.easiness_factor,
+                    repetitions = excluded.repetitions
+                """,
+                rows,
+            )
+
+    def put(self, card: Card) -> None:
+        self.put_many([card])
+
+    def due_ids(
+        self,
+        current_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        specialty: Optional[str] = None,
+        question_type: Optional[str] = None
+    ) -> List[str]:
+        """
+        IDs fälliger Karten (neue Karten eingeschlossen), schwierigste zuerst
+        (EF, dann Wiederholungen; bei Gleichstand Einfügereihenfolge).
+        """
+        now = (current_date or datetime.now()).timestamp()
+        sql = "SELECT id FROM cards WHERE (due_at IS NULL OR due_at <= ?)"
+        params: List[Any] = [now]
+        if specialty:
+            sql += " AND specialty = ?"
+            params.append(specialty)
+        if question_type:
+            sql += " AND question_type = ?"
+            params.append(question_type)
+        sql += " ORDER BY easiness_factor, repetitions, rowid"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+
+    def count_due(self, current_date: Optional[datetime] = None) -> int:
+        now = (current_date or datetime.now()).timestamp()
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cards WHERE due_at IS NULL OR due_at <= ?", (now,)
+            ).fetchone()[0]
+
+    def new_ids(self, limit: int = 20) -> List[str]:
+        """Zufällige Auswahl noch nie gelernter Karten."""
+        with self._lock:
+            return [
+                row[0] for row in self._conn.execute(
+                    "SELECT id FROM cards WHERE repetitions = 0 ORDER BY RANDOM() LIMIT ?", (limit,)
+                )
+            ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# due_day für Karten ohne Termin (neue Karten); echte Datums-Ordinale sind >= 1
+NO_REVIEW_DAY = -1
+
+
+def _schedule_fields(card: Card) -> Tuple[float, int]:
+    """(Fälligkeit als Unix-Zeit oder NaN, Datums-Ordinal oder NO_REVIEW_DAY) einer Karte."""
+    if card.next_review is None:
+        return float("nan"), NO_REVIEW_DAY
+    next_review = datetime.fromisoformat(card.next_review)
+    return next_review.timestamp(), next_review.date().toordinal()
+
+
+@dataclass
+class ScheduleArrays:
+    """
+    Spaltenweise NumPy-Sicht auf den Planungszustand aller Karten.
+
+    Die Review-Daten werden einmal beim Aufbau geparst; Prognosen und
+    Statistiken sind danach reine Array-Reduktionen (bincount, Masken).
+    """
+    ids: List[str]
+    index: Dict[str, int]
+    due_ts: np.ndarray  # float64, NaN = neue Karte
+    due_day: np.ndarray  # int64, date().toordinal() von next_review
+    interval: np.ndarray
+    easiness_factor: np.ndarray
+    repetitions: np.ndarray
+    total_reviews: np.ndarray
+    correct_reviews: np.ndarray
+    specialty_code: np.ndarray  # Index in specialties
+    specialties: List[str]
+
+    @classmethod
+    def from_cards(cls, cards: Iterable[Card]) -> "ScheduleArrays":
+        cards = list(cards)
+        specialties: Dict[str, int] = {}
+        fields = [_schedule_fields(c) for c in cards]
+        return cls(
+            ids=[c.id for c in cards],
+            index={c.id: i for i, c in enumerate(cards)},
+            due_ts=np.array([f[0] for f in fields], dtype=np.float64),
+            due_day=np.array([f[1] for f in fields], dtype=np.int64),
+            interval=np.array([c.interval for c in cards], dtype=np.int64),
+            easiness_factor=np.array([c.easiness_factor for c in cards], dtype=np.float64),
+            repetitions=np.array([c.repetitions for c in cards], dtype=np.int64),
+            total_reviews=np.array([c.total_reviews for c in cards], dtype=np.int64),
+            correct_reviews=np.array([c.correct_reviews for c in cards], dtype=np.int64),
+            specialty_code=np.array(
+                [specialties.setdefault(c.specialty, len(specialties)) for c in cards], dtype=np.int64
+            ),
+            specialties=list(specialties),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def update(self, card: Card) -> None:
+        """Übernimmt den Zustand einer (bekannten) Karte in O(1)."""
+        i = self.index[card.id]
+        self.due_ts[i], self.due_day[i] = _schedule_fields(card)
+        self.interval[i] = card.interval
+        self.easiness_factor[i] = card.easiness_factor
+        self.repetitions[i] = card.repetitions
+        self.total_reviews[i] = card.total_reviews
+        self.correct_reviews[i] = card.correct_reviews
+        if self.specialties[self.specialty_code[i]] != card.specialty:
+            if card.specialty not in self.specialties:
+                self.specialties.append(card.specialty)
+            self.specialty_code[i] = self.specialties.index(card.specialty)
+
+    def due_mask(self, current_date: Optional[datetime] = None) -> np.ndarray:
+        """Fällige Karten (wie Card.is_due): neu oder next_review <= jetzt."""
+        now = (current_date or datetime.now()).timestamp()
+        return np.isnan(self.due_ts) | (self.due_ts <= now)
+
+    def mastered_mask(self) -> np.ndarray:
+        return (self.repetitions >= 5) & (self.easiness_factor > 2.0)
+
+    def forecast_counts(self, start_day: int, days: int) -> np.ndarray:
+        """Anzahl Karten mit Review-Datum start_day + 0..days-1 (ein bincount)."""
+        offsets = self.due_day - start_day
+        offsets = offsets[(self.due_day != NO_REVIEW_DAY) & (offsets >= 0) & (offsets < days)]
+        return np.bincount(offsets, minlength=days)[:days]
+
+
 @dataclass
 class StudySession:
     """Eine Lernsession."""
@@ -169,15 +416,20 @@ class SpacedRepetitionSystem:
     - Fachgebiet-Filter
     - Fortschrittsverfolgung
     - Statistiken und Prognosen
+    - Karten in SQLite (srs_cards.sqlite), Reviews als Einzelzeilen-Updates
     """
     
     def __init__(self, data_path: Path):
         self.data_path = data_path
+        # srs_cards.json wird nur noch migriert
         self.cards_file = data_path / "srs_cards.json"
+        self.cards_db = data_path / "srs_cards.sqlite"
         self.progress_file = data_path / "srs_progress.json"
         self.sessions_file = data_path / "srs_sessions.json"
         
+        self.store = SRSCardStore(self.cards_db, legacy_file=self.cards_file)
         self.cards: Dict[str, Card] = {}
+        self._schedule: Optional[ScheduleArrays] = None
         self.sessions: List[StudySession] = []
         self.current_session: Optional[StudySession] = None
         
@@ -186,16 +438,12 @@ class SpacedRepetitionSystem:
     def _load_data(self):
         """Lädt gespeicherte SRS-Daten."""
         # Lade Karten
-        if self.cards_file.exists():
-            try:
-                with open(self.cards_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                for card_data in data.get("cards", []):
-                    card = Card.from_dict(card_data)
-                    self.cards[card.id] = card
+        try:
+            self.cards = self.store.load_all()
+            if self.cards:
                 logger.info(f"📂 Loaded {len(self.cards)} cards")
-            except Exception as e:
-                logger.error(f"Error loading cards: {e}")
+        except sqlite3.Error as e:
+            logger.error(f"Error loading cards: {e}")
         
         # Lade Sessions
         if self.sessions_file.exists():
@@ -206,17 +454,21 @@ class SpacedRepetitionSystem:
             except Exception as e:
                 logger.error(f"Error loading sessions: {e}")
     
+    @property
+    def schedule(self) -> ScheduleArrays:
+        """Spaltenweise Sicht auf alle Karten (lazy aufgebaut, bei Reviews in O(1) nachgeführt)."""
+        if self._schedule is None or len(self._schedule) != len(self.cards):
+            self._schedule = ScheduleArrays.from_cards(self.cards.values())
+        return self._schedule
+    
     def _save_data(self):
-        """Speichert SRS-Daten."""
-        # Speichere Karten
-        with open(self.cards_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                "timestamp": datetime.now().isoformat(),
-                "total_cards": len(self.cards),
-                "cards": [card.to_dict() for card in self.cards.values()]
-            }, f, ensure_ascii=False, indent=2)
-        
-        # Speichere Sessions
+        """Speichert alle SRS-Daten (z.B. nach direkten Änderungen an self.cards)."""
+        self._schedule = None
+        self.store.put_many(self.cards.values())
+        self._save_sessions()
+    
+    def _save_sessions(self):
+        """Speichert die Sessions."""
         with open(self.sessions_file, 'w', encoding='utf-8') as f:
             json.dump({
                 "timestamp": datetime.now().isoformat(),
@@ -242,7 +494,7 @@ class SpacedRepetitionSystem:
                 data = json.load(f)
             
             qa_pairs = data.get("qa_pairs", data if isinstance(data, list) else [])
-            imported = 0
+            new_cards = []
             
             for i, qa in enumerate(qa_pairs):
                 card_id = f"card_{i:06d}"
@@ -258,9 +510,11 @@ class SpacedRepetitionSystem:
                         tags=qa.get("tags", [])
                     )
                     self.cards[card_id] = card
-                    imported += 1
+                    new_cards.append(card)
             
-            self._save_data()
+            self.store.put_many(new_cards)
+            self._schedule = None
+            imported = len(new_cards)
             logger.info(f"✅ Imported {imported} new cards (total: {len(self.cards)})")
             return imported
             
@@ -285,33 +539,13 @@ class SpacedRepetitionSystem:
         Returns:
             Liste fälliger Karten
         """
-        due_cards = []
-        
-        for card in self.cards.values():
-            if not card.is_due():
-                continue
-            
-            if specialty and card.specialty != specialty:
-                continue
-            
-            if question_type and card.question_type != question_type:
-                continue
-            
-            due_cards.append(card)
-        
-        # Sortiere nach Priorität (niedrigerer EF = schwieriger = höhere Priorität)
-        due_cards.sort(key=lambda c: (c.easiness_factor, c.repetitions))
-        
-        if limit:
-            due_cards = due_cards[:limit]
-        
-        return due_cards
+        # Index-Abfrage, sortiert nach Priorität (niedrigerer EF = schwieriger = höhere Priorität)
+        ids = self.store.due_ids(limit=limit, specialty=specialty, question_type=question_type)
+        return [self.cards[card_id] for card_id in ids if card_id in self.cards]
     
     def get_new_cards(self, limit: int = 20) -> List[Card]:
         """Gibt neue (noch nie gelernte) Karten zurück."""
-        new_cards = [c for c in self.cards.values() if c.repetitions == 0]
-        random.shuffle(new_cards)
-        return new_cards[:limit]
+        return [self.cards[card_id] for card_id in self.store.new_ids(limit) if card_id in self.cards]
     
     def start_session(self) -> StudySession:
         """Startet eine neue Lernsession."""
@@ -341,6 +575,9 @@ class SpacedRepetitionSystem:
         card = self.cards[card_id]
         updated_card = SM2Algorithm.calculate_next_review(card, quality)
         self.cards[card_id] = updated_card
+        self.store.put(updated_card)
+        if self._schedule is not None and card_id in self._schedule.index:
+            self._schedule.update(updated_card)
         
         # Update Session-Statistik
         if self.current_session:
@@ -354,7 +591,6 @@ class SpacedRepetitionSystem:
                 / self.current_session.cards_reviewed
             )
         
-        self._save_data()
         return updated_card
     
     def end_session(self) -> Optional[StudySession]:
@@ -372,20 +608,22 @@ class SpacedRepetitionSystem:
         session = self.current_session
         self.current_session = None
         
-        self._save_data()
+        self._save_sessions()
         logger.info(f"✅ Ended session: {session.cards_reviewed} cards reviewed")
         return session
     
     def get_statistics(self) -> Dict[str, Any]:
         """Berechnet Lernstatistiken."""
-        total_cards = len(self.cards)
-        mastered = sum(1 for c in self.cards.values() if c.repetitions >= 5 and c.easiness_factor > 2.0)
-        learning = sum(1 for c in self.cards.values() if 0 < c.repetitions < 5)
-        new = sum(1 for c in self.cards.values() if c.repetitions == 0)
-        due_today = len(self.get_due_cards())
+        schedule = self.schedule
+        total_cards = len(schedule)
+        repetitions = schedule.repetitions
+        mastered = int(np.count_nonzero(schedule.mastered_mask()))
+        learning = int(np.count_nonzero((repetitions > 0) & (repetitions < 5)))
+        new = int(np.count_nonzero(repetitions == 0))
+        due_today = int(np.count_nonzero(schedule.due_mask()))
         
-        total_reviews = sum(c.total_reviews for c in self.cards.values())
-        correct_reviews = sum(c.correct_reviews for c in self.cards.values())
+        total_reviews = int(schedule.total_reviews.sum())
+        correct_reviews = int(schedule.correct_reviews.sum())
         
         return {
             "total_cards": total_cards,
@@ -396,11 +634,49 @@ class SpacedRepetitionSystem:
             "total_reviews": total_reviews,
             "correct_reviews": correct_reviews,
             "accuracy": (correct_reviews / total_reviews * 100) if total_reviews > 0 else 0,
-            "average_ef": sum(c.easiness_factor for c in self.cards.values()) / total_cards if total_cards > 0 else 2.5,
+            "average_ef": float(schedule.easiness_factor.mean()) if total_cards > 0 else 2.5,
             "total_sessions": len(self.sessions),
             "total_study_time_hours": sum(s.time_spent_seconds for s in self.sessions) / 3600,
         }
     
+    def get_specialty_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Statistiken pro Fachgebiet (gruppierte Reduktion über die Karten-Arrays).
+        
+        Returns:
+            Dict Fachgebiet -> Kennzahlen, absteigend nach Kartenanzahl
+        """
+        schedule = self.schedule
+        if not len(schedule):
+            return {}
+        codes = schedule.specialty_code
+        n = len(schedule.specialties)
+        
+        def count(mask: np.ndarray) -> np.ndarray:
+            return np.bincount(codes[mask], minlength=n)
+        
+        total = np.bincount(codes, minlength=n)
+        due = count(schedule.due_mask())
+        mastered = count(schedule.mastered_mask())
+        new = count(schedule.repetitions == 0)
+        ef_sum = np.bincount(codes, weights=schedule.easiness_factor, minlength=n)
+        reviews = np.bincount(codes, weights=schedule.total_reviews, minlength=n)
+        correct = np.bincount(codes, weights=schedule.correct_reviews, minlength=n)
+        
+        stats = {}
+        for code in np.argsort(-total, kind="stable"):
+            if not total[code]:
+                continue
+            stats[schedule.specialties[code]] = {
+                "total_cards": int(total[code]),
+                "due_today": int(due[code]),
+                "mastered": int(mastered[code]),
+                "new": int(new[code]),
+                "accuracy": float(correct[code] / reviews[code] * 100) if reviews[code] > 0 else 0,
+                "average_ef": float(ef_sum[code] / total[code]),
+            }
+        return stats
+    
     def get_forecast(self, days: int = 30) -> Dict[str, int]:
         """
         Prognostiziert die Anzahl fälliger Karten für die nächsten Tage.
@@ -411,21 +687,13 @@ class SpacedRepetitionSystem:
         Returns:
             Dict mit Datum -> Anzahl fälliger Karten
         """
-        forecast = {}
         today = datetime.now()
+        counts = self.schedule.forecast_counts(today.date().toordinal(), days)
         
-        for day_offset in range(days):
-            check_date = today + timedelta(days=day_offset)
-            date_str = check_date.strftime("%Y-%m-%d")
-            
-            due_count = sum(
-                1 for c in self.cards.values()
-                if c.next_review and datetime.fromisoformat(c.next_review).date() == check_date.date()
-            )
-            
-            forecast[date_str] = due_count
-        
-        return forecast
+        return {
+            (today + timedelta(days=day_offset)).strftime("%Y-%m-%d"): int(counts[day_offset])
+            for day_offset in range(days)
+        }
     
     def print_dashboard(self):
         """Gibt ein Übersichts-Dashboard aus."""
@@ -448,6 +716,15 @@ class SpacedRepetitionSystem:
         print(f"   Sessions:        {stats['total_sessions']}")
         print(f"   Lernzeit:        {stats['total_study_time_hours']:.1f}h")
         
+        specialty_stats = self.get_specialty_statistics()
+        if specialty_stats:
+            print("\n🏥 Fachgebiete:")
+            for specialty, spec in list(specialty_stats.items())[:10]:
+                print(
+                    f"   {specialty[:18]:<18} {spec['total_cards']:>6,} Karten  "
+                    f"{spec['due_today']:>5,} fällig  {spec['accuracy']:5.1f}%"
+                )
+        
         print("\n" + "=" * 60)
 
 
@@ -0,0 +1,200 @@
+"""Tests for core.http_download against a local HTTP server stub."""
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from core.http_download import DownloadError, download_file
+
+CONTENT = bytes(range(256)) * 1600  # 400 KB, several CHUNK_SIZE reads
+ETAG = '"v1"'
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Serves ``server.content``; ``server.mode`` selects the misbehaviour under test."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        content, etag, mode = server.content, server.etag, server.mode
+
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == etag and mode != "ignore_range":
+            start = int(range_header.split("=")[1].rstrip("-"))
+            if mode == "416":
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.end_headers()
+                return
+            if mode == "bad_range":
+                start += 10
+            body = content[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+        else:
+            body = content
+            self.send_response(200)
+        self.send_header("Content-Type", server.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if mode == "truncate":
+            body = body[: len(body) // 2]
+        self.wfile.write(body)
+
+
+class TestDownloadFile(unittest.TestCase):
+    """Branches of download_file: 304, resume, restart, truncation, rejection."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/guideline.pdf"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.content = CONTENT
+        self.server.etag = ETAG
+        self.server.mode = None
+        self.server.content_type = "application/pdf"
+        self.server.requests = []
+        self.tmp = Path(tempfile.mkdtemp())
+        self.output = self.tmp / "guideline.pdf"
+        self.part = self.tmp / "guideline.pdf.part"
+        self.part_meta = self.tmp / "guideline.pdf.part.json"
+        self.session = requests.Session()
+
+    def tearDown(self):
+        self.session.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _download(self, **kwargs):
+        return download_file(self.session, self.url, self.output, timeout=10, **kwargs)
+
+    def _write_partial(self, size):
+        self.part.write_bytes(CONTENT[:size])
+        self.part_meta.write_text(json.dumps({"url": self.url, "etag": ETAG}), encoding="utf-8")
+
+    def test_full_download(self):
+        result = self._download()
+        self.assertEqual(result.status, "downloaded")
+        self.assertEqual(self.output.read_bytes(), CONTENT)
+        self.assertEqual(result.sha256, hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual(result.etag, ETAG)
+        self.assertFalse(self.part.exists())
+        self.assertFalse(self.part_meta.exists())
+
+    def test_not_modified(self):
+        self.output.write_bytes(CONTENT)
+        result = self._download(etag=ETAG)
+        self.assertEqual(result.status, "not_modified")
+        self.assertFalse(result.changed)
+        self.assertEqual(result.size, len(CONTENT))
+        self.assertEqual(self.server.requests[-1].get("If-None-Match"), ETAG)
+
+    def test_resume_with_range(self):
+        self._write_partial(100000)
+        result = self._download()
+        self.assertEqual(result.status, "resumed")
+        self.assertEqual(result.bytes_transferred, len(CONTENT) - 100000)
+        self.assertEqual(result.sha256, hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual(self.output.read_bytes(), CONTENT)
+        headers = self.server.requests[-1]
+        self.assertEqual(headers.get("Range"), "bytes=100000-")
+        self.assertEqual(headers.get("If-Range"), ETAG)
+
+    def test_changed_content_restarts(self):
+        # If-Range no longer matches: server answers 200 with the full content
+        self._write_partial(100000)
+        self.server.mode = "ignore_range"
+        result = self._download()
+        self.assertEqual(result.status, "downloaded")
+        self.assertEqual(result.bytes_transferred, len(CONTENT))
+        self.assertEqual(self.output.read_bytes(), CONTENT)
+
+    def test_416_restarts(self):
+        self._write_partial(100000)
+        self.server.mode = "416"
+        result = self._download()
+        self.assertEqual(result.status, "downloaded")
+        self.assertEqual(self.output.read_bytes(), CONTENT)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertNotIn("Range", self.server.requests[-1])
+
+    def test_mismatched_content_range_restarts(self):
+        self._write_partial(100000)
+        self.server.mode = "bad_range"
+        result = self._download()
+        self.assertEqual(result.status, "downloaded")
+        self.assertEqual(self.output.read_bytes(), CONTENT)
+        self.assertNotIn("Range", self.server.requests[-1])
+
+    def test_truncation_keeps_resumable_part(self):
+        self.server.mode = "truncate"
+        with self.assertRaises(requests.RequestException):
+            self._download()
+        self.assertFalse(self.output.exists())
+        self.assertTrue(self.part.exists())
+        self.assertLess(self.part.stat().st_size, len(CONTENT))
+
+    def test_truncation_without_validators_discards_part(self):
+        self.server.mode = "truncate"
+        self.server.etag = None
+        with self.assertRaises(requests.RequestException):
+            self._download()
+        self.assertFalse(self.output.exists())
+        self.assertFalse(self.part.exists())
+
+    def test_interrupted_transfer_is_resumed_and_verified(self):
+        self.server.mode = "truncate"
+        with self.assertRaises(requests.RequestException):
+            self._download()
+        kept = self.part.stat().st_size
+        self.assertGreater(kept, 0)
+
+        self.server.mode = None
+        result = self._download()
+        self.assertEqual(result.status, "resumed")
+        self.assertEqual(result.bytes_transferred, len(CONTENT) - kept)
+        self.assertEqual(self.server.requests[-1].get("Range"), f"bytes={kept}-")
+        self.assertEqual(result.sha256, hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual(result.sha256, hashlib.sha256(self.output.read_bytes()).hexdigest())
+
+    def test_min_size_rejected(self):
+        with self.assertRaises(DownloadError):
+            self._download(min_size=len(CONTENT) + 1)
+        self.assertFalse(self.output.exists())
+        self.assertFalse(self.part.exists())
+
+    def test_accept_rejected(self):
+        self.server.content_type = "text/html"
+        with self.assertRaises(DownloadError):
+            self._download(accept=lambda r: "pdf" in r.headers.get("Content-Type", ""))
+        self.assertFalse(self.output.exists())
+        self.assertFalse(self.part.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for core.prompt_cache."""
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from core.prompt_cache import PromptCache
+
+
+def _messages(name):
+    return [{"role": "user", "content": name}]
+
+
+class TestPromptCache(unittest.TestCase):
+    """Lookups, buffered hit accounting and eviction order."""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.cache_path = self.tmp / "prompt_cache.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _fill(self, cache, names):
+        for name in names:
+            cache.set(_messages(name), "test", {"text": name})
+            time.sleep(0.002)  # distinct access times
+
+    def test_get_roundtrip_and_miss(self):
+        cache = PromptCache(str(self.cache_path))
+        self.assertIsNone(cache.get(_messages("a"), "test"))
+        cache.set(_messages("a"), "test", {"text": "a"})
+        entry = cache.get(_messages("a"), "test")
+        self.assertEqual(entry["response"], {"text": "a"})
+        self.assertEqual(entry["hits"], 2)
+        self.assertEqual(cache.get(_messages("a"), "test")["hits"], 3)
+        self.assertIsNone(cache.get(_messages("a"), "other"))
+        cache.close()
+
+    def test_lru_order_follows_reads(self):
+        cache = PromptCache(str(self.cache_path), max_entries=3)
+        self._fill(cache, ["a", "b", "c"])
+        self.assertIsNotNone(cache.get(_messages("a"), "test"))
+        time.sleep(0.002)
+        self._fill(cache, ["d"])
+        self.assertIsNotNone(cache.get(_messages("a"), "test"))
+        self.assertIsNone(cache.get(_messages("b"), "test"))
+        self.assertIsNotNone(cache.get(_messages("c"), "test"))
+        self.assertEqual(len(cache), 3)
+        cache.close()
+
+    def test_lfu_order_follows_reads(self):
+        cache = PromptCache(str(self.cache_path), max_entries=2, policy="lfu")
+        self._fill(cache, ["a", "b"])
+        cache.get(_messages("a"), "test")
+        self._fill(cache, ["c"])
+        self.assertIsNotNone(cache.get(_messages("a"), "test"))
+        self.assertIsNone(cache.get(_messages("b"), "test"))
+        cache.close()
+
+    def test_buffered_hits_persist(self):
+        cache = PromptCache(str(self.cache_path))
+        cache.set(_messages("a"), "test", {"text": "a"})
+        for _ in range(3):
+            cache.get(_messages("a"), "test")
+        cache.close()
+        reopened = PromptCache(str(self.cache_path))
+        self.assertEqual(reopened.get(_messages("a"), "test")["hits"], 5)
+        reopened.close()
+
+    def test_sqlite_path_is_used_directly(self):
+        db_path = self.tmp / "responses.sqlite"
+        cache = PromptCache(str(db_path))
+        cache.set(_messages("a"), "test", {"text": "a"})
+        cache.close()
+        reopened = PromptCache(str(db_path))
+        self.assertEqual(reopened.db_path, db_path)
+        self.assertIsNotNone(reopened.get(_messages("a"), "test"))
+        reopened.close()
+        self.assertTrue(db_path.exists())
+
+    def test_get_does_not_wait_for_writers(self):
+        cache = PromptCache(str(self.cache_path))
+        cache.set(_messages("a"), "test", {"text": "a"})
+        writer = sqlite3.connect(str(cache.db_path), isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            start = time.monotonic()
+            self.assertIsNotNone(cache.get(_messages("a"), "test"))
+            self.assertIsNone(cache.get(_messages("b"), "test"))
+            self.assertLess(time.monotonic() - start, 1.0)
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
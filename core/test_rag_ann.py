@@ -0,0 +1,58 @@
+"""Tests for the ANN index integration of core.rag_system."""
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from core.rag_system import EmbeddedContent, MedicalRAGSystem, RAGConfig
+
+
+def _content(content_id, vector):
+    return EmbeddedContent(
+        content_id=content_id,
+        text=f"Text {content_id}",
+        embedding=[float(x) for x in vector],
+        metadata={},
+        source_module="leitlinien",
+        source_tier="tier2_bibliothek",
+        timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+    )
+
+
+class TestAnnOverwrite(unittest.TestCase):
+    """Overwriting an indexed content_id must move its row in the ANN index."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        config = RAGConfig(ann_backend="ivf", ann_min_items=1, ann_nlist=8, ann_nprobe=1)
+        with patch("core.rag_system.SENTENCE_TRANSFORMERS_AVAILABLE", False):
+            self.rag = MedicalRAGSystem(config=config, cache_dir=self.tmp)
+        rng = np.random.default_rng(0)
+        for i in range(200):
+            self.rag._register_content(_content(f"c{i}", rng.standard_normal(16)))
+        self.assertTrue(self.rag.build_ann_index())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_search_finds_overwritten_vector(self):
+        index = self.rag.ann_index
+        row = self.rag.embedding_matrix.row_by_id["c0"]
+        old_list = int(index.assignments[row])
+        # New vector sits exactly on another centroid
+        new_list = (old_list + 1) % index.nlist
+        new_vector = index.centroids[new_list]
+
+        self.rag._register_content(_content("c0", new_vector))
+
+        self.assertEqual(int(index.assignments[row]), new_list)
+        results = self.rag._search_vectors(new_vector.reshape(1, -1), top_k=1, min_similarity=0.5)[0]
+        self.assertEqual([r.content_id for r in results], ["c0"])
+        self.assertAlmostEqual(results[0].similarity_score, 1.0, places=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
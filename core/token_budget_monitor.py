@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import logging
+import threading
 from dataclasses import dataclass, field
 from typing import Any, Dict, Optional, Tuple
 
@@ -52,6 +53,7 @@ class TokenBudgetMonitor:
         self.providers: Dict[str, ProviderBudget] = {}
         self.total_cost = 0.0
         self.total_tokens = 0
+        self._lock = threading.RLock()
 
     def register_provider(
         self,
@@ -61,11 +63,12 @@ class TokenBudgetMonitor:
     ) -> None:
         """Register a provider for tracking."""
         in_rate, out_rate = rates if rates else (0.0, 0.0)
-        self.providers[name] = ProviderBudget(
-            budget_limit=None if budget_limit is None else float(budget_limit),
-            rate_in=in_rate,
-            rate_out=out_rate,
-        )
+        with self._lock:
+            self.providers[name] = ProviderBudget(
+                budget_limit=None if budget_limit is None else float(budget_limit),
+                rate_in=in_rate,
+                rate_out=out_rate,
+            )
 
     def estimate_tokens(self, text: str, model: str = "cl100k_base") -> int:
         """Rough token estimation using tiktoken (falls back to len/4)."""
@@ -102,27 +105,28 @@ class TokenBudgetMonitor:
             output_tokens: Completion tokens.
             cost_override: Optional externally computed cost.
         """
-        if provider not in self.providers:
-            self.register_provider(provider)
+        with self._lock:
+            if provider not in self.providers:
+                self.register_provider(provider)
 
-        provider_budget = self.providers[provider]
-        cost = cost_override if cost_override is not None else self._calc_cost(
-            provider, input_tokens, output_tokens
-        )
+            provider_budget = self.providers[provider]
+            cost = cost_override if cost_override is not None else self._calc_cost(
+                provider, input_tokens, output_tokens
+            )
 
-        provider_budget.add_usage(input_tokens, output_tokens, cost)
-        self.total_cost += cost
-        self.total_tokens += input_tokens + output_tokens
+            provider_budget.add_usage(input_tokens, output_tokens, cost)
+            self.total_cost += cost
+            self.total_tokens += input_tokens + output_tokens
 
-        logger.debug(
-            "💰 %s: +%s tokens (+$%.4f) | Total $%.4f",
-            provider,
-            input_tokens + output_tokens,
-            cost,
-            self.total_cost,
-        )
+            logger.debug(
+                "💰 %s: +%s tokens (+$%.4f) | Total $%.4f",
+                provider,
+                input_tokens + output_tokens,
+                cost,
+                self.total_cost,
+            )
 
-        return self.get_provider_stats(provider)
+            return self.get_provider_stats(provider)
 
     def is_exhausted(self, provider: str) -> bool:
         """Check whether a provider budget is exhausted."""
@@ -153,9 +157,10 @@ class TokenBudgetMonitor:
 
     def summary(self) -> Dict[str, Any]:
         """Return a session level summary."""
-        return {
-            "total_cost": self.total_cost,
-            "total_tokens": self.total_tokens,
-            "budget_limit": self.budget_limit,
-            "providers": {name: self.get_provider_stats(name) for name in self.providers},
-        }
+        with self._lock:
+            return {
+                "total_cost": self.total_cost,
+                "total_tokens": self.total_tokens,
+                "budget_limit": self.budget_limit,
+                "providers": {name: self.get_provider_stats(name) for name in self.providers},
+            }
@@ -1,10 +1,13 @@
 import os
 import json
 import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import requests
 import tiktoken
@@ -17,6 +20,15 @@ try:  # pragma: no cover - optional helper
 except Exception:  # pragma: no cover - fallback
     TokenBudgetMonitor = None
 
+from core.checkpoint_journal import CheckpointJournal
+from core.http_pool import HTTPSessionPool
+from core.prompt_cache import PromptCache
+
+try:  # pragma: no cover - optional helper
+    from core.rate_limiter import RateLimitConfig, RateLimiter
+except Exception:  # pragma: no cover - fallback
+    RateLimiter = None
+
 try:  # pragma: no cover
     from core.pdf_utils import extract_text_from_file
 except Exception:  # pragma: no cover
@@ -82,6 +94,15 @@ class ProviderConfig:
     timeout: int = 120
 
 
+class _InFlightCall:
+    """A provider call that concurrent identical requests wait on instead of repeating it."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
 @dataclass
 class ProcessingResult:
     success: bool
@@ -170,6 +191,20 @@ class UnifiedAPIClient:
         "medgemma": 217.75,
     }
 
+    # Requests pro Minute je Provider (Token-Bucket). Opt-in: LLM_RATE_LIMIT=1 aktiviert diese
+    # Defaults, <PROVIDER>_RPM (z.B. REQUESTY_RPM) aktiviert/überschreibt einen einzelnen Provider
+    DEFAULT_RATE_LIMITS_RPM: Dict[str, float] = {
+        "requesty": 600,
+        "anthropic": 50,
+        "aws_bedrock": 50,
+        "comet_api": 120,
+        "portkey": 300,
+        "perplexity": 50,
+        "openrouter": 200,
+        "openai": 500,
+        "medgemma": 60,
+    }
+
     # Provider-Reihenfolgen pro Kostenprofil
     # HINWEIS: Requesty zuerst (funktioniert zuverlässig mit Claude Sonnet 4.5)
     COST_MODE_ORDERS: Dict[str, List[str]] = {
@@ -206,16 +241,29 @@ class UnifiedAPIClient:
         "budget_tokens": 10000,  # Max thinking tokens für Claude
     }
 
-    def __init__(self, max_cost: Optional[float] = None, checkpoint_dir: str = "checkpoints", cost_mode: Optional[str] = None):
+    def __init__(
+        self,
+        max_cost: Optional[float] = None,
+        checkpoint_dir: str = "checkpoints",
+        cost_mode: Optional[str] = None,
+        http_pool: Optional[HTTPSessionPool] = None,
+        response_cache: Optional[Union[PromptCache, str, bool]] = None,
+    ):
+        """
+        Args:
+            response_cache: Opt-in response cache: a PromptCache, a cache path, or True for
+                the default path. None reads LLM_RESPONSE_CACHE ("1" or a path; unset = off).
+        """
         self.max_cost = max_cost
         self.pricing = dict(self.DEFAULT_PRICING)
         self.tokenizer = tiktoken.get_encoding("cl100k_base")
         self.cost_mode = (cost_mode or os.getenv("LLM_COST_MODE") or "premium").lower()
 
-        # Budget & cost state
+        # Budget & cost state (guarded by _cost_lock, chat_completion_many runs calls in threads)
         self.session_cost = 0.0
         self.session_requests = 0
         self.provider_spend: Dict[str, float] = {}
+        self._cost_lock = threading.RLock()
 
         # Optional global budget monitor
         self.budget_monitor = (
@@ -239,14 +287,57 @@ class UnifiedAPIClient:
                     rates=(p.cost_per_1k_input, p.cost_per_1k_output),
                 )
 
+        # Keep-alive connection pool for all HTTP providers; can be shared with
+        # core.web_search / core.perplexity_pdf_finder (http_pool=client.http)
+        self.http = http_pool or HTTPSessionPool(
+            pool_maxsize=int(self._get_budget("LLM_HTTP_POOL_SIZE", 32))
+        )
+        self._anthropic_clients: Dict[str, Any] = {}
+
+        self.rate_limiters: Dict[str, Any] = {}
+        if RateLimiter:
+            limit_all = os.getenv("LLM_RATE_LIMIT", "").lower() in ("1", "true", "yes", "on")
+            for p in self.providers.values():
+                env_var = f"{p.key.upper()}_RPM"
+                if not (limit_all or os.getenv(env_var)):
+                    continue
+                rpm = self._get_budget(env_var, self.DEFAULT_RATE_LIMITS_RPM.get(p.key, 60))
+                if rpm > 0:
+                    self.rate_limiters[p.key] = RateLimiter(RateLimitConfig.from_rpm(rpm))
+
         self.checkpoint_dir = Path(checkpoint_dir)
         self.checkpoint_dir.mkdir(exist_ok=True)
 
+        # Response cache + in-flight coalescing (identical concurrent requests share one call)
+        self.response_cache = self._init_response_cache(response_cache)
+        self.cache_stats: Dict[str, Any] = {"hits": 0, "misses": 0, "coalesced": 0, "saved_cost": 0.0}
+        self._in_flight: Dict[Tuple[str, str], _InFlightCall] = {}
+        self._in_flight_lock = threading.Lock()
+
         logger.info(
             "UnifiedAPIClient initialized with providers: %s",
             ", ".join(self.provider_order) if self.provider_order else "none",
         )
 
+    DEFAULT_RESPONSE_CACHE_PATH = "cache/llm_response_cache.sqlite"
+
+    def _init_response_cache(
+        self, response_cache: Optional[Union[PromptCache, str, bool]]
+    ) -> Optional[PromptCache]:
+        if response_cache is None:
+            env_value = os.getenv("LLM_RESPONSE_CACHE", "").strip()
+            if env_value.lower() in ("", "0", "false", "no", "off"):
+                return None
+            response_cache = True if env_value.lower() in ("1", "true", "yes", "on") else env_value
+        if response_cache is False:
+            return None
+        if isinstance(response_cache, PromptCache):
+            return response_cache
+        path = self.DEFAULT_RESPONSE_CACHE_PATH if response_cache is True else str(response_cache)
+        max_entries = int(self._get_budget("LLM_RESPONSE_CACHE_MAX_ENTRIES", 100000))
+        logger.info("Response cache enabled: %s", path)
+        return PromptCache(path, max_entries=max_entries)
+
     # --- Provider Setup ---
     def _get_budget(self, env_var: str, default: float) -> float:
         try:
@@ -514,22 +605,34 @@ class UnifiedAPIClient:
 
     def _record_cost(self, cfg: ProviderConfig, input_tokens: int, output_tokens: int) -> float:
         cost = self._calculate_cost(cfg, input_tokens, output_tokens)
-        self.session_cost += cost
-        self.session_requests += 1
-        self.provider_spend[cfg.key] = self.provider_spend.get(cfg.key, 0.0) + cost
+        with self._cost_lock:
+            self.session_cost += cost
+            self.session_requests += 1
+            self.provider_spend[cfg.key] = self.provider_spend.get(cfg.key, 0.0) + cost
 
-        if self.budget_monitor:
-            self.budget_monitor.track_usage(
-                cfg.key, input_tokens, output_tokens, cost_override=cost
-            )
+            if self.budget_monitor:
+                self.budget_monitor.track_usage(
+                    cfg.key, input_tokens, output_tokens, cost_override=cost
+                )
 
-        if self.max_cost is not None and self.session_cost > self.max_cost:
-            raise BudgetExceededError(
-                f"Session budget ${self.max_cost:.2f} exceeded (now ${self.session_cost:.2f})",
-                provider="session",
-            )
+            if self.max_cost is not None and self.session_cost > self.max_cost:
+                raise BudgetExceededError(
+                    f"Session budget ${self.max_cost:.2f} exceeded (now ${self.session_cost:.2f})",
+                    provider="session",
+                )
         return cost
 
+    def _wait_for_rate_limit(self, cfg: ProviderConfig) -> None:
+        """Blocks until the provider's token bucket admits one request."""
+        limiter = self.rate_limiters.get(cfg.key)
+        if limiter is None:
+            return
+        while True:
+            allowed, wait_seconds = limiter.allow()
+            if allowed:
+                return
+            time.sleep(min(wait_seconds, 5.0))
+
     def _build_order(self, preferred_provider: Optional[str]) -> List[str]:
         if preferred_provider and preferred_provider in self.providers:
             remaining = [p for p in self.provider_order if p != preferred_provider]
@@ -541,7 +644,7 @@ class UnifiedAPIClient:
     def _post_with_retry(
         self, url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: int
     ) -> requests.Response:
-        resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
+        resp = self.http.post(url, headers=headers, json=payload, timeout=timeout)
         if resp.status_code == 429:
             raise RateLimitError("rate_limit", f"429: {resp.text}")
         resp.raise_for_status()
@@ -660,9 +763,7 @@ class UnifiedAPIClient:
         temperature: float,
     ) -> ProcessingResult:
         try:
-            import anthropic
-
-            client = anthropic.Anthropic(api_key=cfg.api_key)
+            client = self._anthropic_client(cfg)
 
             # Extended Thinking für Opus/Sonnet 4.5
             use_extended_thinking = (
@@ -744,6 +845,16 @@ class UnifiedAPIClient:
                 error=str(e),
             )
 
+    def _anthropic_client(self, cfg: ProviderConfig):
+        """One SDK client per API key, so its (httpx) connection pool is reused across calls."""
+        client = self._anthropic_clients.get(cfg.api_key or "")
+        if client is None:
+            import anthropic
+
+            client = anthropic.Anthropic(api_key=cfg.api_key)
+            self._anthropic_clients[cfg.api_key or ""] = client
+        return client
+
     def _call_bedrock(
         self,
         cfg: ProviderConfig,
@@ -891,11 +1002,12 @@ class UnifiedAPIClient:
                     output_tokens = usage.get("completion_tokens", 0)
 
             cost = self._calculate_cost(cfg, input_tokens, output_tokens)
-            if self.budget_monitor:
-                self.budget_monitor.track_usage(
-                    cfg.key, input_tokens, output_tokens, cost_override=cost
-                )
-            self.session_cost += cost
+            with self._cost_lock:
+                if self.budget_monitor:
+                    self.budget_monitor.track_usage(
+                        cfg.key, input_tokens, output_tokens, cost_override=cost
+                    )
+                self.session_cost += cost
 
             return ProcessingResult(
                 success=True,
@@ -951,11 +1063,12 @@ class UnifiedAPIClient:
             except Exception:
                 output_tokens = 0
             cost = self._calculate_cost(cfg, input_tokens, output_tokens)
-            if self.budget_monitor:
-                self.budget_monitor.track_usage(
-                    cfg.key, input_tokens, output_tokens, cost_override=cost
-                )
-            self.session_cost += cost
+            with self._cost_lock:
+                if self.budget_monitor:
+                    self.budget_monitor.track_usage(
+                        cfg.key, input_tokens, output_tokens, cost_override=cost
+                    )
+                self.session_cost += cost
             return ProcessingResult(
                 success=True,
                 provider=cfg.key,
@@ -1014,8 +1127,92 @@ class UnifiedAPIClient:
         system_prompt: Optional[str] = None,
         provider: Optional[str] = None,
         model: Optional[str] = None,
+        use_cache: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        Performs a chat completion, trying providers in order of priority.
+
+        With a response cache configured, identical requests (cost mode, resolved
+        provider order, model, messages, temperature, max_tokens) are answered from the cache, and
+        concurrent identical requests wait for a single provider call.
+        `use_cache=False` bypasses the cache for this call.
+        """
+        kwargs = dict(
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system_prompt=system_prompt,
+            provider=provider,
+            model=model,
+        )
+        if self.response_cache is None or use_cache is False:
+            return self._chat_completion_uncached(**kwargs)
+
+        cache_messages = {
+            "messages": self._build_messages(prompt, system_prompt),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        # Scope = resolved fallback order + cost_mode, so a changed LLM_PROVIDER_PRIORITY
+        # or cost mode never serves an answer produced under a different provider order
+        order = ",".join(self._build_order(provider))
+        scope = f"chat:{self.cost_mode}:{order}:{model or 'default'}"
+        cached = self.response_cache.get(cache_messages, scope)
+        if cached is not None:
+            return self._cached_result(cached["response"], "hits")
+
+        key = (scope, json.dumps(cache_messages, sort_keys=True, ensure_ascii=False))
+        with self._in_flight_lock:
+            call = self._in_flight.get(key)
+            owner = call is None
+            if owner:
+                call = self._in_flight[key] = _InFlightCall()
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return self._cached_result(call.result, "coalesced")
+
+        try:
+            result = self._chat_completion_uncached(**kwargs)
+            call.result = result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(key, None)
+            call.done.set()
+
+        with self._cost_lock:
+            self.cache_stats["misses"] += 1
+        try:
+            self.response_cache.set(cache_messages, scope, result)
+        except Exception as e:  # Cache-Fehler dürfen den Call nicht scheitern lassen
+            logger.warning("Response cache write failed: %s", e)
+        return result
+
+    def _cached_result(self, result: Dict[str, Any], counter: str) -> Dict[str, Any]:
+        """Copy of a stored result with zero cost; the original cost is counted as saved."""
+        saved = float(result.get("usage", {}).get("cost", 0.0) or 0.0)
+        with self._cost_lock:
+            self.cache_stats[counter] += 1
+            self.cache_stats["saved_cost"] += saved
+        return {
+            **result,
+            "usage": {**result.get("usage", {}), "cost": 0.0},
+            "meta": {**result.get("meta", {}), "cached": True, "saved_cost": saved},
+        }
+
+    def _chat_completion_uncached(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str],
+        provider: Optional[str],
+        model: Optional[str],
     ) -> Dict[str, Any]:
-        """Performs a chat completion, trying providers in order of priority."""
         last_error: Any = None
 
         for provider_key in self._build_order(provider):
@@ -1028,6 +1225,7 @@ class UnifiedAPIClient:
                 last_error = f"{cfg.key} budget exhausted"
                 continue
 
+            self._wait_for_rate_limit(cfg)
             logger.info("Attempting request with provider: %s", cfg.key)
             try:
                 result = self._call_provider(
@@ -1065,6 +1263,66 @@ class UnifiedAPIClient:
 
         raise ProviderError(provider or "all", f"All providers failed. Last error: {last_error}")
 
+    def chat_completion_many(
+        self,
+        items: Iterable[Union[str, Dict[str, Any]]],
+        max_concurrency: int = 8,
+        **defaults: Any,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Runs many chat completions concurrently and yields results as they complete.
+
+        Each item is a prompt string or a dict of chat_completion() keyword
+        arguments; `defaults` (e.g. system_prompt, max_tokens) apply to all of them.
+        Every request keeps the usual provider fallback order, and configured provider
+        rate limits (LLM_RATE_LIMIT / <PROVIDER>_RPM) are enforced per call. Items are
+        pulled lazily from the iterable, so at most `max_concurrency` are in flight at any time.
+
+        Yields:
+            (index, result): index into `items` and the chat_completion() result,
+            or {"error": ..., "provider": ...} if all providers failed.
+
+        Raises:
+            BudgetExceededError: after draining in-flight requests, once the session
+                budget is exceeded (no new requests are started after that point).
+        """
+        pending = iter(enumerate(items))
+        in_flight: Dict[Any, int] = {}
+        budget_error: Optional[BudgetExceededError] = None
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="llm") as pool:
+
+            def submit_next() -> bool:
+                try:
+                    index, item = next(pending)
+                except StopIteration:
+                    return False
+                kwargs = dict(defaults)
+                kwargs.update({"prompt": item} if isinstance(item, str) else item)
+                in_flight[pool.submit(self.chat_completion, **kwargs)] = index
+                return True
+
+            while len(in_flight) < max(1, max_concurrency) and submit_next():
+                pass
+
+            while in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BudgetExceededError as e:
+                        budget_error = budget_error or e
+                        continue
+                    except Exception as e:
+                        result = {"error": str(e), "provider": getattr(e, "provider", None)}
+                    if budget_error is None:
+                        submit_next()
+                    yield index, result
+
+        if budget_error is not None:
+            raise budget_error
+
     def _extract_json_object(self, text: str) -> Optional[Dict[str, Any]]:
         if "```json" in text:
             json_start = text.find("```json") + 7
@@ -1104,6 +1362,7 @@ class UnifiedAPIClient:
         max_tokens: int = 2048,
         temperature: float = 0.3,
         system_prompt: Optional[str] = None,
+        use_cache: Optional[bool] = None,
     ) -> Dict[str, Any]:
         """
         Convenience wrapper: performs a chat completion and tries to parse JSON payloads.
@@ -1117,6 +1376,7 @@ class UnifiedAPIClient:
                 system_prompt=system_prompt,
                 provider=provider,
                 model=model,
+                use_cache=use_cache,
             )
             response_text = result.get("response", "")
             parsed = self._extract_json_object(response_text) or {}
@@ -1127,6 +1387,7 @@ class UnifiedAPIClient:
                 "cost": result.get("usage", {}).get("cost", 0.0),
                 "budget_remaining": result.get("meta", {}).get("budget_remaining"),
                 "raw_response": response_text,
+                "cached": result.get("meta", {}).get("cached", False),
             }
             return parsed
         except BudgetExceededError:
@@ -1170,14 +1431,9 @@ class UnifiedAPIClient:
                 )
         return "\n\n".join(formatted_texts)
 
-    # --- Checkpoint System for batch jobs (legacy compatibility) ---
-    def _save_checkpoint(self, checkpoint_file: str, state: Dict[str, Any]):
-        path = self.checkpoint_dir / checkpoint_file
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(state, f, indent=2)
-        logger.info("Checkpoint saved to %s", path)
-
+    # --- Checkpoint System for batch jobs ---
     def _load_checkpoint(self, checkpoint_file: str) -> Optional[Dict[str, Any]]:
+        """Legacy JSON checkpoint ({"last_processed_index", "results"}), only read for migration."""
         path = self.checkpoint_dir / checkpoint_file
         if path.exists():
             with open(path, "r", encoding="utf-8") as f:
@@ -1186,43 +1442,78 @@ class UnifiedAPIClient:
                 return state
         return None
 
+    def _checkpoint_journal(self, checkpoint_file: str) -> CheckpointJournal:
+        """
+        Append-only journal next to `checkpoint_file` (``.jsonl``, one line per PDF).
+        A legacy JSON checkpoint is imported once and renamed to ``*.migrated``.
+        """
+        journal = CheckpointJournal(
+            self.checkpoint_dir / Path(checkpoint_file).with_suffix(".jsonl").name, key_field="file"
+        )
+        legacy_path = self.checkpoint_dir / checkpoint_file
+        if legacy_path != journal.path and legacy_path.exists():
+            legacy = self._load_checkpoint(checkpoint_file) or {}
+            if not len(journal):
+                for entry in legacy.get("results", []):
+                    if isinstance(entry, dict) and entry.get("file"):
+                        journal.append(entry)
+                journal.sync()
+            legacy_path.rename(legacy_path.with_name(legacy_path.name + ".migrated"))
+        return journal
+
     def batch_process_pdfs(
         self, pdf_dir: str, prompt_template: str, checkpoint_file: str = "batch_checkpoint.json"
     ) -> list:
-        """Processes PDFs in a directory with checkpointing support."""
+        """
+        Processes PDFs in a directory with checkpointing support.
+
+        Each finished PDF is appended to the checkpoint journal; on resume, PDFs
+        already in the journal are skipped (lookup by file name).
+        """
         pdf_paths = list(Path(pdf_dir).glob("*.pdf"))
-        results = []
-        checkpoint = self._load_checkpoint(checkpoint_file)
-        start_index = checkpoint.get("last_processed_index", -1) + 1 if checkpoint else 0
-        if checkpoint and "results" in checkpoint:
-            results = checkpoint["results"]
-
-        for i in range(start_index, len(pdf_paths)):
-            pdf_path = pdf_paths[i]
-            logger.info("Processing file %s/%s: %s", i + 1, len(pdf_paths), pdf_path.name)
-            try:
-                result = self.process_pdf_with_api(
-                    str(pdf_path), prompt=prompt_template.format(filename=pdf_path.name)
-                )
-                results.append({"file": pdf_path.name, "result": result})
-                state = {"last_processed_index": i, "results": results}
-                self._save_checkpoint(checkpoint_file, state)
-            except BudgetExceededError as e:
-                logger.info("Budget exceeded. Stopping batch process. %s", e)
-                break
-            except Exception as e:
-                logger.error("Failed to process %s: %s", pdf_path.name, e)
-                results.append({"file": pdf_path.name, "result": {"error": str(e)}})
-                state = {"last_processed_index": i, "results": results}
-                self._save_checkpoint(checkpoint_file, state)
+        journal = self._checkpoint_journal(checkpoint_file)
+        if len(journal):
+            logger.info("Checkpoint %s: %s PDFs already processed", journal.path, len(journal))
+
+        try:
+            for i, pdf_path in enumerate(pdf_paths):
+                if pdf_path.name in journal:
+                    continue
+                logger.info("Processing file %s/%s: %s", i + 1, len(pdf_paths), pdf_path.name)
+                try:
+                    result = self.process_pdf_with_api(
+                        str(pdf_path), prompt=prompt_template.format(filename=pdf_path.name)
+                    )
+                    journal.append({"file": pdf_path.name, "result": result})
+                except BudgetExceededError as e:
+                    logger.info("Budget exceeded. Stopping batch process. %s", e)
+                    break
+                except Exception as e:
+                    logger.error("Failed to process %s: %s", pdf_path.name, e)
+                    journal.append({"file": pdf_path.name, "result": {"error": str(e)}})
+            results = journal.records()
+        finally:
+            journal.close()
 
         logger.info("Batch processing finished.")
         return results
 
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Connection-pool statistics per base URL (requests, new vs. reused connections, latency)."""
+        return self.http.stats()
+
     def get_cost_report(self) -> Dict[str, Any]:
-        return {
-            "total_cost": round(self.session_cost, 4),
-            "total_requests": self.session_requests,
-            "provider_spend": self.provider_spend,
-            "budget_summary": self.budget_monitor.summary() if self.budget_monitor else {},
-        }
+        with self._cost_lock:
+            return {
+                "total_cost": round(self.session_cost, 4),
+                "total_requests": self.session_requests,
+                "provider_spend": dict(self.provider_spend),
+                "budget_summary": self.budget_monitor.summary() if self.budget_monitor else {},
+                "response_cache": {
+                    "enabled": self.response_cache is not None,
+                    "hits": self.cache_stats["hits"],
+                    "misses": self.cache_stats["misses"],
+                    "coalesced": self.cache_stats["coalesced"],
+                    "saved_cost": round(self.cache_stats["saved_cost"], 4),
+                },
+            }
@@ -26,6 +26,8 @@ from typing import Dict, List, Optional
 
 import requests
 
+from core.http_pool import HTTPSessionPool, get_default_pool
+
 logger = logging.getLogger(__name__)
 
 ALLOWED_DOMAINS_DEFAULT = [
@@ -41,7 +43,9 @@ ALLOWED_DOMAINS_DEFAULT = [
 ]
 
 
-def _call_perplexity(api_key: str, model_id: str, query: str) -> Optional[str]:
+def _call_perplexity(
+    api_key: str, model_id: str, query: str, http_pool: Optional[HTTPSessionPool] = None
+) -> Optional[str]:
     """Make a single Perplexity API call."""
     system_prompt = (
         "Du bist ein medizinischer Recherche-Assistent für deutsche Prüfungsvorbereitung. "
@@ -67,7 +71,7 @@ def _call_perplexity(api_key: str, model_id: str, query: str) -> Optional[str]:
         "max_tokens": 1000,
     }
 
-    resp = requests.post(
+    resp = (http_pool or get_default_pool()).post(
         "https://api.perplexity.ai/chat/completions",
         headers=headers,
         json=payload,
@@ -83,11 +87,13 @@ def search_medical_web(
     max_results: int = 5,
     allowed_domains: Optional[List[str]] = None,
     model: Optional[str] = None,
+    http_pool: Optional[HTTPSessionPool] = None,
 ) -> List[Dict[str, str]]:
     """
     Performs a web search using Perplexity's online model directly.
 
-    Supports two API keys for failover/rate limit handling.
+    Supports two API keys for failover/rate limit handling. Requests go through
+    `http_pool` (e.g. UnifiedAPIClient.http) or the shared default keep-alive pool.
 
     Returns a list of dicts: {title, url, snippet, source}
     """
@@ -107,7 +113,7 @@ def search_medical_web(
     for i, api_key in enumerate(api_keys):
         try:
             logger.debug(f"Versuche Perplexity API Key {i+1}...")
-            content = _call_perplexity(api_key, model_id, query)
+            content = _call_perplexity(api_key, model_id, query, http_pool=http_pool)
 
             if content:
                 logger.info(f"Perplexity Web-Suche erfolgreich (Key {i+1})")
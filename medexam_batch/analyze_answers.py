@@ -7,6 +7,16 @@ server errors, and malformed responses.
 import argparse
 import json
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.dataset import open_items  # noqa: E402
+
+# Only these fields are read from each entry (answer files are streamed)
+ENTRY_FIELDS = ("antwort", "frage", "index", "evidenzgrad", "leitlinie")
+COUNTERS = ("problematic_entries", "empty_answers", "server_errors", "short_answers")
 
 
 def analyze_answer_files(input_path=None):
@@ -41,7 +51,9 @@ def analyze_answer_files(input_path=None):
         # Get all answer files
         if os.path.exists(answers_dir):
             answer_files = [
-                f for f in os.listdir(answers_dir) if f.endswith("_answers.json")
+                f
+                for f in os.listdir(answers_dir)
+                if f.endswith(("_answers.json", "_answers.jsonl"))
             ]
             answer_files.sort()
             for filename in answer_files:
@@ -51,31 +63,28 @@ def analyze_answer_files(input_path=None):
 
     for filename, file_path in files_to_process:
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            # Ensure data is a list
-            if not isinstance(data, list):
-                print(
-                    f"Error: {filename} - expected list, " f"got {type(data).__name__}"
-                )
+            data = open_items(file_path, fields=ENTRY_FIELDS)
+
+            # Ensure data is a list (JSON list or JSONL)
+            if data.shape == "object":
+                data.close()
+                print(f"Error: {filename} - expected list, got dict")
                 continue
 
             file_report = {
                 "filename": filename,
-                "entries": len(data),
+                "entries": 0,
                 "problematic_entries": 0,
                 "empty_answers": 0,
                 "server_errors": 0,
                 "short_answers": 0,
             }
-
-            # Update summary
-            report["summary"]["total_files"] += 1
-            report["summary"]["total_entries"] += len(data)
+            file_problems = []
 
             # Analyze each entry
             for entry in data:
+                file_report["entries"] += 1
+
                 # Skip if entry is not a dictionary
                 if not isinstance(entry, dict):
                     print(f"Warning: {filename} - entry not dict, skipping")
@@ -88,14 +97,12 @@ def analyze_answer_files(input_path=None):
                 if "antwort" not in entry or entry["antwort"] is None:
                     is_problematic = True
                     reason.append("empty_answer")
-                    report["summary"]["empty_answers"] += 1
                     file_report["empty_answers"] += 1
                 elif isinstance(entry["antwort"], str):
                     answer_clean = entry["antwort"].strip()
                     if not answer_clean:  # Whitespace-only answer
                         is_problematic = True
                         reason.append("empty_answer")
-                        report["summary"]["empty_answers"] += 1
                         file_report["empty_answers"] += 1
                 # Check for malformed JSON responses or other non-string
                 # server errors
@@ -103,7 +110,6 @@ def analyze_answer_files(input_path=None):
                     # If answer is not a string, it might be malformed
                     is_problematic = True
                     reason.append("server_error")
-                    report["summary"]["server_errors"] += 1
                     file_report["server_errors"] += 1
 
                 # Check for server error indicators (more specific to avoid
@@ -146,7 +152,6 @@ def analyze_answer_files(input_path=None):
                         ):
                             is_problematic = True
                             reason.append("server_error")
-                            report["summary"]["server_errors"] += 1
                             file_report["server_errors"] += 1
                             break
 
@@ -181,7 +186,6 @@ def analyze_answer_files(input_path=None):
                         ):
                             is_problematic = True
                             reason.append("short_answer")
-                            report["summary"]["short_answers"] += 1
                             file_report["short_answers"] += 1
                         # Also check for very short non-placeholder answers
                         # that might be legitimate
@@ -195,11 +199,9 @@ def analyze_answer_files(input_path=None):
                             # could be problematic
                             is_problematic = True
                             reason.append("short_answer")
-                            report["summary"]["short_answers"] += 1
                             file_report["short_answers"] += 1
 
                 if is_problematic:
-                    report["summary"]["problematic_entries"] += 1
                     file_report["problematic_entries"] += 1
 
                     # Extract question text
@@ -217,8 +219,14 @@ def analyze_answer_files(input_path=None):
                         "evidenzgrad": entry.get("evidenzgrad", "N/A"),
                         "leitlinie": entry.get("leitlinie", "N/A"),
                     }
-                    report["problematic_entries"].append(problematic_entry)
+                    file_problems.append(problematic_entry)
 
+            # Update summary once the whole file has been read
+            report["summary"]["total_files"] += 1
+            report["summary"]["total_entries"] += file_report["entries"]
+            for key in COUNTERS:
+                report["summary"][key] += file_report[key]
+            report["problematic_entries"].extend(file_problems)
             report["files"].append(file_report)
 
         except Exception as e:
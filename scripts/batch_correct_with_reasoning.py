@@ -17,7 +17,6 @@ from __future__ import annotations
 
 import argparse
 import json
-import os
 import re
 import sys
 import time
@@ -28,6 +27,7 @@ from typing import Any, Dict, List, Optional, Tuple
 # Repo-Root in sys.path, damit `core.*` importierbar ist.
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from core.checkpoint_journal import CheckpointJournal
 from core.unified_api_client import UnifiedAPIClient
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -49,37 +49,6 @@ def _write_json(path: Path, payload: Any) -> None:
         json.dump(payload, f, ensure_ascii=False, indent=2)
 
 
-def _append_jsonl(path: Path, obj: Dict[str, Any], *, fsync: bool) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    line = json.dumps(obj, ensure_ascii=False) + "\n"
-    with path.open("a", encoding="utf-8") as f:
-        f.write(line)
-        f.flush()
-        if fsync:
-            os.fsync(f.fileno())
-
-
-def _load_checkpoint_jsonl(path: Path) -> Dict[str, Dict[str, Any]]:
-    done: Dict[str, Dict[str, Any]] = {}
-    if not path.exists():
-        return done
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            try:
-                obj = json.loads(s)
-            except Exception:
-                continue
-            if not isinstance(obj, dict):
-                continue
-            rid = str(obj.get("id") or "").strip()
-            if rid:
-                done[rid] = obj
-    return done
-
-
 def _pick_latest(output_dir: Path, pattern: str) -> Path:
     candidates = sorted(
         output_dir.glob(pattern),
@@ -322,7 +291,9 @@ def main() -> int:
 
     items: List[Dict[str, Any]] = [x for x in payload["items"] if isinstance(x, dict)]
 
-    done = _load_checkpoint_jsonl(ck_path) if args.resume else {}
+    # Checkpoint-Journal: eine Zeile pro Item, fsync gebündelt (--fsync: jede Zeile)
+    journal = CheckpointJournal(ck_path, key_field="id", sync_every=1 if args.fsync else 100)
+    done = journal if args.resume else {}
 
     client = UnifiedAPIClient()
     sys_prompt = _system_prompt()
@@ -358,8 +329,7 @@ def main() -> int:
                         um = updated_item.get("__meta__", {})
                         if isinstance(um, dict):
                             um["error"] = um.get("error") or "json_salvaged"
-                        _append_jsonl(ck_path, updated_item, fsync=bool(args.fsync))
-                        done[rid] = updated_item
+                        journal.append(updated_item)
                         new_processed += 1
                         continue
 
@@ -419,22 +389,22 @@ def main() -> int:
             },
         }
 
-        _append_jsonl(ck_path, out_item, fsync=bool(args.fsync))
+        journal.append(out_item)
         new_processed += 1
 
         if args.sleep and float(args.sleep) > 0:
             time.sleep(float(args.sleep))
 
         if n % 10 == 0:
-            snap = _load_checkpoint_jsonl(ck_path)
+            snap = journal.records()
             ok_now = sum(
                 1
-                for x in snap.values()
+                for x in snap
                 if isinstance(x, dict) and str(x.get("antwort_korrigiert") or "").strip()
             )
             err_now = len(snap) - ok_now
             cost_now = 0.0
-            for x in snap.values():
+            for x in snap:
                 m = x.get("__meta__", {}) if isinstance(x, dict) else {}
                 try:
                     cost_now += float(m.get("cost") or 0.0)
@@ -450,8 +420,8 @@ def main() -> int:
             break
 
     # Final-Snapshot aus Checkpoint schreiben (enthält alle Runs)
-    snap = _load_checkpoint_jsonl(ck_path)
-    processed = list(snap.values())
+    processed = journal.records()
+    journal.close()
     processed.sort(key=lambda x: int(x.get("index") or 0))
 
     total_cost = 0.0
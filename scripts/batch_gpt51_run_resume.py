@@ -38,46 +38,95 @@ GPT51_INPUT_COST_PER_1M = 0.625  # $0.625 / 1M input tokens
 GPT51_OUTPUT_COST_PER_1M = 5.00  # $5.00 / 1M output tokens
 
 
+def _iter_kb_records(kb_path: Path):
+    """Streamt KB-Einträge aus einer Binär-KB (Verzeichnis) oder der JSON-KB."""
+    if kb_path.is_dir():
+        sys.path.insert(0, str(BASE_DIR))
+        from core.kb_store import BinaryKnowledgeBase
+
+        yield from BinaryKnowledgeBase(kb_path).iter_records()
+        return
+
+    import ijson
+
+    with open(kb_path, "r", encoding="utf-8") as f:
+        for _content_id, content_dict in ijson.kvitems(f, "knowledge_base"):
+            yield content_dict
+
+
+# Lexikalischer KB-Index pro Lauf: kb_path -> (BM25Index, Record-Lookup für Zeilen)
+_KB_LEXICAL_CACHE: Dict[str, Any] = {}
+
+
+def _load_kb_lexical_index(kb_path: Path):
+    """
+    BM25-Index über die KB-Texte, persistiert neben der KB (gleicher Pfad und
+    Fingerprint wie bei MedicalRAGSystem, d.h. ein dort gebauter Index wird
+    wiederverwendet). Die KB wird pro Lauf nur einmal gestreamt.
+    """
+    key = str(kb_path)
+    if key in _KB_LEXICAL_CACHE:
+        return _KB_LEXICAL_CACHE[key]
+
+    sys.path.insert(0, str(BASE_DIR))
+    from core.bm25_index import BM25Index
+    from core.kb_store import ids_fingerprint
+
+    if kb_path.is_dir():
+        from core.kb_store import BinaryKnowledgeBase
+
+        kb = BinaryKnowledgeBase(kb_path)
+        ids = [r.get("content_id") or "" for r in kb.iter_records()]
+        index = BM25Index.load_or_build(
+            kb_path / "bm25_index.npz",
+            ids_fingerprint(ids),
+            lambda: (r.get("text", "") for r in kb.iter_records()),
+        )
+        lookup = kb.read_records  # Random Access per Byte-Offset
+    else:
+        # JSON-KB: kein Random Access -> gekürzte Records einmalig im Speicher halten
+        records = [
+            {
+                "content_id": r.get("content_id") or "",
+                "text": r.get("text", ""),
+                "metadata": r.get("metadata") or {},
+            }
+            for r in _iter_kb_records(kb_path)
+        ]
+        index = BM25Index.load_or_build(
+            Path(str(kb_path) + ".bm25.npz"),
+            ids_fingerprint([r["content_id"] for r in records]),
+            lambda: (r["text"] for r in records),
+        )
+        for r in records:
+            r["text"] = r["text"][:800]
+        lookup = lambda rows: [records[row] for row in rows]  # noqa: E731
+
+    _KB_LEXICAL_CACHE[key] = (index, lookup)
+    return index, lookup
+
+
 def load_rag_context(kb_path: Path, question: str, top_k: int = 3) -> List[Dict]:
     """
     Lädt relevanten Kontext aus der Leitlinien-KB.
-    Vereinfachte Keyword-Suche ohne vollständiges RAG-System.
+    BM25-Suche (core.bm25_index) ohne vollständiges RAG-System (keine Embeddings).
     """
     if not kb_path.exists():
         logger.warning(f"KB nicht gefunden: {kb_path}")
         return []
 
     try:
-        # KB ist sehr groß - nur Streaming/Sampling
-        import ijson
-
-        results = []
-        question_lower = question.lower()
-        keywords = [w for w in question_lower.split() if len(w) > 4]
-
-        with open(kb_path, "r", encoding="utf-8") as f:
-            for content_id, content_dict in ijson.kvitems(f, "knowledge_base"):
-                text = content_dict.get("text", "")[:500].lower()
-
-                # Keyword-Match
-                matches = sum(1 for kw in keywords if kw in text)
-                if matches >= 2:
-                    results.append(
-                        {
-                            "text": content_dict.get("text", "")[:800],
-                            "source": content_dict.get("metadata", {}).get(
-                                "source", "Leitlinie"
-                            ),
-                            "matches": matches,
-                        }
-                    )
-
-                if len(results) >= top_k * 3:  # Sammle mehr, sortiere später
-                    break
-
-        # Sortiere nach Matches
-        results.sort(key=lambda x: x["matches"], reverse=True)
-        return results[:top_k]
+        index, lookup = _load_kb_lexical_index(kb_path)
+        hits = index.search(question, top_k=top_k, min_matched=2)
+        records = lookup([doc_id for doc_id, _score in hits])
+        return [
+            {
+                "text": record.get("text", "")[:800],
+                "source": (record.get("metadata") or {}).get("source", "Leitlinie"),
+                "score": round(score, 3),
+            }
+            for record, (_doc_id, score) in zip(records, hits)
+        ]
 
     except Exception as e:
         logger.warning(f"KB-Laden fehlgeschlagen: {e}")
@@ -249,9 +298,15 @@ def main():
     parser.add_argument(
         "--kb-path",
         default="_LLM_ARCHIVE_CLEAN/knowledge_condensed.json",
-        help="Pfad zur Knowledge Base (JSON)",
+        help="Pfad zur Knowledge Base (JSON oder Binär-KB-Verzeichnis)",
     )
     parser.add_argument("--limit", type=int, default=600, help="Maximale Anzahl Fragen")
+    parser.add_argument(
+        "--rag-limit",
+        type=int,
+        default=5,
+        help="RAG-Kontext nur für die ersten N Fragen laden (Perf, 0 = alle)",
+    )
     parser.add_argument(
         "--budget", type=float, default=20.0, help="Maximales Budget in $"
     )
@@ -341,7 +396,7 @@ def main():
 
         # RAG-Kontext laden (optional, kann langsam sein)
         context = []
-        if kb_path.exists() and i <= 5:  # Nur für erste 5 Fragen KB laden (Perf)
+        if kb_path.exists() and (args.rag_limit <= 0 or i <= args.rag_limit):
             context = load_rag_context(kb_path, question_text)
 
         # GPT-5.1 Call
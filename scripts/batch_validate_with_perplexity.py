@@ -31,6 +31,10 @@ import requests
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 OUTPUT_DIR = PROJECT_ROOT / "_OUTPUT"
 
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.checkpoint_journal import CheckpointJournal  # noqa: E402
+
 
 def _now_run_id() -> str:
     return datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -47,37 +51,6 @@ def _write_json(path: Path, payload: Any) -> None:
         json.dump(payload, f, ensure_ascii=False, indent=2)
 
 
-def _append_jsonl(path: Path, obj: Dict[str, Any], *, fsync: bool) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    line = json.dumps(obj, ensure_ascii=False) + "\n"
-    with path.open("a", encoding="utf-8") as f:
-        f.write(line)
-        f.flush()
-        if fsync:
-            os.fsync(f.fileno())
-
-
-def _load_checkpoint_jsonl(path: Path) -> Dict[str, Dict[str, Any]]:
-    done: Dict[str, Dict[str, Any]] = {}
-    if not path.exists():
-        return done
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            try:
-                obj = json.loads(s)
-            except Exception:
-                continue
-            if not isinstance(obj, dict):
-                continue
-            rid = str(obj.get("id") or "").strip()
-            if rid:
-                done[rid] = obj
-    return done
-
-
 def _pick_latest(output_dir: Path, pattern: str) -> Path:
     candidates = sorted(
         output_dir.glob(pattern),
@@ -355,7 +328,9 @@ def main() -> int:
 
     items: List[Dict[str, Any]] = [x for x in payload["items"] if isinstance(x, dict)]
 
-    done = _load_checkpoint_jsonl(ck_path) if args.resume else {}
+    # Checkpoint-Journal: eine Zeile pro Item, fsync gebündelt (--fsync: jede Zeile)
+    journal = CheckpointJournal(ck_path, key_field="id", sync_every=1 if args.fsync else 100)
+    done = journal if args.resume else {}
     sys_prompt = _system_prompt()
 
     max_new = int(args.limit) if args.limit and int(args.limit) > 0 else 0
@@ -388,8 +363,7 @@ def main() -> int:
                     "empfehlung": salv0.get("empfehlung", ""),
                     "__meta__": {"raw_response": raw0, "note": "salvaged_from_truncated_json"},
                 }
-                _append_jsonl(ck_path, out_item, fsync=bool(args.fsync))
-                done[rid] = out_item
+                journal.append(out_item)
                 new_processed += 1
                 continue
             # sonst: re-run via API (fall-through)
@@ -406,7 +380,7 @@ def main() -> int:
                 "empfehlung": "Batch-Korrektur erneut ausführen oder manuell prüfen.",
                 "__meta__": {"error": "missing_answer"},
             }
-            _append_jsonl(ck_path, out_item, fsync=bool(args.fsync))
+            journal.append(out_item)
             new_processed += 1
             continue
 
@@ -452,7 +426,7 @@ def main() -> int:
                     "empfehlung": salv.get("empfehlung", ""),
                     "__meta__": {"raw_response": raw_text, "note": "salvaged_from_truncated_json"},
                 }
-                _append_jsonl(ck_path, out_item, fsync=bool(args.fsync))
+                journal.append(out_item)
                 new_processed += 1
                 continue
             out_item = {
@@ -464,7 +438,7 @@ def main() -> int:
                 "empfehlung": "",
                 "__meta__": {"raw_response": raw_text},
             }
-            _append_jsonl(ck_path, out_item, fsync=bool(args.fsync))
+            journal.append(out_item)
             new_processed += 1
             continue
 
@@ -484,16 +458,15 @@ def main() -> int:
             "__meta__": {"raw_response": raw_text},
         }
 
-        _append_jsonl(ck_path, out_item, fsync=bool(args.fsync))
+        journal.append(out_item)
         new_processed += 1
 
         if args.sleep and float(args.sleep) > 0:
             time.sleep(float(args.sleep))
 
         if n % 10 == 0:
-            snap = _load_checkpoint_jsonl(ck_path)
             counts = {"ok": 0, "maybe": 0, "problem": 0, "error": 0}
-            for x in snap.values():
+            for x in journal.records():
                 v = str(x.get("verdict") or "").strip().lower()
                 if v in counts:
                     counts[v] += 1
@@ -505,8 +478,8 @@ def main() -> int:
         if max_new and new_processed >= max_new:
             break
 
-    snap = _load_checkpoint_jsonl(ck_path)
-    processed = list(snap.values())
+    processed = journal.records()
+    journal.close()
     processed.sort(key=lambda x: int(x.get("index") or 0))
     counts = {"ok": 0, "maybe": 0, "problem": 0, "error": 0}
     for x in processed:
@@ -26,10 +26,14 @@ from __future__ import annotations
 import argparse
 import json
 import math
-import re
+import sys
 from pathlib import Path
 from typing import Any, Dict, Iterator, List, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.bm25_index import BM25Index, file_fingerprint  # noqa: E402
+
 
 def _approx_tokens(s: str) -> int:
     # crude heuristic: ~4 chars/token
@@ -62,66 +66,6 @@ SYSTEM_PROMPT = (
     "Du arbeitest streng evidenzorientiert und markierst Unsicherheit klar."
 )
 
-STOPWORDS_DE = {
-    "der",
-    "die",
-    "das",
-    "ein",
-    "eine",
-    "einer",
-    "einem",
-    "einen",
-    "und",
-    "oder",
-    "aber",
-    "sowie",
-    "wie",
-    "was",
-    "welche",
-    "welcher",
-    "welches",
-    "wann",
-    "warum",
-    "wieso",
-    "wo",
-    "mit",
-    "ohne",
-    "bei",
-    "im",
-    "in",
-    "am",
-    "an",
-    "auf",
-    "aus",
-    "für",
-    "von",
-    "zum",
-    "zur",
-    "des",
-    "den",
-    "dem",
-    "ist",
-    "sind",
-    "war",
-    "wird",
-    "werden",
-    "kann",
-    "können",
-    "soll",
-    "sollen",
-    "bitte",
-    "u",
-    "ua",
-    "z",
-    "b",
-}
-
-
-def _tokenize(text: str) -> List[str]:
-    toks = re.findall(r"[A-Za-zÄÖÜäöüß0-9]{2,}", (text or "").lower())
-    return [t for t in toks if t not in STOPWORDS_DE]
-
-
 def _safe_trunc(s: str, max_chars: int) -> str:
     s = (s or "").strip()
     if len(s) <= max_chars:
@@ -143,41 +87,37 @@ def _load_evidenz(path: Path) -> List[Dict[str, Any]]:
     return []
 
 
-def _build_inverted_index(evidenz: List[Dict[str, Any]]) -> Dict[str, List[int]]:
-    inv: Dict[str, List[int]] = {}
-    for i, e in enumerate(evidenz):
-        q = str(e.get("frage") or "")
-        a = str(e.get("antwort") or "")
-        toks = _tokenize(q + " " + a[:600])
-        for t in set(toks):
-            inv.setdefault(t, []).append(i)
-    return inv
+def _evidenz_doc_text(e: Dict[str, Any]) -> str:
+    return str(e.get("frage") or "") + " " + str(e.get("antwort") or "")[:600]
+
+
+def _load_rag_index(evid_path: Path, evidenz: List[Dict[str, Any]], index_path: Path) -> BM25Index:
+    """
+    BM25 index over evidenz (frage + antwort head), persisted next to the source.
+    Reused across runs as long as the evidenz file is unchanged.
+    """
+    return BM25Index.load_or_build(
+        index_path,
+        source_fingerprint=file_fingerprint(evid_path),
+        texts=lambda: (_evidenz_doc_text(e) for e in evidenz),
+    )
 
 
 def _retrieve_rag_snippets(
     *,
     query: str,
     evidenz: List[Dict[str, Any]],
-    inv: Dict[str, List[int]],
+    index: BM25Index,
     top_k: int,
     min_score: int,
     max_chars_total: int,
 ) -> Tuple[str, List[str]]:
     """
-    Lightweight lexical retrieval against evidenz_antworten_clean.json.
+    Lightweight lexical retrieval (BM25) against evidenz_antworten_clean.json.
+    `min_score` is the minimum number of distinct query terms a match must contain.
     Returns (rag_context_text, suggested_citations).
     """
-    q_toks = _tokenize(query)
-    if not q_toks:
-        return "", []
-
-    scores: Dict[int, int] = {}
-    for t in set(q_toks):
-        for doc_id in inv.get(t, []):
-            scores[doc_id] = scores.get(doc_id, 0) + 1
-
-    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
-    picked = [(d, s) for d, s in ranked if s >= min_score][:top_k]
+    picked = index.search(query, top_k=top_k, min_matched=max(1, min_score))
     if not picked:
         return "", []
 
@@ -198,7 +138,7 @@ def _retrieve_rag_snippets(
         source_file = _safe_trunc(str(e.get("source_file") or ""), 160)
 
         block: List[str] = []
-        block.append(f"[RAG {idx}] (score={score}) Frage: {frage}")
+        block.append(f"[RAG {idx}] (score={score:.2f}) Frage: {frage}")
         if antwort:
             block.append(f"Antwort-Auszug: {antwort}")
         meta_parts: List[str] = []
@@ -393,7 +333,14 @@ def main() -> None:
         help="Local RAG knowledge base (evidenz_antworten_clean.json).",
     )
     parser.add_argument("--rag-top-k", type=int, default=2, help="Top-K RAG snippets to include per card.")
-    parser.add_argument("--rag-min-score", type=int, default=2, help="Min token-overlap score to include a RAG match.")
+    parser.add_argument(
+        "--rag-min-score", type=int, default=2, help="Min number of matched query terms to include a RAG match."
+    )
+    parser.add_argument(
+        "--rag-index",
+        default=None,
+        help="Persisted BM25 index for --rag-evidenz (default: <rag-evidenz>.bm25.npz; rebuilt when stale).",
+    )
     parser.add_argument("--rag-max-chars", type=int, default=1400, help="Max chars of RAG context included per card.")
     args = parser.parse_args()
 
@@ -403,7 +350,10 @@ def main() -> None:
 
     evid_path = Path(args.rag_evidenz)
     evidenz = _load_evidenz(evid_path)
-    inv = _build_inverted_index(evidenz) if evidenz else {}
+    rag_index = None
+    if evidenz:
+        index_path = Path(args.rag_index) if args.rag_index else Path(str(evid_path) + ".bm25.npz")
+        rag_index = _load_rag_index(evid_path, evidenz, index_path)
 
     total_est_tokens = 0
     total_cards = 0
@@ -444,7 +394,7 @@ def main() -> None:
                 rag_text, rag_cits = _retrieve_rag_snippets(
                     query=str(card.get("front") or ""),
                     evidenz=evidenz,
-                    inv=inv,
+                    index=rag_index,
                     top_k=int(args.rag_top_k),
                     min_score=int(args.rag_min_score),
                     max_chars_total=int(args.rag_max_chars),
@@ -7,20 +7,29 @@ Baut den RAG-Index aus allen Leitlinien-PDFs auf.
 Extrahiert Text, chunked, und generiert Embeddings.
 
 Features:
+- Parallele PDF-Extraktion (Prozess-Pool) mit Text-Cache pro Inhalts-Hash
 - Checkpoint-Support: Kann bei Unterbrechung fortgesetzt werden
 - Inkrementelles Speichern: Speichert nach jeder Datei
 - Resume-Funktion: --resume Flag um fortzufahren
 
-Geschätzte Zeit: ~15-20 Min (lokal) oder ~5 Min (OpenAI)
+Embeddings werden pro Datei gebündelt erzeugt (--embed-batch-size Texte pro
+Encoder-Pass, bis zu 2048 Inputs pro OpenAI-Request).
+
+Geschätzte Zeit: ~15-20 Min (lokal, vor Batching) oder ~5 Min (OpenAI)
 """
 
 import argparse
 import gc
+import gzip
 import hashlib
 import json
 import logging
+import multiprocessing
+import os
 import sys
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Generator, List, Optional, Set, Tuple
@@ -32,6 +41,10 @@ logger = logging.getLogger(__name__)
 # Checkpoint-Konfiguration
 CHECKPOINT_DIR = Path(__file__).resolve().parent.parent / "_OUTPUT" / "rag_checkpoints"
 CHECKPOINT_FILE = CHECKPOINT_DIR / "checkpoint.json"
+# Extrahierter PDF-Text pro Inhalts-Hash (unveränderte PDFs werden nicht neu geparst)
+TEXT_CACHE_DIR = CHECKPOINT_DIR.parent / "rag_text_cache"
+# Extraktions-Worker (PDF-Parsing ist speicherhungrig, daher nicht alle Kerne)
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
 
 
 def load_checkpoint() -> dict:
@@ -204,6 +217,107 @@ def _gather_pdf_files(directories: List[Path]) -> List[Tuple[Path, Path]]:
     return pdf_files
 
 
+def _file_sha256(path: Path) -> str:
+    """SHA-256 des Dateiinhalts (Schlüssel für den Text-Cache)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_and_chunk_pdf(
+    pdf_path: str,
+    root_dir: str,
+    chunk_size: int,
+    overlap: int,
+    text_cache_dir: Optional[str] = None,
+) -> dict:
+    """
+    Extrahiert und chunked ein PDF (läuft in einem Worker-Prozess).
+
+    Der extrahierte Text wird pro Inhalts-Hash gecacht, sodass unveränderte
+    Leitlinien bei erneutem Lauf nicht neu geparst werden.
+    """
+    path = Path(pdf_path)
+    rel_path = path.relative_to(root_dir)
+    result = {
+        "file_key": pdf_path,
+        "name": path.name,
+        "category": rel_path.parts[0] if len(rel_path.parts) > 1 else Path(root_dir).name,
+        "path": str(rel_path),
+        "chunks": [],
+        "cached": False,
+        "error": None,
+    }
+    try:
+        text = None
+        cache_file = None
+        if text_cache_dir:
+            cache_file = Path(text_cache_dir) / f"{_file_sha256(path)}.txt.gz"
+            if cache_file.exists():
+                with gzip.open(cache_file, "rt", encoding="utf-8") as f:
+                    text = f.read()
+                result["cached"] = True
+
+        if text is None:
+            text = extract_text_from_pdf(path)
+            if cache_file is not None:
+                tmp = cache_file.with_name(cache_file.name + f".tmp-{os.getpid()}")
+                with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, cache_file)
+
+        result["chunks"] = list(chunk_text(text, chunk_size, overlap)) if text else []
+    except Exception as e:  # noqa: BLE001
+        result["error"] = str(e)
+    return result
+
+
+def _iter_extracted(
+    pdf_files: List[Tuple[Path, Path]],
+    chunk_size: int,
+    overlap: int,
+    workers: int,
+    text_cache_dir: Optional[Path],
+    queue_size: int,
+) -> Generator[dict, None, None]:
+    """
+    Producer: Extraktion + Chunking über einen Prozess-Pool.
+
+    Es sind höchstens `queue_size` Dateien gleichzeitig in Arbeit (begrenzte
+    Queue); Ergebnisse kommen in Eingabereihenfolge zurück. Die Worker werden
+    per "spawn" gestartet: ein fork nach dem Laden des Embedding-Modells
+    würde Modell-Speicher und Threads (Torch/Tokenizer) in jeden Worker kopieren.
+    """
+    cache_dir = str(text_cache_dir) if text_cache_dir else None
+    if text_cache_dir:
+        text_cache_dir.mkdir(parents=True, exist_ok=True)
+
+    if workers <= 1:
+        for pdf_path, root_dir in pdf_files:
+            yield extract_and_chunk_pdf(str(pdf_path), str(root_dir), chunk_size, overlap, cache_dir)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending: deque = deque()
+        files = iter(pdf_files)
+        for pdf_path, root_dir in files:
+            pending.append(pool.submit(
+                extract_and_chunk_pdf, str(pdf_path), str(root_dir), chunk_size, overlap, cache_dir
+            ))
+            if len(pending) >= queue_size:
+                break
+        while pending:
+            result = pending.popleft().result()
+            next_file = next(files, None)
+            if next_file is not None:
+                pending.append(pool.submit(
+                    extract_and_chunk_pdf, str(next_file[0]), str(next_file[1]), chunk_size, overlap, cache_dir
+                ))
+            yield result
+
+
 def build_rag_index_streaming(
     rag,
     pdf_files: List[Tuple[Path, Path]],
@@ -212,99 +326,103 @@ def build_rag_index_streaming(
     chunk_size: int,
     overlap: int,
     save_every: int = 50,
+    workers: int = 1,
+    text_cache_dir: Optional[Path] = None,
+    embed_batch_chunks: int = 512,
 ) -> int:
     """
-    Baut den RAG-Index inkrementell pro PDF-Datei.
-    Speichert häufig Checkpoints und den Embedding-Cache.
+    Baut den RAG-Index inkrementell als Producer/Consumer-Pipeline.
+
+    - Producer: Prozess-Pool extrahiert und chunked PDFs (Text-Cache pro Inhalts-Hash)
+    - Consumer: ein Embedding-Schritt, der Chunks mehrerer Dateien zu Batches
+      von ca. `embed_batch_chunks` bündelt
+
+    Eine Datei gilt erst als verarbeitet (Checkpoint), wenn alle ihre Chunks
+    eingebettet und in der Wissensbasis sind.
     """
     start_time = time.time()
     total_added = 0
     processed_files: Set[str] = set()
     files_since_save = 0
     total_files = len(pdf_files)
-    total_to_process = len([pf for pf, _ in pdf_files if str(pf) not in skip_files])
+    todo = [(pf, root) for pf, root in pdf_files if str(pf) not in skip_files]
+    total_to_process = len(todo)
 
     print(f"\n📊 Generiere Embeddings inkrementell für {total_to_process} aus {total_files} PDFs...")
-    print(f"   Checkpoint alle {save_every} Dateien")
+    print(f"   Checkpoint alle {save_every} Dateien, {workers} Extraktions-Worker")
 
-    processed_idx = 0
-    for idx, (pdf_path, root_dir) in enumerate(pdf_files, 1):
-        file_key = str(pdf_path)
-        if file_key in skip_files:
-            continue
-
-        processed_idx += 1
-        rel_path = pdf_path.relative_to(root_dir)
-        category = rel_path.parts[0] if len(rel_path.parts) > 1 else root_dir.name
-
-        print(f"[{processed_idx}/{total_to_process}] {pdf_path.name[:60]}...", end=" ")
+    def save_all(label: str) -> None:
+        all_processed = list(skip_files | processed_files)
+        save_checkpoint(all_processed, total_added)
+        rag.save_knowledge_base(str(output_path))
+        # Embedding-Cache persistieren, damit Embeddings bei Resume nicht neu berechnet werden
         try:
-            text = extract_text_from_pdf(pdf_path)
-            if not text:
-                print("⚠️ Kein Text")
-                continue
+            rag.embedding_cache.save()
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Embedding-Cache konnte nicht gespeichert werden: {e}")
+        gc.collect()
+        elapsed = time.time() - start_time
+        print(f"   💾 {label} ({len(all_processed)} Dateien, {total_added} Einträge, {elapsed/60:.1f} min)")
 
-            chunks = list(chunk_text(text, chunk_size, overlap))
-            chunk_count = len(chunks)
+    batch: List[dict] = []
 
-            if not chunk_count:
-                print("⚠️ Keine Chunks")
+    def flush() -> None:
+        """Bettet alle gepufferten Chunks gebündelt ein und fügt sie dateiweise hinzu."""
+        nonlocal total_added, files_since_save
+        if not batch:
+            return
+        try:
+            # Ein gebündelter Encoder-/API-Aufruf füllt den Cache für alle Dateien im Batch
+            rag.generate_embeddings([chunk for item in batch for chunk in item["chunks"]])
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Batch-Embedding fehlgeschlagen, Fallback pro Datei: {e}")
+
+        for item in batch:
+            metadata = {
+                "source": item["name"],
+                "category": item["category"],
+                "path": item["path"]
+            }
+            try:
+                added_here = rag.add_to_knowledge_base(
+                    texts=item["chunks"],
+                    source_module="leitlinien",
+                    source_tier="tier2_bibliothek",
+                    metadata=metadata
+                )
+            except Exception as e:  # noqa: BLE001
+                logger.warning(f"Fehler beim Hinzufügen der Chunks aus {item['name']}: {e}")
                 continue
-
-            added_here = 0
-            for chunk in chunks:
-                metadata = {
-                    "source": pdf_path.name,
-                    "category": category,
-                    "path": str(rel_path)
-                }
-                try:
-                    added_here += rag.add_to_knowledge_base(
-                        texts=[chunk],
-                        source_module="leitlinien",
-                        source_tier="tier2_bibliothek",
-                        metadata=metadata
-                    )
-                except Exception as e:  # noqa: BLE001
-                    logger.warning(f"Fehler beim Hinzufügen eines Chunks aus {pdf_path.name}: {e}")
-                    continue
-
             total_added += added_here
-            processed_files.add(file_key)
+            processed_files.add(item["file_key"])
             files_since_save += 1
-            print(f"✅ {chunk_count} Chunks (+{added_here})")
-
-        except Exception as e:  # noqa: BLE001
-            logger.exception(f"Fehler beim Verarbeiten von {pdf_path.name}: {e}")
-            continue
+        batch.clear()
 
         # Checkpoint & Persistenz
         if files_since_save >= save_every:
-            all_processed = list(skip_files | processed_files)
-            save_checkpoint(all_processed, total_added)
-            rag.save_knowledge_base(str(output_path))
-            # Embedding-Cache persistieren, damit Embeddings bei Resume nicht neu berechnet werden
-            try:
-                rag.embedding_cache.save()
-            except Exception as e:  # noqa: BLE001
-                logger.warning(f"Embedding-Cache konnte nicht gespeichert werden: {e}")
-            gc.collect()
-            elapsed = time.time() - start_time
-            print(f"   💾 Checkpoint gespeichert ({len(all_processed)} Dateien, {total_added} Einträge, {elapsed/60:.1f} min)")
+            save_all("Checkpoint gespeichert")
             files_since_save = 0
 
+    extracted = _iter_extracted(todo, chunk_size, overlap, workers, text_cache_dir, queue_size=max(2, workers * 2))
+    for processed_idx, item in enumerate(extracted, 1):
+        print(f"[{processed_idx}/{total_to_process}] {item['name'][:60]}...", end=" ")
+        if item["error"]:
+            print("❌ Fehler")
+            logger.warning(f"Fehler beim Verarbeiten von {item['name']}: {item['error']}")
+            continue
+        if not item["chunks"]:
+            print("⚠️ Kein Text")
+            continue
+
+        batch.append(item)
+        print(f"✅ {len(item['chunks'])} Chunks{' (Cache)' if item['cached'] else ''}")
+        if sum(len(b["chunks"]) for b in batch) >= embed_batch_chunks:
+            flush()
+    flush()
+
     # Finaler Checkpoint
     if processed_files:
-        all_processed = list(skip_files | processed_files)
-        save_checkpoint(all_processed, total_added)
-        rag.save_knowledge_base(str(output_path))
-        try:
-            rag.embedding_cache.save()
-        except Exception as e:  # noqa: BLE001
-            logger.warning(f"Embedding-Cache konnte nicht gespeichert werden: {e}")
-        gc.collect()
-        elapsed = time.time() - start_time
-        print(f"   💾 Finaler Checkpoint ({len(all_processed)} Dateien, {total_added} Einträge, {elapsed/60:.1f} min)")
+        save_all("Finaler Checkpoint")
 
     print(f"\n✅ {total_added} Einträge zum RAG-Index hinzugefügt")
     return total_added
@@ -333,7 +451,7 @@ def main():
     parser.add_argument(
         "--output",
         default="_OUTPUT/rag_knowledge_base.json",
-        help="Output-Pfad für Wissensbasis"
+        help="Output-Pfad für Wissensbasis (.json = JSON, sonst Binär-KB-Verzeichnis, z.B. .kb)"
     )
     parser.add_argument(
         "--chunk-size",
@@ -353,6 +471,12 @@ def main():
         choices=["auto", "cpu", "mps", "cuda"],
         help="Gerät für lokale Embeddings (auto=SentenceTransformer-Standard)"
     )
+    parser.add_argument(
+        "--embed-batch-size",
+        type=int,
+        default=None,
+        help="Texte pro Encoder-Forward-Pass (lokal, Standard: RAGConfig.batch_size)"
+    )
     parser.add_argument(
         "--use-openai",
         action="store_true",
@@ -374,6 +498,34 @@ def main():
         default=50,
         help="Checkpoint nach X verarbeiteten Dateien speichern (default: 50)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Prozesse für PDF-Extraktion/Chunking (1 = seriell, default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--no-text-cache",
+        action="store_true",
+        help="Extrahierten PDF-Text nicht cachen/wiederverwenden"
+    )
+    parser.add_argument(
+        "--ann",
+        default="none",
+        choices=["none", "ivf", "hnsw", "auto"],
+        help="ANN-Index neben der KB aufbauen (ivf=NumPy, hnsw=hnswlib, auto=hnsw falls verfügbar)"
+    )
+    parser.add_argument(
+        "--ann-nprobe",
+        type=int,
+        default=None,
+        help="IVF: durchsuchte Listen pro Query (Recall vs. Latenz)"
+    )
+    parser.add_argument(
+        "--bm25",
+        action="store_true",
+        help="BM25-Index für hybride Suche (BM25 + Dense) neben der KB aufbauen"
+    )
     parser.add_argument(
         "--verbose",
         action="store_true"
@@ -447,6 +599,11 @@ def main():
 
     config = RAGConfig()
     config.embedding_device = args.device
+    config.ann_backend = args.ann
+    if args.embed_batch_size:
+        config.batch_size = args.embed_batch_size
+    if args.ann_nprobe:
+        config.ann_nprobe = args.ann_nprobe
     rag = get_rag_system(config=config, use_openai=args.use_openai)
 
     # Lade bestehende Wissensbasis wenn vorhanden
@@ -467,9 +624,17 @@ def main():
         output_path=output_path,
         chunk_size=args.chunk_size,
         overlap=args.overlap,
-        save_every=args.save_every
+        save_every=args.save_every,
+        workers=args.workers,
+        text_cache_dir=None if args.no_text_cache else TEXT_CACHE_DIR,
     )
 
+    # ANN-Index: bei Resume inkrementell erweitern, sonst (neu) aufbauen
+    if args.ann != "none" and rag.build_ann_index():
+        print(f"   🧭 ANN-Index ({rag.ann_index.backend}): {rag.ann_index.indexed_rows} Zeilen")
+    if args.bm25:
+        print(f"   🔤 BM25-Index: {rag.build_lexical_index()} Zeilen")
+
     # Final save (falls nichts zu speichern, no-op)
     rag.save_knowledge_base(str(output_path))
     try:
@@ -9,11 +9,13 @@ Nutzt OpenAI API direkt für:
 
 Verwendung:
     PYTHONPATH=. .venv/bin/python3 scripts/classify_and_validate.py --classify
+    PYTHONPATH=. .venv/bin/python3 scripts/classify_and_validate.py --classify --heuristic
     PYTHONPATH=. .venv/bin/python3 scripts/classify_and_validate.py --validate --batch-size 20
     PYTHONPATH=. .venv/bin/python3 scripts/classify_and_validate.py --inventory
 """
 
 import os
+import sys
 import json
 import argparse
 from pathlib import Path
@@ -23,9 +25,12 @@ from openai import OpenAI
 
 # === KONFIGURATION ===
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
 OUTPUT_DIR = PROJECT_ROOT / "_OUTPUT"
 INVENTORY_DIR = OUTPUT_DIR / "inventar_fachgebiet"
 
+from core.dataset import load_items, resolve_dataset  # noqa: E402
+
 # 8 Kompakte Fachgebiete
 FACHGEBIETE = [
     "Innere Medizin",
@@ -38,6 +43,9 @@ FACHGEBIETE = [
     "Sonstige"  # Rechtsmedizin, Pharmakologie, Radiologie, etc.
 ]
 
+# Felder, die Klassifikation und Validierung aus dem Datensatz brauchen
+QUESTION_FIELDS = ("frage", "source_file", "antwort", "leitlinie", "context", "evidenzgrad")
+
 # OpenAI Client
 client = OpenAI()  # Nutzt OPENAI_API_KEY aus Umgebung
 
@@ -119,10 +127,9 @@ Prüfe auf: Faktische Richtigkeit, Vollständigkeit, Quellenbeleg.
 
 
 def load_questions() -> list[dict]:
-    """Lädt die Fragen aus evidenz_antworten.json"""
-    path = OUTPUT_DIR / "evidenz_antworten.json"
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
+    """Lädt die Fragen aus evidenz_antworten (.jsonl bevorzugt), nur die benötigten Felder."""
+    questions, _meta = load_items(resolve_dataset(OUTPUT_DIR / "evidenz_antworten.json"), fields=QUESTION_FIELDS)
+    return questions
 
 
 def sanitize_text(text: str) -> str:
@@ -172,6 +179,40 @@ def classify_question(item: dict, model: str = "gpt-4o-mini") -> dict:
         return {"fachgebiet": "Sonstige", "subkategorie": "", "konfidenz": 0}
 
 
+# Heuristische Kategorien (core.category_classifier) -> 8 Fachgebiete
+HEURISTIC_TO_FACHGEBIET = {
+    "Innere Medizin": "Innere Medizin",
+    "Chirurgie": "Chirurgie",
+    "Unfallchirurgie/Orthopädie": "Chirurgie",
+    "Urologie": "Chirurgie",
+    "Neurologie": "Neurologie",
+    "Gynäkologie/Geburtshilfe": "Gynäkologie",
+    "Pädiatrie": "Pädiatrie",
+    "Psychiatrie": "Psychiatrie",
+    "Notfallmedizin": "Notfallmedizin",
+    "Anästhesie": "Notfallmedizin",
+}
+
+
+def classify_questions_heuristic(items: list[dict]) -> list[dict]:
+    """Klassifiziert alle Fragen offline per Keyword-Heuristik (ohne API-Aufrufe)."""
+    from core.category_classifier import classify_many
+
+    texts = [
+        " ".join(filter(None, (item.get("frage", ""), item.get("context", ""), item.get("leitlinie", ""))))
+        for item in items
+    ]
+    results = classify_many(texts, [item.get("source_file", "") or "" for item in items])
+    return [
+        {
+            "fachgebiet": HEURISTIC_TO_FACHGEBIET.get(r.category, "Sonstige"),
+            "subkategorie": r.topic,
+            "konfidenz": int(round(r.confidence * 100)),
+        }
+        for r in results
+    ]
+
+
 def validate_answer(item: dict, model: str = "gpt-4o") -> dict:
     """Validiert eine Antwort mit dem Validierungs-Prompt."""
     prompt = VALIDATION_USER_TEMPLATE.format(
@@ -202,10 +243,11 @@ def validate_answer(item: dict, model: str = "gpt-4o") -> dict:
 def run_classification(
     model: str = "gpt-4o-mini",
     limit: Optional[int] = None,
-    resume: bool = True
+    resume: bool = True,
+    heuristic: bool = False
 ):
-    """Führt die Fachgebiet-Klassifikation durch."""
-    print(f"\n🏥 FACHGEBIET-KLASSIFIKATION mit {model}")
+    """Führt die Fachgebiet-Klassifikation durch (LLM oder offline per Heuristik)."""
+    print(f"\n🏥 FACHGEBIET-KLASSIFIKATION mit {'Keyword-Heuristik' if heuristic else model}")
     print("=" * 60)
 
     questions = load_questions()
@@ -225,6 +267,13 @@ def run_classification(
 
     results = list(classified.values())
 
+    # Heuristik: alle offenen Fragen in einem Batch (linear in der Textlänge)
+    heuristic_results = {}
+    if heuristic:
+        pending = [(i, item) for i, item in enumerate(questions) if item.get("frage", "") not in classified]
+        batch = classify_questions_heuristic([item for _, item in pending])
+        heuristic_results = {i: classification for (i, _), classification in zip(pending, batch)}
+
     for i, item in enumerate(questions):
         frage = item.get("frage", "")
         if frage in classified:
@@ -232,7 +281,10 @@ def run_classification(
 
         print(f"\r[{i+1}/{len(questions)}] Klassifiziere...", end="", flush=True)
 
-        classification = classify_question(item, model)
+        if heuristic:
+            classification = heuristic_results[i]
+        else:
+            classification = classify_question(item, model)
 
         result = {
             "frage": frage,
@@ -246,8 +298,8 @@ def run_classification(
         results.append(result)
         classified[frage] = result
 
-        # Checkpoint alle 50 Fragen
-        if len(results) % 50 == 0:
+        # Checkpoint alle 50 Fragen (Heuristik läuft ohne API-Kosten durch)
+        if not heuristic and len(results) % 50 == 0:
             with open(checkpoint_path, "w", encoding="utf-8") as f:
                 json.dump(results, f, ensure_ascii=False, indent=2)
             print(f" [Checkpoint bei {len(results)}]")
@@ -428,6 +480,8 @@ def main():
     parser.add_argument("--batch-size", type=int, default=20, help="Batch-Größe für Validierung")
     parser.add_argument("--fachgebiet", help="Nur bestimmtes Fachgebiet validieren")
     parser.add_argument("--no-resume", action="store_true", help="Checkpoint ignorieren")
+    parser.add_argument("--heuristic", action="store_true",
+                        help="Klassifikation offline per Keyword-Heuristik statt OpenAI")
 
     args = parser.parse_args()
 
@@ -436,6 +490,7 @@ def main():
         print("\n\nBeispiele:")
         print("  --classify                    # Alle Fragen klassifizieren")
         print("  --classify --limit 100        # Nur 100 Fragen klassifizieren")
+        print("  --classify --heuristic        # Offline per Keyword-Heuristik klassifizieren")
         print("  --validate --batch-size 20    # 20 Fragen validieren")
         print("  --inventory                   # Inventar nach Fachgebiet erstellen")
         return
@@ -444,7 +499,8 @@ def main():
         run_classification(
             model=args.model,
             limit=args.limit,
-            resume=not args.no_resume
+            resume=not args.no_resume,
+            heuristic=args.heuristic
         )
 
     if args.validate:
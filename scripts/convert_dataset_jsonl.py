@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+MedExamAI Datensatz-Konverter
+=============================
+
+Konvertiert Antwort-Datensätze (``evidenz_antworten*.json``, Liste oder Objekt
+mit ``items``) in die kanonische JSONL-Form aus ``core.dataset``
+(JSONL + Meta-Sidecar + Offset-/Fragen-Index).
+
+Die Scripts bevorzugen danach automatisch die ``.jsonl``-Variante, sofern sie
+nicht älter als die JSON-Datei ist.
+
+Usage:
+    python scripts/convert_dataset_jsonl.py
+    python scripts/convert_dataset_jsonl.py --input _OUTPUT/evidenz_antworten_enriched_for_srs_20251215_1529.json
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.dataset import convert_to_jsonl, count_items  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Konvertiert JSON-Datensatz nach JSONL (+ Index)")
+    parser.add_argument("--input", default="_OUTPUT/evidenz_antworten.json", help="JSON-Datensatz")
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Ziel-Datei (Standard: Input mit Endung .jsonl)"
+    )
+    parser.add_argument("--force", action="store_true", help="Bestehendes Ziel überschreiben")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    base_dir = Path(__file__).resolve().parent.parent
+    input_path = base_dir / args.input
+    output_path = base_dir / args.output if args.output else input_path.with_suffix(".jsonl")
+
+    if not input_path.exists():
+        print(f"❌ Input nicht gefunden: {input_path}")
+        return 1
+    if output_path.exists() and not args.force:
+        print(f"❌ Ziel existiert bereits: {output_path} (--force zum Überschreiben)")
+        return 1
+
+    print(f"🔄 Konvertiere {input_path.name} -> {output_path}")
+    start = time.time()
+    convert_to_jsonl(input_path, output_path)
+    print(f"✅ {count_items(output_path)} Items geschrieben ({time.time() - start:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+MedExamAI RAG-KB Konverter
+==========================
+
+Konvertiert die JSON-Wissensbasis (``rag_knowledge_base.json``) in das
+Binärformat aus ``core.kb_store`` (memmap-Embeddings + JSONL-Records).
+
+Die JSON-Datei wird mit ijson gestreamt, falls installiert, sodass auch
+sehr große KBs mit konstantem Speicher konvertiert werden.
+
+Usage:
+    python scripts/convert_rag_kb.py
+    python scripts/convert_rag_kb.py --input _OUTPUT/rag_knowledge_base.json \\
+        --output _OUTPUT/rag_knowledge_base.kb
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.kb_store import convert_json_kb, is_binary_kb  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Konvertiert JSON-KB in Binär-KB (memmap)")
+    parser.add_argument("--input", default="_OUTPUT/rag_knowledge_base.json", help="JSON-Wissensbasis")
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Ziel-Verzeichnis (Standard: Input mit Endung .kb)"
+    )
+    parser.add_argument("--force", action="store_true", help="Bestehendes Ziel überschreiben")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    base_dir = Path(__file__).resolve().parent.parent
+    input_path = base_dir / args.input
+    output_path = base_dir / args.output if args.output else input_path.with_suffix(".kb")
+
+    if not input_path.exists():
+        print(f"❌ Input nicht gefunden: {input_path}")
+        return 1
+    if is_binary_kb(output_path) and not args.force:
+        print(f"❌ Ziel existiert bereits: {output_path} (--force zum Überschreiben)")
+        return 1
+
+    print(f"🔄 Konvertiere {input_path.name} -> {output_path}")
+    start = time.time()
+    stats = convert_json_kb(input_path, output_path)
+    print(f"✅ {stats['written']} Einträge geschrieben, {stats['skipped']} übersprungen ({time.time() - start:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,11 +10,14 @@ https://register.awmf.org/assets/guidelines/{registry}l_S{level}_{title}_{date}.
 
 Verwendung:
     python3 scripts/download_guidelines.py
+    python3 scripts/download_guidelines.py --refresh   # vorhandene PDFs bedingt aktualisieren
 """
 
+import json
 import os
 import re
 import sys
+import threading
 import time
 import logging
 from pathlib import Path
@@ -24,6 +27,10 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.http_download import DownloadResult, download_file
+
 # Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,6 +41,13 @@ logger = logging.getLogger(__name__)
 # Download-Verzeichnis
 DOWNLOAD_DIR = Path("_BIBLIOTHEK/Leitlinien")
 
+# Pro Zielpfad: URL, ETag/Last-Modified und SHA-256
+DOWNLOAD_STATE_FILE = DOWNLOAD_DIR / "download_state.json"
+_STATE: Dict[str, Dict] = {}
+# Zielpfad -> SHA-256 der dort liegenden Datei (für Hardlinks bei identischem Inhalt)
+_HASH_INDEX: Dict[str, str] = {}
+_STATE_LOCK = threading.Lock()
+
 # AWMF Base URL
 AWMF_BASE = "https://register.awmf.org/assets/guidelines"
 
@@ -484,44 +498,107 @@ GUIDELINES: List[Dict] = [
 ]
 
 
-def download_pdf(url: str, output_path: Path, timeout: int = 60) -> bool:
+def load_download_state() -> None:
+    """Lädt Validatoren und Hash-Index des letzten Laufs."""
+    _STATE.clear()
+    _HASH_INDEX.clear()
+    if DOWNLOAD_STATE_FILE.exists():
+        try:
+            with open(DOWNLOAD_STATE_FILE, 'r', encoding='utf-8') as f:
+                _STATE.update(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Download-Status nicht lesbar: {e}")
+    for key, entry in _STATE.items():
+        if entry.get("sha256") and Path(key).exists():
+            _HASH_INDEX[key] = entry["sha256"]
+
+
+def link_identical(path: Path, sha256: str) -> Optional[Path]:
     """
-    Lädt eine PDF-Datei herunter.
+    Registriert `path` mit Inhalt `sha256` im Hash-Index. Liegt derselbe Inhalt
+    bereits unter einem anderen Zielpfad, wird `path` durch einen Hardlink darauf
+    ersetzt (atomar per os.replace). Jeder Zielpfad bleibt eigenständig: ein
+    späterer Download ersetzt nur den eigenen Verzeichniseintrag.
+
+    Aufrufer hält _STATE_LOCK.
 
     Returns:
-        True wenn erfolgreich, False sonst
+        Pfad der bereits vorhandenen Kopie, falls verlinkt, sonst None
     """
-    try:
-        response = SESSION.get(url, timeout=timeout, stream=True)
+    linked: Optional[Path] = None
+    for other_str, digest in _HASH_INDEX.items():
+        other = Path(other_str)
+        if digest != sha256 or other == path:
+            continue
+        try:
+            if not other.exists() or other.stat().st_size != path.stat().st_size:
+                continue
+            if not os.path.samefile(other, path):
+                tmp = path.with_name(path.name + ".link")
+                tmp.unlink(missing_ok=True)
+                os.link(other, tmp)
+                os.replace(tmp, path)
+            linked = other
+            break
+        except OSError as e:
+            # z.B. anderes Dateisystem: eigene Kopie behalten
+            logger.debug(f"Hardlink {path} -> {other} nicht möglich: {e}")
+            break
+    _HASH_INDEX[str(path)] = sha256
+    return linked
+
+
+def save_download_state() -> None:
+    """Schreibt den Download-Status (atomar per Rename)."""
+    tmp_path = DOWNLOAD_STATE_FILE.with_suffix(".json.tmp")
+    with _STATE_LOCK:
+        data = json.dumps(_STATE, ensure_ascii=False, indent=2)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, DOWNLOAD_STATE_FILE)
+
+
+def download_pdf(
+    url: str,
+    output_path: Path,
+    timeout: int = 60,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> Optional[DownloadResult]:
+    """
+    Lädt eine PDF-Datei herunter.
 
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', '')
+    Mit etag/last_modified wird nur bedingt angefragt (304 = unverändert),
+    abgebrochene Downloads werden beim nächsten Aufruf per Range fortgesetzt.
 
+    Returns:
+        DownloadResult wenn erfolgreich (auch "not_modified"), None sonst
+    """
+    try:
+        return download_file(
+            SESSION,
+            url,
+            output_path,
+            etag=etag,
+            last_modified=last_modified,
+            timeout=timeout,
+            min_size=1001,  # Min 1KB
             # Prüfen ob es wirklich eine PDF ist
-            if 'pdf' in content_type.lower() or url.endswith('.pdf'):
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-
-                with open(output_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-
-                # Prüfen ob Datei nicht leer ist
-                if output_path.stat().st_size > 1000:  # Min 1KB
-                    return True
-                else:
-                    output_path.unlink()  # Leere Datei löschen
-
-        return False
-
+            accept=lambda r: 'pdf' in r.headers.get('content-type', '').lower() or url.endswith('.pdf'),
+        )
     except Exception as e:
         logger.debug(f"Download fehlgeschlagen: {url} - {e}")
-        return False
+        return None
 
 
-def download_guideline(guideline: Dict) -> Tuple[str, Optional[Path]]:
+def download_guideline(guideline: Dict, refresh: bool = False) -> Tuple[str, Optional[Path]]:
     """
     Versucht eine Leitlinie herunterzuladen, testet verschiedene URLs.
 
+    Args:
+        guideline: Eintrag aus GUIDELINES
+        refresh: Vorhandene PDFs per ETag/Last-Modified auf Änderungen prüfen
+
     Returns:
         (registry_number, downloaded_path or None)
     """
@@ -534,20 +611,54 @@ def download_guideline(guideline: Dict) -> Tuple[str, Optional[Path]]:
     safe_title = re.sub(r'\s+', '_', safe_title)
     output_path = DOWNLOAD_DIR / specialty / f"{registry}_{safe_title}.pdf"
 
+    with _STATE_LOCK:
+        entry = dict(_STATE.get(str(output_path), {}))
+    present = output_path.exists() and output_path.stat().st_size > 1000
+
     # Bereits heruntergeladen?
-    if output_path.exists() and output_path.stat().st_size > 1000:
+    if present and not refresh:
         logger.info(f"✓ Bereits vorhanden: {registry} - {title}")
         return (registry, output_path)
 
-    # Versuche alle URLs
-    for url in guideline["pdf_urls"]:
+    # Versuche alle URLs (zuletzt erfolgreiche zuerst)
+    urls = list(guideline["pdf_urls"])
+    if entry.get("url") in urls:
+        urls.remove(entry["url"])
+        urls.insert(0, entry["url"])
+    for url in urls:
         logger.debug(f"  Versuche: {url}")
-        if download_pdf(url, output_path):
-            size_kb = output_path.stat().st_size / 1024
-            logger.info(f"✓ Heruntergeladen: {registry} - {title} ({size_kb:.0f} KB)")
+        conditional = present and entry.get("url") == url
+        result = download_pdf(
+            url,
+            output_path,
+            etag=entry.get("etag") if conditional else None,
+            last_modified=entry.get("last_modified") if conditional else None,
+        )
+        if result:
+            if not result.changed:
+                logger.info(f"✓ Unverändert: {registry} - {title}")
+                return (registry, output_path)
+
+            # Identischer Inhalt unter anderem Namen wird per Hardlink nur einmal gespeichert
+            with _STATE_LOCK:
+                linked = link_identical(output_path, result.sha256)
+                _STATE[str(output_path)] = {
+                    "url": url,
+                    "etag": result.etag,
+                    "last_modified": result.last_modified,
+                    "sha256": result.sha256,
+                }
+            size_kb = result.size / 1024
+            if linked:
+                logger.info(f"✓ Identisch mit {linked.name} (Hardlink): {registry} - {title}")
+            else:
+                logger.info(f"✓ Heruntergeladen: {registry} - {title} ({size_kb:.0f} KB)")
             return (registry, output_path)
         time.sleep(0.5)  # Rate limiting
 
+    if present:
+        logger.warning(f"✗ Aktualisierung fehlgeschlagen, behalte: {registry} - {title}")
+        return (registry, output_path)
     logger.warning(f"✗ Fehlgeschlagen: {registry} - {title}")
     return (registry, None)
 
@@ -562,10 +673,13 @@ def search_awmf_pdf(registry: str, title: str) -> Optional[str]:
     return None
 
 
-def download_all_guidelines(parallel: bool = True, max_workers: int = 4) -> Dict:
+def download_all_guidelines(parallel: bool = True, max_workers: int = 4, refresh: bool = False) -> Dict:
     """
     Lädt alle kuratierten Leitlinien herunter.
 
+    Args:
+        refresh: Vorhandene PDFs bedingt neu anfragen (nur geänderte werden übertragen)
+
     Returns:
         Statistik-Dictionary
     """
@@ -576,12 +690,13 @@ def download_all_guidelines(parallel: bool = True, max_workers: int = 4) -> Dict
 
     # Verzeichnis erstellen
     DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    load_download_state()
 
     results = {"success": [], "failed": [], "skipped": []}
 
     if parallel:
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(download_guideline, g): g for g in GUIDELINES}
+            futures = {executor.submit(download_guideline, g, refresh): g for g in GUIDELINES}
 
             for i, future in enumerate(as_completed(futures), 1):
                 guideline = futures[future]
@@ -597,7 +712,7 @@ def download_all_guidelines(parallel: bool = True, max_workers: int = 4) -> Dict
                     logger.info(f"Progress: {i}/{len(GUIDELINES)}")
     else:
         for i, guideline in enumerate(GUIDELINES, 1):
-            registry, path = download_guideline(guideline)
+            registry, path = download_guideline(guideline, refresh)
 
             if path:
                 results["success"].append((registry, str(path)))
@@ -619,8 +734,8 @@ def download_all_guidelines(parallel: bool = True, max_workers: int = 4) -> Dict
         logger.info(f"Fehlgeschlagen: {', '.join(results['failed'])}")
 
     # Cache-Datei speichern
+    save_download_state()
     cache_path = DOWNLOAD_DIR / "download_cache.json"
-    import json
     with open(cache_path, 'w', encoding='utf-8') as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
 
@@ -641,6 +756,8 @@ if __name__ == "__main__":
     parser.add_argument("--list", action="store_true", help="Liste heruntergeladene PDFs")
     parser.add_argument("--sequential", action="store_true", help="Sequentiell statt parallel")
     parser.add_argument("--workers", type=int, default=4, help="Anzahl paralleler Downloads")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Vorhandene PDFs per ETag/Last-Modified auf Änderungen prüfen")
 
     args = parser.parse_args()
 
@@ -652,7 +769,8 @@ if __name__ == "__main__":
     else:
         results = download_all_guidelines(
             parallel=not args.sequential,
-            max_workers=args.workers
+            max_workers=args.workers,
+            refresh=args.refresh
         )
 
         # Exit-Code
@@ -6,6 +6,7 @@ Ziele (Outputs immer mit Timestamp, nichts wird überschrieben):
 - Anki-TSV Review-Queue (nur needs_review + needs_context), Back = bestehende Antwort + Review-Hinweise
 - Study-Dashboard (Markdown) mit Counts pro Fachgebiet × Status
 - Optional: Daily-Plan (JSON) mit stratifizierter Auswahl aus ready-Karten
+  (mit `--srs-dir` nur Karten, die laut SRS-Zustand fällig oder dort unbekannt sind)
 
 Harte Constraints
 - `_OUTPUT/evidenz_antworten.json` wird NICHT geschrieben/überschrieben.
@@ -14,7 +15,8 @@ Harte Constraints
 
 Hinweis
 - Die Input-JSON kann entweder eine Liste von Items sein (neueres Format)
-  oder ein Objekt mit `items: [...]` (älteres Format). Beides wird unterstützt.
+  oder ein Objekt mit `items: [...]` (älteres Format). Beides wird unterstützt,
+  ebenso JSONL (core.dataset). Die Items werden in einem Durchlauf gestreamt.
 """
 
 from __future__ import annotations
@@ -23,15 +25,20 @@ import argparse
 import json
 import random
 import re
+import sys
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_OUTPUT_DIR = PROJECT_ROOT / "_OUTPUT"
 
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.dataset import iter_items, question_key  # noqa: E402
+
 
 @dataclass(frozen=True)
 class ExportPaths:
@@ -49,11 +56,6 @@ def _now_ts() -> str:
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
 
-def _read_json(path: Path) -> Any:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
-
-
 def _write_text(path: Path, text: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8", newline="\n") as f:
@@ -290,20 +292,11 @@ def _build_tags(
     return out
 
 
-def _parse_input_payload(payload: Any) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
-    """Unterstützt zwei Input-Formate: list[dict] oder {items: list[dict], ...meta}."""
-    if isinstance(payload, list):
-        items = [x for x in payload if isinstance(x, dict)]
-        return items, {}
-
-    if isinstance(payload, dict):
-        maybe_items = payload.get("items")
-        if isinstance(maybe_items, list):
-            items = [x for x in maybe_items if isinstance(x, dict)]
-            meta = {k: v for k, v in payload.items() if k != "items"}
-            return items, meta
-
-    raise ValueError("Input JSON muss Liste oder Objekt mit `items` sein")
+def _iter_input_items(path: Path) -> Iterator[Dict[str, Any]]:
+    """Streamt Dict-Items aus list[dict], {items: list[dict], ...meta} oder JSONL."""
+    for item in iter_items(path):
+        if isinstance(item, dict):
+            yield item
 
 
 def _pick_default_input(output_dir: Path) -> Path:
@@ -442,6 +435,22 @@ def _dashboard_markdown(
     return "\n".join(lines)
 
 
+def _load_srs_due(srs_dir: Path) -> Dict[str, Tuple[str, bool]]:
+    """Frage-Schlüssel -> (Karten-ID, fällig) aus dem SRS-Zustand (eine Maske über ScheduleArrays)."""
+    from core.spaced_repetition import SpacedRepetitionSystem
+
+    srs = SpacedRepetitionSystem(srs_dir)
+    try:
+        schedule = srs.schedule
+        due = schedule.due_mask().tolist()
+        return {
+            question_key(srs.cards[card_id].question): (card_id, due[row])
+            for row, card_id in enumerate(schedule.ids)
+        }
+    finally:
+        srs.store.close()
+
+
 def _stratified_sample(
     groups: Dict[str, List[int]],
     *,
@@ -560,6 +569,11 @@ def main() -> int:
         default="",
         help="Seed für Daily-Plan (default: YYYYMMDD)",
     )
+    parser.add_argument(
+        "--srs-dir",
+        default="",
+        help="Optional: SRS-Datenverzeichnis (srs_cards.sqlite); Daily-Plan lässt dort nicht fällige Karten aus",
+    )
 
     args = parser.parse_args()
 
@@ -582,12 +596,9 @@ def main() -> int:
         ),
     )
 
-    payload = _read_json(in_path)
-    items, _meta = _parse_input_payload(payload)
-
     # Zählwerke
     totals: Dict[str, int] = {
-        "all_items": len(items),
+        "all_items": 0,
         "meaningful": 0,
     }
 
@@ -602,9 +613,20 @@ def main() -> int:
     ready_rows: List[Tuple[str, str, str]] = []
     review_rows: List[Tuple[str, str, str]] = []
 
-    for idx, entry in enumerate(items):
-        if not isinstance(entry, dict):
-            continue
+    # Daily-Plan Gruppen (nur ready Items, selbe Filter wie ready_rows)
+    groups: Dict[str, List[int]] = defaultdict(list)
+    idx_to_card: Dict[int, Dict[str, Any]] = {}
+
+    srs_due: Optional[Dict[str, Tuple[str, bool]]] = None
+    srs_not_due = 0
+    if paths.daily_plan is not None and args.srs_dir:
+        srs_dir = Path(args.srs_dir)
+        if not srs_dir.is_dir():
+            raise SystemExit(f"SRS-Verzeichnis nicht gefunden: {srs_dir}")
+        srs_due = _load_srs_due(srs_dir)
+
+    for idx, entry in enumerate(_iter_input_items(in_path)):
+        totals["all_items"] += 1
 
         is_meaningful = bool(entry.get("is_meaningful"))
         if is_meaningful:
@@ -637,6 +659,22 @@ def main() -> int:
             empty_q_or_a_skipped += 1
             continue
 
+        if paths.daily_plan is not None and mapped == "ready":
+            srs_hit = srs_due.get(question_key(q_raw)) if srs_due is not None else None
+            if srs_hit is not None and not srs_hit[1]:
+                srs_not_due += 1
+            else:
+                fach_plan = fach_raw or "unbekannt"
+                groups[fach_plan].append(idx)
+                idx_to_card[idx] = {
+                    "id": f"evidenz_{idx}",
+                    "fachgebiet": fach_plan,
+                    "frage": q_raw,
+                    "status": _coerce_str(entry.get("study_status")).strip(),
+                }
+                if srs_due is not None:
+                    idx_to_card[idx]["srs_card_id"] = srs_hit[0] if srs_hit else None
+
         front = _tsv_safe_field(q_raw)
         if mapped == "ready":
             back = _tsv_safe_field(a_raw)
@@ -698,32 +736,6 @@ def main() -> int:
 
     # Optional daily plan
     if paths.daily_plan is not None:
-        # Gruppen (nur ready_rows) nach Fachgebiet aus dem Tag fachgebiet:* ableiten
-        groups: Dict[str, List[int]] = defaultdict(list)
-        idx_to_card: Dict[int, Dict[str, Any]] = {}
-
-        # wir verwenden die selben Filter wie ready_rows (meaningful-only default)
-        # Dazu brauchen wir nochmals die Indizes der ready Items: wir rekonstruieren über items
-        for i, entry in enumerate(items):
-            if not isinstance(entry, dict):
-                continue
-            if not (args.include_non_meaningful or bool(entry.get("is_meaningful"))):
-                continue
-            if _map_status(entry.get("study_status")) != "ready":
-                continue
-            q_raw = _coerce_str(entry.get("frage")).strip()
-            a_raw = _coerce_str(entry.get("antwort")).strip()
-            if not q_raw or not a_raw:
-                continue
-            fach_raw = _coerce_str(entry.get("fachgebiet")).strip() or "unbekannt"
-            groups[fach_raw].append(i)
-            idx_to_card[i] = {
-                "id": f"evidenz_{i}",
-                "fachgebiet": fach_raw,
-                "frage": q_raw,
-                "status": _coerce_str(entry.get("study_status")).strip(),
-            }
-
         seed = args.seed.strip() or datetime.now().strftime("%Y%m%d")
         rng = random.Random(seed)
 
@@ -749,6 +761,12 @@ def main() -> int:
             ),
             "karten": chosen,
         }
+        if srs_due is not None:
+            daily_payload["srs"] = {
+                "verzeichnis": str(args.srs_dir),
+                "karten": len(srs_due),
+                "nicht_faellig_ausgelassen": srs_not_due,
+            }
         _write_json(paths.daily_plan, daily_payload)
 
     # Logs (Deutsch, keine Secrets)
@@ -23,11 +23,16 @@ import os
 import re
 import shutil
 import hashlib
+import sys
 import unicodedata
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.fuzzy_match import FuzzyIndex
+
 
 IMG_SRC_RE = re.compile(r"<img[^>]+src=[\"']([^\"']+)[\"']", re.IGNORECASE)
 YEAR_RE = re.compile(r"\b(20\d{2})\b")
@@ -216,22 +221,33 @@ def _build_card_index(cards: Sequence[Card]) -> Tuple[Dict[str, List[int]], Dict
     return by_norm, by_norm_ascii, by_token_key
 
 
+def _build_fuzzy_index(cards: Sequence[Card]) -> Tuple[FuzzyIndex, FuzzyIndex]:
+    # IDs = card indices; empty texts never reach a positive threshold
+    return FuzzyIndex(card.norm for card in cards), FuzzyIndex(card.norm_ascii for card in cards)
+
+
 def _best_fuzzy_match(
     norm: str,
     norm_ascii: str,
     cards: Sequence[Card],
     candidates: Sequence[int],
+    fuzzy: Tuple[FuzzyIndex, FuzzyIndex],
     threshold: float = 0.92,
 ) -> Optional[int]:
-    from difflib import SequenceMatcher
+    # Same result as a SequenceMatcher loop: norm ratio, or the ascii ratio
+    # for cards below threshold; first candidate with the best score wins.
+    norm_index, ascii_index = fuzzy
+    scores: Dict[int, float] = {}
+    if norm:
+        scores.update(norm_index.scores(norm, candidates, cutoff=threshold))
+    if norm_ascii:
+        rest = [idx for idx in candidates if idx not in scores]
+        scores.update(ascii_index.scores(norm_ascii, rest, cutoff=threshold))
 
     best_idx = None
     best_score = 0.0
     for idx in candidates:
-        card = cards[idx]
-        score = SequenceMatcher(None, norm, card.norm).ratio() if norm and card.norm else 0.0
-        if score < threshold and norm_ascii and card.norm_ascii:
-            score = SequenceMatcher(None, norm_ascii, card.norm_ascii).ratio()
+        score = scores.get(idx, 0.0)
         if score > best_score:
             best_score = score
             best_idx = idx
@@ -247,6 +263,7 @@ def _match_question(
     by_norm_ascii: Dict[str, List[int]],
     by_token_key: Dict[str, List[int]],
     used_in_block: Set[int],
+    fuzzy: Tuple[FuzzyIndex, FuzzyIndex],
 ) -> Tuple[Optional[Card], Optional[int], str]:
     norm = _normalize_key(question)
     norm_ascii = _normalize_key(question, ascii_only=True)
@@ -268,7 +285,7 @@ def _match_question(
     if not candidates and norm:
         # fallback to all cards if key is empty
         candidates = list(range(len(cards)))
-    fuzzy_idx = _best_fuzzy_match(norm, norm_ascii, cards, candidates)
+    fuzzy_idx = _best_fuzzy_match(norm, norm_ascii, cards, candidates, fuzzy)
     if fuzzy_idx is not None:
         used_in_block.add(fuzzy_idx)
         return cards[fuzzy_idx], fuzzy_idx, "fuzzy"
@@ -293,6 +310,7 @@ def _collect_blocks(
     by_norm_ascii: Dict[str, List[int]],
     by_token_key: Dict[str, List[int]],
 ) -> Tuple[List[Block], Set[int], List[str]]:
+    fuzzy = _build_fuzzy_index(cards)
     matched_cards: Set[int] = set()
     unmatched_questions_global: List[str] = []
     processed_blocks: List[Block] = []
@@ -311,7 +329,7 @@ def _collect_blocks(
 
         for q in questions:
             card, idx, match_type = _match_question(
-                q, cards, by_norm, by_norm_ascii, by_token_key, used_in_block
+                q, cards, by_norm, by_norm_ascii, by_token_key, used_in_block, fuzzy
             )
             matches.append(Match(question_raw=q, card=card, match_type=match_type))
             if card is None:
@@ -44,6 +44,7 @@ import requests
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from core.checkpoint_journal import CheckpointJournal  # noqa: E402
 from core.perplexity_pdf_finder import PerplexityPDFFinder
 
 # Pfade
@@ -154,33 +155,9 @@ def load_existing_manifest() -> Set[str]:
     return names
 
 
-def load_checkpoint() -> Dict[str, Dict]:
-    """Lädt bereits verarbeitete Einträge aus Checkpoint."""
-    done = {}
-    if not CHECKPOINT_PATH.exists():
-        return done
-
-    with open(CHECKPOINT_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-                key = obj.get("guideline_ref", "").strip()
-                if key:
-                    done[key] = obj
-            except json.JSONDecodeError:
-                continue
-
-    return done
-
-
-def save_checkpoint(entry: Dict) -> None:
-    """Speichert einen Eintrag in den Checkpoint."""
-    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(CHECKPOINT_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+def open_checkpoint() -> CheckpointJournal:
+    """Öffnet das Checkpoint-Journal (eine Zeile pro Referenz, Lookup per guideline_ref)."""
+    return CheckpointJournal(CHECKPOINT_PATH, key_field="guideline_ref")
 
 
 def is_not_downloadable(ref: str) -> bool:
@@ -460,7 +437,8 @@ def main():
         return 1
 
     existing = load_existing_manifest()
-    checkpoint = load_checkpoint() if args.resume else {}
+    journal = open_checkpoint()
+    checkpoint = journal if args.resume else {}
 
     logger.info(f"Existierende Leitlinien: {len(existing)}")
     logger.info(f"Bereits verarbeitet: {len(checkpoint)}")
@@ -518,7 +496,7 @@ def main():
         entry = process_guideline(ref, society, finder, existing, dry_run=args.dry_run)
 
         # Checkpoint speichern
-        save_checkpoint(entry)
+        journal.append(entry)
 
         # Statistik
         status = entry.get("status", "unknown")
@@ -544,12 +522,13 @@ def main():
             logger.info(f"Progress: {processed}/{len(all_refs)} - {stats}")
 
     # Finale Ergebnisse speichern
-    final = load_checkpoint()
+    final = journal.records()
+    journal.close()
     results = {
         "generated_at": datetime.now().isoformat(),
         "stats": stats,
         "total_processed": len(final),
-        "items": list(final.values()),
+        "items": final,
     }
 
     RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -26,9 +26,9 @@ Deliverables (alles neu, Timestamp)
 
 Hinweis zur Input-Struktur
 - Einige Runs erzeugen eine Liste (list[dict]), andere ein Objekt
-  mit `items: [...]`.
+  mit `items: [...]` (oder JSONL, siehe core.dataset).
   Dieses Script unterstützt beides und schreibt die gleiche Top-Level-Struktur
-  wie das Input-Artefakt.
+  wie das Input-Artefakt. Die Items werden gestreamt statt komplett geladen.
 """
 
 from __future__ import annotations
@@ -37,15 +37,29 @@ import argparse
 import csv
 import json
 import re
+import sys
 from collections import Counter
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_OUTPUT_DIR = PROJECT_ROOT / "_OUTPUT"
 
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.dataset import (  # noqa: E402
+    ItemStream,
+    JsonlWriter,
+    iter_items,
+    open_items,
+    write_items,
+)
+
+# Felder für die Bestandsaufnahme (erster, projizierter Durchlauf)
+BEFORE_FIELDS = ("is_meaningful", "validation", "study_status")
+
 
 @dataclass(frozen=True)
 class Inputs:
@@ -88,21 +102,11 @@ def _safe_int(v: Any) -> Optional[int]:
         return None
 
 
-def _parse_enriched_payload(
-    payload: Any,
-) -> Tuple[List[Dict[str, Any]], Dict[str, Any], str]:
-    """Return (items, meta, top_level_kind)."""
-    if isinstance(payload, list):
-        return [x for x in payload if isinstance(x, dict)], {}, "list"
-
-    if isinstance(payload, dict):
-        maybe_items = payload.get("items")
-        if isinstance(maybe_items, list):
-            meta = {k: v for k, v in payload.items() if k != "items"}
-            items = [x for x in maybe_items if isinstance(x, dict)]
-            return items, meta, "object"
-
-    raise ValueError("Input enriched JSON muss Liste oder Objekt mit `items` sein")
+def _iter_enriched(stream: ItemStream) -> Iterator[Dict[str, Any]]:
+    """Dict-Items eines enriched-Streams (Liste, Objekt mit `items` oder JSONL)."""
+    for item in stream:
+        if isinstance(item, dict):
+            yield item
 
 
 def _load_inventory_csv(path: Path) -> Dict[int, Dict[str, str]]:
@@ -357,7 +361,7 @@ def main() -> int:
         default=str(
             DEFAULT_OUTPUT_DIR / "evidenz_antworten_enriched_for_srs_20251215_1529.json"
         ),
-        help="Input enriched_for_srs JSON",
+        help="Input enriched_for_srs JSON (oder JSONL)",
     )
     parser.add_argument(
         "--problem-inventory",
@@ -404,7 +408,7 @@ def main() -> int:
     out_dir = Path(args.output_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    if inputs.enriched_path.name == "evidenz_antworten.json":
+    if inputs.enriched_path.name in {"evidenz_antworten.json", "evidenz_antworten.jsonl"}:
         raise SystemExit(
             "Sicherheitsstopp: evidenz_antworten.json darf nicht als Input/Output dienen"
         )
@@ -424,10 +428,7 @@ def main() -> int:
     out_review_queue = out_dir / f"review_queue_{ts}.json"
     out_srs_review = out_dir / f"srs_cards_review_queue_{ts}.json"
 
-    # Load inputs
-    enriched_payload = _read_json(inputs.enriched_path)
-    items, meta, top_kind = _parse_enriched_payload(enriched_payload)
-
+    # Load inputs (enriched wird gestreamt, nie komplett geladen)
     inv_problem = _load_inventory_csv(inputs.problem_inventory_path)
     inv_maybe = _load_inventory_csv(inputs.maybe_inventory_path)
 
@@ -438,9 +439,9 @@ def main() -> int:
     meaningful_missing_fc_before = 0
     meaningful_unknown_status_before = 0
 
-    for i, e in enumerate(items):
-        if not isinstance(e, dict):
-            continue
+    for e in _iter_enriched(
+        open_items(inputs.enriched_path, fields=BEFORE_FIELDS)
+    ):
         if bool(e.get("is_meaningful")):
             meaningful_total += 1
             validation = e.get("validation")
@@ -453,7 +454,8 @@ def main() -> int:
             if _coerce_str(e.get("study_status")).strip().lower() == "unknown":
                 meaningful_unknown_status_before += 1
 
-    # Apply backfill + status consistency
+    # Apply backfill + status consistency, Post-Check und Review-Queue
+    # in einem Durchlauf; korrigierte Items gehen in eine temporäre JSONL.
     backfilled_by_index = 0
     backfilled_by_question = 0
     fc_changed_total = 0
@@ -464,145 +466,131 @@ def main() -> int:
     mismatches_problem = 0
     mismatches_maybe = 0
 
-    for i, e in enumerate(items):
-        if not isinstance(e, dict):
-            continue
-
-        validation = e.get("validation")
-        if not isinstance(validation, dict):
-            validation = {}
-            e["validation"] = validation
-
-        existing_fc = validation.get("perplexity_factcheck")
-
-        # Backfill nur für meaningful
-        if bool(e.get("is_meaningful")):
-            report_fc = fc_by_index.get(i)
-            used = "index"
-            if report_fc is None:
-                used = "question"
-                report_fc = fc_by_q.get(_norm(_coerce_str(e.get("frage"))))
-
-            if report_fc is not None:
-                merged_fc, changed = _merge_factcheck(
-                    existing_fc=existing_fc,
-                    report_fc=report_fc,
-                    report_file_name=inputs.factcheck_report_path.name,
-                )
-                validation["perplexity_factcheck"] = merged_fc
-                if changed:
-                    fc_changed_total += 1
-                    if used == "index":
-                        backfilled_by_index += 1
-                    else:
-                        backfilled_by_question += 1
-            else:
-                # Should not happen, aber konsistent bleiben
-                if not isinstance(existing_fc, dict):
-                    still_missing_fc_after += 1
-
-        # Status-Konsistenz (für alle Einträge, wenn FC vorhanden)
-        fc_current = validation.get("perplexity_factcheck")
-        status, reason = _classify_from_factcheck(fc_current)
-        e["study_status"] = status
-        e["study_exclude_reason"] = reason
-
-        status_counts_after[status] += 1
-
-        # Inventory vs Verdict Konsistenz (nur meaningful/Review-Fälle)
-        if bool(e.get("is_meaningful")) and isinstance(fc_current, dict):
-            v = _coerce_str(fc_current.get("verdict")).strip().lower()
-            if i in inv_problem and v != "problem":
-                mismatches_problem += 1
-            if i in inv_maybe and v != "maybe":
-                mismatches_maybe += 1
-
     # Post-Check: alle meaningful sollten Factcheck haben
     meaningful_missing_fc_after = 0
     meaningful_unknown_verdict_after = 0
     meaningful_status_counts: Counter[str] = Counter()
 
-    for i, e in enumerate(items):
-        if not isinstance(e, dict) or not bool(e.get("is_meaningful")):
-            continue
-        validation = e.get("validation")
-        if isinstance(validation, dict):
-            fc = validation.get("perplexity_factcheck")
-        else:
-            fc = None
-        if not isinstance(fc, dict):
-            meaningful_missing_fc_after += 1
-            continue
-        verdict = _coerce_str(fc.get("verdict")).strip().lower()
-        if verdict in {"", "unknown", "n/a"}:
-            meaningful_unknown_verdict_after += 1
-        meaningful_status_counts[_coerce_str(e.get("study_status"))] += 1
-
-    # Build review_queue
     review_items: List[Dict[str, Any]] = []
     prio_counts: Counter[str] = Counter()
 
-    for i, e in enumerate(items):
-        if not isinstance(e, dict) or not bool(e.get("is_meaningful")):
-            continue
+    enriched = open_items(inputs.enriched_path)
+    tmp_fixed = out_fixed.with_name(f".{out_fixed.stem}.jsonl")
+    with JsonlWriter(tmp_fixed, index=False) as fixed_writer:
+        for i, e in enumerate(_iter_enriched(enriched)):
+            validation = e.get("validation")
+            if not isinstance(validation, dict):
+                validation = {}
+                e["validation"] = validation
+
+            existing_fc = validation.get("perplexity_factcheck")
+
+            # Backfill nur für meaningful
+            if bool(e.get("is_meaningful")):
+                report_fc = fc_by_index.get(i)
+                used = "index"
+                if report_fc is None:
+                    used = "question"
+                    report_fc = fc_by_q.get(_norm(_coerce_str(e.get("frage"))))
+
+                if report_fc is not None:
+                    merged_fc, changed = _merge_factcheck(
+                        existing_fc=existing_fc,
+                        report_fc=report_fc,
+                        report_file_name=inputs.factcheck_report_path.name,
+                    )
+                    validation["perplexity_factcheck"] = merged_fc
+                    if changed:
+                        fc_changed_total += 1
+                        if used == "index":
+                            backfilled_by_index += 1
+                        else:
+                            backfilled_by_question += 1
+                else:
+                    # Should not happen, aber konsistent bleiben
+                    if not isinstance(existing_fc, dict):
+                        still_missing_fc_after += 1
+
+            # Status-Konsistenz (für alle Einträge, wenn FC vorhanden)
+            fc_current = validation.get("perplexity_factcheck")
+            status, reason = _classify_from_factcheck(fc_current)
+            e["study_status"] = status
+            e["study_exclude_reason"] = reason
+
+            status_counts_after[status] += 1
+            fixed_writer.write(e)
+
+            if not bool(e.get("is_meaningful")):
+                continue
 
-        status = _coerce_str(e.get("study_status")).strip()
-        if status not in {"needs_review", "needs_context"}:
-            continue
+            # Inventory vs Verdict Konsistenz (nur meaningful/Review-Fälle)
+            if isinstance(fc_current, dict):
+                v = _coerce_str(fc_current.get("verdict")).strip().lower()
+                if i in inv_problem and v != "problem":
+                    mismatches_problem += 1
+                if i in inv_maybe and v != "maybe":
+                    mismatches_maybe += 1
+
+            fc = fc_current
+            if not isinstance(fc, dict):
+                meaningful_missing_fc_after += 1
+                continue
+            verdict = _coerce_str(fc.get("verdict")).strip().lower()
+            if verdict in {"", "unknown", "n/a"}:
+                meaningful_unknown_verdict_after += 1
+            meaningful_status_counts[status] += 1
 
-        validation = e.get("validation")
-        if isinstance(validation, dict):
-            fc = validation.get("perplexity_factcheck")
-        else:
-            fc = None
-        if not isinstance(fc, dict):
-            continue
+            # Build review_queue
+            if status not in {"needs_review", "needs_context"}:
+                continue
 
-        priority, prio_reason = _priority(e, fc)
-        prio_counts[priority] += 1
-
-        inv_row = inv_problem.get(i) or inv_maybe.get(i) or {}
-
-        raw_issues = fc.get("issues")
-        issues_list: List[Any] = raw_issues if isinstance(raw_issues, list) else []
-
-        raw_sources = fc.get("suggested_sources")
-        sources_list: List[Any] = raw_sources if isinstance(raw_sources, list) else []
-
-        review_items.append(
-            {
-                "index": i,
-                "frage": _coerce_str(e.get("frage")).strip(),
-                "fachgebiet": _coerce_str(e.get("fachgebiet")).strip()
-                or inv_row.get("fachgebiet", ""),
-                "source_file": _coerce_str(e.get("source_file")).strip()
-                or inv_row.get("source_file", ""),
-                "antwort": _coerce_str(e.get("antwort")).strip(),
-                "study_status": status,
-                "study_exclude_reason": _coerce_str(
-                    e.get("study_exclude_reason")
-                ).strip(),
-                "verdict": _coerce_str(fc.get("verdict")).strip(),
-                "issues": issues_list,
-                "issues_compact": " | ".join(
-                    [
-                        _coerce_str(x).strip()
-                        for x in issues_list
-                        if _coerce_str(x).strip()
-                    ][:5]
-                ),
-                "issues_compact_inventory": inv_row.get("issues", ""),
-                "suggested_sources": sources_list,
-                "sources_compact_inventory": inv_row.get("sources", ""),
-                "optional_fix_snippet": _coerce_str(
-                    fc.get("optional_fix_snippet")
-                ).strip(),
-                "priority": priority,
-                "priority_reason": prio_reason,
-                "factcheck_report": _coerce_str(fc.get("report_file")).strip()
-                or inputs.factcheck_report_path.name,
-            }
-        )
+            priority, prio_reason = _priority(e, fc)
+            prio_counts[priority] += 1
+
+            inv_row = inv_problem.get(i) or inv_maybe.get(i) or {}
+
+            raw_issues = fc.get("issues")
+            issues_list: List[Any] = raw_issues if isinstance(raw_issues, list) else []
+
+            raw_sources = fc.get("suggested_sources")
+            sources_list: List[Any] = (
+                raw_sources if isinstance(raw_sources, list) else []
+            )
+
+            review_items.append(
+                {
+                    "index": i,
+                    "frage": _coerce_str(e.get("frage")).strip(),
+                    "fachgebiet": _coerce_str(e.get("fachgebiet")).strip()
+                    or inv_row.get("fachgebiet", ""),
+                    "source_file": _coerce_str(e.get("source_file")).strip()
+                    or inv_row.get("source_file", ""),
+                    "antwort": _coerce_str(e.get("antwort")).strip(),
+                    "study_status": status,
+                    "study_exclude_reason": _coerce_str(
+                        e.get("study_exclude_reason")
+                    ).strip(),
+                    "verdict": _coerce_str(fc.get("verdict")).strip(),
+                    "issues": issues_list,
+                    "issues_compact": " | ".join(
+                        [
+                            _coerce_str(x).strip()
+                            for x in issues_list
+                            if _coerce_str(x).strip()
+                        ][:5]
+                    ),
+                    "issues_compact_inventory": inv_row.get("issues", ""),
+                    "suggested_sources": sources_list,
+                    "sources_compact_inventory": inv_row.get("sources", ""),
+                    "optional_fix_snippet": _coerce_str(
+                        fc.get("optional_fix_snippet")
+                    ).strip(),
+                    "priority": priority,
+                    "priority_reason": prio_reason,
+                    "factcheck_report": _coerce_str(fc.get("report_file")).strip()
+                    or inputs.factcheck_report_path.name,
+                }
+            )
 
     # sort: high -> medium -> low, dann index
     prio_order = {"high": 0, "medium": 1, "low": 2}
@@ -695,20 +683,21 @@ def main() -> int:
         _write_json(out_srs_review, srs_payload)
 
     # Write fixed enriched (gleiche Top-Level-Struktur wie Input)
-    if top_kind == "list":
-        fixed_payload: Any = items
-    else:
-        fixed_payload = dict(meta)
+    fixed_meta: Optional[Dict[str, Any]] = None
+    if enriched.meta is not None:
+        fixed_meta = dict(enriched.meta)
         # optionale Meta-Stats (hilfreich, aber klein)
-        fixed_payload["fixed_at"] = datetime.now().isoformat()
-        fixed_payload["fixed_from"] = inputs.enriched_path.name
-        fixed_payload["counts_after"] = {
+        fixed_meta["fixed_at"] = datetime.now().isoformat()
+        fixed_meta["fixed_from"] = inputs.enriched_path.name
+        fixed_meta["counts_after"] = {
             "meaningful_total": meaningful_total,
             "meaningful_status": dict(meaningful_status_counts),
         }
-        fixed_payload["items"] = items
 
-    _write_json(out_fixed, fixed_payload)
+    try:
+        write_items(out_fixed, iter_items(tmp_fixed), meta=fixed_meta)
+    finally:
+        tmp_fixed.unlink(missing_ok=True)
     _write_json(out_review_queue, review_payload)
 
     # Ausgabe (Deutsch, keine Secrets)
@@ -175,6 +175,8 @@ class AnswerGenerator:
         self.dry_run = dry_run
         self.use_web_search = use_web_search
         self.allowed_web_domains = allowed_web_domains
+        self._prefetched_rag_contexts: Dict[str, Dict[str, Any]] = {}
+        self._api_client = None  # lazy, ein Client (und Keep-Alive-Pool) für alle LLM-/Web-Aufrufe
 
         # Scientific Skills Integration
         self.use_scientific_skills = use_scientific_skills and SCIENTIFIC_SKILLS_AVAILABLE
@@ -200,6 +202,14 @@ class AnswerGenerator:
 
         logger.info(f"AnswerGenerator initialisiert (OpenAI: {use_openai}, Validation: {validate}, ScientificSkills: {self.use_scientific_skills})")
 
+    def _get_api_client(self):
+        """Gemeinsamer UnifiedAPIClient (wiederverwendete HTTP-Verbindungen statt neuem Client pro Frage)."""
+        if self._api_client is None:
+            from core.unified_api_client import UnifiedAPIClient  # Lazy import
+
+            self._api_client = UnifiedAPIClient()
+        return self._api_client
+
     def load_questions(self, questions_file: Path) -> List[Dict[str, Any]]:
         """Lädt extrahierte Fragen aus JSON."""
         with open(questions_file, 'r', encoding='utf-8') as f:
@@ -284,8 +294,10 @@ class AnswerGenerator:
         themes = detect_medical_themes(full_text, top_n=3)
         theme_list = [t[0] for t in themes]
 
-        # RAG-Kontext abrufen
-        rag_context = self.rag.get_context_for_question(question)
+        # RAG-Kontext abrufen (vorab im Batch geholt, falls über process_questions)
+        rag_context = self._prefetched_rag_contexts.pop(question, None)
+        if rag_context is None:
+            rag_context = self.rag.get_context_for_question(question)
 
         # Leitlinien suchen wenn aktiviert
         guideline_info = ""
@@ -305,7 +317,9 @@ class AnswerGenerator:
                 domains = self.allowed_web_domains or ALLOWED_DOMAINS_DEFAULT
                 # Query fokussiert auf Leitlinien-/DocCheck-Ebenen
                 query = question
-                web_citations = search_medical_web(query, max_results=3, allowed_domains=domains)
+                web_citations = search_medical_web(
+                    query, max_results=3, allowed_domains=domains, http_pool=self._get_api_client().http
+                )
             except Exception as e:
                 logger.warning(f"Websuche fehlgeschlagen oder nicht verfügbar: {e}")
 
@@ -330,7 +344,7 @@ class AnswerGenerator:
         # In Produktion: LLM-generiert basierend auf Kontext
         if not self.dry_run:
             definition, aetiologie, diagnostik, therapie, rechtlich = self._generate_with_llm(
-                question, context or [], rag_context.get("contexts", []), guideline_info, theme_list,
+                question, context or [], rag_context.get("context", []), guideline_info, theme_list,
                 scientific_enrichments=scientific_enrichments,
                 web_citations=web_citations
             )
@@ -478,7 +492,6 @@ class AnswerGenerator:
         from core.unified_api_client import (
             BudgetExceededError,
             ProviderError,
-            UnifiedAPIClient,
         )  # Lazy import
 
         therapy_bias = any(k in question.lower() for k in ["therapie", "behand", "dosis", "dosierung"])
@@ -487,7 +500,7 @@ class AnswerGenerator:
         # Budgetcheck
         if self.cost_used + est_cost > self.budget_limit:
             raise RuntimeError("Budget-Limit erreicht")
-        client = UnifiedAPIClient()
+        client = self._get_api_client()
         prompt = self._build_prompt(
             question, context, rag_contexts, guideline_info, themes,
             scientific_enrichments, web_citations or []
@@ -705,6 +718,12 @@ class AnswerGenerator:
         if limit:
             questions = questions[:limit]
 
+        # RAG-Kontext für alle Fragen gebündelt abrufen
+        question_texts = [q.get("frage", "") for q in questions if q.get("frage")]
+        self._prefetched_rag_contexts = dict(
+            zip(question_texts, self.rag.get_context_for_questions(question_texts))
+        )
+
         answers = []
         for i, q in enumerate(questions):
             if progress_callback:
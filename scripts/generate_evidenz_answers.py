@@ -811,8 +811,10 @@ def run_single_batch(args, base_dir: Path, unanswered_path: Path, blocks_path: P
 
         rag = get_rag_system(use_openai=False)
 
-        # Lade gespeicherte Wissensbasis
-        kb_path = base_dir / "_OUTPUT/rag_knowledge_base.json"
+        # Lade gespeicherte Wissensbasis (Binär-KB bevorzugt, siehe scripts/convert_rag_kb.py)
+        kb_path = base_dir / "_OUTPUT/rag_knowledge_base.kb"
+        if not kb_path.exists():
+            kb_path = base_dir / "_OUTPUT/rag_knowledge_base.json"
         if kb_path.exists():
             print(f"   Lade Wissensbasis: {kb_path}")
             rag.load_knowledge_base(str(kb_path))
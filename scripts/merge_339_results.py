@@ -1,13 +1,47 @@
 #!/usr/bin/env python3
 """
 Merge 339 regenerated answers into main evidenz_antworten.json
+
+Hinweis: Steht eine Frage mehrfach in der Hauptdatei, erhält jede leere/kurze
+Kopie die Regen-Antwort (früher nur die letzte Kopie; die übrigen blieben leer).
 """
 
-import json
 import shutil
+import sys
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.dataset_merge import MergeRules, MergeRun, answer_text, merge_into  # noqa: E402
+
+MIN_ANSWER_LEN = 50
+
+
+def _replace_answer(item, regen_item, run):
+    # Ersetze leere/kurze Antwort
+    item["antwort"] = answer_text(regen_item)
+    item["leitlinie"] = regen_item.get("leitlinie", "")
+    item["quellen"] = regen_item.get("quellen", [])
+    item["regenerated_at"] = datetime.now().isoformat()
+    item["regen_model"] = regen_item.get("model_used", "gpt-5.1")
+    return item
+
+
+def _new_item(regen_item, run):
+    return {
+        "frage": regen_item.get("frage", "").strip(),
+        "source_file": regen_item.get("source_file", ""),
+        "antwort": answer_text(regen_item),
+        "leitlinie": regen_item.get("leitlinie", ""),
+        "quellen": regen_item.get("quellen", []),
+        "context": regen_item.get("context", []),
+        "rag_chunks_used": regen_item.get("rag_chunks_used", 0),
+        "generated_at": regen_item.get("generated_at", ""),
+        "model_used": regen_item.get("model_used", ""),
+        "run_id": regen_item.get("run_id", ""),
+    }
+
 
 def main():
     base_dir = Path(__file__).parent.parent
@@ -26,77 +60,33 @@ def main():
     print(f"Erstelle Backup: {backup_file}")
     shutil.copy(main_file, backup_file)
 
-    # Lade Dateien
-    print(f"Lade Hauptdatei: {main_file}")
-    with open(main_file, "r", encoding="utf-8") as f:
-        main_data = json.load(f)
-
-    print(f"Lade Regen-Datei: {regen_file}")
-    with open(regen_file, "r", encoding="utf-8") as f:
-        regen_data = json.load(f)
-
-    print(f"\nHauptdatei: {len(main_data)} Einträge")
-    print(f"Regen-Datei: {len(regen_data)} Einträge")
-
-    # Erstelle Lookup für existierende Fragen
-    existing_questions = {}
-    for i, item in enumerate(main_data):
-        frage = item.get("frage", "").strip()
-        if frage:
-            existing_questions[frage] = i
-
-    # Merge: Nur neue hinzufügen, leere ersetzen
-    added = 0
-    replaced = 0
-    skipped_empty = 0
-
-    for regen_item in regen_data:
-        frage = regen_item.get("frage", "").strip()
-        antwort = regen_item.get("antwort", "").strip()
-
-        # Skip wenn regen-Antwort leer
-        if not antwort or len(antwort) < 50:
-            skipped_empty += 1
-            continue
-
-        if frage in existing_questions:
-            # Existiert bereits - prüfe ob wir ersetzen sollten
-            idx = existing_questions[frage]
-            existing_antwort = main_data[idx].get("antwort", "").strip()
-
-            if not existing_antwort or len(existing_antwort) < 50:
-                # Ersetze leere/kurze Antwort
-                main_data[idx]["antwort"] = antwort
-                main_data[idx]["leitlinie"] = regen_item.get("leitlinie", "")
-                main_data[idx]["quellen"] = regen_item.get("quellen", [])
-                main_data[idx]["regenerated_at"] = datetime.now().isoformat()
-                main_data[idx]["regen_model"] = regen_item.get("model_used", "gpt-5.1")
-                replaced += 1
-        else:
-            # Neue Frage hinzufügen
-            main_data.append({
-                "frage": frage,
-                "source_file": regen_item.get("source_file", ""),
-                "antwort": antwort,
-                "leitlinie": regen_item.get("leitlinie", ""),
-                "quellen": regen_item.get("quellen", []),
-                "context": regen_item.get("context", []),
-                "rag_chunks_used": regen_item.get("rag_chunks_used", 0),
-                "generated_at": regen_item.get("generated_at", ""),
-                "model_used": regen_item.get("model_used", ""),
-                "run_id": regen_item.get("run_id", ""),
-            })
-            added += 1
-
-    # Speichern
-    print(f"\n=== Merge-Ergebnis ===")
-    print(f"Hinzugefügt: {added}")
-    print(f"Ersetzt: {replaced}")
-    print(f"Übersprungen (leer): {skipped_empty}")
-    print(f"Neue Gesamtzahl: {len(main_data)}")
-
-    with open(main_file, "w", encoding="utf-8") as f:
-        json.dump(main_data, f, ensure_ascii=False, indent=2)
+    # Merge: Nur neue hinzufügen, leere/kurze ersetzen (erste Regen-Antwort je Frage gewinnt).
+    # Ohne consume wird der Kandidat für alle doppelten Basis-Einträge wiederverwendet.
+    rules = MergeRules(
+        accept=lambda item: len(answer_text(item)) >= MIN_ANSWER_LEN,
+        replace_if=lambda item: len(answer_text(item)) < MIN_ANSWER_LEN,
+        duplicates="first",
+        add_missing=True,
+    )
+    print(f"Merge {regen_file.name} -> {main_file.name}")
+    report = merge_into(
+        main_file,
+        [MergeRun(regen_file)],
+        main_file,
+        rules,
+        apply=_replace_answer,
+        new_item=_new_item,
+    )
+    run_stats = report.runs[regen_file.name]
+
+    print(f"\nHauptdatei: {report.base_items} Einträge")
+    print(f"Regen-Datei: {run_stats.items} Einträge")
+
+    print("\n=== Merge-Ergebnis ===")
+    print(f"Hinzugefügt: {report.added}")
+    print(f"Ersetzt: {report.replaced}")
+    print(f"Übersprungen (leer): {run_stats.rejected}")
+    print(f"Neue Gesamtzahl: {report.output_items}")
 
     print(f"\nGespeichert in: {main_file}")
     print(f"Backup unter: {backup_file}")
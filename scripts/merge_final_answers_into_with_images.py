@@ -21,10 +21,16 @@ from __future__ import annotations
 
 import argparse
 import csv
+import os
 import re
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.dataset_merge import DatasetMerger, MergeRules, MergeRun, copy_fields  # noqa: E402
 
 
 CONTEXT_PREFIX_RE = re.compile(r"(?is)^\s*<b>\s*Kontext\s*:\s*</b>.*?(?:<br>\s*){2}")
@@ -121,8 +127,8 @@ class TSVRow:
     tags: str
 
 
-def read_tsv(path: Path) -> List[TSVRow]:
-    rows: List[TSVRow] = []
+def read_tsv(path: Path) -> Iterator[TSVRow]:
+    """Streams TSV rows (question, answer, tags)."""
     with path.open("r", encoding="utf-8", newline="") as f:
         reader = csv.reader(f, delimiter="\t")
         for row in reader:
@@ -131,85 +137,94 @@ def read_tsv(path: Path) -> List[TSVRow]:
             if len(row) < 2:
                 # Keep minimal rows (shouldn't happen)
                 q = row[0] if row else ""
-                rows.append(TSVRow(question=q, answer="", tags=""))
+                yield TSVRow(question=q, answer="", tags="")
                 continue
             q = row[0]
             a = row[1]
             t = row[2] if len(row) >= 3 else ""
-            rows.append(TSVRow(question=q, answer=a, tags=t))
-    return rows
+            yield TSVRow(question=q, answer=a, tags=t)
 
 
 def write_tsv(path: Path, rows: Iterable[TSVRow]) -> None:
+    """
+    Writes rows to a temp file next to `path` and swaps it in atomically, so
+    `rows` may still be streaming from `path` itself (e.g. --out-ok == --final-ok).
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f, delimiter="\t", quoting=csv.QUOTE_MINIMAL)
-        for r in rows:
-            writer.writerow([r.question, r.answer, r.tags])
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    try:
+        with tmp.open("w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="\t", quoting=csv.QUOTE_MINIMAL)
+            for r in rows:
+                writer.writerow([r.question, r.answer, r.tags])
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
 
 
-def build_with_images_index(with_images_rows: List[TSVRow]) -> Dict[str, Tuple[Optional[str], str]]:
+def _question_key(row: Dict[str, Any]) -> str:
+    return normalize_question(row["question"])
+
+
+def with_images_run(with_images_path: Path) -> MergeRun:
     """
-    Map normalized_question -> (image_block_or_none, original_tags)
+    with_images rows reduced to (question, image block), joined by normalized
+    question (last row wins on duplicates).
     """
-    idx: Dict[str, Tuple[Optional[str], str]] = {}
-    for r in with_images_rows:
-        nq = normalize_question(r.question)
-        img = extract_image_block(r.answer)
-        idx[nq] = (img, r.tags or "")
-    return idx
+    rows = (
+        {"question": r.question, "image_block": extract_image_block(r.answer)}
+        for r in read_tsv(with_images_path)
+    )
+    return MergeRun(rows, name=with_images_path.name)
 
 
 def merge_one(final_path: Path, with_images_path: Path, output_path: Path) -> Dict[str, int]:
-    final_rows = read_tsv(final_path)
-    with_images_rows = read_tsv(with_images_path)
-    wi_index = build_with_images_index(with_images_rows)
+    merger = DatasetMerger(
+        MergeRules(key=_question_key),
+        apply=copy_fields({"image_block": None}),
+    )
+    wi_stats = merger.add_run(with_images_run(with_images_path))
+    final_rows = ({"question": r.question, "answer": r.answer, "tags": r.tags} for r in read_tsv(final_path))
 
-    out_rows: List[TSVRow] = []
-    matched = 0
     inserted_images = 0
     already_had_img = 0
-    unmatched = 0
-
-    for fr in final_rows:
-        nq = normalize_question(fr.question)
-        img_block: Optional[str] = None
-        wi_tags = ""
-        if nq in wi_index:
-            img_block, wi_tags = wi_index[nq]
-            matched += 1
-        else:
-            unmatched += 1
-
-        new_answer = fr.answer
-        if img_block:
-            if "<img" in (fr.answer or "").lower():
-                already_had_img += 1
-            else:
-                new_answer = insert_image_block_into_final_answer(fr.answer, img_block)
-                inserted_images += 1
-
-        # Tags: prefer FINAL tags, but ensure we don't leak extern::pending and keep media::image if image present
-        new_tags = normalize_tags(fr.tags)
-        new_tags = remove_tag(new_tags, "extern::pending")
-
-        # If either source had an image, ensure media::image tag exists
-        has_img_now = ("<img" in (new_answer or "").lower()) or (img_block is not None)
-        if has_img_now:
-            new_tags = ensure_tag(new_tags, "media::image")
-
-        out_rows.append(TSVRow(question=fr.question, answer=new_answer, tags=new_tags))
-
-    write_tsv(output_path, out_rows)
-
-    # Count extern::pending occurrences in output tags (should be 0)
-    pending_in_output = sum(1 for r in out_rows if "extern::pending" in (r.tags or "").split())
+    pending_in_output = 0
+
+    def out_rows() -> Iterator[TSVRow]:
+        nonlocal inserted_images, already_had_img, pending_in_output
+        for row in merger.merge(final_rows):
+            img_block: Optional[str] = row.get("image_block")
+            new_answer = row["answer"]
+            if img_block:
+                if "<img" in (row["answer"] or "").lower():
+                    already_had_img += 1
+                else:
+                    new_answer = insert_image_block_into_final_answer(row["answer"], img_block)
+                    inserted_images += 1
+
+            # Tags: prefer FINAL tags, but ensure we don't leak extern::pending and keep media::image if image present
+            new_tags = normalize_tags(row["tags"])
+            new_tags = remove_tag(new_tags, "extern::pending")
+
+            # If either source had an image, ensure media::image tag exists
+            has_img_now = ("<img" in (new_answer or "").lower()) or (img_block is not None)
+            if has_img_now:
+                new_tags = ensure_tag(new_tags, "media::image")
+
+            # Count extern::pending occurrences in output tags (should be 0)
+            if "extern::pending" in new_tags.split():
+                pending_in_output += 1
+            yield TSVRow(question=row["question"], answer=new_answer, tags=new_tags)
+
+    write_tsv(output_path, out_rows())
+    report = merger.report
 
     return {
-        "final_rows": len(final_rows),
-        "with_images_rows": len(with_images_rows),
-        "matched": matched,
-        "unmatched": unmatched,
+        "final_rows": report.base_items,
+        "with_images_rows": wi_stats.items,
+        "matched": report.replaced,
+        "unmatched": report.base_items - report.replaced,
         "inserted_images": inserted_images,
         "already_had_img": already_had_img,
         "extern_pending_in_output": pending_in_output,
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-Merge regenerated answers into a main dataset by exact question string.
+Merge regenerated answers into a main dataset by normalized question string
+(whitespace/case-insensitive, see core.dataset_merge).
 
 Use-case:
 - Targeted re-generation (e.g. "68 wrong answers") where questions already exist
@@ -16,9 +17,22 @@ from __future__ import annotations
 import argparse
 import json
 import shutil
+import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.dataset import iter_items, open_items  # noqa: E402
+from core.dataset_merge import (  # noqa: E402
+    MergeReport,
+    MergeRules,
+    MergeRun,
+    answer_text,
+    item_question_key,
+    merge_into,
+)
 
 
 def _load_json(path: Path) -> Any:
@@ -35,151 +49,119 @@ def _extract_question(entry: Dict[str, Any]) -> str:
     return (entry.get("frage") or entry.get("question") or "").strip()
 
 
-def _extract_answer(entry: Dict[str, Any]) -> str:
-    return (entry.get("antwort") or entry.get("answer") or "").strip()
+def _regen_model(entry: Dict[str, Any]) -> str:
+    return entry.get("model") or entry.get("model_used") or entry.get("model_name") or ""
 
 
 def _load_targets(path: Path) -> Set[str]:
+    """Target questions, normalized like the merge keys."""
     data = _load_json(path)
     targets: Set[str] = set()
+    if isinstance(data, dict):
+        # Best effort: accept {"questions": [...]} style
+        data = data.get("questions") or data.get("items") or data.get("data")
     if isinstance(data, list):
         for item in data:
             if isinstance(item, dict):
-                q = _extract_question(item)
+                q = item_question_key(item)
             else:
-                q = str(item).strip()
+                q = item_question_key({"frage": str(item)})
             if q:
                 targets.add(q)
-    elif isinstance(data, dict):
-        # Best effort: accept {"questions": [...]} style
-        maybe_list = data.get("questions") or data.get("items") or data.get("data")
-        if isinstance(maybe_list, list):
-            for item in maybe_list:
-                if isinstance(item, dict):
-                    q = _extract_question(item)
-                else:
-                    q = str(item).strip()
-                if q:
-                    targets.add(q)
     return targets
 
 
-def _index_main(main_data: List[Dict[str, Any]]) -> Dict[str, int]:
-    index: Dict[str, int] = {}
-    for i, item in enumerate(main_data):
-        q = _extract_question(item)
-        if q:
-            index[q] = i
-    return index
+def _regen_items(
+    regen_path: Path, targets: Optional[Set[str]], found: Set[str], counts: Dict[str, int]
+) -> Iterator[Dict[str, Any]]:
+    """Streams regen items; with targets, only those questions (found keys are recorded)."""
+    for item in iter_items(regen_path):
+        counts["regen_entries"] += 1
+        if not isinstance(item, dict):
+            continue
+        q = item_question_key(item)
+        if targets is not None:
+            if q not in targets:
+                continue
+            found.add(q)
+        yield item
 
 
 def _merge(
     *,
-    main_data: List[Dict[str, Any]],
-    regen_data: List[Dict[str, Any]],
+    main_path: Path,
+    regen_path: Path,
     targets: Optional[Set[str]],
     min_answer_len: int,
     add_missing: bool,
-    regen_source: str,
-) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
-    main_index = _index_main(main_data)
-    regen_index: Dict[str, Dict[str, Any]] = {}
-    for item in regen_data:
-        if not isinstance(item, dict):
-            continue
-        q = _extract_question(item)
-        if q:
-            regen_index[q] = item
-
-    replaced: List[Dict[str, Any]] = []
-    skipped_short = 0
-    skipped_not_in_targets = 0
-    missing_in_main = 0
-    missing_in_regen = 0
-
+    fuzzy_threshold: Optional[float],
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any], MergeReport]:
     now = datetime.now().isoformat()
+    regen_source = regen_path.name
+    replaced: List[Dict[str, Any]] = []
 
-    iter_targets: Iterable[str]
-    if targets is None:
-        iter_targets = regen_index.keys()
-    else:
-        iter_targets = targets
-
-    for q in iter_targets:
-        regen_item = regen_index.get(q)
-        if regen_item is None:
-            missing_in_regen += 1
-            continue
-
-        answer = _extract_answer(regen_item)
-        if len(answer) < min_answer_len:
-            skipped_short += 1
-            continue
-
-        idx = main_index.get(q)
-        if idx is None:
-            missing_in_main += 1
-            if not add_missing:
-                continue
-            main_data.append(
-                {
-                    "frage": q,
-                    "source_file": regen_item.get("source_file", ""),
-                    "antwort": answer,
-                    "regenerated_at": now,
-                    "regen_model": regen_item.get("model")
-                    or regen_item.get("model_used")
-                    or regen_item.get("model_name")
-                    or "",
-                    "regen_source": regen_source,
-                }
-            )
-            continue
-
-        if targets is not None and q not in targets:
-            skipped_not_in_targets += 1
-            continue
-
-        old_answer = (main_data[idx].get("antwort") or "").strip()
-        main_data[idx]["antwort"] = answer
-        main_data[idx]["regenerated_at"] = now
-        main_data[idx]["regen_model"] = (
-            regen_item.get("model")
-            or regen_item.get("model_used")
-            or regen_item.get("model_name")
-            or ""
-        )
-        main_data[idx]["regen_source"] = regen_source
-
+    def replace_answer(item: Dict[str, Any], regen_item: Dict[str, Any], run: MergeRun) -> Dict[str, Any]:
+        answer = answer_text(regen_item)
         replaced.append(
             {
-                "index": idx,
-                "frage": q,
-                "old_answer": old_answer,
+                "frage": _extract_question(item),
+                "old_answer": (item.get("antwort") or "").strip(),
                 "new_answer": answer,
                 "score_before": regen_item.get("score_before"),
                 "fehler_before": regen_item.get("fehler_before"),
             }
         )
+        item["antwort"] = answer
+        item["regenerated_at"] = now
+        item["regen_model"] = _regen_model(regen_item)
+        item["regen_source"] = regen_source
+        return item
+
+    def new_item(regen_item: Dict[str, Any], run: MergeRun) -> Dict[str, Any]:
+        return {
+            "frage": _extract_question(regen_item),
+            "source_file": regen_item.get("source_file", ""),
+            "antwort": answer_text(regen_item),
+            "regenerated_at": now,
+            "regen_model": _regen_model(regen_item),
+            "regen_source": regen_source,
+        }
+
+    found: Set[str] = set()
+    counts = {"regen_entries": 0}
+    rules = MergeRules(
+        accept=lambda item: len(answer_text(item)) >= min_answer_len,
+        add_missing=add_missing,
+        fuzzy_threshold=fuzzy_threshold,
+    )
+    run = MergeRun(_regen_items(regen_path, targets, found, counts), name=regen_source)
+    report = merge_into(main_path, [run], main_path, rules, apply=replace_answer, new_item=new_item)
+
+    # Indices of replaced items come from the provenance report (same order)
+    replaced_entries = (entry for entry in report.provenance if entry["match"] != "added")
+    replaced = [{"index": entry["index"], **row} for entry, row in zip(replaced_entries, replaced)]
 
+    run_stats = report.runs[regen_source]
+    missing_in_main = report.added + report.unused
     summary = {
         "timestamp": now,
-        "main_entries": len(main_data),
-        "regen_entries": len(regen_data),
+        "main_entries": report.output_items,
+        "regen_entries": counts["regen_entries"],
         "targets_count": len(targets) if targets is not None else None,
         "replaced": len(replaced),
-        "skipped_short": skipped_short,
+        "replaced_fuzzy": report.fuzzy,
+        "skipped_short": run_stats.rejected,
         "missing_in_main": missing_in_main,
-        "missing_in_regen": missing_in_regen,
-        "skipped_not_in_targets": skipped_not_in_targets,
+        "added": report.added,
+        "missing_in_regen": len(targets - found) if targets is not None else 0,
     }
 
-    return replaced, summary
+    return replaced, summary, report
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(
-        description="Merge regenerated answers into main JSON by exact question string"
+        description="Merge regenerated answers into main JSON by normalized question string"
     )
     parser.add_argument(
         "--main",
@@ -194,7 +176,7 @@ def main() -> int:
     parser.add_argument(
         "--targets",
         default=None,
-        help="Optional JSON list/dict containing the questions to replace (exact match)",
+        help="Optional JSON list/dict containing the questions to replace (normalized match)",
     )
     parser.add_argument(
         "--min-answer-len",
@@ -207,6 +189,12 @@ def main() -> int:
         action="store_true",
         help="If a regen question is not in main, append it (default: false)",
     )
+    parser.add_argument(
+        "--fuzzy-threshold",
+        type=float,
+        default=None,
+        help="Fuzzy fallback for main questions without exact match (e.g. 0.95; default: off)",
+    )
     parser.add_argument(
         "--backup-dir",
         default="_OUTPUT/backups",
@@ -244,25 +232,21 @@ def main() -> int:
     print(f"📦 Backup: {backup_path}")
     shutil.copy(main_path, backup_path)
 
-    main_data = _load_json(main_path)
-    regen_data = _load_json(regen_path)
-    if not isinstance(main_data, list):
-        raise SystemExit("Main JSON must be a list")
-    if not isinstance(regen_data, list):
-        raise SystemExit("Regen JSON must be a list")
+    with open_items(main_path) as main_items:
+        if main_items.shape == "object":
+            raise SystemExit("Main JSON must be a list")
 
-    replaced, summary = _merge(
-        main_data=main_data,
-        regen_data=regen_data,
+    replaced, summary, report = _merge(
+        main_path=main_path,
+        regen_path=regen_path,
         targets=targets,
         min_answer_len=args.min_answer_len,
         add_missing=args.add_missing,
-        regen_source=regen_path.name,
+        fuzzy_threshold=args.fuzzy_threshold,
     )
 
     _dump_json(Path(args.write_fixed), replaced)
-    _dump_json(Path(args.write_summary), summary)
-    _dump_json(main_path, main_data)
+    _dump_json(Path(args.write_summary), {**summary, "provenance": report.provenance})
 
     print("\n=== Merge Summary ===")
     for k, v in summary.items():
@@ -49,6 +49,10 @@ except Exception:
 PROJECT_ROOT = Path(__file__).parent.parent
 OUTPUT_DIR = PROJECT_ROOT / "_OUTPUT"
 
+sys.path.insert(0, str(PROJECT_ROOT.resolve()))
+
+from core.checkpoint_journal import CheckpointJournal  # noqa: E402
+
 
 def _read_json(path: Path) -> Any:
     with path.open("r", encoding="utf-8") as f:
@@ -87,41 +91,14 @@ def _run_id_from_checkpoint_path(path: Path) -> Optional[str]:
     return m.group(1) if m else None
 
 
-def _load_checkpoint_jsonl(path: Path) -> Dict[int, Dict[str, Any]]:
-    """Loads checkpoint lines into a dict keyed by index_in_evidenz_antworten."""
-    results_by_index: Dict[int, Dict[str, Any]] = {}
-    if not path.exists():
-        return results_by_index
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            try:
-                obj = json.loads(s)
-            except Exception:
-                continue
-            if not isinstance(obj, dict):
-                continue
-            idx = obj.get("index_in_evidenz_antworten")
-            if isinstance(idx, int):
-                results_by_index[idx] = obj
-    return results_by_index
-
-
-def _append_checkpoint_jsonl(
-    path: Path,
-    obj: Dict[str, Any],
-    *,
-    fsync: bool,
-) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    line = json.dumps(obj, ensure_ascii=False) + "\n"
-    with path.open("a", encoding="utf-8") as f:
-        f.write(line)
-        f.flush()
-        if fsync:
-            os.fsync(f.fileno())
+def _open_checkpoint(path: Path, fsync_every: int) -> CheckpointJournal:
+    """Checkpoint-Journal keyed by index_in_evidenz_antworten (fsync alle N Items, 0=nie)."""
+    return CheckpointJournal(
+        path,
+        key_field="index_in_evidenz_antworten",
+        sync_every=max(fsync_every, 0),
+        sync_interval=None,
+    )
 
 
 def _normalize_whitespace(text: str) -> str:
@@ -754,7 +731,12 @@ def main() -> int:
 
     # Load checkpoint if present (resume) or ensure we don't overwrite
     # accidentally.
-    results_by_index = _load_checkpoint_jsonl(checkpoint_path)
+    journal = _open_checkpoint(checkpoint_path, args.fsync_every)
+    results_by_index: Dict[int, Dict[str, Any]] = {
+        rec["index_in_evidenz_antworten"]: rec
+        for rec in journal.records()
+        if isinstance(rec.get("index_in_evidenz_antworten"), int)
+    }
     if results_by_index and not args.resume and not args.dry_run:
         raise SystemExit(
             "Checkpoint existiert bereits. Nutze --resume oder wähle " "--run-id neu."
@@ -805,14 +787,7 @@ def main() -> int:
         }
 
         if not args.dry_run:
-            do_fsync = args.fsync_every > 0 and (
-                (completed + 1) % args.fsync_every == 0
-            )
-            _append_checkpoint_jsonl(
-                checkpoint_path,
-                record,
-                fsync=do_fsync,
-            )
+            journal.append(record)
 
         results_by_index[item.index_in_evidenz] = record
         completed += 1
@@ -821,6 +796,8 @@ def main() -> int:
         if completed % max(args.progress_every, 1) == 0:
             print(f"[{completed}/{len(sample)}] …", file=sys.stderr)
 
+    journal.close()
+
     # Rebuild results in sample order (stable), using checkpoint content.
     results: List[Dict[str, Any]] = []
     for pos, item in enumerate(sample, 1):
@@ -24,15 +24,21 @@ Output (überschreibt):
 
 from __future__ import annotations
 
+import heapq
 import json
 import re
+import sys
 import unicodedata
 from collections import defaultdict
 from datetime import datetime
-from difflib import SequenceMatcher
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.fuzzy_match import FuzzyIndex, ratio as fuzzy_ratio
+
 
 # -----------------------------
 # Konfiguration
@@ -226,22 +232,48 @@ def chunk_to_search_text(chunk: Dict[str, Any]) -> str:
     return "\n".join(parts)
 
 
+# Gecachte SequenceMatcher pro Quelle (die Quellen werden nacheinander abgearbeitet)
+CHUNK_MATCHER_CACHE = 2048
+
+
+class ChunkMatcher:
+    """Fuzzy-Index über die Chunk-Texte einer Quelle (gekürzt, lowercase) für die Sequenz-Ähnlichkeit."""
+
+    def __init__(self, max_matchers: Optional[int] = CHUNK_MATCHER_CACHE):
+        self.index = FuzzyIndex(max_matchers=max_matchers)
+        self._ids: dict[str, int] = {}
+
+    def fuzzy_id(self, chunk_text: str) -> int:
+        c_short = chunk_text[:2000].lower()
+        idx = self._ids.get(c_short)
+        if idx is None:
+            idx = self._ids[c_short] = self.index.add(c_short)
+        return idx
+
+
+@lru_cache(maxsize=8192)
+def _chunk_norm(chunk_text: str) -> str:
+    return normalize_for_match(chunk_text)
+
+
+def _keyword_overlap(q_kw_norm: list[str], chunk_text: str) -> float:
+    chunk_norm = _chunk_norm(chunk_text)
+    hits = 0
+    for kw in q_kw_norm:
+        if kw in chunk_norm:
+            hits += 1
+    return hits / max(1, len(q_kw_norm))
+
+
 def score_question_to_chunk(question: str, chunk_text: str) -> float:
     q_kw = extract_keywords(question)
     if not q_kw:
         return 0.0
 
-    chunk_norm = normalize_for_match(chunk_text)
-    hits = 0
-    for kw in q_kw:
-        if normalize_for_match(kw) in chunk_norm:
-            hits += 1
-
-    overlap = hits / max(1, len(q_kw))
+    overlap = _keyword_overlap([normalize_for_match(kw) for kw in q_kw], chunk_text)
 
     q_short = question[:500].lower()
-    c_short = chunk_text[:2000].lower()
-    seq = SequenceMatcher(None, q_short, c_short).ratio()
+    seq = fuzzy_ratio(q_short, chunk_text[:2000].lower())
 
     return 0.8 * overlap + 0.2 * seq
 
@@ -510,6 +542,7 @@ def load_chunks_from_files(chunk_files: list[Path]) -> list[tuple[str, Dict[str,
 def select_top_chunks(
     frage: str,
     candidates: list[tuple[str, Dict[str, Any]]],
+    matcher: ChunkMatcher,
     manual_files: Optional[list[str]] = None,
 ) -> tuple[list[dict], float]:
     if manual_files:
@@ -519,19 +552,41 @@ def select_top_chunks(
             top = [{"chunk_file": fn, "score": 1.0, "chunk": ch} for fn, ch in filtered][:TOP_K_CHUNKS]
             return top, 1.0
 
-    if len(extract_keywords(frage)) < MIN_KEYWORDS_FOR_MATCH:
+    q_kw = extract_keywords(frage)
+    if len(q_kw) < MIN_KEYWORDS_FOR_MATCH:
         return [], 0.0
+    q_kw_norm = [normalize_for_match(kw) for kw in q_kw]
+    q_short = frage[:500].lower()
 
-    scored: list[dict] = []
+    # Score wie score_question_to_chunk. Die Sequenz-Ratio (teuer) wird nur
+    # für Chunks gerechnet, deren obere Schranke noch in die Top-K kommt.
+    entries: list[tuple[str, Dict[str, Any], float, int]] = []
     for fn, ch in candidates:
         txt = chunk_to_search_text(ch)
         if not txt.strip():
             continue
-        s = score_question_to_chunk(frage, txt)
-        scored.append({"chunk_file": fn, "score": s, "chunk": ch})
+        entries.append((fn, ch, _keyword_overlap(q_kw_norm, txt), matcher.fuzzy_id(txt)))
+    if not entries:
+        return [], 0.0
 
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    top = scored[:TOP_K_CHUNKS]
+    seq_bounds = matcher.index.upper_bounds(q_short, [e[3] for e in entries]).tolist()
+    limits = [0.8 * e[2] + 0.2 * b for e, b in zip(entries, seq_bounds)]
+    top_scores: list[float] = []  # Min-Heap der besten TOP_K_CHUNKS Scores
+    scored: list[tuple[int, dict]] = []
+    for pos in sorted(range(len(entries)), key=lambda i: -limits[i]):
+        if len(top_scores) == TOP_K_CHUNKS and limits[pos] < top_scores[0]:
+            break
+        fn, ch, overlap, fuzzy_id = entries[pos]
+        s = 0.8 * overlap + 0.2 * matcher.index.ratio(q_short, fuzzy_id)
+        scored.append((pos, {"chunk_file": fn, "score": s, "chunk": ch}))
+        if len(top_scores) < TOP_K_CHUNKS:
+            heapq.heappush(top_scores, s)
+        elif s > top_scores[0]:
+            heapq.heapreplace(top_scores, s)
+
+    # Gleichstand: Reihenfolge der Kandidaten (wie stabiles Sortieren aller Scores)
+    scored.sort(key=lambda x: (-x[1]["score"], x[0]))
+    top = [item for _pos, item in scored[:TOP_K_CHUNKS]]
     best = float(top[0]["score"]) if top else 0.0
     return top, best
 
@@ -617,6 +672,7 @@ def main() -> None:
     print(f"✅ Chunk-Index Keys: {len(chunk_index)}")
 
     source_cache: dict[str, list[tuple[str, Dict[str, Any]]]] = {}
+    source_matchers: dict[str, ChunkMatcher] = {}
     batch_items: list[dict] = []
     stats = defaultdict(int)
 
@@ -635,6 +691,7 @@ def main() -> None:
         if source_key not in source_cache:
             chunk_files = chunk_index.get(source_key, [])
             source_cache[source_key] = load_chunks_from_files(chunk_files)
+            source_matchers[source_key] = ChunkMatcher()
 
         candidates = list(source_cache[source_key])
 
@@ -650,7 +707,9 @@ def main() -> None:
                     candidates.append((fn, ch))
                     seen.add(k)
 
-        top_chunks, best_score = select_top_chunks(frage, candidates, manual_files=manual_files)
+        top_chunks, best_score = select_top_chunks(
+            frage, candidates, source_matchers[source_key], manual_files=manual_files
+        )
         contexts = [extract_context_from_chunk(t["chunk"]) for t in top_chunks]
         merged_context = merge_contexts(contexts) if contexts else {}
 
@@ -19,7 +19,7 @@ import yaml  # type: ignore
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from core.subject_classifier import classify_subject  # type: ignore
-from core.guideline_fetcher import fetch_guidelines_for_text  # type: ignore
+from core.guideline_fetcher import fetch_guidelines_for_texts  # type: ignore
 from core.rag_system import get_rag_system  # type: ignore
 
 
@@ -36,24 +36,27 @@ def prepare_blocks(blocks: List[Dict[str, Any]], max_rag_sources: int = 3) -> Li
     # Wissen befüllen (Fragen + Kontext)
     for b in blocks:
         rag.add_to_knowledge_base(
-            [b.get("questions", []), b.get("context", [])],
+            [*b.get("questions", []), *b.get("context", [])],
             source_module="gold_standard",
             source_tier="tier1_gold",
         )
 
-    for b in blocks:
-        text = " ".join(b.get("questions", [])) + " " + " ".join(b.get("context", []))
+    texts = [" ".join(b.get("questions", [])) + " " + " ".join(b.get("context", [])) for b in blocks]
+    # RAG-Kontext für alle Blöcke in einem Batch (ein Embedding-Aufruf, ein Matrix-Produkt)
+    rag_contexts = rag.get_context_for_questions(texts, top_k=max_rag_sources)
+    # Leitlinien für alle Blöcke (ein Fetcher, Themen-Cache pro Text)
+    guideline_results = fetch_guidelines_for_texts(texts, download=False)
+
+    for b, text, rag_ctx, gl in zip(blocks, texts, rag_contexts, guideline_results):
         subject = classify_subject(text) or "Allgemein"
-        gl = fetch_guidelines_for_text(text, download=False)
         guideline = gl["guidelines"][0] if gl.get("guidelines") else {}
-        rag_ctx = rag.get_context_for_question(text, top_k=max_rag_sources)
 
         prepared.append(
             {
                 **b,
                 "subject": subject,
                 "guideline": guideline,
-                "rag_snippets": rag_ctx.get("contexts", []),
+                "rag_snippets": rag_ctx.get("context", []),
                 "rag_sources": rag_ctx.get("sources", []),
             }
         )
@@ -27,8 +27,8 @@ Hinweis
 - Matching primär innerhalb derselben `source_file`.
 - Fallback auf normalisierten Dateinamen nur, wenn eindeutig (sonst: als
   "offen" markieren).
-- Fuzzy-Matching via Standardbibliothek `difflib`, aber konservativ: nur bei
-  klaren Scores.
+- Fuzzy-Matching mit der `difflib`-Ratio (über `core.fuzzy_match`), aber
+  konservativ: nur bei klaren Scores.
 """
 
 from __future__ import annotations
@@ -36,17 +36,24 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sys
 import unicodedata
 from dataclasses import dataclass
 from datetime import datetime
-from difflib import SequenceMatcher
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.fuzzy_match import FuzzyIndex  # noqa: E402
+
 DEFAULT_OUTPUT_DIR = PROJECT_ROOT / "_OUTPUT"
 DEFAULT_GOLD_DIR = PROJECT_ROOT / "_GOLD_STANDARD"
 
+# Fuzzy-Matches, deren Zweitbester näher als das liegt, gelten als mehrdeutig
+AMBIGUITY_MARGIN = 0.02
+
 
 def _now_ts() -> str:
     return datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -208,17 +215,25 @@ def _threshold_for(q_norm: str) -> float:
     return 0.90
 
 
-def _similarity(a: str, b: str) -> float:
-    if not a or not b:
-        return 0.0
-    return SequenceMatcher(None, a, b).ratio()
+def _candidate_fuzzy_index(candidates: List[ContextCandidate]) -> FuzzyIndex:
+    """Fuzzy-Index über Kandidaten: ID 2*i = Original, 2*i+1 = Reconstructed."""
+    index = FuzzyIndex()
+    for c in candidates:
+        index.add(c.norm_original)
+        index.add(c.norm_reconstructed)
+    return index
 
 
 def _best_match(
     q_norm: str,
     candidates: List[ContextCandidate],
+    fuzzy: Optional[FuzzyIndex] = None,
 ) -> Tuple[Optional[ContextCandidate], str, float, str]:
-    """Findet besten Match. Returns (candidate|None, method, score, note)."""
+    """Findet besten Match. Returns (candidate|None, method, score, note).
+
+    `fuzzy` ist der Index aus `_candidate_fuzzy_index(candidates)` (wird sonst
+    hier gebaut).
+    """
     if not q_norm or not candidates:
         return None, "", 0.0, "keine_kandidaten"
 
@@ -248,10 +263,22 @@ def _best_match(
     if thresh >= 1.0:
         return None, "", 0.0, "zu_kurz_fuer_fuzzy"
 
+    if fuzzy is None:
+        fuzzy = _candidate_fuzzy_index(candidates)
+    # Exakter Top-Score; danach nur Kandidaten nahe daran exakt scoren –
+    # alle anderen können weder gewinnen noch die Ambiguität auslösen.
+    top = fuzzy.match_one(q_norm)
+    top_score = top[1] if top else 0.0
+    if top_score < thresh:
+        return None, "", top_score, f"unter_schwelle_{thresh:.2f}"
+    near = dict(fuzzy.scores(q_norm, cutoff=top_score - 2 * AMBIGUITY_MARGIN))
+
     scored: List[Tuple[float, float, ContextCandidate, str]] = []
-    for c in candidates:
-        s1 = _similarity(q_norm, c.norm_original)
-        s2 = _similarity(q_norm, c.norm_reconstructed)
+    for i, c in enumerate(candidates):
+        if 2 * i not in near and 2 * i + 1 not in near:
+            continue
+        s1 = near.get(2 * i, 0.0)
+        s2 = near.get(2 * i + 1, 0.0)
         if s1 >= s2:
             scored.append((s1, s2, c, "fuzzy_original"))
         else:
@@ -267,11 +294,8 @@ def _best_match(
     best_score, _alt, best, method = scored[0]
     second_score = scored[1][0] if len(scored) > 1 else 0.0
 
-    if best_score < thresh:
-        return None, "", best_score, f"unter_schwelle_{thresh:.2f}"
-
     # Ambiguität: wenn 2. fast gleich gut ist -> nicht auto-matchen
-    if len(scored) > 1 and (best_score - second_score) < 0.02:
+    if len(scored) > 1 and (best_score - second_score) < AMBIGUITY_MARGIN:
         return None, "", best_score, "mehrdeutig_fuzzy"
 
     return best, method, float(best_score), ""
@@ -532,6 +556,7 @@ def main() -> int:
 
     matched: List[Dict[str, Any]] = []
     unmatched: List[Dict[str, Any]] = []
+    fuzzy_indexes: Dict[str, FuzzyIndex] = {}
 
     for it in needs_context_items:
         idx_raw = _safe_int(it.get("index"))
@@ -544,6 +569,7 @@ def main() -> int:
 
         # Kandidaten nach source_file
         candidates = context_index.get(source_file, [])
+        candidates_source = source_file
         source_match_note = ""
 
         if not candidates and source_file:
@@ -552,11 +578,17 @@ def main() -> int:
             mapped = context_sources_norm_map.get(key, [])
             if len(mapped) == 1:
                 candidates = context_index.get(mapped[0], [])
+                candidates_source = mapped[0]
                 source_match_note = f"source_file_fallback:{mapped[0]}"
             elif len(mapped) > 1:
                 source_match_note = "source_file_fallback_ambiguous"
 
-        best, method, score, note = _best_match(q_norm, candidates)
+        fuzzy = None
+        if candidates:
+            fuzzy = fuzzy_indexes.get(candidates_source)
+            if fuzzy is None:
+                fuzzy = fuzzy_indexes[candidates_source] = _candidate_fuzzy_index(candidates)
+        best, method, score, note = _best_match(q_norm, candidates, fuzzy)
 
         issues_compact = _coerce_str(it.get("issues_compact")).strip()
         if not issues_compact:
@@ -8,12 +8,18 @@ Speichert Fortschritt für Resume-Fähigkeit.
 import json
 import os
 import re
+import sys
 import requests
 import time
 import argparse
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.checkpoint_journal import CheckpointJournal
+from core.dataset import count_items, iter_items, resolve_dataset
+
 
 def load_api_key():
     """Lade OpenAI API Key aus .env"""
@@ -88,9 +94,17 @@ FEHLER: [Kurz wenn Score<=2, sonst "OK"]
 
 def main():
     parser = argparse.ArgumentParser(description="Vollständige Validierung")
-    parser.add_argument("--input", default="_OUTPUT/evidenz_antworten.json")
+    parser.add_argument(
+        "--input",
+        default="_OUTPUT/evidenz_antworten.json",
+        help="Datensatz (.json oder .jsonl; eine neuere .jsonl daneben wird bevorzugt)",
+    )
     parser.add_argument("--output", default="_OUTPUT/validation_full_results.json")
-    parser.add_argument("--checkpoint", default="_OUTPUT/validation_checkpoint.json")
+    parser.add_argument(
+        "--checkpoint",
+        default="_OUTPUT/validation_checkpoint.jsonl",
+        help="Checkpoint-Journal (JSONL, eine Zeile pro Frage); altes .json daneben wird übernommen",
+    )
     parser.add_argument(
         "--problematic-output",
         default="_OUTPUT/problematic_answers.json",
@@ -106,21 +120,26 @@ def main():
         print("Kein API Key gefunden!")
         return
 
-    # Lade Daten
-    data = json.load(open(args.input, encoding="utf-8"))
-    print(f"Geladen: {len(data)} Antworten")
+    # Daten werden gestreamt, nur Frage + Antwort offener Einträge bleiben im Speicher
+    input_path = resolve_dataset(args.input)
+    print(f"Geladen: {count_items(input_path)} Antworten")
 
-    # Lade Checkpoint falls vorhanden
+    # Lade Checkpoint falls vorhanden (Journal: eine Zeile pro validierter Frage)
     checkpoint_path = Path(args.checkpoint)
-    validated = {}
-    if checkpoint_path.exists():
-        checkpoint = json.load(open(checkpoint_path, encoding="utf-8"))
-        validated = {v["frage"]: v for v in checkpoint.get("results", [])}
+    validated = CheckpointJournal(checkpoint_path, key_field="frage", sync_every=args.batch_size)
+    legacy_path = checkpoint_path.with_suffix(".json")
+    if not len(validated) and legacy_path != checkpoint_path and legacy_path.exists():
+        legacy = json.load(open(legacy_path, encoding="utf-8"))
+        for v in legacy.get("results", []):
+            validated.append(v)
+        validated.sync()
+        print(f"Alter Checkpoint übernommen: {legacy_path}")
+    if len(validated):
         print(f"Checkpoint geladen: {len(validated)} bereits validiert")
 
     # Filtere bereits validierte
     to_validate = []
-    for entry in data:
+    for entry in iter_items(input_path, fields=("frage", "antwort")):
         frage = entry.get("frage", "")
         if frage and frage not in validated:
             to_validate.append(entry)
@@ -128,11 +147,11 @@ def main():
     print(f"Noch zu validieren: {len(to_validate)}")
 
     if not to_validate:
+        validated.close()
         print("Alle bereits validiert!")
         return
 
     # Validierung
-    results = list(validated.values())
     problematic = []
     total_cost = 0.0
 
@@ -158,7 +177,7 @@ def main():
             "score": validation["score"],
             "fehler": validation["fehler"],
         }
-        results.append(result)
+        validated.append(result)
 
         if validation["score"] <= 2:
             problematic.append({
@@ -171,22 +190,21 @@ def main():
         elif i % 50 == 0:
             print(f"[{i}/{len(to_validate)}] ✅ Fortschritt... (${total_cost:.4f})")
 
-        # Checkpoint alle 100
+        # Checkpoint alle 100 (Ergebnisse stehen schon im Journal, hier nur fsync + Stand)
         if i % args.batch_size == 0:
-            checkpoint_data = {
-                "timestamp": datetime.now().isoformat(),
-                "total_validated": len(results),
-                "results": results,
-                "problematic_count": len(problematic),
-            }
-            with open(checkpoint_path, "w", encoding="utf-8") as f:
-                json.dump(checkpoint_data, f, ensure_ascii=False, indent=2)
-            print(f"  💾 Checkpoint: {len(results)} validiert, {len(problematic)} problematisch")
+            validated.update_state(
+                timestamp=datetime.now().isoformat(),
+                problematic_count=len(problematic),
+            )
+            validated.sync()
+            print(f"  💾 Checkpoint: {len(validated)} validiert, {len(problematic)} problematisch")
 
         # Rate limiting
         time.sleep(0.15)
 
     # Finale Ergebnisse
+    results = validated.records()
+    validated.close()
     output = {
         "timestamp": datetime.now().isoformat(),
         "total_validated": len(results),
@@ -344,6 +344,7 @@ def safe_backup_existing(path: Path) -> None:
 
 
 def load_checkpoint(path: Path) -> Set[str]:
+    """Alter JSON-Checkpoint ({"done_node_ids": [...]}), nur noch zur Übernahme gelesen."""
     try:
         if not path.exists():
             return set()
@@ -356,9 +357,23 @@ def load_checkpoint(path: Path) -> Set[str]:
     return set()
 
 
-def write_checkpoint(path: Path, done: Set[str], meta: Dict[str, Any]) -> None:
-    payload = {"done_node_ids": sorted(done), **meta}
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+def open_checkpoint(path: Path, resume: bool):
+    """Checkpoint-Journal (JSONL): eine Zeile pro erledigter node_id, Budget-Stand als State."""
+    # Import direkt aus Datei (ohne `import core` side-effects)
+    import importlib.util
+
+    journal_module_path = (Path(__file__).parent.parent / "core" / "checkpoint_journal.py").resolve()
+    spec = importlib.util.spec_from_file_location("_checkpoint_journal_local", journal_module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+
+    journal = module.CheckpointJournal(path, key_field="node_id", sync_every=5)
+    if not resume:
+        journal.clear()
+    elif not len(journal):
+        for node_id in sorted(load_checkpoint(path.with_suffix(".json"))):
+            journal.append({"node_id": node_id})
+    return journal
 
 
 # -----------------------------
@@ -377,7 +392,9 @@ def main() -> None:
     )
     parser.add_argument("--write-updated-nodes", action="store_true")
     parser.add_argument("--resume", action="store_true")
-    parser.add_argument("--checkpoint", default="_OUTPUT/remnote_merge/remnote_needs_review_medgemma_checkpoint.json")
+    parser.add_argument(
+        "--checkpoint", default="_OUTPUT/remnote_merge/remnote_needs_review_medgemma_checkpoint.jsonl"
+    )
     parser.add_argument("--max-items", type=int, default=0, help="0 = alle")
     parser.add_argument("--budget-eur", type=float, default=5.0)
     parser.add_argument("--max-tokens", type=int, default=800)
@@ -401,9 +418,7 @@ def main() -> None:
     if args.max_items and args.max_items > 0:
         queue = queue[: args.max_items]
 
-    done: Set[str] = set()
-    if args.resume:
-        done = load_checkpoint(checkpoint_path)
+    done = open_checkpoint(checkpoint_path, resume=args.resume)
 
     # Prepare MedGemma client (unless dry-run)
     medgemma_client: Optional[MedGemmaClient] = None
@@ -480,7 +495,7 @@ def main() -> None:
                     "timestamp": datetime.now().isoformat(timespec="seconds"),
                 }
                 f_out.write(json.dumps(result, ensure_ascii=False) + "\n")
-                done.add(node_id)
+                done.append({"node_id": node_id})
                 processed += 1
                 continue
 
@@ -500,11 +515,9 @@ def main() -> None:
                     "timestamp": datetime.now().isoformat(timespec="seconds"),
                 }
                 f_out.write(json.dumps(result, ensure_ascii=False) + "\n")
-                done.add(node_id)
+                done.append({"node_id": node_id})
                 skipped += 1
-                write_checkpoint(
-                    checkpoint_path, done, {"spent_usd": spent_usd, "processed": processed, "skipped": skipped}
-                )
+                done.update_state(spent_usd=spent_usd, processed=processed, skipped=skipped)
                 continue
 
             try:
@@ -561,38 +574,31 @@ def main() -> None:
 
             status_counts[result.get("qa_status") or "unknown"] += 1
             f_out.write(json.dumps(result, ensure_ascii=False) + "\n")
-            done.add(node_id)
+            done.append({"node_id": node_id})
             processed += 1
 
             # checkpoint every N
             if processed % 5 == 0:
-                write_checkpoint(
-                    checkpoint_path,
-                    done,
-                    {
-                        "spent_usd": spent_usd,
-                        "spent_eur_est": round(spent_usd / EUR_USD_RATE, 4),
-                        "processed": processed,
-                        "skipped": skipped,
-                        "updated_at": datetime.now().isoformat(timespec="seconds"),
-                    },
+                done.update_state(
+                    spent_usd=spent_usd,
+                    spent_eur_est=round(spent_usd / EUR_USD_RATE, 4),
+                    processed=processed,
+                    skipped=skipped,
+                    updated_at=datetime.now().isoformat(timespec="seconds"),
                 )
 
             # small delay to be gentle
             time.sleep(0.2)
 
     # Final checkpoint
-    write_checkpoint(
-        checkpoint_path,
-        done,
-        {
-            "spent_usd": spent_usd,
-            "spent_eur_est": round(spent_usd / EUR_USD_RATE, 4),
-            "processed": processed,
-            "skipped": skipped,
-            "finished_at": datetime.now().isoformat(timespec="seconds"),
-        },
+    done.update_state(
+        spent_usd=spent_usd,
+        spent_eur_est=round(spent_usd / EUR_USD_RATE, 4),
+        processed=processed,
+        skipped=skipped,
+        finished_at=datetime.now().isoformat(timespec="seconds"),
     )
+    done.close()
 
     # Optionally merge updates back into nodes file (write new file)
     updated_nodes_written = False
@@ -24,14 +24,15 @@ MedGemma-Validierung aktiv ist UND keine kritischen lokalen Issues gefunden werd
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
 import os
 import re
 import subprocess
-from collections import Counter
+from collections import Counter, deque
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, Optional
 
 import requests
 
@@ -140,15 +141,25 @@ def priority_rank(category: str) -> int:
 # -----------------------------
 
 
+_LOCAL_PIPELINE = None
+
+
+def _local_pipeline():
+    """EnhancedValidationPipeline einmal pro Lauf aufbauen (Validatoren sind teuer)."""
+    global _LOCAL_PIPELINE
+    if _LOCAL_PIPELINE is None:
+        from core.enhanced_validation_pipeline import EnhancedValidationPipeline  # type: ignore
+
+        _LOCAL_PIPELINE = EnhancedValidationPipeline(strict_mode=False)
+    return _LOCAL_PIPELINE
+
+
 def run_local_validation(query: str, answer: str, question_id: str) -> Dict[str, Any]:
     """
     Nutzt die bereits vorhandene EnhancedValidationPipeline (lokal, keine API).
     """
     try:
-        from core.enhanced_validation_pipeline import EnhancedValidationPipeline  # type: ignore
-
-        pipeline = EnhancedValidationPipeline(strict_mode=False)
-        final_answer, meta = pipeline.validate_answer(answer=answer, query=query, question_id=question_id)
+        final_answer, meta = _local_pipeline().validate_answer(answer=answer, query=query, question_id=question_id)
         return {
             "available": True,
             "final_answer": final_answer,
@@ -161,6 +172,46 @@ def run_local_validation(query: str, answer: str, question_id: str) -> Dict[str,
         }
 
 
+def iter_local_validation_many(cards: Iterable[Dict[str, Any]], workers: Optional[int]) -> Iterator[Dict[str, Any]]:
+    """
+    Lokale Validierung für viele Karten parallel (Prozess-Pool, Ergebnisse in Eingabereihenfolge).
+
+    Lazy: `cards` wird erst gelesen, wenn der Aufrufer Ergebnisse abholt (höchstens
+    2 Chunks pro Worker im Voraus), abgebrochene Läufe validieren also nicht alles vorab.
+    Fällt der Pool aus (z.B. BrokenProcessPool), werden die noch offenen und alle
+    übrigen Karten einzeln per run_local_validation geprüft.
+
+    Args:
+        cards: {"query", "answer", "question_id"} je Karte
+        workers: Prozesse (None = CPU-Anzahl, 1 = seriell)
+    """
+    remaining = iter(cards)
+    pending: deque = deque()  # an den Pool übergeben, noch ohne Ergebnis
+
+    def tracked() -> Iterator[Dict[str, Any]]:
+        for card in remaining:
+            pending.append(card)
+            yield card
+
+    try:
+        for final_answer, meta in _local_pipeline().validate_many(tracked(), workers=workers):
+            pending.popleft()
+            yield {"available": True, "final_answer": final_answer, "meta": meta}
+        return
+    except Exception as e:
+        print(f"⚠️ Parallele lokale Validierung abgebrochen ({e}), prüfe übrige Karten einzeln")
+    for card in itertools.chain(pending, remaining):
+        yield run_local_validation(card["query"], card["answer"], card["question_id"])
+
+
+def _local_request(it: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "question_id": it.get("id") or f"repair_{it.get('original_index', 0):05d}",
+        "query": it.get("original_frage", "") or "",  # minimal; Kontext steht im Prompt
+        "answer": it.get("repaired_answer", "") or it.get("original_antwort", ""),
+    }
+
+
 # -----------------------------
 # MedGemma Endpoint (optional)
 # -----------------------------
@@ -536,6 +587,12 @@ def main() -> None:
     parser.add_argument("--max-items", type=int, default=0, help="0 = alle")
     parser.add_argument("--budget-eur", type=float, default=5.0)
     parser.add_argument("--max-tokens", type=int, default=800)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Prozesse für die lokale Validierung (Default: CPU-Anzahl, 1 = seriell)",
+    )
     args = parser.parse_args()
 
     repo_root = Path(__file__).parent.parent
@@ -622,16 +679,16 @@ def main() -> None:
     medgemma_calls_succeeded = 0
     medgemma_errors = Counter()
 
+    # Lokale Pre-Validierung (reine CPU-Arbeit) parallel, im Gleichschritt mit der Schleife
+    local_vals = iter_local_validation_many((_local_request(it) for it in enriched), workers=args.workers)
+
     for it in enriched:
-        qid = it.get("id") or f"repair_{it.get('original_index', 0):05d}"
+        local_request = _local_request(it)
+        local_val = next(local_vals)
+        qid = local_request["question_id"]
         cat = it.get("_validation_category", "rest")
         cat_counts[cat] += 1
-
-        frage = it.get("original_frage", "") or ""
-        answer = it.get("repaired_answer", "") or it.get("original_antwort", "")
-        query = frage  # minimal; Kontext steht im Prompt
-
-        local_val = run_local_validation(query=query, answer=answer, question_id=qid)
+        query = local_request["query"]
 
         rag_snippets = (
             build_rag_snippets_for_item(repo_root, cat, it)
@@ -750,6 +807,7 @@ def main() -> None:
 
         status_counts[qa_status] += 1
         results.append(qa_update)
+    local_vals.close()  # Prozess-Pool beenden
 
     # Report schreiben
     out_report.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,277 @@
+"""Vectorized SM-2 scheduling and deck-wide review-load simulation."""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from spaced_repetition.algorithm import LearningItem
+
+logger = logging.getLogger(__name__)
+
+MIN_EASINESS = 1.3
+
+# Share of answers per quality 0-5 assumed by the simulator when none is given
+DEFAULT_QUALITY_PROBS = (0.04, 0.04, 0.07, 0.20, 0.40, 0.25)
+
+
+def calculate_next_intervals(
+    quality,
+    easiness_factor,
+    repetitions,
+    current_interval
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    SM-2 for arrays of cards; element-wise identical to ``calculate_next_interval``.
+
+    Args:
+        quality: Quality ratings (0-5), integer array or scalar
+        easiness_factor: Current easiness factors
+        repetitions: Current repetition counts
+        current_interval: Current intervals in days
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (new_intervals, new_repetitions, new_easiness_factors)
+
+    Raises:
+        ValueError: If any quality is not an integer between 0 and 5
+    """
+    quality = np.asarray(quality)
+    if quality.dtype.kind not in "iu" or (quality.size and (quality.min() < 0 or quality.max() > 5)):
+        raise ValueError("Quality rating must be an integer between 0 and 5")
+    quality, easiness_factor, repetitions, current_interval = np.broadcast_arrays(
+        quality,
+        np.asarray(easiness_factor, dtype=np.float64),
+        np.asarray(repetitions, dtype=np.int64),
+        np.asarray(current_interval, dtype=np.int64),
+    )
+
+    passed = quality >= 3
+    # np.rint rounds half to even, like Python's round()
+    grown = np.rint(current_interval * easiness_factor).astype(np.int64)
+    new_interval = np.where(repetitions == 0, 1, np.where(repetitions == 1, 6, grown))
+    new_interval = np.where(passed, new_interval, 1)
+    new_repetitions = np.where(passed, repetitions + 1, 0)
+
+    miss = 5 - quality
+    new_easiness = np.maximum(MIN_EASINESS, easiness_factor + (0.1 - miss * (0.08 + miss * 0.02)))
+    return new_interval, new_repetitions, new_easiness
+
+
+def review_items_batch(items: Sequence[LearningItem], qualities: Iterable[int]) -> List[LearningItem]:
+    """
+    Batch version of ``review_item``: updates all items in one vectorized step.
+
+    Args:
+        items: Learning items to review
+        qualities: One quality rating (0-5) per item
+
+    Returns:
+        List[LearningItem]: The updated items
+    """
+    if not all(isinstance(item, LearningItem) for item in items):
+        raise TypeError("items must be LearningItem instances")
+    qualities = np.asarray(list(qualities))
+    if len(qualities) != len(items):
+        raise ValueError("Need exactly one quality rating per item")
+    if not items:
+        return []
+
+    intervals, reps, easiness = calculate_next_intervals(
+        qualities,
+        [item.easiness_factor for item in items],
+        [item.repetitions for item in items],
+        [item.interval for item in items],
+    )
+    now = datetime.now()
+    for item, interval, rep, ef in zip(items, intervals.tolist(), reps.tolist(), easiness.tolist()):
+        item.easiness_factor = ef
+        item.repetitions = rep
+        item.interval = interval
+        item.last_review = now
+        item.next_review = now + timedelta(days=interval)
+
+    logger.info(f"Batch review: {len(items)} items updated")
+    return list(items)
+
+
+@dataclass
+class SimulationResult:
+    """
+    Projected daily load of a review simulation (index 0 = today).
+
+    Attributes:
+        reviews (np.ndarray): Reviews per day, new-card first reviews included
+        new_cards (np.ndarray): New cards introduced per day
+        lapses (np.ndarray): Reviews per day rated below 3
+        new_cards_left (int): New cards not yet introduced at the end
+    """
+    reviews: np.ndarray
+    new_cards: np.ndarray
+    lapses: np.ndarray
+    new_cards_left: int
+
+    @property
+    def peak(self) -> int:
+        return int(self.reviews.max()) if self.reviews.size else 0
+
+    @property
+    def average(self) -> float:
+        return float(self.reviews.mean()) if self.reviews.size else 0.0
+
+
+def simulate_review_load(
+    due_in_days,
+    easiness_factor,
+    repetitions,
+    interval,
+    days: int,
+    new_cards: int = 0,
+    new_cards_per_day: int = 20,
+    quality_probs: Sequence[float] = DEFAULT_QUALITY_PROBS,
+    seed: Optional[int] = 0
+) -> SimulationResult:
+    """
+    Projects the daily review load of a whole deck over ``days`` days.
+
+    Every day, all cards due that day are reviewed at once: qualities are
+    drawn from ``quality_probs`` and SM-2 is applied via
+    ``calculate_next_intervals``. Up to ``new_cards_per_day`` unseen cards
+    enter the queue each day. The loop runs over days, not over cards.
+
+    Args:
+        due_in_days: Days until each scheduled card is due (<= 0 = due today)
+        easiness_factor: Easiness factor per scheduled card
+        repetitions: Repetition count per scheduled card
+        interval: Current interval per scheduled card
+        days: Number of days to simulate
+        new_cards: Unseen cards waiting to be introduced
+        new_cards_per_day: Daily new-card limit
+        quality_probs: Probability of each quality rating 0-5
+        seed: Random seed (None = non-deterministic)
+
+    Returns:
+        SimulationResult: Daily reviews, introduced new cards and lapses
+    """
+    probs = np.asarray(quality_probs, dtype=np.float64)
+    if probs.shape != (6,) or (probs < 0).any() or not np.isclose(probs.sum(), 1.0):
+        raise ValueError("quality_probs must hold 6 probabilities summing to 1")
+    rng = np.random.default_rng(seed)
+
+    due = np.maximum(np.asarray(due_in_days, dtype=np.int64), 0)
+    n_scheduled = len(due)
+    introduced = min(new_cards, new_cards_per_day * days) if new_cards_per_day > 0 else 0
+
+    # New cards get slots up front and become due on their introduction day
+    due = np.concatenate([due, np.arange(introduced, dtype=np.int64) // max(new_cards_per_day, 1)])
+    ef = np.concatenate([np.asarray(easiness_factor, dtype=np.float64), np.full(introduced, 2.5)])
+    reps = np.concatenate([np.asarray(repetitions, dtype=np.int64), np.zeros(introduced, dtype=np.int64)])
+    ivl = np.concatenate([np.asarray(interval, dtype=np.int64), np.zeros(introduced, dtype=np.int64)])
+
+    reviews = np.zeros(days, dtype=np.int64)
+    lapses = np.zeros(days, dtype=np.int64)
+    new_per_day = np.bincount(due[n_scheduled:], minlength=days)[:days]
+
+    # Cards are bucketed by due day; reviewed cards only move to later days
+    order = np.argsort(due, kind="stable")
+    buckets: Dict[int, List[np.ndarray]] = {}
+    bounds = np.searchsorted(due[order], np.arange(days + 1))
+    for day in range(days):
+        idx = order[bounds[day]:bounds[day + 1]]
+        if day in buckets:
+            idx = np.concatenate([idx] + buckets.pop(day))
+        if not idx.size:
+            continue
+        quality = rng.choice(6, size=idx.size, p=probs)
+        ivl[idx], reps[idx], ef[idx] = calculate_next_intervals(quality, ef[idx], reps[idx], ivl[idx])
+        next_day = day + ivl[idx]
+        reviews[day] = idx.size
+        lapses[day] = int(np.count_nonzero(quality < 3))
+
+        keep = next_day < days
+        if keep.any():
+            idx, next_day = idx[keep], next_day[keep]
+            step = np.argsort(next_day, kind="stable")
+            idx, next_day = idx[step], next_day[step]
+            split = np.flatnonzero(np.diff(next_day)) + 1
+            for group, group_day in zip(np.split(idx, split), next_day[np.r_[0, split]].tolist()):
+                buckets.setdefault(group_day, []).append(group)
+
+    return SimulationResult(
+        reviews=reviews,
+        new_cards=new_per_day,
+        lapses=lapses,
+        new_cards_left=new_cards - introduced,
+    )
+
+
+def compare_new_card_limits(
+    limits: Iterable[int],
+    due_in_days,
+    easiness_factor,
+    repetitions,
+    interval,
+    days: int,
+    new_cards: int = 0,
+    quality_probs: Sequence[float] = DEFAULT_QUALITY_PROBS,
+    seed: Optional[int] = 0
+) -> Dict[int, SimulationResult]:
+    """
+    Runs ``simulate_review_load`` once per daily new-card limit (same seed).
+
+    Returns:
+        Dict[int, SimulationResult]: Simulation result per limit
+    """
+    return {
+        limit: simulate_review_load(
+            due_in_days, easiness_factor, repetitions, interval, days,
+            new_cards=new_cards,
+            new_cards_per_day=limit,
+            quality_probs=quality_probs,
+            seed=seed,
+        )
+        for limit in limits
+    }
+
+
+def simulate_deck(
+    schedule,
+    days: int,
+    new_cards_per_day: int = 20,
+    quality_probs: Sequence[float] = DEFAULT_QUALITY_PROBS,
+    seed: Optional[int] = 0,
+    today: Optional[datetime] = None
+) -> SimulationResult:
+    """
+    Simulates a deck given as columnar schedule (``SpacedRepetitionSystem.schedule``).
+
+    Cards without a review date count as new cards and are introduced under
+    the daily limit; overdue cards are due today.
+
+    Args:
+        schedule: Object with ``due_ts``, ``due_day``, ``easiness_factor``,
+            ``repetitions`` and ``interval`` arrays (core ``ScheduleArrays``)
+        days: Number of days to simulate
+        new_cards_per_day: Daily new-card limit
+        quality_probs: Probability of each quality rating 0-5
+        seed: Random seed
+        today: Reference date (default: now)
+
+    Returns:
+        SimulationResult: Projected daily load
+    """
+    today_ordinal = (today or datetime.now()).date().toordinal()
+    unseen = np.isnan(schedule.due_ts)
+    seen = ~unseen
+    return simulate_review_load(
+        schedule.due_day[seen] - today_ordinal,
+        schedule.easiness_factor[seen],
+        schedule.repetitions[seen],
+        schedule.interval[seen],
+        days,
+        new_cards=int(np.count_nonzero(unseen)),
+        new_cards_per_day=new_cards_per_day,
+        quality_probs=quality_probs,
+        seed=seed,
+    )
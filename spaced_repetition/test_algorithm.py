@@ -11,6 +11,12 @@ from spaced_repetition.algorithm import (
     calculate_next_interval,
     review_item
 )
+from spaced_repetition.simulation import (
+    calculate_next_intervals,
+    review_items_batch,
+    simulate_review_load,
+    compare_new_card_limits
+)
 
 
 class TestLearningItem(unittest.TestCase):
@@ -140,5 +146,78 @@ class TestPerformance(unittest.TestCase):
         self.assertLess(duration, 1.0)  # Should be fast
 
 
+class TestBatchScheduling(unittest.TestCase):
+    """Tests for the vectorized SM-2 engine and the load simulator."""
+
+    def test_parity_with_calculate_next_interval(self):
+        """Vectorized results equal the scalar SM-2 for every input."""
+        grid = [
+            (q, ef, reps, interval)
+            for q in range(6)
+            for ef in (1.3, 1.7, 2.5, 2.6, 2.85)
+            for reps in (0, 1, 2, 5)
+            for interval in (0, 1, 6, 10, 37)
+        ]
+        intervals, reps, efs = calculate_next_intervals(*map(list, zip(*grid)))
+        for i, args in enumerate(grid):
+            self.assertEqual(
+                calculate_next_interval(*args),
+                (int(intervals[i]), int(reps[i]), float(efs[i]))
+            )
+
+    def test_invalid_quality(self):
+        """Out-of-range or non-integer qualities raise ValueError."""
+        with self.assertRaises(ValueError):
+            calculate_next_intervals([6], [2.5], [0], [1])
+        with self.assertRaises(ValueError):
+            calculate_next_intervals([2.5], [2.5], [0], [1])
+
+    def test_review_items_batch_matches_review_item(self):
+        """Batch review leaves items in the same state as single reviews."""
+        batch = [LearningItem(f"b{i}", "content") for i in range(4)]
+        single = [LearningItem(f"s{i}", "content") for i in range(4)]
+        for qualities in ([5, 4, 3, 5], [4, 0, 5, 3], [5, 5, 1, 4]):
+            review_items_batch(batch, qualities)
+            for item, quality in zip(single, qualities):
+                review_item(item, quality)
+        for b, s in zip(batch, single):
+            self.assertEqual(
+                (b.interval, b.repetitions, b.easiness_factor),
+                (s.interval, s.repetitions, s.easiness_factor)
+            )
+
+    def test_simulation_matches_per_card_loop(self):
+        """With a fixed quality the simulator equals a per-card, per-day loop."""
+        due = [0, 0, 1, 3, -2, 8]
+        efs = [2.5, 1.3, 2.0, 2.6, 2.5, 1.8]
+        reps = [0, 1, 2, 3, 4, 2]
+        intervals = [0, 1, 6, 10, 3, 5]
+        days, new_cards, per_day = 40, 5, 2
+        result = simulate_review_load(
+            due, efs, reps, intervals, days,
+            new_cards=new_cards, new_cards_per_day=per_day,
+            quality_probs=(0, 0, 0, 0, 1, 0)
+        )
+
+        cards = [[max(d, 0), ef, r, i] for d, ef, r, i in zip(due, efs, reps, intervals)]
+        cards += [[k // per_day, 2.5, 0, 0] for k in range(new_cards)]
+        expected = [0] * days
+        for day in range(days):
+            for card in cards:
+                if card[0] == day:
+                    card[3], card[2], card[1] = calculate_next_interval(4, card[1], card[2], card[3])
+                    card[0] = day + card[3]
+                    expected[day] += 1
+        self.assertEqual(result.reviews.tolist(), expected)
+        self.assertEqual(int(result.new_cards.sum()), new_cards)
+
+    def test_new_card_limits(self):
+        """Higher new-card limits introduce more cards."""
+        results = compare_new_card_limits([0, 5, 20], [0] * 10, [2.5] * 10, [1] * 10, [1] * 10, 30, new_cards=500)
+        introduced = [int(results[limit].new_cards.sum()) for limit in (0, 5, 20)]
+        self.assertEqual(introduced, [0, 150, 500])
+        self.assertEqual(results[5].new_cards_left, 350)
+
+
 if __name__ == '__main__':
     unittest.main()